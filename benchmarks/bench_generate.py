@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Benchmark harness for schedule generation
+
+Times generate_schedule on synthetic gyms of increasing size, writes the
+results as JSON and optionally fails when a run is slower than a stored
+baseline by more than a threshold.
+
+    python benchmarks/bench_generate.py --output bench.json
+    python benchmarks/bench_generate.py --baseline benchmarks/baseline.json
+    python benchmarks/bench_generate.py --update-baseline benchmarks/baseline.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.instance_generator import generate_instance
+
+# name -> (coaches, slots, class definitions)
+SIZES = {
+    "small": (5, 10, 4),
+    "medium": (25, 50, 12),
+    "large": (100, 200, 40),
+    "xlarge": (300, 600, 100),
+}
+
+def run_case(size_name, repeats, seed, profile=False):
+    coaches, slots, classes = SIZES[size_name]
+    timings = []
+    scheduled = conflicts = 0
+    phases = None
+    for _ in range(repeats):
+        scheduler = generate_instance(coaches, slots, classes, seed=seed)
+        start = time.perf_counter()
+        if profile:
+            schedule, conflict_list, schedule_profile = scheduler.generate_schedule_with_profile()
+            phases = schedule_profile.to_dict()["phases"]
+        else:
+            schedule, conflict_list = scheduler.generate_schedule()
+        timings.append(time.perf_counter() - start)
+        scheduled, conflicts = len(schedule), len(conflict_list)
+    result = {
+        "name": size_name,
+        "size": size_name,
+        "coaches": coaches,
+        "slots": slots,
+        "class_definitions": classes,
+        "repeats": repeats,
+        "min_seconds": min(timings),
+        "median_seconds": statistics.median(timings),
+        "scheduled": scheduled,
+        "conflicts": conflicts,
+    }
+    if phases is not None:
+        result["phases"] = phases
+    return result
+
+def run_benchmarks(sizes, repeats=3, seed=0, profile=False):
+    # generate_schedule does not depend on the schedule mode yet, so each size runs once
+    results = [run_case(size, repeats, seed, profile) for size in sizes]
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "seed": seed,
+        "results": results,
+    }
+
+def compare_to_baseline(report, baseline, threshold):
+    """Return a message for every case slower than baseline * (1 + threshold)"""
+    reference = {r["name"]: r for r in baseline.get("results", [])}
+    regressions = []
+    for result in report["results"]:
+        base = reference.get(result["name"])
+        if base is None:
+            continue
+        limit = base["min_seconds"] * (1 + threshold)
+        if result["min_seconds"] > limit:
+            regressions.append(
+                f"{result['name']}: {result['min_seconds']:.4f}s vs baseline "
+                f"{base['min_seconds']:.4f}s (limit {limit:.4f}s)"
+            )
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark schedule generation")
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=list(SIZES))
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write results JSON to this file")
+    parser.add_argument("--baseline", help="Compare against this baseline JSON")
+    parser.add_argument("--threshold", type=float, default=0.5,
+                        help="Allowed slowdown as a fraction of the baseline (default 0.5 = 50%%)")
+    parser.add_argument("--update-baseline", help="Write results as the new baseline")
+    parser.add_argument("--profile", action="store_true",
+                        help="Record per-phase timings and counters for each case")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.sizes, args.repeats, args.seed, args.profile)
+    for r in report["results"]:
+        print(f"{r['name']:<22} {r['min_seconds'] * 1000:10.2f} ms  "
+              f"scheduled={r['scheduled']} conflicts={r['conflicts']}")
+        for phase in r.get("phases", []):
+            print(f"    {phase['name']:<18} {phase['wall_seconds'] * 1000:9.3f} ms  "
+                  f"checks={phase['eligibility_checks']} placed={phase['placements']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.update_baseline:
+        with open(args.update_baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline written to {args.update_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(report, baseline, args.threshold)
+        if regressions:
+            print("\nPerformance regressions:")
+            for message in regressions:
+                print(f"  {message}")
+            return 1
+        print("\nNo regressions against baseline.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark based on `python -X importtime`
+
+Imports each entry point in a fresh interpreter, parses the importtime
+report and fails when an entry point takes longer than its budget.
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --budget benchmarks/import_budget.json --output startup.json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# name -> module imported at startup
+ENTRY_POINTS = {
+    "gui": "src.gui.main_window",
+    "web": "src.app",
+    "cli": "src.cli",
+}
+
+def parse_importtime(stderr):
+    """Parse `-X importtime` lines into [{module, self_us, cumulative_us, depth}]"""
+    records = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+            self_us, cumulative_us = int(self_us), int(cumulative_us)
+        except ValueError:
+            continue
+        depth = (len(name) - len(name.lstrip(" "))) // 2
+        records.append({"module": name.strip(), "self_us": self_us,
+                        "cumulative_us": cumulative_us, "depth": depth})
+    return records
+
+def measure(module, repeats=3, top=10):
+    """Import a module in fresh interpreters and keep the fastest run"""
+    best = None
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    with tempfile.TemporaryDirectory() as workdir:
+        # The web app opens its SQLite stores on import; keep them out of the repo
+        env.setdefault("BJJ_SESSION_DB", os.path.join(workdir, "sessions.sqlite3"))
+        for _ in range(repeats):
+            start = time.perf_counter()
+            run = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                                 capture_output=True, text=True, cwd=workdir, env=env)
+            wall = time.perf_counter() - start
+            if run.returncode != 0:
+                return {"module": module, "error": run.stderr.strip().splitlines()[-1]}
+            records = parse_importtime(run.stderr)
+            target = next((r for r in records if r["module"] == module and r["depth"] == 0), None)
+            total_ms = (target["cumulative_us"] if target else sum(r["self_us"] for r in records)) / 1000
+            if best is None or total_ms < best["import_ms"]:
+                best = {
+                    "module": module,
+                    "import_ms": total_ms,
+                    "process_ms": wall * 1000,
+                    "module_count": len(records),
+                    "slowest": sorted(records, key=lambda r: r["self_us"], reverse=True)[:top],
+                }
+    return best
+
+def check_budget(report, budget):
+    """Return a message for every entry point over its budget in milliseconds"""
+    failures = []
+    for name, result in report.items():
+        limit = budget.get(name)
+        if limit is None:
+            continue
+        if "error" in result:
+            failures.append(f"{name}: import failed ({result['error']})")
+        elif result["import_ms"] > limit:
+            failures.append(f"{name}: {result['import_ms']:.1f} ms exceeds budget {limit:.1f} ms")
+    return failures
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure startup import time")
+    parser.add_argument("--entry-points", nargs="+", choices=list(ENTRY_POINTS), default=list(ENTRY_POINTS))
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10, help="Slowest modules to list per entry point")
+    parser.add_argument("--budget", default=os.path.join(os.path.dirname(__file__), "import_budget.json"),
+                        help="JSON file mapping entry point to a budget in milliseconds")
+    parser.add_argument("--output", help="Write the report JSON to this file")
+    args = parser.parse_args(argv)
+
+    report = {name: measure(ENTRY_POINTS[name], args.repeats, args.top) for name in args.entry_points}
+    for name, result in report.items():
+        if "error" in result:
+            print(f"{name:<5} {result['module']:<22} failed: {result['error']}")
+            continue
+        print(f"{name:<5} {result['module']:<22} {result['import_ms']:8.1f} ms import "
+              f"{result['process_ms']:8.1f} ms process  {result['module_count']} modules")
+        for record in result["slowest"]:
+            print(f"        {record['module']:<40} {record['self_us'] / 1000:7.2f} ms")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.budget and os.path.exists(args.budget):
+        with open(args.budget) as f:
+            budget = json.load(f)
+        failures = check_budget(report, budget)
+        if failures:
+            print("\nStartup budget exceeded:")
+            for message in failures:
+                print(f"  {message}")
+            return 1
+        print("\nAll entry points within budget.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,11 +6,18 @@ A modular Brazilian Jiu-Jitsu class scheduling application that helps
 gym owners and coaches create balanced weekly schedules.
 """
 
-from src.models.scheduler import BJJScheduler
-from src.gui.main_window import ScheduleCalendarGUI
+import sys
 
 def main():
     """Main entry point for the BJJ Scheduler application"""
+    # With arguments run headless, so servers never need tkinter
+    if len(sys.argv) > 1:
+        from src.cli import main as cli_main
+        sys.exit(cli_main(sys.argv[1:]))
+
+    from src.models.scheduler import BJJScheduler
+    from src.gui.main_window import ScheduleCalendarGUI
+
     print("Starting BJJ Class Scheduler...")
     
     # Create scheduler with empty configuration
@@ -0,0 +1,520 @@
+"""
+Versioned JSON API (/api/v1) for driving the scheduler without HTML forms
+
+State lives in workspaces: a workspace id is an unguessable token and
+holds one gym config plus its latest schedule in the session database,
+so every worker process sees the same data. Async jobs are recorded in
+the same database, so any worker can answer a job poll. Config entities are addressed by
+id: coaches and class definitions by name, time slots as
+"<day>@<HH:MM>-<HH:MM>".
+"""
+
+import json
+import math
+import secrets
+import sqlite3
+import threading
+from datetime import date, time
+from time import perf_counter
+from typing import Callable, Dict, List, Optional
+
+from flask import Blueprint, Response, jsonify, request
+from werkzeug.exceptions import HTTPException
+
+from .models.availability import TIME_BUCKETS
+from .models.calendar_sync import DAY_INDEX
+from .models.enums import ClassType
+from .models.scheduler import BJJScheduler
+from .utils import metrics
+from .utils.feeds import schedule_from_dicts, schedule_to_dicts, schedule_version
+from .utils.jobs import JobRegistry
+from .utils.session_store import SessionStore
+
+SCHEDULE_COLUMNS = ["class", "class_type", "coach", "day", "start", "end", "fixed"]
+MAX_TIME_BUDGET = 30.0
+MAX_ABSENCE_SCENARIOS = 5000
+MAX_ROBUSTNESS_SAMPLES = 200000
+MAX_PARETO_POPULATION = 200
+MAX_PARETO_GENERATIONS = 200
+CLASS_TYPES = [t.value for t in ClassType]
+
+class ApiError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+def slot_id(slot: dict) -> str:
+    """day@HH:MM-HH:MM, with @location appended for slots at a named location"""
+    key = f"{slot['day'].lower()}@{slot['start_time']}-{slot['end_time']}"
+    return f"{key}@{slot['location']}" if slot.get("location") else key
+
+# Entity collections in a config and how each entity is identified
+ENTITY_KEYS = {
+    "coaches": lambda c: c["name"],
+    "class_definitions": lambda c: c["name"],
+    "time_slots": slot_id,
+}
+
+def _whole(value, minimum: int) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool) and value >= minimum
+
+def _clock(value) -> Optional[time]:
+    try:
+        return time.fromisoformat(value) if isinstance(value, str) else None
+    except ValueError:
+        return None
+
+def _names(value, known) -> bool:
+    return isinstance(value, list) and all(isinstance(v, str) and v.lower() in known for v in value)
+
+def entity_problem(collection: str, item) -> Optional[str]:
+    """Why a config entity would fail scheduling, or None; checks types and values from_dict trusts"""
+    if not isinstance(item, dict):
+        return "expected an object"
+    if collection == "coaches":
+        if not _whole(item.get("max_weekly_classes"), 0):
+            return "max_weekly_classes must be a whole number of at least 0"
+        if not _names(item.get("preferred_times"), TIME_BUCKETS):
+            return f"preferred_times must list {', '.join(TIME_BUCKETS)}"
+        if not _names(item.get("available_days", []), DAY_INDEX):
+            return "available_days must list weekday names"
+        if not all(isinstance(item.get(flag, True), bool)
+                   for flag in ("can_teach_gi", "can_teach_nogi", "can_teach_open_mat")):
+            return "can_teach_* must be true or false"
+        if not isinstance(item.get("availability", []), list) or \
+                not all(isinstance(w, str) for w in item.get("availability", [])):
+            return "availability must be a list of windows like \"tuesday 06:00-07:30\""
+    elif collection == "time_slots":
+        if not isinstance(item.get("day"), str) or item["day"].lower() not in DAY_INDEX:
+            return "day must be a weekday name"
+        start, end = _clock(item.get("start_time")), _clock(item.get("end_time"))
+        if start is None or end is None:
+            return "start_time and end_time must be HH:MM"
+        if end <= start:
+            return "end_time must be after start_time"
+        if any(item.get(key) not in (None, *CLASS_TYPES) for key in ("primary_preference", "secondary_preference")):
+            return f"preferences must be {', '.join(CLASS_TYPES)} or null"
+        if not isinstance(item.get("location"), (str, type(None))):
+            return "location must be a string"
+    else:
+        if item.get("class_type") not in CLASS_TYPES:
+            return f"class_type must be {', '.join(CLASS_TYPES)}"
+        if not _whole(item.get("duration_minutes", 60), 1):
+            return "duration_minutes must be a whole number of at least 1"
+        if not _whole(item.get("weekly_count", 0), 0):
+            return "weekly_count must be a whole number of at least 0"
+    if collection != "time_slots" and not isinstance(item.get("name"), str):
+        return "name must be a string"
+    return None
+
+def validate_config(config: dict) -> BJJScheduler:
+    """Build a scheduler from a config, turning bad payloads into a 400"""
+    if not isinstance(config, dict):
+        raise ApiError(400, "Invalid config: expected a JSON object")
+    for collection in ENTITY_KEYS:
+        items = config.get(collection, [])
+        if not isinstance(items, list):
+            raise ApiError(400, f"Invalid config: {collection} must be a list")
+        for i, item in enumerate(items):
+            problem = entity_problem(collection, item)
+            if problem:
+                raise ApiError(400, f"Invalid config: {collection}[{i}]: {problem}")
+    scheduler = BJJScheduler()
+    try:
+        scheduler.from_dict(config)
+    except (KeyError, TypeError, ValueError, AttributeError) as e:
+        raise ApiError(400, f"Invalid config: {type(e).__name__}: {e}")
+    return scheduler
+
+def upsert_config(config: dict, changes: dict) -> Dict[str, Dict[str, int]]:
+    """Apply bulk upserts and deletes to a config in place; returns per-collection counts"""
+    counts = {}
+    deletes = changes.get("delete", {})
+    if not isinstance(deletes, dict) or any(
+            collection not in ENTITY_KEYS or not isinstance(ids, list) or not all(isinstance(i, str) for i in ids)
+            for collection, ids in deletes.items()):
+        raise ApiError(400, f"delete must map {', '.join(ENTITY_KEYS)} to lists of ids")
+    for collection, key in ENTITY_KEYS.items():
+        items = config.setdefault(collection, [])
+        try:
+            positions = {key(item): i for i, item in enumerate(items)}
+            created = updated = 0
+            for item in changes.get(collection, []):
+                item_id = key(item)
+                if item_id in positions:
+                    items[positions[item_id]] = item
+                    updated += 1
+                else:
+                    positions[item_id] = len(items)
+                    items.append(item)
+                    created += 1
+        except (KeyError, TypeError, AttributeError) as e:
+            raise ApiError(400, f"Invalid {collection} entry: {type(e).__name__}: {e}")
+        doomed = set(deletes.get(collection, []))
+        if doomed:
+            config[collection] = [item for item in items if key(item) not in doomed]
+        counts[collection] = {"created": created, "updated": updated,
+                              "deleted": len(items) - len(config[collection])}
+    return counts
+
+def compact_schedule(schedule: List[dict]) -> dict:
+    """Columnar schedule payload: one short row per class"""
+    return {
+        "columns": SCHEDULE_COLUMNS,
+        "rows": [[e["class_name"], e["class_type"], e["coach"], e["day"], e["start_time"], e["end_time"],
+                  e["is_fixed"]] for e in schedule],
+    }
+
+_WORKSPACE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS api_workspaces (
+    id TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (id, key)
+);
+"""
+
+class WorkspaceStore:
+    """Workspace documents in their own table of the session database.
+
+    Workspaces never expire and are not evicted with browser sessions; they
+    live until deleted. Each top-level field is a row, so an update writes
+    only the fields it changes.
+    """
+
+    def __init__(self, store: SessionStore):
+        self.store = store
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(_WORKSPACE_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.store.path, timeout=30, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def create(self, config: dict) -> str:
+        workspace_id = secrets.token_urlsafe(16)
+        self._connect().execute("INSERT INTO api_workspaces (id, key, value) VALUES (?, 'config', ?)",
+                                (workspace_id, json.dumps(config)))
+        return workspace_id
+
+    def _read(self, conn, workspace_id: str) -> Optional[dict]:
+        rows = conn.execute("SELECT key, value FROM api_workspaces WHERE id = ?", (workspace_id,)).fetchall()
+        return {key: json.loads(value) for key, value in rows} if rows else None
+
+    def load(self, workspace_id: str) -> dict:
+        conn = self._connect()
+        document = self._read(conn, workspace_id)
+        if document is None:
+            raise ApiError(404, "Unknown workspace")
+        return document
+
+    def update(self, workspace_id: str, change: Optional[Callable[[dict], dict]] = None, **fields) -> dict:
+        """Write fields of a workspace; the write lock makes the read-modify-write atomic across workers.
+
+        `change` is called with the current document inside the lock and
+        returns more fields to write, so edits derived from the stored
+        config cannot overwrite a concurrent edit.
+        """
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            document = self._read(conn, workspace_id)
+            if document is None:
+                raise ApiError(404, "Unknown workspace")
+            if change is not None:
+                fields.update(change(document))
+            conn.executemany("INSERT OR REPLACE INTO api_workspaces (id, key, value) VALUES (?, ?, ?)",
+                             [(workspace_id, key, json.dumps(value)) for key, value in fields.items()])
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        document.update(fields)
+        return document
+
+    def delete(self, workspace_id: str):
+        self._connect().execute("DELETE FROM api_workspaces WHERE id = ?", (workspace_id,))
+
+def run_generation(workspaces: WorkspaceStore, workspace_id: str, config: dict, options: dict) -> dict:
+    """Generate a schedule for a workspace config and store it as the workspace's schedule"""
+    from .models.solvers import solve
+
+    scheduler = validate_config(config)
+    manual = resolve_manual(scheduler, options.get("manual", []))
+    started = perf_counter()
+    try:
+        result = solve(scheduler, manual, seed=options.get("seed"), time_budget=options.get("time_budget"),
+                       max_iterations=options.get("iterations"),
+                       warm_start=schedule_from_dicts(options.get("warm_start") or []),
+                       stability_weight=options.get("stability_weight"),
+                       by_location=options.get("by_location", False))
+    except Exception:
+        metrics.GENERATE_OUTCOMES.inc(outcome="error")
+        raise
+    finally:
+        metrics.GENERATE_DURATION.observe(perf_counter() - started)
+    metrics.GENERATE_OUTCOMES.inc(outcome="conflicts" if result.conflicts else "ok")
+    schedule = schedule_to_dicts(result.schedule)
+    workspaces.update(workspace_id, schedule=schedule, conflicts=result.conflicts)
+    response = {
+        "version": schedule_version(schedule),
+        "seconds": round(result.elapsed_seconds, 6),
+        "iterations": result.iterations,
+        "scheduled": len(schedule),
+        "score": result.score,
+        "bounds": result.bounds.to_dict(),
+        "conflicts": result.conflicts,
+        "schedule": compact_schedule(schedule),
+    }
+    if result.locations is not None:
+        response["locations"] = [location.to_dict() for location in result.locations]
+    return response
+
+def run_pareto(workspaces: WorkspaceStore, workspace_id: str, config: dict, options: dict) -> dict:
+    """Explore a workspace's trade-offs and keep the front for POST .../pareto/<choice>"""
+    from .models.pareto import explore_pareto
+
+    scheduler = validate_config(config)
+    manual = resolve_manual(scheduler, options.get("manual", []))
+    front = explore_pareto(scheduler, manual, population=options["population"],
+                           generations=options["generations"], seed=options.get("seed"), size=options["size"])
+    schedules = [schedule_to_dicts(solution.schedule) for solution in front.solutions]
+    workspaces.update(workspace_id, pareto=[{"schedule": schedule, "conflicts": solution.conflicts}
+                                            for schedule, solution in zip(schedules, front.solutions)])
+    result = front.to_dict()
+    for entry, schedule in zip(result["solutions"], schedules):
+        entry.update(version=schedule_version(schedule), schedule=compact_schedule(schedule))
+    return result
+
+def resolve_manual(scheduler: BJJScheduler, manual: List[dict]) -> List[dict]:
+    """Turn {class, coach, slot} id triples into manual assignments"""
+    classes = {cd.name: cd for cd in scheduler.class_definitions}
+    coaches = {c.name: c for c in scheduler.coaches}
+    slots = {slot_id({"day": ts.day, "start_time": ts.start_time.strftime("%H:%M"),
+                      "end_time": ts.end_time.strftime("%H:%M"), "location": ts.location}): ts
+             for ts in scheduler.time_slots}
+    assignments = []
+    for entry in manual:
+        try:
+            assignments.append({"class_def": classes[entry["class"]], "coach": coaches[entry["coach"]],
+                                "time_slot": slots[entry["slot"]]})
+        except (KeyError, TypeError) as e:
+            raise ApiError(400, f"Unknown manual assignment reference: {e}")
+    return assignments
+
+def parse_generate_options(body: dict) -> dict:
+    try:
+        time_budget = body.get("time_budget")
+        if time_budget is not None:
+            time_budget = min(float(time_budget), MAX_TIME_BUDGET)
+        iterations = body.get("iterations")
+        seed = body.get("seed")
+        stability_weight = body.get("stability_weight")
+        return {
+            "seed": int(seed) if seed is not None else None,
+            "time_budget": time_budget,
+            "iterations": int(iterations) if iterations is not None else None,
+            "manual": body.get("manual", []),
+            "stability_weight": float(stability_weight) if stability_weight is not None else None,
+            "by_location": bool(body.get("by_location", False)),
+        }
+    except (TypeError, ValueError) as e:
+        raise ApiError(400, f"Invalid generate options: {e}")
+
+def create_api(store: SessionStore, jobs: Optional[JobRegistry] = None) -> Blueprint:
+    """Build the /api/v1 blueprint around a session store"""
+    api = Blueprint("api_v1", __name__)
+    workspaces = WorkspaceStore(store)
+    jobs = jobs or JobRegistry(store.path)
+
+    def json_body() -> dict:
+        body = request.get_json(silent=True)
+        if not isinstance(body, dict):
+            raise ApiError(400, "Expected a JSON object body")
+        return body
+
+    @api.errorhandler(ApiError)
+    def handle_api_error(error):
+        return jsonify({"error": error.message}), error.status
+
+    @api.errorhandler(HTTPException)
+    def handle_http_error(error):
+        return jsonify({"error": error.description}), error.code
+
+    @api.route("/workspaces", methods=["POST"])
+    def create_workspace():
+        body = request.get_json(silent=True) or {}
+        config = body.get("config", {})
+        validate_config(config)
+        workspace_id = workspaces.create(config)
+        return jsonify({"id": workspace_id}), 201
+
+    @api.route("/workspaces/<workspace_id>", methods=["DELETE"])
+    def delete_workspace(workspace_id):
+        workspaces.delete(workspace_id)
+        return "", 204
+
+    @api.route("/workspaces/<workspace_id>/config", methods=["GET"])
+    def get_config(workspace_id):
+        return jsonify(workspaces.load(workspace_id)["config"])
+
+    @api.route("/workspaces/<workspace_id>/config", methods=["PUT"])
+    def replace_config(workspace_id):
+        config = json_body()
+        validate_config(config)
+        workspaces.update(workspace_id, config=config)
+        return jsonify({"ok": True})
+
+    @api.route("/workspaces/<workspace_id>/config", methods=["PATCH"])
+    def upsert_workspace_config(workspace_id):
+        changes = json_body()
+        counts = {}
+
+        def apply(document: dict) -> dict:
+            config = document["config"]
+            counts.update(upsert_config(config, changes))
+            validate_config(config)
+            return {"config": config}
+
+        workspaces.update(workspace_id, apply)
+        return jsonify(counts)
+
+    @api.route("/workspaces/<workspace_id>/generate", methods=["POST"])
+    def generate(workspace_id):
+        body = request.get_json(silent=True) or {}
+        options = parse_generate_options(body)
+        document = workspaces.load(workspace_id)
+        config = document["config"]
+        if body.get("warm_start"):
+            # Keep the workspace's current schedule where it still fits
+            options["warm_start"] = document.get("schedule")
+        if body.get("async"):
+            job_id = jobs.submit(run_generation, workspaces, workspace_id, config, options)
+            return jsonify({"job": job_id, "status": "queued"}), 202
+        return jsonify(run_generation(workspaces, workspace_id, config, options))
+
+    @api.route("/workspaces/<workspace_id>/absences", methods=["POST"])
+    def absences(workspace_id):
+        from .models.absence import analyze_absences
+
+        body = request.get_json(silent=True) or {}
+        scheduler = validate_config(workspaces.load(workspace_id)["config"])
+        groups = body.get("groups")
+        try:
+            size = int(body.get("size", 1))
+            limit = int(body["limit"]) if body.get("limit") is not None else None
+        except (TypeError, ValueError) as e:
+            raise ApiError(400, f"Invalid absence options: {e}")
+        scenarios = len(groups) if isinstance(groups, list) else math.comb(len(scheduler.coaches), max(size, 0))
+        if size < 1 or scenarios > MAX_ABSENCE_SCENARIOS:
+            raise ApiError(400, f"Absence analysis is limited to {MAX_ABSENCE_SCENARIOS} scenarios")
+        try:
+            report = analyze_absences(scheduler, size=size, groups=groups)
+        except (TypeError, ValueError) as e:
+            raise ApiError(400, str(e))
+        return jsonify(report.to_dict(limit=limit))
+
+    @api.route("/workspaces/<workspace_id>/robustness", methods=["POST"])
+    def robustness(workspace_id):
+        from .models.robustness import DEFAULT_ABSENCE_PROBABILITY, simulate_robustness
+
+        body = request.get_json(silent=True) or {}
+        document = workspaces.load(workspace_id)
+        if "schedule" not in document:
+            raise ApiError(404, "No schedule generated yet")
+        scheduler = validate_config(document["config"])
+        try:
+            samples = int(body.get("samples", 10000))
+            default = float(body.get("default_probability", DEFAULT_ABSENCE_PROBABILITY))
+            seed = int(body["seed"]) if body.get("seed") is not None else None
+            limit = int(body["limit"]) if body.get("limit") is not None else None
+        except (TypeError, ValueError) as e:
+            raise ApiError(400, f"Invalid robustness options: {e}")
+        if not 1 <= samples <= MAX_ROBUSTNESS_SAMPLES:
+            raise ApiError(400, f"Robustness simulation takes 1 to {MAX_ROBUSTNESS_SAMPLES} samples")
+        try:
+            report = simulate_robustness(scheduler, schedule_from_dicts(document["schedule"]),
+                                         body.get("probabilities"), default, samples=samples, seed=seed)
+        except (TypeError, ValueError) as e:
+            raise ApiError(400, str(e))
+        return jsonify(report.to_dict(limit=limit))
+
+    @api.route("/workspaces/<workspace_id>/pareto", methods=["POST"])
+    def pareto(workspace_id):
+        body = request.get_json(silent=True) or {}
+        config = workspaces.load(workspace_id)["config"]
+        try:
+            options = {
+                "population": int(body.get("population", 40)),
+                "generations": int(body.get("generations", 40)),
+                "size": int(body.get("size", 10)),
+                "seed": int(body["seed"]) if body.get("seed") is not None else None,
+                "manual": body.get("manual", []),
+            }
+        except (TypeError, ValueError) as e:
+            raise ApiError(400, f"Invalid trade-off options: {e}")
+        if not (2 <= options["population"] <= MAX_PARETO_POPULATION
+                and 0 <= options["generations"] <= MAX_PARETO_GENERATIONS and options["size"] >= 1):
+            raise ApiError(400, f"Trade-off search takes a population of 2 to {MAX_PARETO_POPULATION}, "
+                                f"up to {MAX_PARETO_GENERATIONS} generations and a size of at least 1")
+        if body.get("async"):
+            job_id = jobs.submit(run_pareto, workspaces, workspace_id, config, options)
+            return jsonify({"job": job_id, "status": "queued"}), 202
+        return jsonify(run_pareto(workspaces, workspace_id, config, options))
+
+    @api.route("/workspaces/<workspace_id>/pareto/<int:choice>", methods=["POST"])
+    def choose_pareto(workspace_id, choice):
+        front = workspaces.load(workspace_id).get("pareto", [])
+        if choice >= len(front):
+            raise ApiError(404, "Unknown trade-off schedule")
+        schedule, conflicts = front[choice]["schedule"], front[choice]["conflicts"]
+        workspaces.update(workspace_id, schedule=schedule, conflicts=conflicts)
+        return jsonify({"version": schedule_version(schedule), "conflicts": conflicts,
+                        "schedule": compact_schedule(schedule)})
+
+    @api.route("/jobs/<job_id>", methods=["GET"])
+    def get_job(job_id):
+        job = jobs.get(job_id)
+        if job is None:
+            raise ApiError(404, "Unknown job")
+        return jsonify(job)
+
+    @api.route("/workspaces/<workspace_id>/schedule", methods=["GET"])
+    def get_schedule(workspace_id):
+        document = workspaces.load(workspace_id)
+        if "schedule" not in document:
+            raise ApiError(404, "No schedule generated yet")
+        schedule = document["schedule"]
+        return jsonify({"version": schedule_version(schedule), "conflicts": document.get("conflicts", []),
+                        "schedule": compact_schedule(schedule)})
+
+    @api.route("/workspaces/<workspace_id>/export/<fmt>", methods=["GET"])
+    def export(workspace_id, fmt):
+        from .utils.export import export_to_csv_string
+
+        document = workspaces.load(workspace_id)
+        if "schedule" not in document:
+            raise ApiError(404, "No schedule generated yet")
+        try:
+            start_date = date.fromisoformat(request.args["start_date"]) if "start_date" in request.args else None
+            weeks = int(request.args.get("weeks", 4))
+        except ValueError as e:
+            raise ApiError(400, str(e))
+        schedule = schedule_from_dicts(document["schedule"])
+        if fmt == "ics":
+            body, mimetype = BJJScheduler().export_to_icalendar(schedule, start_date, weeks), "text/calendar"
+        elif fmt == "csv":
+            body, mimetype = export_to_csv_string(schedule, start_date, weeks), "text/csv"
+        else:
+            raise ApiError(404, f"Unknown export format: {fmt}")
+        data = body.encode("utf-8")
+        metrics.EXPORTS.inc(format=f"api_{fmt}")
+        metrics.EXPORT_BYTES.inc(len(data), format=f"api_{fmt}")
+        return Response(data, mimetype=mimetype)
+
+    return api
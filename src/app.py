@@ -1,31 +1,178 @@
-from flask import Flask, render_template, request, redirect, url_for, session, send_file, flash, abort
-from flask_session import Session
+from flask import Flask, render_template, request, redirect, url_for, session, send_file, flash, abort, g, Response, jsonify, get_flashed_messages
 import os
 import json
+import threading
+from collections import OrderedDict
+from time import perf_counter
 from src.models.scheduler import BJJScheduler
+from src.models.changes import COLLECTIONS
+from src.models.history import ConfigHistory
+from src.utils import metrics
+from src.utils.session_store import SessionStore, StoreSessionInterface
+from src.utils.feeds import FeedRegistry, schedule_from_dicts, schedule_to_dicts, schedule_version
+from src.utils.schedule_history import ScheduleHistory
+from src.utils.jobs import JobRegistry
+from src.api import create_api
 
 import io
 from datetime import date
 
-# Helper to get or create scheduler from session
+# The gym config lives in the session as one key per entity plus an index of
+# entity ids, so an edit rewrites only the entities it touched
+CONFIG_INDEX_KEY = 'cfg:index'
+CONSTRAINTS_KEY = 'cfg:constraints'
+TRAVEL_KEY = 'cfg:travel'
+# Bumped by every config save, so per-config caches can tell a stale entry
+CONFIG_REVISION_KEY = 'config_revision'
+HISTORY_LIMIT = int(os.environ.get('BJJ_UNDO_LIMIT', 50))
+
+def config_key(collection, entity_id):
+    return f'cfg:{collection}:{entity_id}'
 
 def get_scheduler():
-    if 'scheduler_data' in session:
-        scheduler = BJJScheduler()
-        scheduler.from_dict(session['scheduler_data'])
-        return scheduler
-    else:
-        scheduler = BJJScheduler()
-        session['scheduler_data'] = scheduler.to_dict()
+    scheduler = BJJScheduler()
+    index = session.get(CONFIG_INDEX_KEY)
+    if index is None:
+        save_scheduler(scheduler, label='initial config')
         return scheduler
+    for collection in COLLECTIONS:
+        setattr(scheduler, collection, [
+            scheduler.entity_from_dict(collection, session[config_key(collection, entity_id)])
+            for entity_id in index['ids'][collection]
+        ])
+    scheduler.changes.restore(scheduler, index['ids'], index['next_id'])
+    scheduler.constraints.configure(session.get(CONSTRAINTS_KEY, {}))
+    scheduler.travel_times_from_list(session.get(TRAVEL_KEY, []))
+    return scheduler
+
+def save_scheduler(scheduler, label=None, record=True):
+    """Persist only the entities changed since the scheduler was loaded.
+
+    With record=True the new config also becomes an undo step, labelled by
+    `label` or by the form action that made the edit.
+    """
+    settings_changed = False
+    constraints = scheduler.constraints.to_dict()
+    if constraints != session.get(CONSTRAINTS_KEY, {}):
+        session[CONSTRAINTS_KEY] = constraints
+        settings_changed = True
+    travel = scheduler.travel_times_to_list()
+    if travel != session.get(TRAVEL_KEY, []):
+        session[TRAVEL_KEY] = travel
+        settings_changed = True
+    changes = scheduler.changes.pending(scheduler)
+    if changes.is_empty and not settings_changed:
+        return
+    if record:
+        # The current revision holds the config as last saved, so entities
+        # untouched since then are copied from it rather than serialized
+        saved = session.get(CONFIG_INDEX_KEY)
+        record_history(scheduler, label or edit_label(),
+                       scheduler.changes.unchanged_since(saved['ids']) if saved else None)
+    if changes.full:
+        for key in [k for k in session if k.startswith('cfg:') and k not in (CONSTRAINTS_KEY, TRAVEL_KEY)]:
+            del session[key]
+    for collection, entity_ids in changes.deletes.items():
+        for entity_id in entity_ids:
+            if config_key(collection, entity_id) in session:
+                del session[config_key(collection, entity_id)]
+    for collection, positions in changes.upserts.items():
+        entities = getattr(scheduler, collection)
+        for entity_id, position in positions.items():
+            session[config_key(collection, entity_id)] = scheduler.entity_to_dict(collection, entities[position])
+    if changes.order_changed:
+        session[CONFIG_INDEX_KEY] = {'ids': scheduler.changes.ids, 'next_id': scheduler.changes.next_id}
+    session[CONFIG_REVISION_KEY] = session.get(CONFIG_REVISION_KEY, 0) + 1
+    forget_substitute_indexes(session.sid)
+    # Trade-offs explored for the old config no longer apply
+    session.pop('pareto_front', None)
+    session.pop('pareto_job', None)
+    scheduler.changes.mark_clean()
+
+# Undo history: a small index of revisions plus content-addressed chunks of
+# entities, which consecutive revisions share
+HISTORY_INDEX_KEY = 'hist:index'
+HISTORY_CHUNK_PREFIX = 'hist:chunk:'
+
+def load_history():
+    index = session.get(HISTORY_INDEX_KEY)
+    if index is None:
+        return ConfigHistory(limit=HISTORY_LIMIT)
+    chunks = {key[len(HISTORY_CHUNK_PREFIX):]: session[key]
+              for key in session if key.startswith(HISTORY_CHUNK_PREFIX)}
+    return ConfigHistory.from_state(index, chunks)
+
+def save_history(history):
+    index, chunks = history.to_state()
+    for digest, chunk in chunks.items():
+        if HISTORY_CHUNK_PREFIX + digest not in session:
+            session[HISTORY_CHUNK_PREFIX + digest] = chunk
+    for key in [k for k in session if k.startswith(HISTORY_CHUNK_PREFIX)]:
+        if key[len(HISTORY_CHUNK_PREFIX):] not in chunks:
+            del session[key]
+    session[HISTORY_INDEX_KEY] = index
 
-def save_scheduler(scheduler):
-    session['scheduler_data'] = scheduler.to_dict()
+def record_history(scheduler, label, unchanged=None):
+    history = load_history()
+    if history.record(scheduler, label, unchanged):
+        save_history(history)
+
+def edit_label():
+    """Name of the config edit made by the current request, for undo messages"""
+    action = next((key for key in request.form if key in EDIT_ACTIONS), request.endpoint or 'edit')
+    return action.replace('_', ' ')
 
 app = Flask(__name__)
 app.secret_key = os.environ.get('BJJ_SECRET_KEY', 'dev-secret-key')
-app.config['SESSION_TYPE'] = 'filesystem'
-Session(app)
+# Server-side sessions: SQLite store with TTL expiry, a total size cap and
+# deduplication of identical values (e.g. the same gym config in many sessions)
+session_store = SessionStore(
+    os.environ.get('BJJ_SESSION_DB', 'bjj_sessions.sqlite3'),
+    ttl_seconds=float(os.environ.get('BJJ_SESSION_TTL', 7 * 24 * 3600)),
+    max_bytes=int(os.environ.get('BJJ_SESSION_MAX_BYTES', 64 * 1024 * 1024)),
+)
+app.session_interface = StoreSessionInterface(session_store)
+session_store.start_compactor(float(os.environ.get('BJJ_SESSION_COMPACT_INTERVAL', 300)))
+
+# Published schedules for subscribable iCal feeds (shared by all workers)
+feed_registry = FeedRegistry(os.environ.get('BJJ_FEED_DB', session_store.path))
+# Every published schedule, kept for audit and rollback
+schedule_history = ScheduleHistory(feed_registry.path)
+
+# Background jobs of the web app and the API, recorded in the session database
+jobs = JobRegistry(session_store.path)
+
+# Versioned JSON API; its workspaces live in the session database
+app.register_blueprint(create_api(session_store, jobs), url_prefix='/api/v1')
+
+def get_feed_token():
+    if 'feed_token' not in session:
+        import secrets
+        session['feed_token'] = secrets.token_urlsafe(16)
+    return session['feed_token']
+
+@app.before_request
+def start_request_timer():
+    g.request_start = perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    start = g.pop('request_start', None)
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    if start is not None:
+        metrics.REQUEST_LATENCY.observe(perf_counter() - start, route=route, method=request.method)
+    metrics.REQUESTS.inc(route=route, method=request.method, status=response.status_code)
+    return response
+
+def send_export(data, fmt, **kwargs):
+    """send_file for export downloads, counting exported bytes per format"""
+    metrics.EXPORTS.inc(format=fmt)
+    metrics.EXPORT_BYTES.inc(len(data), format=fmt)
+    return send_file(io.BytesIO(data), **kwargs)
+
+@app.route('/metrics')
+def metrics_endpoint():
+    return Response(metrics.REGISTRY.render(), mimetype='text/plain; version=0.0.4')
 
 # Remove or comment out the old index route
 # @app.route('/')
@@ -47,8 +194,8 @@ def download_settings():
     # Add manual assignments from session
     data['manual_assignments'] = session.get('manual_assignments', [])
     json_bytes = json.dumps(data, indent=2).encode('utf-8')
-    return send_file(
-        io.BytesIO(json_bytes),
+    return send_export(
+        json_bytes, 'settings',
         mimetype='application/json',
         as_attachment=True,
         download_name='bjj_scheduler_settings.json'
@@ -78,6 +225,11 @@ def upload_settings():
         flash(f'Failed to upload settings: {e}')
     return redirect(url_for('settings'))
 
+def form_availability(field):
+    """Availability windows typed one per line; raises ValueError naming a malformed one"""
+    from src.models.availability import validate_windows
+    return validate_windows(request.form.get(field, '').splitlines())
+
 @app.route('/coaches')
 def coaches():
     scheduler = get_scheduler()
@@ -94,6 +246,11 @@ def add_coach():
         can_teach_gi = 'can_teach_gi' in request.form
         can_teach_nogi = 'can_teach_nogi' in request.form
         can_teach_open_mat = 'can_teach_open_mat' in request.form
+        try:
+            availability = form_availability('availability')
+        except ValueError as e:
+            flash(str(e))
+            return render_template('coach_form.html', action='Add', coach=None)
         from src.models.data_classes import Coach
         coach = Coach(
             name=name,
@@ -102,7 +259,8 @@ def add_coach():
             available_days=available_days,
             can_teach_gi=can_teach_gi,
             can_teach_nogi=can_teach_nogi,
-            can_teach_open_mat=can_teach_open_mat
+            can_teach_open_mat=can_teach_open_mat,
+            availability=availability
         )
         scheduler.add_coach(coach)
         save_scheduler(scheduler)
@@ -117,6 +275,11 @@ def edit_coach(index):
         abort(404)
     coach = scheduler.coaches[index]
     if request.method == 'POST':
+        try:
+            coach.availability = form_availability('availability')
+        except ValueError as e:
+            flash(str(e))
+            return render_template('coach_form.html', action='Edit', coach=coach, index=index)
         coach.name = request.form['name'].strip()
         coach.max_weekly_classes = int(request.form['max_weekly_classes'])
         coach.preferred_times = request.form.getlist('preferred_times')
@@ -124,6 +287,7 @@ def edit_coach(index):
         coach.can_teach_gi = 'can_teach_gi' in request.form
         coach.can_teach_nogi = 'can_teach_nogi' in request.form
         coach.can_teach_open_mat = 'can_teach_open_mat' in request.form
+        scheduler.update_coach(index, coach)
         save_scheduler(scheduler)
         flash('Coach updated!')
         return redirect(url_for('coaches'))
@@ -134,7 +298,7 @@ def delete_coach(index):
     scheduler = get_scheduler()
     if index < 0 or index >= len(scheduler.coaches):
         abort(404)
-    del scheduler.coaches[index]
+    scheduler.remove_coach(index)
     save_scheduler(scheduler)
     flash('Coach deleted!')
     return redirect(url_for('coaches'))
@@ -167,7 +331,8 @@ def add_time_slot():
             start_time=time(start_hour, start_minute),
             end_time=time(end_hour, end_minute),
             primary_preference=primary_preference,
-            secondary_preference=secondary_preference
+            secondary_preference=secondary_preference,
+            location=request.form.get('location', '').strip() or None
         )
         scheduler.add_time_slot(time_slot)
         save_scheduler(scheduler)
@@ -202,9 +367,10 @@ def edit_time_slot(index):
             start_time=time(start_hour, start_minute),
             end_time=time(end_hour, end_minute),
             primary_preference=primary_preference,
-            secondary_preference=secondary_preference
+            secondary_preference=secondary_preference,
+            location=request.form.get('location', time_slot.location or '').strip() or None
         )
-        scheduler.time_slots[index] = new_time_slot
+        scheduler.update_time_slot(index, new_time_slot)
         save_scheduler(scheduler)
         flash('Time slot updated!')
         return redirect(url_for('time_slots'))
@@ -215,7 +381,7 @@ def delete_time_slot(index):
     scheduler = get_scheduler()
     if index < 0 or index >= len(scheduler.time_slots):
         abort(404)
-    del scheduler.time_slots[index]
+    scheduler.remove_time_slot(index)
     save_scheduler(scheduler)
     flash('Time slot deleted!')
     return redirect(url_for('time_slots'))
@@ -263,7 +429,7 @@ def edit_class_type(index):
             duration_minutes=int(request.form['duration_minutes']),
             weekly_count=int(request.form['weekly_count'])
         )
-        scheduler.class_definitions[index] = new_class_def
+        scheduler.update_class_definition(index, new_class_def)
         save_scheduler(scheduler)
         flash('Class type updated!')
         return redirect(url_for('class_types'))
@@ -274,7 +440,7 @@ def delete_class_type(index):
     scheduler = get_scheduler()
     if index < 0 or index >= len(scheduler.class_definitions):
         abort(404)
-    del scheduler.class_definitions[index]
+    scheduler.remove_class_definition_at(index)
     save_scheduler(scheduler)
     flash('Class type deleted!')
     return redirect(url_for('class_types'))
@@ -287,7 +453,6 @@ def unified_scheduler():
     # Prepare data for manual assignment form
     class_options = [cd for cd in scheduler.class_definitions if cd.weekly_count > 0]
     coach_options = scheduler.coaches
-    slot_options = scheduler.time_slots
     schedule = session.get('last_schedule')
     conflicts = session.get('last_conflicts', [])
     coach_edit_idx = None
@@ -309,33 +474,46 @@ def unified_scheduler():
             can_teach_gi = 'coach_can_teach_gi' in request.form
             can_teach_nogi = 'coach_can_teach_nogi' in request.form
             can_teach_open_mat = 'coach_can_teach_open_mat' in request.form
-            coach = Coach(
-                name=name,
-                max_weekly_classes=max_weekly_classes,
-                preferred_times=preferred_times,
-                available_days=available_days,
-                can_teach_gi=can_teach_gi,
-                can_teach_nogi=can_teach_nogi,
-                can_teach_open_mat=can_teach_open_mat
-            )
-            scheduler.add_coach(coach)
-            save_scheduler(scheduler)
-            flash('Coach added!')
+            try:
+                availability = form_availability('coach_availability')
+            except ValueError as e:
+                flash(str(e))
+            else:
+                coach = Coach(
+                    name=name,
+                    max_weekly_classes=max_weekly_classes,
+                    preferred_times=preferred_times,
+                    available_days=available_days,
+                    can_teach_gi=can_teach_gi,
+                    can_teach_nogi=can_teach_nogi,
+                    can_teach_open_mat=can_teach_open_mat,
+                    availability=availability
+                )
+                scheduler.add_coach(coach)
+                save_scheduler(scheduler)
+                flash('Coach added!')
         elif 'edit_coach' in request.form:
             idx = int(request.form['coach_edit_idx'])
             coach = scheduler.coaches[idx]
-            coach.name = request.form['coach_name'].strip()
-            coach.max_weekly_classes = int(request.form['coach_max_weekly_classes'])
-            coach.preferred_times = request.form.getlist('coach_preferred_times')
-            coach.available_days = request.form.getlist('coach_available_days')
-            coach.can_teach_gi = 'coach_can_teach_gi' in request.form
-            coach.can_teach_nogi = 'coach_can_teach_nogi' in request.form
-            coach.can_teach_open_mat = 'coach_can_teach_open_mat' in request.form
-            save_scheduler(scheduler)
-            flash('Coach updated!')
+            try:
+                availability = form_availability('coach_availability')
+            except ValueError as e:
+                flash(str(e))
+            else:
+                coach.name = request.form['coach_name'].strip()
+                coach.max_weekly_classes = int(request.form['coach_max_weekly_classes'])
+                coach.preferred_times = request.form.getlist('coach_preferred_times')
+                coach.available_days = request.form.getlist('coach_available_days')
+                coach.can_teach_gi = 'coach_can_teach_gi' in request.form
+                coach.can_teach_nogi = 'coach_can_teach_nogi' in request.form
+                coach.can_teach_open_mat = 'coach_can_teach_open_mat' in request.form
+                coach.availability = availability
+                scheduler.update_coach(idx, coach)
+                save_scheduler(scheduler)
+                flash('Coach updated!')
         elif 'delete_coach' in request.form:
             idx = int(request.form['coach_delete_idx'])
-            del scheduler.coaches[idx]
+            scheduler.remove_coach(idx)
             save_scheduler(scheduler)
             flash('Coach deleted!')
         elif 'start_edit_coach' in request.form:
@@ -359,9 +537,10 @@ def unified_scheduler():
                 start_time=time(start_hour, start_minute),
                 end_time=time(end_hour, end_minute),
                 primary_preference=primary_preference,
-                secondary_preference=secondary_preference
+                secondary_preference=secondary_preference,
+                location=request.form.get('slot_location', '').strip() or None
             )
-            scheduler.time_slots.append(slot)
+            scheduler.add_time_slot(slot)
             save_scheduler(scheduler)
             flash('Time slot added!')
         elif 'edit_slot' in request.form:
@@ -377,19 +556,22 @@ def unified_scheduler():
             secondary_preference = request.form.get('slot_secondary_preference')
             if primary_preference == 'none': primary_preference = None
             if secondary_preference == 'none': secondary_preference = None
+            # Forms without a location field keep the slot's location
+            location = request.form.get('slot_location', scheduler.time_slots[idx].location or '')
             slot = TimeSlot(
                 day=day,
                 start_time=time(start_hour, start_minute),
                 end_time=time(end_hour, end_minute),
                 primary_preference=primary_preference,
-                secondary_preference=secondary_preference
+                secondary_preference=secondary_preference,
+                location=location.strip() or None
             )
-            scheduler.time_slots[idx] = slot
+            scheduler.update_time_slot(idx, slot)
             save_scheduler(scheduler)
             flash('Time slot updated!')
         elif 'delete_slot' in request.form:
             idx = int(request.form['slot_delete_idx'])
-            del scheduler.time_slots[idx]
+            scheduler.remove_time_slot(idx)
             save_scheduler(scheduler)
             flash('Time slot deleted!')
         elif 'start_edit_slot' in request.form:
@@ -423,12 +605,12 @@ def unified_scheduler():
                 duration_minutes=int(request.form['class_type_duration']),
                 weekly_count=int(request.form['class_type_weekly_count'])
             )
-            scheduler.class_definitions[idx] = new_class_def
+            scheduler.update_class_definition(idx, new_class_def)
             save_scheduler(scheduler)
             flash('Class type updated!')
         elif 'delete_class_type' in request.form:
             idx = int(request.form['class_type_delete_idx'])
-            del scheduler.class_definitions[idx]
+            scheduler.remove_class_definition_at(idx)
             save_scheduler(scheduler)
             flash('Class type deleted!')
         elif 'start_edit_class_type' in request.form:
@@ -453,53 +635,32 @@ def unified_scheduler():
             session['manual_assignments'] = manual_assignments
             flash('Manual assignments cleared!')
         elif 'generate_schedule' in request.form:
-            from src.models.data_classes import ClassDefinition, Coach, TimeSlot
-            from src.models.enums import ClassType
-            mas = []
-            for ma in manual_assignments:
-                class_def = next((cd for cd in scheduler.class_definitions if cd.name == ma['class_name']), None)
-                coach = next((c for c in scheduler.coaches if c.name == ma['coach_name']), None)
-                slot = scheduler.time_slots[ma['slot_idx']]
-                if class_def and coach and slot:
-                    mas.append({'class_def': class_def, 'coach': coach, 'time_slot': slot})
-            schedule_objs, conflicts = scheduler.generate_schedule(manual_assignments=mas)
-            day_order = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
-            def sc_to_dict(sc, schedule_list):
-                same_slot = [s for s in schedule_list if s.time_slot == sc.time_slot]
-                same_slot.sort(key=lambda x: x.slot_position)
-                idx = sc.slot_position
-                from datetime import timedelta, datetime as dt
-                slot_start = dt.combine(dt.today(), sc.time_slot.start_time)
-                class_start = slot_start
-                for prev in same_slot[:idx]:
-                    class_start += timedelta(minutes=prev.class_def.duration_minutes)
-                class_end = class_start + timedelta(minutes=sc.class_def.duration_minutes)
-                return {
-                    'class_name': sc.class_def.name,
-                    'class_type': sc.class_def.class_type.value,
-                    'duration': sc.class_def.duration_minutes,
-                    'day': sc.time_slot.day,
-                    'start_time': class_start.time().strftime('%H:%M'),
-                    'end_time': class_end.time().strftime('%H:%M'),
-                    'coach': sc.coach.name,
-                    'is_fixed': sc.is_fixed
-                }
-            schedule_dicts = [sc_to_dict(sc, schedule_objs) for sc in schedule_objs]
-            schedule_dicts.sort(key=lambda x: (day_order.index(x['day'].lower()), x['start_time']))
-            schedule = schedule_dicts
+            mas = resolve_manual_assignments(scheduler, manual_assignments)
+            # Start from the last schedule so small config edits move few classes
+            warm_start = None
+            if 'keep_previous' in request.form and session.get('last_schedule'):
+                warm_start = schedule_from_dicts(session['last_schedule'])
+            started = perf_counter()
+            try:
+                schedule_objs, conflicts = scheduler.generate_schedule(manual_assignments=mas, warm_start=warm_start)
+            except Exception:
+                metrics.GENERATE_OUTCOMES.inc(outcome='error')
+                raise
+            finally:
+                metrics.GENERATE_DURATION.observe(perf_counter() - started)
+            metrics.GENERATE_OUTCOMES.inc(outcome='conflicts' if conflicts else 'ok')
+            schedule = schedule_to_dicts(schedule_objs)
             session['last_schedule'] = schedule
             session['last_conflicts'] = conflicts
+            from src.models.bounds import bound_report
+            session['last_bounds'] = bound_report(scheduler, schedule_objs, mas).to_dict()
+            publish_schedule(schedule, 'generate')
+        elif 'explore_tradeoffs' in request.form:
+            session.pop('pareto_front', None)
+            session['pareto_job'] = jobs.submit(explore_tradeoffs, scheduler.to_dict(), manual_assignments)
         # TODO: handle config modals, save/upload
-    return render_template('unified_scheduler.html',
-        coaches=scheduler.coaches,
-        time_slots=scheduler.time_slots,
-        class_types=scheduler.class_definitions,
-        manual_assignments=manual_assignments,
-        class_options=class_options,
-        coach_options=coach_options,
-        slot_options=slot_options,
-        schedule=schedule,
-        conflicts=conflicts,
+    context = scheduler_context(
+        scheduler, manual_assignments, schedule, conflicts,
         coach_edit_idx=coach_edit_idx,
         coach_edit_data=coach_edit_data,
         slot_edit_idx=slot_edit_idx,
@@ -507,6 +668,135 @@ def unified_scheduler():
         class_edit_idx=class_edit_idx,
         class_edit_data=class_edit_data
     )
+    if request.method == 'POST' and request.headers.get('X-Fragment-Request'):
+        changed = [name for name in FRAGMENTS
+                   if any(action in request.form for action in FRAGMENT_ACTIONS[name])]
+        return jsonify(fragments=render_fragments(changed, context), messages=get_flashed_messages())
+    return render_template('unified_scheduler.html', **context)
+
+# Sections of unified_scheduler.html that can be re-rendered on their own,
+# with the form actions whose result changes them
+FRAGMENT_ACTIONS = {
+    'coaches': ('add_coach', 'edit_coach', 'delete_coach', 'start_edit_coach'),
+    'slots': ('add_slot', 'edit_slot', 'delete_slot', 'start_edit_slot'),
+    'classes': ('add_class_type', 'edit_class_type', 'delete_class_type', 'start_edit_class_type'),
+    'manual': ('add_coach', 'edit_coach', 'delete_coach', 'add_slot', 'edit_slot', 'delete_slot',
+               'add_class_type', 'edit_class_type', 'delete_class_type', 'add_manual', 'clear_manual'),
+    'schedule': ('generate_schedule',),
+    'conflicts': ('generate_schedule',),
+    'pareto': ('explore_tradeoffs',),
+}
+FRAGMENTS = tuple(FRAGMENT_ACTIONS)
+EDIT_ACTIONS = {action for name in ('coaches', 'slots', 'classes') for action in FRAGMENT_ACTIONS[name]
+                if not action.startswith('start_')}
+# Edits drop the trade-offs explored for the old config
+FRAGMENT_ACTIONS['pareto'] += tuple(sorted(EDIT_ACTIONS))
+
+def resolve_manual_assignments(scheduler, manual_assignments):
+    """Manual assignments stored by name in the session, as generate_schedule takes them"""
+    mas = []
+    for ma in manual_assignments:
+        class_def = next((cd for cd in scheduler.class_definitions if cd.name == ma['class_name']), None)
+        coach = next((c for c in scheduler.coaches if c.name == ma['coach_name']), None)
+        slot = scheduler.time_slots[ma['slot_idx']]
+        if class_def and coach and slot:
+            mas.append({'class_def': class_def, 'coach': coach, 'time_slot': slot})
+    return mas
+
+def scheduler_context(scheduler, manual_assignments, schedule, conflicts, **edit_state):
+    """Template variables shared by the unified page and its fragments"""
+    context = dict(
+        feed_token=session.get('feed_token') if schedule else None,
+        coaches=scheduler.coaches,
+        time_slots=scheduler.time_slots,
+        class_types=scheduler.class_definitions,
+        manual_assignments=manual_assignments,
+        class_options=[cd for cd in scheduler.class_definitions if cd.weekly_count > 0],
+        coach_options=scheduler.coaches,
+        slot_options=scheduler.time_slots,
+        schedule=schedule,
+        conflicts=conflicts,
+        bounds=session.get('last_bounds') if schedule else None,
+        pareto=pareto_front(),
+        pareto_pending='pareto_job' in session,
+        coach_edit_idx=None, coach_edit_data=None,
+        slot_edit_idx=None, slot_edit_data=None,
+        class_edit_idx=None, class_edit_data=None,
+    )
+    context.update(edit_state)
+    return context
+
+def explore_tradeoffs(config, manual_assignments):
+    """Trade-off schedules of a config as kept in session['pareto_front']; runs as a background job"""
+    from src.models.pareto import explore_pareto
+    scheduler = BJJScheduler()
+    scheduler.from_dict(config)
+    front = explore_pareto(scheduler, resolve_manual_assignments(scheduler, manual_assignments))
+    return [dict(solution.to_dict(), schedule=schedule_to_dicts(solution.schedule)) for solution in front.solutions]
+
+def pareto_front():
+    """The explored trade-offs, taking in the result of a finished exploration job"""
+    job_id = session.get('pareto_job')
+    if job_id is not None:
+        job = jobs.get(job_id)
+        if job is None or job['status'] == 'failed':
+            session.pop('pareto_job')
+            flash(f"Exploring trade-offs failed: {job['error'] if job else 'the job was lost'}")
+        elif job['status'] == 'done':
+            session.pop('pareto_job')
+            session['pareto_front'] = job['result']
+    return session.get('pareto_front')
+
+def render_fragments(names, context):
+    return {name: render_template(f'partials/_{name}.html', **context) for name in names}
+
+@app.route('/fragments/<name>')
+def fragment(name):
+    """Render one section of the unified page from the current session"""
+    if name not in FRAGMENT_ACTIONS:
+        abort(404)
+    context = scheduler_context(get_scheduler(), session.get('manual_assignments', []),
+                                session.get('last_schedule'), session.get('last_conflicts', []))
+    return render_fragments([name], context)[name]
+
+@app.route('/import', methods=['POST'])
+def import_entities_upload():
+    """Bulk import coaches, time slots and classes from an uploaded CSV or JSONL file"""
+    from src.utils.importer import detect_format, import_entities
+    file = request.files.get('import_file')
+    if file is None or file.filename == '':
+        flash('No selected file')
+        return redirect(url_for('unified_scheduler'))
+    scheduler = get_scheduler()
+    # Rows are parsed straight off the upload stream
+    stream = io.TextIOWrapper(file.stream, encoding='utf-8-sig', newline='')
+    result = import_entities(scheduler, stream, detect_format(file.filename), request.form.get('import_kind') or None)
+    if result.ok:
+        save_scheduler(scheduler, label='import')
+    flash(result.summary())
+    for error in result.errors[:20]:
+        flash(str(error))
+    return redirect(url_for('unified_scheduler'))
+
+@app.route('/undo', methods=['POST'])
+def undo():
+    return step_history(ConfigHistory.undo, 'Undid {}', 'Nothing to undo')
+
+@app.route('/redo', methods=['POST'])
+def redo():
+    return step_history(ConfigHistory.redo, 'Redid {}', 'Nothing to redo')
+
+def step_history(step, done_message, empty_message):
+    scheduler = get_scheduler()
+    history = load_history()
+    label = step(history, scheduler)
+    if label is None:
+        flash(empty_message)
+    else:
+        save_scheduler(scheduler, record=False)
+        session[HISTORY_INDEX_KEY] = history.to_state()[0]
+        flash(done_message.format(label))
+    return redirect(request.referrer or url_for('unified_scheduler'))
 
 @app.route('/schedule/export/ical')
 def export_ical():
@@ -514,20 +804,12 @@ def export_ical():
     schedule = session.get('last_schedule')
     if not schedule:
         flash('No schedule to export!')
-        return redirect(url_for('schedule'))
+        return redirect(url_for('unified_scheduler'))
     # Rebuild ScheduledClass objects for export
-    from src.models.data_classes import ClassDefinition, TimeSlot, Coach, ScheduledClass
-    from src.models.enums import ClassType
-    from datetime import time
-    schedule_objs = []
-    for sc in schedule:
-        class_def = ClassDefinition(sc['class_name'], ClassType(sc['class_type']), sc['duration'])
-        time_slot = TimeSlot(sc['day'], time.fromisoformat(sc['start_time']), time.fromisoformat(sc['end_time']))
-        coach = Coach(sc['coach'], 0, [], [])
-        schedule_objs.append(ScheduledClass(class_def, time_slot, coach, is_fixed=sc['is_fixed']))
+    schedule_objs = schedule_from_dicts(schedule)
     ical_str = scheduler.export_to_icalendar(schedule_objs, start_date=date.today(), weeks=4)
-    return send_file(
-        io.BytesIO(ical_str.encode('utf-8')),
+    return send_export(
+        ical_str.encode('utf-8'), 'ical',
         mimetype='text/calendar',
         as_attachment=True,
         download_name='bjj_schedule.ics'
@@ -540,7 +822,7 @@ def export_csv():
     schedule = session.get('last_schedule')
     if not schedule:
         flash('No schedule to export!')
-        return redirect(url_for('schedule'))
+        return redirect(url_for('unified_scheduler'))
     output = io.StringIO()
     writer = csv.writer(output)
     writer.writerow(['Class Name', 'Type', 'Duration', 'Day', 'Start Time', 'End Time', 'Coach', 'Fixed'])
@@ -549,12 +831,164 @@ def export_csv():
             sc['class_name'], sc['class_type'], sc['duration'], sc['day'],
             sc['start_time'], sc['end_time'], sc['coach'], 'Yes' if sc['is_fixed'] else ''
         ])
-    return send_file(
-        io.BytesIO(output.getvalue().encode('utf-8')),
+    return send_export(
+        output.getvalue().encode('utf-8'), 'csv',
         mimetype='text/csv',
         as_attachment=True,
         download_name='bjj_schedule.csv'
     )
 
+# Substitute indexes of recently viewed schedules, keyed by session, config
+# revision and schedule version; building one costs far more than a lookup
+SUBSTITUTE_CACHE_SIZE = 64
+substitute_indexes = OrderedDict()
+substitute_indexes_lock = threading.Lock()
+
+def substitute_index(schedule):
+    """The cached substitute index of a schedule of the session's config, built on a miss"""
+    key = (session.sid, session.get(CONFIG_REVISION_KEY, 0), schedule_version(schedule))
+    with substitute_indexes_lock:
+        index = substitute_indexes.get(key)
+        if index is not None:
+            substitute_indexes.move_to_end(key)
+            return index
+    index = get_scheduler().substitute_index(schedule_from_dicts(schedule))
+    with substitute_indexes_lock:
+        substitute_indexes[key] = index
+        while len(substitute_indexes) > SUBSTITUTE_CACHE_SIZE:
+            substitute_indexes.popitem(last=False)
+    return index
+
+def forget_substitute_indexes(sid):
+    with substitute_indexes_lock:
+        for key in [k for k in substitute_indexes if k[0] == sid]:
+            del substitute_indexes[key]
+
+def publish_schedule(schedule, label):
+    """Publish a schedule to the session's feeds and record it in the schedule history"""
+    token = get_feed_token()
+    feed_registry.publish(token, schedule)
+    schedule_history.record(token, schedule, label)
+
+@app.route('/schedule/substitutes/<int:entry>')
+def schedule_substitutes(entry):
+    """Coaches who could cover one class of the last schedule, best first"""
+    schedule = session.get('last_schedule') or []
+    if entry >= len(schedule):
+        abort(404)
+    substitutes = substitute_index(schedule).find(entry)
+    # The whole request so far, including loading or building the index
+    elapsed_ms = (perf_counter() - g.request_start) * 1000
+    return jsonify(entry=schedule[entry], substitutes=[s.to_dict() for s in substitutes],
+                   elapsed_ms=round(elapsed_ms, 3))
+
+@app.route('/schedule/pareto/<int:choice>', methods=['POST'])
+def use_pareto_schedule(choice):
+    """Make one schedule of the explored trade-offs the current one and publish it"""
+    front = session.get('pareto_front') or []
+    if choice >= len(front):
+        abort(404)
+    solution = front[choice]
+    scheduler = get_scheduler()
+    schedule_objs = schedule_from_dicts(solution['schedule'])
+    session['last_schedule'] = solution['schedule']
+    session['last_conflicts'] = solution['conflicts']
+    from src.models.bounds import bound_report
+    manual = resolve_manual_assignments(scheduler, session.get('manual_assignments', []))
+    session['last_bounds'] = bound_report(scheduler, scheduler.resolve_schedule(schedule_objs), manual).to_dict()
+    publish_schedule(solution['schedule'], 'trade-off')
+    flash('Schedule chosen from the explored trade-offs!')
+    return redirect(url_for('unified_scheduler'))
+
+@app.route('/schedule/history')
+def schedule_history_list():
+    """Published schedule versions, newest first; page back with ?before=<id>"""
+    if 'feed_token' not in session:
+        return jsonify(entries=[])
+    before = request.args.get('before', type=int)
+    limit = min(request.args.get('limit', 50, type=int), 500)
+    entries = schedule_history.entries(session['feed_token'], limit=limit, before=before)
+    return jsonify(entries=[e.to_dict() for e in entries])
+
+@app.route('/schedule/history/<version>')
+def schedule_history_version(version):
+    schedule = schedule_history.get(session.get('feed_token', ''), version)
+    if schedule is None:
+        abort(404)
+    return jsonify(version=version, schedule=schedule)
+
+@app.route('/schedule/history/<old_version>/diff/<new_version>')
+def schedule_history_diff(old_version, new_version):
+    diff = schedule_history.diff(session.get('feed_token', ''), old_version, new_version)
+    if diff is None:
+        abort(404)
+    return jsonify(diff.to_dict())
+
+@app.route('/schedule/history/<version>/restore', methods=['POST'])
+def schedule_history_restore(version):
+    """Roll the current schedule back to a past version and republish it"""
+    schedule = schedule_history.get(session.get('feed_token', ''), version)
+    if schedule is None:
+        abort(404)
+    session['last_schedule'] = schedule
+    session['last_conflicts'] = []
+    session.pop('last_bounds', None)
+    publish_schedule(schedule, f'restore {version[:12]}')
+    flash('Schedule restored from history!')
+    return redirect(url_for('unified_scheduler'))
+
+@app.route('/feeds/revoke', methods=['POST'])
+def revoke_feeds():
+    """Take the session's feed URLs offline and publish the current schedule under new ones"""
+    old_token = session.pop('feed_token', None)
+    if old_token is not None:
+        feed_registry.revoke(old_token)
+        token = get_feed_token()
+        schedule_history.transfer(old_token, token)
+        if session.get('last_schedule'):
+            feed_registry.publish(token, session['last_schedule'])
+        flash('Calendar links replaced; the old links no longer work.')
+    return redirect(url_for('unified_scheduler'))
+
+def serve_feed(token, scope, key=''):
+    """Serve a cached iCal feed, answering conditional requests with 304"""
+    publication = feed_registry.get(token)
+    if publication is None:
+        abort(404)
+    etag = publication.etag(scope, key)
+    if request.if_none_match.contains(etag) or (
+            not request.if_none_match and request.if_modified_since
+            and request.if_modified_since >= publication.last_modified):
+        response = Response(status=304)
+    else:
+        body = publication.render(scope, key)
+        if body is None:
+            abort(404)
+        metrics.EXPORTS.inc(format='ical_feed')
+        metrics.EXPORT_BYTES.inc(len(body), format='ical_feed')
+        response = Response(body, mimetype='text/calendar')
+    response.set_etag(etag)
+    response.last_modified = publication.last_modified
+    response.cache_control.public = True
+    response.cache_control.max_age = 60
+    return response
+
+@app.route('/feeds/<token>/gym.ics')
+def gym_feed(token):
+    return serve_feed(token, 'gym')
+
+@app.route('/feeds/<token>/changes.ics')
+def changes_feed(token):
+    """Only the events added, changed or cancelled by the latest schedule version"""
+    return serve_feed(token, 'changes')
+
+@app.route('/feeds/<token>/coach/<coach>.ics')
+def coach_feed(token, coach):
+    return serve_feed(token, 'coach', coach)
+
+@app.route('/feeds/<token>/class/<class_type>.ics')
+def class_type_feed(token, class_type):
+    return serve_feed(token, 'class', class_type)
+
 if __name__ == '__main__':
     app.run(debug=True) 
\ No newline at end of file
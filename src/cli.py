@@ -0,0 +1,258 @@
+"""
+Headless command line interface for batch schedule generation
+
+    python -m src.cli gym.json configs/ --output-dir out --formats csv ics json
+    python -m src.cli configs/ --jobs 4 --seed 7 --time-budget 2 --summary summary.json
+    python -m src.cli configs/ --output-dir out --warm-start out
+    python -m src.cli gym.json --absences 2 --jobs 4
+    python -m src.cli network.json --by-location --jobs 8
+    python -m src.cli gym.json --pareto 10 --generations 60 --jobs 4 --output-dir out
+    python -m src.cli gym.json --robustness 100000 --absence-probability 0.05 --absence-probability Ana=0.2
+
+Config files use the format written by BJJScheduler.save_to_json. This
+module must stay importable without tkinter or Flask so it runs on servers.
+"""
+
+import argparse
+import json
+import os
+import sys
+from datetime import date, datetime
+from typing import List, Optional
+
+FORMATS = ("csv", "ics", "json")
+# Worst coach-absence scenarios listed per config in the summary
+ABSENCE_REPORT_LIMIT = 10
+
+def collect_configs(paths: List[str]) -> List[str]:
+    """Expand directories into the JSON config files they contain"""
+    configs = []
+    for path in paths:
+        if os.path.isdir(path):
+            configs.extend(sorted(
+                os.path.join(path, name) for name in os.listdir(path) if name.endswith(".json")))
+        else:
+            configs.append(path)
+    return configs
+
+def run_config(config_path: str, options: dict) -> dict:
+    """Generate and export one config; returns its summary record"""
+    from .models.scheduler import BJJScheduler
+    from .models.solvers import solve
+
+    summary = {"config": config_path}
+    try:
+        scheduler = BJJScheduler()
+        scheduler.load_from_json(config_path)
+        for entity_file in options.get("imports", []):
+            import_errors = import_entity_file(scheduler, entity_file)
+            if import_errors:
+                summary.update({"ok": False, "error": f"Import of {entity_file} failed",
+                                "import_errors": import_errors})
+                return summary
+        if options.get("imports") and options.get("write_config"):
+            # One save after every import file applied
+            scheduler.save_to_json(config_path)
+        result = solve(scheduler, seed=options["seed"], time_budget=options["time_budget"],
+                       max_iterations=options["iterations"],
+                       warm_start=load_warm_start(options.get("warm_start"), config_path),
+                       stability_weight=options.get("stability_weight"),
+                       by_location=options.get("by_location", False), jobs=options.get("analysis_jobs", 1))
+        summary.update({
+            "ok": True,
+            "seed": result.seed,
+            "iterations": result.iterations,
+            "seconds": round(result.elapsed_seconds, 6),
+            "scheduled": len(result.schedule),
+            "score": result.score,
+            "bounds": result.bounds.to_dict(),
+            "conflict_count": len(result.conflicts),
+            "conflicts": result.conflicts,
+            "outputs": write_outputs(scheduler, result.schedule, result.conflicts, config_path, options),
+        })
+        if result.locations is not None:
+            summary["locations"] = [location.to_dict() for location in result.locations]
+        if options.get("absences"):
+            from .models.absence import analyze_absences
+            report = analyze_absences(scheduler, size=options["absences"], jobs=options.get("analysis_jobs", 1))
+            summary["absences"] = report.to_dict(limit=ABSENCE_REPORT_LIMIT)
+        if options.get("pareto"):
+            summary["pareto"] = run_pareto(scheduler, config_path, options)
+        if options.get("robustness"):
+            from .models.robustness import DEFAULT_ABSENCE_PROBABILITY, simulate_robustness
+            probabilities = dict(options.get("absence_probabilities", []))
+            default = probabilities.pop(None, DEFAULT_ABSENCE_PROBABILITY)
+            report = simulate_robustness(scheduler, result.schedule, probabilities, default,
+                                         samples=options["robustness"], seed=options["seed"])
+            summary["robustness"] = report.to_dict(limit=ABSENCE_REPORT_LIMIT)
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        summary.update({"ok": False, "error": f"{type(e).__name__}: {e}"})
+    return summary
+
+def run_pareto(scheduler, config_path: str, options: dict) -> dict:
+    """Explore the config's trade-offs; with an output dir every front schedule goes to <stem>.pareto.json"""
+    from .models.pareto import explore_pareto
+    from .utils.feeds import schedule_to_dicts
+
+    front = explore_pareto(scheduler, generations=options["generations"], jobs=options.get("analysis_jobs", 1),
+                           seed=options["seed"], size=options["pareto"])
+    report = front.to_dict()
+    if options["output_dir"] is not None:
+        stem = os.path.splitext(os.path.basename(config_path))[0]
+        path = os.path.join(options["output_dir"], f"{stem}.pareto.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump([dict(solution.to_dict(), schedule=schedule_to_dicts(solution.schedule))
+                       for solution in front.solutions], f, indent=2)
+        report["output"] = path
+    return report
+
+def import_entity_file(scheduler, path: str) -> List[dict]:
+    """Stream a CSV/JSONL entity file into the scheduler; returns row errors, if any"""
+    from .utils.importer import detect_format, import_entities
+
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        result = import_entities(scheduler, f, detect_format(path))
+    return result.to_dict()["errors"]
+
+def absence_probability(value: str):
+    """(coach name, or None for everyone, and probability) from 0.05 or NAME=0.2"""
+    name, _, probability = value.rpartition("=")
+    try:
+        return name or None, float(probability)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid probability: {value!r}")
+
+def load_warm_start(path: Optional[str], config_path: str):
+    """Previous schedule from a JSON export, or a directory of them named after each config"""
+    from .utils.feeds import schedule_from_dicts
+
+    if path is None:
+        return None
+    if os.path.isdir(path):
+        stem = os.path.splitext(os.path.basename(config_path))[0]
+        path = os.path.join(path, f"{stem}.json")
+        if not os.path.exists(path):
+            return None
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    return schedule_from_dicts(data["schedule"] if isinstance(data, dict) else data)
+
+def write_outputs(scheduler, schedule, conflicts, config_path: str, options: dict) -> dict:
+    from .utils.export import export_to_csv_string
+    from .utils.feeds import schedule_to_dicts
+
+    output_dir = options["output_dir"]
+    if output_dir is None:
+        return {}
+    os.makedirs(output_dir, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(config_path))[0]
+    start_date = options["start_date"]
+    weeks = options["weeks"]
+    outputs = {}
+    for fmt in options["formats"]:
+        if fmt == "csv":
+            content = export_to_csv_string(schedule, start_date, weeks)
+        elif fmt == "ics":
+            content = scheduler.export_to_icalendar(schedule, start_date, weeks)
+        else:
+            content = json.dumps({"schedule": schedule_to_dicts(schedule), "conflicts": conflicts}, indent=2)
+        path = os.path.join(output_dir, f"{stem}.{fmt}")
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            f.write(content)
+        outputs[fmt] = path
+    return outputs
+
+def run_batch(configs: List[str], options: dict, jobs: int = 1) -> List[dict]:
+    """Run every config, in worker processes when jobs > 1, keeping input order"""
+    if jobs <= 1 or len(configs) <= 1:
+        return [run_config(path, options) for path in configs]
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=min(jobs, len(configs))) as pool:
+        return list(pool.map(run_config, configs, [options] * len(configs)))
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="bjj-scheduler", description="Generate BJJ schedules without the GUI")
+    parser.add_argument("configs", nargs="+", help="Config JSON files or directories of them")
+    parser.add_argument("--seed", type=int,
+                        help="Seed for randomized restarts (alone, adds one seeded restart to the greedy run)")
+    parser.add_argument("--time-budget", type=float, help="Seconds to spend on restarts per config")
+    parser.add_argument("--iterations", type=int, help="Maximum generation runs per config")
+    parser.add_argument("--warm-start", metavar="PATH",
+                        help="Previous JSON schedule export, or a directory of them, to keep placements from")
+    parser.add_argument("--stability-weight", type=float,
+                        help="Score penalty per class moved away from the warm-start schedule")
+    parser.add_argument("--import-entities", action="append", default=[], metavar="FILE",
+                        help="CSV/JSONL file of coaches, slots and classes to import into every config")
+    parser.add_argument("--write-config", action="store_true",
+                        help="Save configs back to disk after importing entities")
+    parser.add_argument("--output-dir", "-o", help="Directory for exported schedules")
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=list(FORMATS))
+    parser.add_argument("--start-date", type=date.fromisoformat, help="First calendar week (YYYY-MM-DD)")
+    parser.add_argument("--weeks", type=int, default=4)
+    parser.add_argument("--jobs", "-j", type=int, default=1, help="Configs to process in parallel")
+    parser.add_argument("--by-location", action="store_true",
+                        help="Solve each slot location separately and coordinate shared coaches")
+    parser.add_argument("--absences", type=int, default=0, metavar="N",
+                        help="Rank every set of N absent coaches by the classes it leaves uncovered")
+    parser.add_argument("--pareto", type=int, default=0, metavar="SIZE",
+                        help="Search for up to SIZE schedules trading off fairness, balance, fill and preferences")
+    parser.add_argument("--generations", type=int, default=40, help="Evolution rounds of the --pareto search")
+    parser.add_argument("--robustness", type=int, default=0, metavar="SAMPLES",
+                        help="Simulate this many weeks of random coach no-shows with substitute repair")
+    parser.add_argument("--absence-probability", type=absence_probability, action="append", default=[],
+                        metavar="[NAME=]P",
+                        help="Chance a coach misses a week: a default for everyone, or NAME=P for one coach")
+    parser.add_argument("--summary", help="Write the JSON summary to this file instead of stdout")
+    parser.add_argument("--fail-on-conflicts", action="store_true",
+                        help="Exit with status 2 when any schedule has conflicts")
+    return parser
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    configs = collect_configs(args.configs)
+    if not configs:
+        print("No config files found", file=sys.stderr)
+        return 1
+    options = {
+        "seed": args.seed,
+        "time_budget": args.time_budget,
+        "iterations": args.iterations,
+        "output_dir": args.output_dir,
+        "formats": args.formats,
+        "start_date": args.start_date,
+        "weeks": args.weeks,
+        "imports": args.import_entities,
+        "write_config": args.write_config,
+        "warm_start": args.warm_start,
+        "stability_weight": args.stability_weight,
+        "by_location": args.by_location,
+        "absences": args.absences,
+        "pareto": args.pareto,
+        "generations": args.generations,
+        "robustness": args.robustness,
+        "absence_probabilities": args.absence_probability,
+        # Worker processes go to the configs when there are several, else to locations,
+        # absence scenarios and trade-off search islands
+        "analysis_jobs": args.jobs if len(configs) == 1 else 1,
+    }
+    results = run_batch(configs, options, args.jobs)
+    report = {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "jobs": args.jobs,
+        "total_seconds": round(sum(r.get("seconds", 0) for r in results), 6),
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.summary:
+        with open(args.summary, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+    if not all(r["ok"] for r in results):
+        return 1
+    if args.fail_on_conflicts and any(r["conflict_count"] for r in results):
+        return 2
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -93,17 +93,20 @@ class ManualAssignmentDialog(ConfigurationDialog):
 
         # Class type
         ttk.Label(main_frame, text="Class:").grid(row=3, column=0, sticky="w", pady=5)
-        class_names = [c.get_display_name() for c in self.scheduler.class_definitions] if self.scheduler else []
+        # Keep the option lists so a selection resolves by combobox index, not by name scan
+        self.class_options = list(self.scheduler.class_definitions) if self.scheduler else []
+        class_names = [c.get_display_name() for c in self.class_options]
         self.class_var = tk.StringVar(value=class_names[0] if class_names else "")
-        class_combo = ttk.Combobox(main_frame, textvariable=self.class_var, values=class_names, state="readonly")
-        class_combo.grid(row=3, column=1, sticky="we", pady=5, padx=(10, 0))
+        self.class_combo = ttk.Combobox(main_frame, textvariable=self.class_var, values=class_names, state="readonly")
+        self.class_combo.grid(row=3, column=1, sticky="we", pady=5, padx=(10, 0))
 
         # Coach
         ttk.Label(main_frame, text="Coach:").grid(row=4, column=0, sticky="w", pady=5)
-        coach_names = [c.name for c in self.scheduler.coaches] if self.scheduler else []
+        self.coach_options = list(self.scheduler.coaches) if self.scheduler else []
+        coach_names = [c.name for c in self.coach_options]
         self.coach_var = tk.StringVar(value=coach_names[0] if coach_names else "")
-        coach_combo = ttk.Combobox(main_frame, textvariable=self.coach_var, values=coach_names, state="readonly")
-        coach_combo.grid(row=4, column=1, sticky="we", pady=5, padx=(10, 0))
+        self.coach_combo = ttk.Combobox(main_frame, textvariable=self.coach_var, values=coach_names, state="readonly")
+        self.coach_combo.grid(row=4, column=1, sticky="we", pady=5, padx=(10, 0))
 
         # Buttons
         button_frame = ttk.Frame(main_frame)
@@ -121,10 +124,10 @@ class ManualAssignmentDialog(ConfigurationDialog):
             if start_time >= end_time:
                 messagebox.showerror("Error", "End time must be after start time")
                 return
-            class_name = self.class_var.get()
-            coach_name = self.coach_var.get()
-            class_def = next((c for c in self.scheduler.class_definitions if c.get_display_name() == class_name), None) if self.scheduler else None
-            coach = next((c for c in self.scheduler.coaches if c.name == coach_name), None) if self.scheduler else None
+            class_idx = self.class_combo.current()
+            coach_idx = self.coach_combo.current()
+            class_def = self.class_options[class_idx] if 0 <= class_idx < len(self.class_options) else None
+            coach = self.coach_options[coach_idx] if 0 <= coach_idx < len(self.coach_options) else None
             if not class_def or not coach:
                 messagebox.showerror("Error", "Please select a valid class and coach")
                 return
@@ -136,4 +139,87 @@ class ManualAssignmentDialog(ConfigurationDialog):
 
     def cancel(self):
         self.result = None
-        self.dialog.destroy() 
\ No newline at end of file
+        self.dialog.destroy() 
+
+
+class SubstituteDialog(ConfigurationDialog):
+    """Pick a scheduled class and list the coaches who could cover it"""
+
+    def __init__(self, parent, scheduler, schedule):
+        super().__init__(parent, "Find Substitute", scheduler)
+        self.schedule = list(schedule)
+        # Built once; every selection is then a lookup
+        self.index = scheduler.substitute_index(self.schedule)
+        self.setup_gui()
+
+    def setup_gui(self):
+        main_frame = ttk.Frame(self.dialog, padding="20")
+        main_frame.pack(fill=tk.BOTH, expand=True)
+
+        ttk.Label(main_frame, text="Class:").grid(row=0, column=0, sticky="w", pady=5)
+        labels = [f"{sc.time_slot.day.title()} {sc.time_slot.start_time.strftime('%H:%M')} "
+                  f"{sc.class_def.name} ({sc.coach.name})" for sc in self.schedule]
+        self.entry_combo = ttk.Combobox(main_frame, values=labels, state="readonly", width=50)
+        self.entry_combo.grid(row=0, column=1, sticky="we", pady=5, padx=(10, 0))
+        self.entry_combo.bind("<<ComboboxSelected>>", lambda event: self.show_substitutes())
+
+        self.results = tk.Listbox(main_frame, height=15)
+        self.results.grid(row=1, column=0, columnspan=2, sticky="nsew", pady=10)
+
+        ttk.Button(main_frame, text="Close", command=self.dialog.destroy).grid(row=2, column=0, columnspan=2)
+        main_frame.columnconfigure(1, weight=1)
+        main_frame.rowconfigure(1, weight=1)
+
+    def show_substitutes(self):
+        self.results.delete(0, tk.END)
+        substitutes = self.index.find(self.entry_combo.current())
+        if not substitutes:
+            self.results.insert(tk.END, "No eligible coach can cover this class.")
+        for sub in substitutes:
+            note = "teaching at that time" if sub.conflict else "free"
+            self.results.insert(tk.END, f"{sub.coach.name}: {sub.headroom} classes of headroom, {note}")
+
+class ParetoDialog(ConfigurationDialog):
+    """Compare the schedules of a Pareto front and pick one"""
+
+    def __init__(self, parent, front):
+        super().__init__(parent, "Explore Trade-offs")
+        self.front = front
+        self.setup_gui()
+
+    def setup_gui(self):
+        from src.models.pareto import OBJECTIVE_LABELS, OBJECTIVES
+
+        main_frame = ttk.Frame(self.dialog, padding="20")
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        ttk.Label(main_frame, text="Lower is better in every column; no schedule beats another in all of them."
+                  ).grid(row=0, column=0, columnspan=2, sticky="w")
+
+        columns = ("score",) + OBJECTIVES
+        self.tree = ttk.Treeview(main_frame, columns=columns, show="headings", height=12)
+        self.tree.heading("score", text="Score")
+        self.tree.column("score", width=70)
+        for name in OBJECTIVES:
+            self.tree.heading(name, text=OBJECTIVE_LABELS[name])
+            self.tree.column(name, width=110)
+        for i, solution in enumerate(self.front.solutions):
+            values = [f"{solution.score:.2f}"] + [f"{solution.objectives[name]:.2f}" for name in OBJECTIVES]
+            self.tree.insert("", tk.END, iid=str(i), values=values)
+        self.tree.grid(row=1, column=0, columnspan=2, sticky="nsew", pady=10)
+
+        ttk.Button(main_frame, text="Use Schedule", command=self.use).grid(row=2, column=0, padx=5)
+        ttk.Button(main_frame, text="Cancel", command=self.cancel).grid(row=2, column=1, padx=5)
+        main_frame.columnconfigure(0, weight=1)
+        main_frame.rowconfigure(1, weight=1)
+
+    def use(self):
+        selection = self.tree.selection()
+        if not selection:
+            messagebox.showerror("Error", "Please select a schedule")
+            return
+        self.result = self.front.solutions[int(selection[0])]
+        self.dialog.destroy()
+
+    def cancel(self):
+        self.result = None
+        self.dialog.destroy()
@@ -3,6 +3,7 @@ from tkinter import ttk, messagebox
 
 from ...models.data_classes import ClassDefinition
 from ...models.enums import ClassType
+from ..widgets.entity_table import EntityTable
 from .base_dialog import ConfigurationDialog
 
 class ClassDefinitionConfigDialog(ConfigurationDialog):
@@ -92,17 +93,19 @@ class ClassDefinitionManagementDialog(ConfigurationDialog):
         # Title
         ttk.Label(main_frame, text="Class Type Management", font=('TkDefaultFont', 12, 'bold')).pack(pady=(0, 20))
         
-        # List frame
-        list_frame = ttk.Frame(main_frame)
-        list_frame.pack(fill=tk.BOTH, expand=True, pady=(0, 20))
-        
-        # Class list
-        self.class_listbox = tk.Listbox(list_frame, height=10)
-        class_scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.class_listbox.yview)
-        self.class_listbox.configure(yscrollcommand=class_scrollbar.set)
-        
-        self.class_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        class_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        # Class table
+        self.class_table = EntityTable(main_frame, [
+            ("name", "Name", 180),
+            ("type", "Type", 90),
+            ("duration", "Minutes", 70),
+            ("weekly", "Per Week", 70),
+        ], row_values=lambda class_def: (
+            class_def.get_display_name(),
+            class_def.class_type.value,
+            class_def.duration_minutes,
+            class_def.weekly_count,
+        ))
+        self.class_table.pack(fill=tk.BOTH, expand=True, pady=(0, 20))
         
         # Buttons
         button_frame = ttk.Frame(main_frame)
@@ -116,10 +119,12 @@ class ClassDefinitionManagementDialog(ConfigurationDialog):
         self.refresh_list()
         
     def refresh_list(self):
-        self.class_listbox.delete(0, tk.END)
+        """Load every class type into the table; edits afterwards update single rows"""
         if self.scheduler and hasattr(self.scheduler, 'class_definitions'):
-            for class_def in self.scheduler.class_definitions:
-                self.class_listbox.insert(tk.END, f"{class_def.get_display_name()} ({class_def.duration_minutes} min, {class_def.weekly_count} per week)")
+            self.class_table.load(self.scheduler.class_definitions)
+            
+    def _index_of(self, class_def):
+        return next(i for i, c in enumerate(self.scheduler.class_definitions) if c is class_def)
             
     def add_class(self):
         if not self.scheduler:
@@ -128,36 +133,30 @@ class ClassDefinitionManagementDialog(ConfigurationDialog):
         self.dialog.wait_window(dialog.dialog)
         if dialog.result:
             self.scheduler.add_class_definition(dialog.result)
-            self.refresh_list()
+            self.class_table.insert(dialog.result)
             
     def edit_class(self):
         if not self.scheduler or not hasattr(self.scheduler, 'class_definitions'):
             return
-        selection = self.class_listbox.curselection()
-        if not selection:
+        class_def = self.class_table.selected()
+        if class_def is None:
             messagebox.showwarning("Warning", "Please select a class type to edit")
             return
-            
-        index = selection[0]
-        class_def = self.scheduler.class_definitions[index]
         
         dialog = ClassDefinitionConfigDialog(self.dialog, self.scheduler, class_def)
         self.dialog.wait_window(dialog.dialog)
         if dialog.result:
-            self.scheduler.class_definitions[index] = dialog.result
-            self.refresh_list()
+            self.scheduler.update_class_definition(self._index_of(class_def), dialog.result)
+            self.class_table.update(class_def, dialog.result)
             
     def delete_class(self):
         if not self.scheduler or not hasattr(self.scheduler, 'class_definitions'):
             return
-        selection = self.class_listbox.curselection()
-        if not selection:
+        class_def = self.class_table.selected()
+        if class_def is None:
             messagebox.showwarning("Warning", "Please select a class type to delete")
             return
-            
-        index = selection[0]
-        class_def = self.scheduler.class_definitions[index]
         
         if messagebox.askyesno("Confirm Delete", f"Are you sure you want to delete {class_def.get_display_name()}?"):
-            del self.scheduler.class_definitions[index]
-            self.refresh_list() 
\ No newline at end of file
+            self.scheduler.remove_class_definition_at(self._index_of(class_def))
+            self.class_table.delete(class_def)
@@ -1,7 +1,9 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 
+from ...models.availability import validate_windows
 from ...models.data_classes import Coach
+from ..widgets.entity_table import EntityTable
 from .base_dialog import ConfigurationDialog
 
 class CoachConfigDialog(ConfigurationDialog):
@@ -61,9 +63,14 @@ class CoachConfigDialog(ConfigurationDialog):
         ttk.Checkbutton(teach_frame, text="No-Gi", variable=self.can_teach_nogi_var).pack(side=tk.LEFT, padx=(0, 10))
         ttk.Checkbutton(teach_frame, text="Open Mat", variable=self.can_teach_open_mat_var).pack(side=tk.LEFT)
         
+        # Availability windows, e.g. "tue 06:00-07:30; thu 18:00-24:00"; they replace times and days when set
+        ttk.Label(main_frame, text="Availability Windows:").grid(row=5, column=0, sticky="w", pady=5)
+        self.availability_var = tk.StringVar(value="; ".join(self.coach.availability) if self.coach else "")
+        ttk.Entry(main_frame, textvariable=self.availability_var, width=40).grid(row=5, column=1, sticky="we", pady=5, padx=(10, 0))
+        
         # Buttons
         button_frame = ttk.Frame(main_frame)
-        button_frame.grid(row=5, column=0, columnspan=2, pady=20)
+        button_frame.grid(row=6, column=0, columnspan=2, pady=20)
         
         ttk.Button(button_frame, text="Save", command=self.save).pack(side=tk.LEFT, padx=(0, 10))
         ttk.Button(button_frame, text="Cancel", command=self.cancel).pack(side=tk.LEFT)
@@ -83,6 +90,12 @@ class CoachConfigDialog(ConfigurationDialog):
                 messagebox.showerror("Error", "Max weekly classes must be positive")
                 return
                 
+            try:
+                availability = validate_windows(self.availability_var.get().split(";"))
+            except ValueError as e:
+                messagebox.showerror("Error", str(e))
+                return
+                
             preferred_times = []
             if self.morning_var.get():
                 preferred_times.append("morning")
@@ -91,7 +104,7 @@ class CoachConfigDialog(ConfigurationDialog):
             if self.evening_var.get():
                 preferred_times.append("evening")
                 
-            if not preferred_times:
+            if not preferred_times and not availability:
                 messagebox.showerror("Error", "At least one preferred time must be selected")
                 return
                 
@@ -100,7 +113,7 @@ class CoachConfigDialog(ConfigurationDialog):
             for day, var in self.day_vars.items():
                 if var.get():
                     available_days.append(day.lower())
-            if not available_days:
+            if not available_days and not availability:
                 messagebox.showerror("Error", "At least one available day must be selected")
                 return
             self.result = Coach(
@@ -110,7 +123,8 @@ class CoachConfigDialog(ConfigurationDialog):
                 available_days=available_days,
                 can_teach_gi=self.can_teach_gi_var.get(),
                 can_teach_nogi=self.can_teach_nogi_var.get(),
-                can_teach_open_mat=self.can_teach_open_mat_var.get()
+                can_teach_open_mat=self.can_teach_open_mat_var.get(),
+                availability=availability
             )
             
             self.dialog.destroy()
@@ -133,17 +147,19 @@ class CoachManagementDialog(ConfigurationDialog):
         # Title
         ttk.Label(main_frame, text="Coach Management", font=('TkDefaultFont', 12, 'bold')).pack(pady=(0, 20))
         
-        # List frame
-        list_frame = ttk.Frame(main_frame)
-        list_frame.pack(fill=tk.BOTH, expand=True, pady=(0, 20))
-        
-        # Coach list
-        self.coach_listbox = tk.Listbox(list_frame, height=10)
-        coach_scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.coach_listbox.yview)
-        self.coach_listbox.configure(yscrollcommand=coach_scrollbar.set)
-        
-        self.coach_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        coach_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        # Coach table
+        self.coach_table = EntityTable(main_frame, [
+            ("name", "Name", 160),
+            ("max", "Classes/Week", 90),
+            ("times", "Preferred Times", 140),
+            ("days", "Available Days", 200),
+        ], row_values=lambda coach: (
+            coach.name,
+            coach.max_weekly_classes,
+            "; ".join(coach.availability) or ", ".join(t.title() for t in coach.preferred_times),
+            ", ".join(day.title() for day in coach.available_days),
+        ))
+        self.coach_table.pack(fill=tk.BOTH, expand=True, pady=(0, 20))
         
         # Buttons
         button_frame = ttk.Frame(main_frame)
@@ -157,11 +173,12 @@ class CoachManagementDialog(ConfigurationDialog):
         self.refresh_list()
         
     def refresh_list(self):
-        self.coach_listbox.delete(0, tk.END)
+        """Load every coach into the table; edits afterwards update single rows"""
         if self.scheduler and hasattr(self.scheduler, 'coaches'):
-            for coach in self.scheduler.coaches:
-                days_str = ", ".join([day.title() for day in coach.available_days])
-                self.coach_listbox.insert(tk.END, f"{coach.name} ({coach.max_weekly_classes} classes/week) - {days_str}")
+            self.coach_table.load(self.scheduler.coaches)
+            
+    def _index_of(self, coach):
+        return next(i for i, c in enumerate(self.scheduler.coaches) if c is coach)
             
     def add_coach(self):
         if not self.scheduler:
@@ -170,36 +187,30 @@ class CoachManagementDialog(ConfigurationDialog):
         self.dialog.wait_window(dialog.dialog)
         if dialog.result:
             self.scheduler.add_coach(dialog.result)
-            self.refresh_list()
+            self.coach_table.insert(dialog.result)
             
     def edit_coach(self):
         if not self.scheduler or not hasattr(self.scheduler, 'coaches'):
             return
-        selection = self.coach_listbox.curselection()
-        if not selection:
+        coach = self.coach_table.selected()
+        if coach is None:
             messagebox.showwarning("Warning", "Please select a coach to edit")
             return
-            
-        index = selection[0]
-        coach = self.scheduler.coaches[index]
         
         dialog = CoachConfigDialog(self.dialog, self.scheduler, coach)
         self.dialog.wait_window(dialog.dialog)
         if dialog.result:
-            self.scheduler.coaches[index] = dialog.result
-            self.refresh_list()
+            self.scheduler.update_coach(self._index_of(coach), dialog.result)
+            self.coach_table.update(coach, dialog.result)
             
     def delete_coach(self):
         if not self.scheduler or not hasattr(self.scheduler, 'coaches'):
             return
-        selection = self.coach_listbox.curselection()
-        if not selection:
+        coach = self.coach_table.selected()
+        if coach is None:
             messagebox.showwarning("Warning", "Please select a coach to delete")
             return
-            
-        index = selection[0]
-        coach = self.scheduler.coaches[index]
         
         if messagebox.askyesno("Confirm Delete", f"Are you sure you want to delete {coach.name}?"):
-            del self.scheduler.coaches[index]
-            self.refresh_list() 
\ No newline at end of file
+            self.scheduler.remove_coach(self._index_of(coach))
+            self.coach_table.delete(coach)
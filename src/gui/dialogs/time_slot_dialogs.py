@@ -1,8 +1,10 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
+from dataclasses import replace
 from datetime import time
 
 from ...models.data_classes import TimeSlot
+from ..widgets.entity_table import EntityTable
 from .base_dialog import ConfigurationDialog
 
 class TimeSlotConfigDialog(ConfigurationDialog):
@@ -52,9 +54,14 @@ class TimeSlotConfigDialog(ConfigurationDialog):
         ttk.Label(end_time_frame, text=":").pack(side=tk.LEFT, padx=2)
         ttk.Spinbox(end_time_frame, from_=0, to=59, textvariable=self.end_minute_var, width=5).pack(side=tk.LEFT)
         
+        # Location, blank for a single gym
+        ttk.Label(main_frame, text="Location:").grid(row=3, column=0, sticky="w", pady=5)
+        self.location_var = tk.StringVar(value=self.time_slot.location or "" if self.time_slot else "")
+        ttk.Entry(main_frame, textvariable=self.location_var).grid(row=3, column=1, sticky="we", pady=5, padx=(10, 0))
+        
         # Buttons
         button_frame = ttk.Frame(main_frame)
-        button_frame.grid(row=3, column=0, columnspan=2, pady=20)
+        button_frame.grid(row=4, column=0, columnspan=2, pady=20)
         
         ttk.Button(button_frame, text="Save", command=self.save).pack(side=tk.LEFT, padx=(0, 10))
         ttk.Button(button_frame, text="Cancel", command=self.cancel).pack(side=tk.LEFT)
@@ -82,7 +89,13 @@ class TimeSlotConfigDialog(ConfigurationDialog):
                 messagebox.showerror("Error", "End time must be after start time")
                 return
                 
-            self.result = TimeSlot(day, start_time, end_time)
+            location = self.location_var.get().strip() or None
+            if self.time_slot:
+                # Keep the preferences this dialog does not edit
+                self.result = replace(self.time_slot, day=day, start_time=start_time, end_time=end_time,
+                                      location=location)
+            else:
+                self.result = TimeSlot(day, start_time, end_time, location=location)
             self.dialog.destroy()
             
         except ValueError:
@@ -103,17 +116,23 @@ class TimeSlotManagementDialog(ConfigurationDialog):
         # Title
         ttk.Label(main_frame, text="Time Slot Management", font=('TkDefaultFont', 12, 'bold')).pack(pady=(0, 20))
         
-        # List frame
-        list_frame = ttk.Frame(main_frame)
-        list_frame.pack(fill=tk.BOTH, expand=True, pady=(0, 20))
-        
-        # Time slot list
-        self.slot_listbox = tk.Listbox(list_frame, height=10)
-        slot_scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.slot_listbox.yview)
-        self.slot_listbox.configure(yscrollcommand=slot_scrollbar.set)
-        
-        self.slot_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        slot_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        # Time slot table
+        self.slot_table = EntityTable(main_frame, [
+            ("day", "Day", 100),
+            ("start", "Start", 70),
+            ("end", "End", 70),
+            ("primary", "Primary", 90),
+            ("secondary", "Secondary", 90),
+            ("location", "Location", 90),
+        ], row_values=lambda slot: (
+            slot.day.title(),
+            slot.start_time.strftime('%H:%M'),
+            slot.end_time.strftime('%H:%M'),
+            slot.primary_preference or "",
+            slot.secondary_preference or "",
+            slot.location or "",
+        ))
+        self.slot_table.pack(fill=tk.BOTH, expand=True, pady=(0, 20))
         
         # Buttons
         button_frame = ttk.Frame(main_frame)
@@ -127,10 +146,12 @@ class TimeSlotManagementDialog(ConfigurationDialog):
         self.refresh_list()
         
     def refresh_list(self):
-        self.slot_listbox.delete(0, tk.END)
+        """Load every time slot into the table; edits afterwards update single rows"""
         if self.scheduler and hasattr(self.scheduler, 'time_slots'):
-            for slot in self.scheduler.time_slots:
-                self.slot_listbox.insert(tk.END, str(slot))
+            self.slot_table.load(self.scheduler.time_slots)
+            
+    def _index_of(self, slot):
+        return next(i for i, s in enumerate(self.scheduler.time_slots) if s is slot)
             
     def add_slot(self):
         if not self.scheduler:
@@ -139,36 +160,30 @@ class TimeSlotManagementDialog(ConfigurationDialog):
         self.dialog.wait_window(dialog.dialog)
         if dialog.result:
             self.scheduler.add_time_slot(dialog.result)
-            self.refresh_list()
+            self.slot_table.insert(dialog.result)
             
     def edit_slot(self):
         if not self.scheduler or not hasattr(self.scheduler, 'time_slots'):
             return
-        selection = self.slot_listbox.curselection()
-        if not selection:
+        slot = self.slot_table.selected()
+        if slot is None:
             messagebox.showwarning("Warning", "Please select a time slot to edit")
             return
-            
-        index = selection[0]
-        slot = self.scheduler.time_slots[index]
         
         dialog = TimeSlotConfigDialog(self.dialog, self.scheduler, slot)
         self.dialog.wait_window(dialog.dialog)
         if dialog.result:
-            self.scheduler.time_slots[index] = dialog.result
-            self.refresh_list()
+            self.scheduler.update_time_slot(self._index_of(slot), dialog.result)
+            self.slot_table.update(slot, dialog.result)
             
     def delete_slot(self):
         if not self.scheduler or not hasattr(self.scheduler, 'time_slots'):
             return
-        selection = self.slot_listbox.curselection()
-        if not selection:
+        slot = self.slot_table.selected()
+        if slot is None:
             messagebox.showwarning("Warning", "Please select a time slot to delete")
             return
-            
-        index = selection[0]
-        slot = self.scheduler.time_slots[index]
         
         if messagebox.askyesno("Confirm Delete", f"Are you sure you want to delete {slot}?"):
-            del self.scheduler.time_slots[index]
-            self.refresh_list() 
\ No newline at end of file
+            self.scheduler.remove_time_slot(self._index_of(slot))
+            self.slot_table.delete(slot)
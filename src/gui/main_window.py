@@ -4,19 +4,21 @@ from typing import List
 from datetime import time
 
 from ..models.scheduler import BJJScheduler
+from ..models.history import ConfigHistory
 from ..models.data_classes import ScheduleRequirements
 from ..models.enums import ClassType, ScheduleMode
-from ..utils.export import save_csv_file
-from .dialogs.coach_dialogs import CoachManagementDialog
-from .dialogs.time_slot_dialogs import TimeSlotManagementDialog
-from .dialogs.class_dialogs import ClassDefinitionManagementDialog
-from .dialogs.base_dialog import ExportOptionsDialog
+# Dialogs and exporters are imported on first use to keep startup fast
 
 class ScheduleCalendarGUI:
     def __init__(self, scheduler: BJJScheduler):
         self.scheduler = scheduler
         self.current_schedule = []
+        # Last generated schedule, kept across config edits as the next warm start
+        self.previous_schedule = []
         self.current_conflicts = []
+        self.current_bounds = None
+        self.history = ConfigHistory()
+        self.history.record(scheduler, "initial config")
         
         # Create main window
         self.root = tk.Tk()
@@ -50,6 +52,14 @@ class ScheduleCalendarGUI:
                   command=self.manage_time_slots).pack(fill=tk.X, pady=2)
         ttk.Button(config_frame, text="Manage Class Types", 
                   command=self.manage_class_types).pack(fill=tk.X, pady=2)
+        ttk.Button(config_frame, text="Import from CSV/JSONL",
+                  command=self.import_entities).pack(fill=tk.X, pady=2)
+        undo_frame = ttk.Frame(config_frame)
+        undo_frame.pack(fill=tk.X, pady=2)
+        ttk.Button(undo_frame, text="Undo", command=self.undo).pack(side=tk.LEFT, expand=True, fill=tk.X)
+        ttk.Button(undo_frame, text="Redo", command=self.redo).pack(side=tk.LEFT, expand=True, fill=tk.X)
+        self.root.bind("<Control-z>", lambda event: self.undo())
+        self.root.bind("<Control-y>", lambda event: self.redo())
         
         # Schedule mode selection
         mode_frame = ttk.Frame(control_frame)
@@ -61,6 +71,9 @@ class ScheduleCalendarGUI:
                        value="balanced").pack(anchor=tk.W)
         ttk.Radiobutton(mode_frame, text="Sequential", variable=self.mode_var, 
                        value="sequential").pack(anchor=tk.W)
+        self.keep_previous_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(mode_frame, text="Keep previous placements",
+                        variable=self.keep_previous_var).pack(anchor=tk.W, pady=(5, 0))
         
         # Buttons
         button_frame = ttk.Frame(control_frame)
@@ -68,8 +81,12 @@ class ScheduleCalendarGUI:
         
         ttk.Button(button_frame, text="Generate Schedule", 
                   command=self.generate_schedule).pack(pady=5, fill=tk.X)
+        ttk.Button(button_frame, text="Explore Trade-offs",
+                  command=self.explore_tradeoffs).pack(pady=5, fill=tk.X)
         ttk.Button(button_frame, text="Manual Assignment", 
                   command=self.manual_assignment).pack(pady=5, fill=tk.X)
+        ttk.Button(button_frame, text="Find Substitute",
+                  command=self.find_substitute).pack(pady=5, fill=tk.X)
         ttk.Button(button_frame, text="Export to iCalendar", 
                   command=self.export_icalendar).pack(pady=5, fill=tk.X)
         ttk.Button(button_frame, text="Save as CSV", 
@@ -212,12 +229,31 @@ class ScheduleCalendarGUI:
         mode = ScheduleMode.BALANCED if self.mode_var.get() == "balanced" else ScheduleMode.SEQUENTIAL
         self.scheduler.set_schedule_mode(mode)
         # Generate schedule using class_definitions' weekly_count
-        self.current_schedule, self.current_conflicts = self.scheduler.generate_schedule()
+        warm_start = self.previous_schedule if self.keep_previous_var.get() else None
+        self.current_schedule, self.current_conflicts = self.scheduler.generate_schedule(warm_start=warm_start)
+        from ..models.bounds import bound_report
+        self.current_bounds = bound_report(self.scheduler, self.current_schedule)
+        self.previous_schedule = self.current_schedule
         # Update displays
         self.update_calendar_display()
         self.update_conflicts_display()
         messagebox.showinfo("Success", f"Schedule generated with {len(self.current_schedule)} classes")
     
+    def explore_tradeoffs(self):
+        """Search a Pareto front of schedules and adopt the one the user picks"""
+        from ..models.pareto import explore_pareto
+        from .dialogs.base_dialog import ParetoDialog
+        front = explore_pareto(self.scheduler)
+        dialog = ParetoDialog(self.root, front)
+        self.root.wait_window(dialog.dialog)
+        if dialog.result:
+            from ..models.bounds import bound_report
+            self.current_schedule, self.current_conflicts = dialog.result.schedule, dialog.result.conflicts
+            self.current_bounds = bound_report(self.scheduler, self.current_schedule)
+            self.previous_schedule = self.current_schedule
+            self.update_calendar_display()
+            self.update_conflicts_display()
+    
     def update_conflicts_display(self):
         self.conflicts_text.delete(1.0, tk.END)
         if self.current_conflicts:
@@ -226,8 +262,11 @@ class ScheduleCalendarGUI:
                 self.conflicts_text.insert(tk.END, f"• {conflict}\n")
         else:
             self.conflicts_text.insert(tk.END, "No scheduling conflicts found.")
+        if self.current_schedule and self.current_bounds is not None:
+            self.conflicts_text.insert(tk.END, f"\n\n{self.current_bounds.summary()}")
     
     def export_icalendar(self):
+        from .dialogs.base_dialog import ExportOptionsDialog
         if not self.current_schedule:
             messagebox.showwarning("Warning", "Please generate a schedule first")
             return
@@ -251,6 +290,8 @@ class ScheduleCalendarGUI:
                 messagebox.showerror("Error", f"Failed to export schedule: {str(e)}")
     
     def export_csv(self):
+        from ..utils.export import save_csv_file
+        from .dialogs.base_dialog import ExportOptionsDialog
         if not self.current_schedule:
             messagebox.showwarning("Warning", "Please generate a schedule first")
             return
@@ -275,31 +316,43 @@ class ScheduleCalendarGUI:
     
     def manage_coaches(self):
         """Open coach management dialog"""
+        from .dialogs.coach_dialogs import CoachManagementDialog
         dialog = CoachManagementDialog(self.root, self.scheduler)
         self.root.wait_window(dialog.dialog)
-        self.current_schedule = []
-        self.current_conflicts = []
-        self.update_calendar_display()
-        self.update_conflicts_display()
+        self.config_changed("edit coaches")
 
     def manage_time_slots(self):
         """Open time slot management dialog"""
+        from .dialogs.time_slot_dialogs import TimeSlotManagementDialog
         dialog = TimeSlotManagementDialog(self.root, self.scheduler)
         self.root.wait_window(dialog.dialog)
-        self.current_schedule = []
-        self.current_conflicts = []
-        self.update_calendar_display()
-        self.update_conflicts_display()
+        self.config_changed("edit time slots")
 
     def manage_class_types(self):
         """Open class type management dialog"""
+        from .dialogs.class_dialogs import ClassDefinitionManagementDialog
         dialog = ClassDefinitionManagementDialog(self.root, self.scheduler)
         self.root.wait_window(dialog.dialog)
+        self.config_changed("edit class types")
+        
+    def config_changed(self, label: str):
+        """Record a config edit for undo and drop the now stale schedule"""
+        self.history.record(self.scheduler, label)
         self.current_schedule = []
         self.current_conflicts = []
         self.update_calendar_display()
         self.update_conflicts_display()
-        
+
+    def undo(self):
+        label = self.history.undo(self.scheduler)
+        if label is not None:
+            self.config_changed(label)
+
+    def redo(self):
+        label = self.history.redo(self.scheduler)
+        if label is not None:
+            self.config_changed(label)
+
     def run(self):
         self.root.mainloop() 
 
@@ -325,14 +378,41 @@ class ScheduleCalendarGUI:
         if filepath:
             try:
                 self.scheduler.load_from_json(filepath)
-                self.current_schedule = []
-                self.current_conflicts = []
-                self.update_calendar_display()
-                self.update_conflicts_display()
+                self.config_changed("load settings")
                 messagebox.showinfo("Success", f"Configuration loaded from {filepath}")
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to load configuration: {str(e)}") 
 
+    def import_entities(self):
+        """Bulk import coaches, time slots and classes from a CSV or JSONL file"""
+        from ..utils.importer import detect_format, import_entities
+        filepath = filedialog.askopenfilename(
+            filetypes=[("CSV or JSONL files", "*.csv *.jsonl *.ndjson"), ("All files", "*.*")],
+            title="Import Coaches, Time Slots and Classes"
+        )
+        if not filepath:
+            return
+        try:
+            with open(filepath, newline='', encoding='utf-8-sig') as f:
+                result = import_entities(self.scheduler, f, detect_format(filepath))
+        except (OSError, UnicodeDecodeError) as e:
+            messagebox.showerror("Error", f"Failed to read {filepath}: {str(e)}")
+            return
+        if not result.ok:
+            details = "\n".join(str(error) for error in result.errors[:20])
+            messagebox.showerror("Import Failed", f"{result.summary()}\n\n{details}")
+            return
+        self.config_changed("import")
+        messagebox.showinfo("Success", result.summary())
+
+    def find_substitute(self):
+        if not self.current_schedule:
+            messagebox.showwarning("Warning", "Please generate a schedule first")
+            return
+        from .dialogs.base_dialog import SubstituteDialog
+        dialog = SubstituteDialog(self.root, self.scheduler, self.current_schedule)
+        self.root.wait_window(dialog.dialog)
+
     def manual_assignment(self):
         from .dialogs.base_dialog import ManualAssignmentDialog
         dialog = ManualAssignmentDialog(self.root, self.scheduler)
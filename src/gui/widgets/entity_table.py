@@ -0,0 +1,160 @@
+import itertools
+import tkinter as tk
+from tkinter import ttk
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .prefix_index import PrefixIndex
+
+class EntityTable:
+    """Searchable, sortable ttk.Treeview that is updated row by row.
+
+    Rows are keyed by the entity object itself, so dialogs can insert, update
+    or delete a single row after an edit instead of rebuilding the whole list.
+    The Treeview only draws the rows that are visible, and rows hidden by the
+    search box are detached rather than deleted so clearing the filter is cheap.
+    """
+
+    FILTER_DELAY_MS = 120
+
+    def __init__(self, parent, columns: Sequence[Tuple[str, str, int]],
+                 row_values: Callable[[Any], Sequence[Any]], height: int = 12):
+        self.row_values = row_values
+        self.columns = [c[0] for c in columns]
+        self._ids = itertools.count()
+        self._iid_by_entity: Dict[int, str] = {}
+        self._entity_by_iid: Dict[str, Any] = {}
+        self._order: List[str] = []
+        self._row_cache: Dict[str, Tuple[str, ...]] = {}
+        self._index = PrefixIndex()
+        self._sort_column: Optional[str] = None
+        self._sort_reverse = False
+        self._filter_job = None
+        self._visible = None
+
+        self.frame = ttk.Frame(parent)
+
+        search_frame = ttk.Frame(self.frame)
+        search_frame.pack(fill=tk.X, pady=(0, 5))
+        ttk.Label(search_frame, text="Search:").pack(side=tk.LEFT)
+        self.search_var = tk.StringVar()
+        self.search_var.trace_add("write", lambda *_: self._schedule_filter())
+        ttk.Entry(search_frame, textvariable=self.search_var).pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(5, 0))
+
+        tree_frame = ttk.Frame(self.frame)
+        tree_frame.pack(fill=tk.BOTH, expand=True)
+        self.tree = ttk.Treeview(tree_frame, columns=self.columns, show="headings",
+                                 height=height, selectmode="browse")
+        for col_id, heading, width in columns:
+            self.tree.heading(col_id, text=heading, command=lambda c=col_id: self.sort_by(c))
+            self.tree.column(col_id, width=width, stretch=True)
+        scrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+
+    def _values(self, entity) -> Tuple[str, ...]:
+        return tuple(str(v) for v in self.row_values(entity))
+
+    def _sort_key(self, iid: str):
+        value = self._row_cache[iid][self.columns.index(self._sort_column)]
+        try:
+            return (0, float(value), "")
+        except ValueError:
+            return (1, 0.0, value.lower())
+
+    def load(self, entities):
+        """Populate the table once; later edits use insert/update/delete"""
+        self.tree.delete(*self.tree.get_children())
+        self._iid_by_entity.clear()
+        self._entity_by_iid.clear()
+        self._order.clear()
+        self._row_cache.clear()
+        self._index.clear()
+        self._visible = None
+        self.search_var.set("")
+        for entity in entities:
+            self.insert(entity, reveal=False)
+
+    def insert(self, entity, reveal: bool = True):
+        iid = str(next(self._ids))
+        values = self._values(entity)
+        self._iid_by_entity[id(entity)] = iid
+        self._entity_by_iid[iid] = entity
+        self._order.append(iid)
+        self._row_cache[iid] = values
+        self._index.add(iid, " ".join(values))
+        self.tree.insert("", tk.END, iid=iid, values=values)
+        if self._visible is not None:
+            # Keep a row added while filtering hidden unless it matches the query
+            self._visible = self._index.search(self.search_var.get())
+            if self._visible is not None and iid not in self._visible:
+                self.tree.detach(iid)
+                return
+        if reveal:
+            self.tree.see(iid)
+
+    def update(self, old_entity, new_entity):
+        iid = self._iid_by_entity.pop(id(old_entity), None)
+        if iid is None:
+            self.insert(new_entity)
+            return
+        values = self._values(new_entity)
+        self._iid_by_entity[id(new_entity)] = iid
+        self._entity_by_iid[iid] = new_entity
+        self._row_cache[iid] = values
+        self._index.update(iid, " ".join(values))
+        self.tree.item(iid, values=values)
+        if self._visible is not None:
+            self.apply_filter()
+
+    def delete(self, entity):
+        iid = self._iid_by_entity.pop(id(entity), None)
+        if iid is None:
+            return
+        del self._entity_by_iid[iid]
+        self._order.remove(iid)
+        del self._row_cache[iid]
+        self._index.remove(iid)
+        if self._visible is not None:
+            self._visible.discard(iid)
+        self.tree.delete(iid)
+
+    def selected(self):
+        """Return the entity for the selected row, or None"""
+        selection = self.tree.selection()
+        if not selection:
+            return None
+        return self._entity_by_iid.get(selection[0])
+
+    def sort_by(self, column: str):
+        if self._sort_column == column:
+            self._sort_reverse = not self._sort_reverse
+        else:
+            self._sort_column = column
+            self._sort_reverse = False
+        self._order.sort(key=self._sort_key, reverse=self._sort_reverse)
+        visible = [iid for iid in self._order if self._visible is None or iid in self._visible]
+        for position, iid in enumerate(visible):
+            self.tree.move(iid, "", position)
+
+    def _schedule_filter(self):
+        # Debounce typing so a fast typist triggers one filter pass, not one per key
+        if self._filter_job is not None:
+            self.frame.after_cancel(self._filter_job)
+        self._filter_job = self.frame.after(self.FILTER_DELAY_MS, self.apply_filter)
+
+    def apply_filter(self):
+        self._filter_job = None
+        matches = self._index.search(self.search_var.get())
+        self._visible = matches
+        position = 0
+        for iid in self._order:
+            if matches is None or iid in matches:
+                # move() also reattaches rows that an earlier filter detached
+                self.tree.move(iid, "", position)
+                position += 1
+            else:
+                self.tree.detach(iid)
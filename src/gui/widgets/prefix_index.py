@@ -0,0 +1,69 @@
+import bisect
+import re
+from typing import Dict, List, Optional, Set, Tuple
+
+_TOKEN_RE = re.compile(r"[\w:-]+")
+
+def tokenize(text: str) -> List[str]:
+    """Split display text into lowercase searchable tokens"""
+    return _TOKEN_RE.findall(text.lower())
+
+class PrefixIndex:
+    """Sorted token index answering "which keys have a word starting with ..." queries.
+
+    Entries are kept as a sorted list of (token, key) pairs so a prefix lookup
+    is a bisect plus a scan over the matching range only.
+    """
+
+    def __init__(self):
+        self._entries: List[Tuple[str, str]] = []
+        self._tokens: Dict[str, List[str]] = {}
+
+    def __len__(self):
+        return len(self._tokens)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._tokens
+
+    def add(self, key: str, text: str):
+        if key in self._tokens:
+            self.remove(key)
+        tokens = sorted(set(tokenize(text)))
+        self._tokens[key] = tokens
+        for token in tokens:
+            bisect.insort(self._entries, (token, key))
+
+    def remove(self, key: str):
+        for token in self._tokens.pop(key, []):
+            i = bisect.bisect_left(self._entries, (token, key))
+            if i < len(self._entries) and self._entries[i] == (token, key):
+                del self._entries[i]
+
+    def update(self, key: str, text: str):
+        self.add(key, text)
+
+    def clear(self):
+        self._entries.clear()
+        self._tokens.clear()
+
+    def _match_prefix(self, prefix: str) -> Set[str]:
+        keys = set()
+        i = bisect.bisect_left(self._entries, (prefix, ""))
+        while i < len(self._entries) and self._entries[i][0].startswith(prefix):
+            keys.add(self._entries[i][1])
+            i += 1
+        return keys
+
+    def search(self, query: str) -> Optional[Set[str]]:
+        """Return keys matching every word of the query, or None for an empty query"""
+        words = tokenize(query)
+        if not words:
+            return None
+        result = None
+        # Narrowest prefixes first so the intersection shrinks quickly
+        for word in sorted(words, key=len, reverse=True):
+            matches = self._match_prefix(word)
+            result = matches if result is None else result & matches
+            if not result:
+                break
+        return result
@@ -0,0 +1,99 @@
+"""
+What-if analysis of coach absences
+
+Removes each coach, or each set of coaches, and measures how many required
+classes can still be covered. The flow relaxation from bounds.py is
+compiled once for the full roster and re-solved per scenario with the
+absent coaches' capacity removed, so a scenario costs two small max flows.
+Scenarios are independent and run in worker processes when jobs > 1.
+"""
+
+import itertools
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .bounds import PlacementRelaxation
+
+# Relaxation shared by the scenarios a worker process runs
+_worker_relaxation: Optional[PlacementRelaxation] = None
+
+@dataclass
+class AbsenceImpact:
+    coaches: Tuple[str, ...]
+    covered: int                    # most required classes still placeable
+    lost: int                       # classes lost against the full roster
+    uncovered_classes: List[str]    # classes no remaining coach may teach in any slot
+
+    def to_dict(self) -> dict:
+        return {"coaches": list(self.coaches), "covered": self.covered, "lost": self.lost,
+                "uncovered_classes": self.uncovered_classes}
+
+@dataclass
+class AbsenceReport:
+    """Scenarios ranked by the classes they lose, worst first"""
+    required: int
+    baseline: int
+    impacts: List[AbsenceImpact]
+
+    @property
+    def single_points_of_failure(self) -> List[str]:
+        """Coaches whose absence alone loses classes"""
+        return [impact.coaches[0] for impact in self.impacts if len(impact.coaches) == 1 and impact.lost > 0]
+
+    def to_dict(self, limit: Optional[int] = None) -> dict:
+        return {
+            "required": self.required,
+            "baseline": self.baseline,
+            "scenarios": len(self.impacts),
+            "single_points_of_failure": self.single_points_of_failure,
+            "impacts": [impact.to_dict() for impact in self.impacts[:limit]],
+        }
+
+def _evaluate(relaxation: PlacementRelaxation, scenarios: Sequence[Tuple[int, ...]]) -> List[Tuple[int, List[str]]]:
+    results = []
+    for absent in scenarios:
+        bounds = relaxation.bounds(frozenset(absent))
+        results.append((bounds.required_classes - bounds.unassigned_classes, bounds.uncovered_classes))
+    return results
+
+def _init_worker(relaxation: PlacementRelaxation):
+    global _worker_relaxation
+    _worker_relaxation = relaxation
+
+def _evaluate_in_worker(scenarios: Sequence[Tuple[int, ...]]) -> List[Tuple[int, List[str]]]:
+    return _evaluate(_worker_relaxation, scenarios)
+
+def analyze_absences(scheduler, size: int = 1, groups: Optional[Sequence[Sequence[str]]] = None,
+                     jobs: int = 1, manual_assignments=None) -> AbsenceReport:
+    """Rank every combination of `size` absent coaches, or the named `groups`, by classes lost"""
+    relaxation = PlacementRelaxation(scheduler, manual_assignments)
+    positions: Dict[str, int] = {}
+    for k, name in enumerate(relaxation.coach_names):
+        positions.setdefault(name, k)
+    if groups is not None:
+        try:
+            scenarios = [tuple(positions[name] for name in group) for group in groups]
+        except KeyError as e:
+            raise ValueError(f"Unknown coach {e.args[0]!r}")
+    else:
+        scenarios = list(itertools.combinations(range(len(relaxation.coach_names)), size))
+
+    baseline = relaxation.bounds()
+    if jobs <= 1 or len(scenarios) < 2 * jobs:
+        results = _evaluate(relaxation, scenarios)
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        chunk = -(-len(scenarios) // (jobs * 4))
+        chunks = [scenarios[i:i + chunk] for i in range(0, len(scenarios), chunk)]
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(relaxation,)) as pool:
+            results = [result for part in pool.map(_evaluate_in_worker, chunks) for result in part]
+
+    covered_before = baseline.required_classes - baseline.unassigned_classes
+    already_uncovered = set(baseline.uncovered_classes)
+    impacts = [
+        AbsenceImpact(tuple(relaxation.coach_names[k] for k in absent), covered, covered_before - covered,
+                      [name for name in uncovered if name not in already_uncovered])
+        for absent, (covered, uncovered) in zip(scenarios, results)
+    ]
+    impacts.sort(key=lambda impact: (-impact.lost, -len(impact.uncovered_classes), impact.coaches))
+    return AbsenceReport(baseline.required_classes, covered_before, impacts)
@@ -0,0 +1,151 @@
+"""
+Coach availability as intervals on the minute-of-week axis
+
+Minute 0 is Monday 00:00 and the week has 7 * 1440 minutes. A coach may
+list windows such as "tuesday 06:00-07:30" or "thu 18:00-24:00"; a window
+ending at or before its start runs past midnight into the next day, and
+Sunday wraps to Monday. An AvailabilityIndex merges the windows into
+sorted, disjoint intervals, so whether a slot lies inside one is a single
+bisect.
+
+Coaches without windows keep the coarse available_days and preferred_times
+fields, which migrate to an index automatically: each preferred time of
+day on each available day becomes an interval. Those buckets only ever
+described when a class starts, so a migrated index checks a slot's start
+and leaves its end free, exactly as before.
+"""
+
+import bisect
+import re
+from functools import lru_cache
+from typing import FrozenSet, Iterable, List, Sequence, Tuple
+
+from .calendar_sync import DAY_INDEX
+from .data_classes import Coach, TimeSlot
+
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+DAY_NAMES = sorted(DAY_INDEX, key=DAY_INDEX.get)
+# Start-time buckets of the legacy preferred_times field
+TIME_BUCKETS = {"morning": (0, 12 * 60), "afternoon": (12 * 60, 17 * 60), "evening": (17 * 60, MINUTES_PER_DAY)}
+
+WINDOW = re.compile(r"^\s*([a-z]+)\s+(\d{1,2}):(\d{2})\s*-\s*(\d{1,2}):(\d{2})\s*$", re.IGNORECASE)
+
+def _day(name: str) -> int:
+    """Day number of a weekday name or an unambiguous prefix of at least three letters"""
+    name = name.lower()
+    matches = [DAY_INDEX[d] for d in DAY_NAMES if len(name) >= 3 and d.startswith(name)]
+    if len(matches) != 1:
+        raise ValueError(f"unknown day {name!r}")
+    return matches[0]
+
+def parse_window(text: str) -> Tuple[int, int]:
+    """(start, end) minutes of week of a window like "tue 06:00-07:30"; end may exceed the week"""
+    match = WINDOW.match(text)
+    if not match:
+        raise ValueError(f"availability window must look like 'tuesday 06:00-07:30', not {text!r}")
+    day, start_h, start_m, end_h, end_m = match.groups()
+    start, end = int(start_h) * 60 + int(start_m), int(end_h) * 60 + int(end_m)
+    if start >= MINUTES_PER_DAY or end > MINUTES_PER_DAY or int(start_m) >= 60 or int(end_m) >= 60:
+        raise ValueError(f"availability window has an invalid time: {text!r}")
+    if end <= start:
+        end += MINUTES_PER_DAY
+    base = _day(day) * MINUTES_PER_DAY
+    return base + start, base + end
+
+def format_window(start: int, end: int) -> str:
+    day, minute = divmod(start, MINUTES_PER_DAY)
+    end_minute = (end - day * MINUTES_PER_DAY) % MINUTES_PER_DAY or MINUTES_PER_DAY
+    return (f"{DAY_NAMES[day % 7]} {minute // 60:02d}:{minute % 60:02d}-"
+            f"{end_minute // 60:02d}:{end_minute % 60:02d}")
+
+def slot_window(slot: TimeSlot) -> Tuple[int, int]:
+    """(start, end) minutes of week of a slot"""
+    base = DAY_INDEX.get(slot.day.lower(), 0) * MINUTES_PER_DAY
+    return (base + slot.start_time.hour * 60 + slot.start_time.minute,
+            base + slot.end_time.hour * 60 + slot.end_time.minute)
+
+class AvailabilityIndex:
+    """Sorted, disjoint [start, end) intervals of a week with O(log n) containment"""
+
+    __slots__ = ("starts", "ends", "starts_only")
+
+    def __init__(self, intervals: Iterable[Tuple[int, int]] = (), starts_only: bool = False):
+        pieces = []
+        for start, end in intervals:
+            if end - start >= MINUTES_PER_WEEK:
+                pieces = [(0, MINUTES_PER_WEEK)]
+                break
+            start, end = start % MINUTES_PER_WEEK, start % MINUTES_PER_WEEK + (end - start)
+            if end > MINUTES_PER_WEEK:
+                pieces.extend([(start, MINUTES_PER_WEEK), (0, end - MINUTES_PER_WEEK)])
+            elif end > start:
+                pieces.append((start, end))
+        starts, ends = [], []
+        for start, end in sorted(pieces):
+            if ends and start <= ends[-1]:
+                ends[-1] = max(ends[-1], end)
+            else:
+                starts.append(start)
+                ends.append(end)
+        self.starts: Tuple[int, ...] = tuple(starts)
+        self.ends: Tuple[int, ...] = tuple(ends)
+        self.starts_only = starts_only
+
+    @classmethod
+    def from_legacy(cls, available_days: Iterable[str], preferred_times: Iterable[str]) -> "AvailabilityIndex":
+        """Index of the start times the old day and time-of-day fields allowed"""
+        buckets = [TIME_BUCKETS[t] for t in preferred_times if t in TIME_BUCKETS]
+        days = {DAY_INDEX[d.lower()] for d in available_days if d.lower() in DAY_INDEX}
+        return cls(((day * MINUTES_PER_DAY + start, day * MINUTES_PER_DAY + end)
+                    for day in days for start, end in buckets), starts_only=True)
+
+    def covers(self, start: int, end: int) -> bool:
+        """Whether [start, end) lies inside one interval (only start is checked for a migrated index)"""
+        i = bisect.bisect_right(self.starts, start) - 1
+        if i < 0:
+            return False
+        return start < self.ends[i] if self.starts_only else end <= self.ends[i]
+
+    def covers_slot(self, slot: TimeSlot) -> bool:
+        return self.covers(*slot_window(slot))
+
+    def days(self) -> FrozenSet[str]:
+        """Days on which any interval lies"""
+        days = set()
+        for start, end in zip(self.starts, self.ends):
+            days.update(DAY_NAMES[d] for d in range(start // MINUTES_PER_DAY, (end - 1) // MINUTES_PER_DAY + 1))
+        return frozenset(days)
+
+    def windows(self) -> List[str]:
+        return [format_window(start, end) for start, end in zip(self.starts, self.ends)]
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __eq__(self, other) -> bool:
+        return (isinstance(other, AvailabilityIndex)
+                and (self.starts, self.ends, self.starts_only) == (other.starts, other.ends, other.starts_only))
+
+    def __hash__(self) -> int:
+        return hash((self.starts, self.ends, self.starts_only))
+
+    def __repr__(self) -> str:
+        return f"AvailabilityIndex({self.windows()!r}{', starts_only=True' if self.starts_only else ''})"
+
+@lru_cache(maxsize=4096)
+def _index(windows: Tuple[str, ...], days: Tuple[str, ...], times: Tuple[str, ...]) -> AvailabilityIndex:
+    if windows:
+        return AvailabilityIndex(parse_window(w) for w in windows)
+    return AvailabilityIndex.from_legacy(days, times)
+
+def availability_index(coach: Coach) -> AvailabilityIndex:
+    """The coach's windows, or its migrated days and preferred times; cached by their values"""
+    return _index(tuple(coach.availability), tuple(coach.available_days), tuple(coach.preferred_times))
+
+def validate_windows(windows: Sequence[str]) -> List[str]:
+    """The windows stripped of blank entries; raises ValueError naming the first malformed one"""
+    windows = [w.strip() for w in windows if w and w.strip()]
+    for window in windows:
+        parse_window(window)
+    return windows
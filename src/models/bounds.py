@@ -0,0 +1,352 @@
+"""
+Lower bounds on unassigned classes, idle slot time and load imbalance
+
+Relaxations of the placement problem give values no schedule of a config
+can beat: a max flow of class minutes into slot minutes bounds unassigned
+and idle minutes, a max flow of class instances into coach capacity bounds
+unassigned classes, and spreading coach loads continuously, whatever
+the number of classes placed, bounds load imbalance. Comparing a schedule with them gives its optimality gap; a zero
+gap means the configuration, not solver time, is the limit.
+"""
+
+import math
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from typing import Collection, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .constraints import FORBIDDEN
+from .data_classes import ScheduledClass, TimeSlot
+from .scoring import ScoreWeights
+
+TOLERANCE = 1e-6
+# Grid refinements and bisection steps of the load imbalance relaxation
+SPREAD_ROUNDS = 5
+SPREAD_POINTS = 33
+BISECTION_STEPS = 60
+
+class FlowNetwork:
+    """Integer max flow (Dinic) on a small directed graph"""
+
+    def __init__(self, size: int):
+        # edges[u] holds [target, residual capacity, index of the reverse edge]
+        self.edges: List[List[list]] = [[] for _ in range(size)]
+
+    def add_edge(self, u: int, v: int, capacity: int):
+        self.edges[u].append([v, capacity, len(self.edges[v])])
+        self.edges[v].append([u, 0, len(self.edges[u]) - 1])
+
+    def max_flow(self, source: int, sink: int) -> int:
+        flow = 0
+        unlimited = sum(edge[1] for edge in self.edges[source])
+        while True:
+            level = [-1] * len(self.edges)
+            level[source] = 0
+            queue = deque([source])
+            while queue:
+                u = queue.popleft()
+                for v, capacity, _ in self.edges[u]:
+                    if capacity > 0 and level[v] < 0:
+                        level[v] = level[u] + 1
+                        queue.append(v)
+            if level[sink] < 0:
+                return flow
+            progress = [0] * len(self.edges)
+
+            def push(u: int, limit: int) -> int:
+                if u == sink:
+                    return limit
+                edges = self.edges[u]
+                while progress[u] < len(edges):
+                    edge = edges[progress[u]]
+                    v, capacity, reverse = edge
+                    if capacity > 0 and level[v] == level[u] + 1:
+                        pushed = push(v, min(limit, capacity))
+                        if pushed:
+                            edge[1] -= pushed
+                            self.edges[v][reverse][1] += pushed
+                            return pushed
+                    progress[u] += 1
+                return 0
+
+            while True:
+                pushed = push(source, unlimited)
+                if not pushed:
+                    break
+                flow += pushed
+
+def _slot_minutes(slot: TimeSlot) -> int:
+    return (slot.end_time.hour * 60 + slot.end_time.minute) - (slot.start_time.hour * 60 + slot.start_time.minute)
+
+def _distinct_slots(time_slots: Sequence[TimeSlot]) -> Dict[TimeSlot, int]:
+    """First position of each slot; equal slots share their bookings when generating"""
+    positions: Dict[TimeSlot, int] = {}
+    for i, slot in enumerate(time_slots):
+        positions.setdefault(slot, i)
+    return positions
+
+def _fixed_placements(scheduler, manual_assignments) -> List[ScheduledClass]:
+    """Manual assignments and fixed classes, which generate_schedule places first"""
+    fixed = [ScheduledClass(ma['class_def'], ma['time_slot'], ma['coach'], is_fixed=True)
+             for ma in manual_assignments or []]
+    return fixed + list(scheduler.fixed_classes)
+
+def _min_spread(lower: np.ndarray, upper: np.ndarray, weights: np.ndarray, total: Optional[float] = None) -> float:
+    """Smallest std of ratios r with lower <= r <= upper and, if given, sum(weights * r) == total.
+
+    For a fixed centre t the closest feasible ratios are clip(t + nu * weights),
+    with nu found by bisection (nu = 0 without a total); the best t is
+    searched on refined grids.
+    """
+    if not len(lower):
+        return 0.0
+    if total is not None:
+        total = min(max(total, float(weights @ lower)), float(weights @ upper))
+    low_t, high_t = float(lower.min()), float(upper.max())
+    reach = (high_t - low_t + 1.0) / float(weights.min())
+    best = math.inf
+    for _ in range(SPREAD_ROUNDS):
+        centres = np.linspace(low_t, high_t, SPREAD_POINTS)
+        nu_low, nu_high = np.zeros(SPREAD_POINTS), np.zeros(SPREAD_POINTS)
+        if total is not None:
+            nu_low, nu_high = nu_low - reach, nu_high + reach
+            for _ in range(BISECTION_STEPS):
+                nu = (nu_low + nu_high) / 2
+                ratios = np.clip(centres[:, None] + nu[:, None] * weights, lower, upper)
+                over = ratios @ weights > total
+                nu_high = np.where(over, nu, nu_high)
+                nu_low = np.where(over, nu_low, nu)
+        spreads = np.clip(centres[:, None] + nu_low[:, None] * weights, lower, upper).std(axis=1)
+        i = int(spreads.argmin())
+        best = min(best, float(spreads[i]))
+        step = (high_t - low_t) / (SPREAD_POINTS - 1)
+        low_t, high_t = centres[i] - step, centres[i] + step
+    return best
+
+@dataclass
+class PlacementBounds:
+    """Lower bounds shared by every schedule of one config and its fixed classes"""
+    required_classes: int
+    required_minutes: int
+    unassigned_classes: int
+    unassigned_minutes: int
+    idle_minutes: int
+    ratio_lower: np.ndarray      # per coach, the load / max ratio range reachable
+    ratio_upper: np.ndarray
+    coach_max: np.ndarray
+    uncovered_classes: List[str] = field(default_factory=list)   # no eligible coach and slot at all
+
+    def load_imbalance(self) -> float:
+        """Lowest load imbalance (as ScoringModel measures it) of any schedule, however many classes it places"""
+        spread = _min_spread(self.ratio_lower, self.ratio_upper, self.coach_max)
+        return round(math.floor(spread / TOLERANCE) * TOLERANCE, 6)
+
+class PlacementRelaxation:
+    """The flow relaxations of one config, compiled once and solvable for any set of absent coaches"""
+
+    def __init__(self, scheduler, manual_assignments=None):
+        fixed = _fixed_placements(scheduler, manual_assignments)
+        used_slots = {sc.time_slot for sc in fixed}
+        used_classes = {sc.class_def for sc in fixed}
+        coaches, time_slots = scheduler.coaches, scheduler.time_slots
+        compiled = scheduler.constraints.compile(coaches, time_slots, scheduler.class_definitions)
+        self.coach_names = [c.name for c in coaches]
+        fixed_load = Counter(sc.coach.name for sc in fixed)
+        self.fixed_load = [fixed_load[c.name] for c in coaches]
+        self.capacity = [max(c.max_weekly_classes - fixed_load[c.name], 0) for c in coaches]
+        self.coach_max = np.array([max(c.max_weekly_classes, 1) for c in coaches], dtype=np.float64)
+
+        # Slots and classes that every rule sees alike, with equal lengths, are interchangeable
+        slot_groups: Dict[tuple, List[int]] = {}
+        for slot, i in _distinct_slots(time_slots).items():
+            if slot not in used_slots:
+                slot_groups.setdefault((compiled.slot_signature(i), _slot_minutes(slot)), []).append(i)
+        class_groups: Dict[tuple, List[int]] = {}
+        self.durations = []
+        for i, class_def in enumerate(scheduler.class_definitions):
+            if class_def not in used_classes and class_def.weekly_count > 0:
+                class_groups.setdefault((compiled.class_signature(i), class_def.duration_minutes), []).append(i)
+                self.durations.extend([class_def.duration_minutes] * class_def.weekly_count)
+        self.durations.sort()
+        class_keys = list(class_groups)
+        self.class_names = [[scheduler.class_definitions[i].name for i in class_groups[key]] for key in class_keys]
+        self.class_counts = [sum(scheduler.class_definitions[i].weekly_count for i in class_groups[key])
+                             for key in class_keys]
+        self.class_minutes = [duration for _, duration in class_keys]
+        self.slot_minutes = [length * len(group) for (_, length), group in slot_groups.items()]
+
+        # Coaches allowed for each class group in each slot group it fits, as positions
+        able: Dict[tuple, frozenset] = {}
+        self.fits: List[Tuple[int, int, frozenset]] = []
+        for ci, (class_sig, duration) in enumerate(class_keys):
+            class_i = class_groups[class_keys[ci]][0]
+            for si, ((slot_sig, length), group) in enumerate(slot_groups.items()):
+                if duration > length:
+                    continue
+                key = (slot_sig, class_sig)
+                if key not in able:
+                    costs = compiled.coach_costs(group[0], class_i)
+                    able[key] = frozenset(k for k, cost in enumerate(costs) if cost != FORBIDDEN)
+                if able[key]:
+                    self.fits.append((ci, si, able[key]))
+
+        fixed_minutes = Counter()
+        for sc in fixed:
+            fixed_minutes[sc.time_slot] += sc.class_def.duration_minutes
+        self.fixed_idle_minutes = sum(max(_slot_minutes(slot) - fixed_minutes[slot], 0)
+                                      for slot in _distinct_slots(time_slots) if slot in used_slots)
+
+    def bounds(self, absent: Collection[int] = ()) -> PlacementBounds:
+        """Bounds with the coaches at the `absent` positions unavailable"""
+        available = frozenset(k for k, cap in enumerate(self.capacity) if cap > 0 and k not in absent)
+        n_classes, n_slots, n_coaches = len(self.class_counts), len(self.slot_minutes), len(self.capacity)
+        teachers = [set() for _ in range(n_classes)]
+        fits = []
+        for ci, si, coaches in self.fits:
+            coaches = coaches & available
+            if coaches:
+                fits.append((ci, si))
+                teachers[ci] |= coaches
+
+        # Class minutes into slot minutes
+        minutes = FlowNetwork(n_classes + n_slots + 2)
+        sink = n_classes + n_slots + 1
+        for ci, count in enumerate(self.class_counts):
+            minutes.add_edge(0, 1 + ci, count * self.class_minutes[ci])
+        for si, slot_minutes in enumerate(self.slot_minutes):
+            minutes.add_edge(1 + n_classes + si, sink, slot_minutes)
+        for ci, si in fits:
+            minutes.add_edge(1 + ci, 1 + n_classes + si, self.class_counts[ci] * self.class_minutes[ci])
+        placeable_minutes = minutes.max_flow(0, sink)
+
+        # Class instances into coach capacity
+        instances = FlowNetwork(n_classes + n_coaches + 2)
+        sink = n_classes + n_coaches + 1
+        for ci, teaching in enumerate(teachers):
+            instances.add_edge(0, 1 + ci, self.class_counts[ci])
+            for k in teaching:
+                instances.add_edge(1 + ci, 1 + n_classes + k, self.class_counts[ci])
+        for k in available:
+            instances.add_edge(1 + n_classes + k, sink, self.capacity[k])
+        placeable_classes = instances.max_flow(0, sink)
+
+        durations = self.durations
+        required_minutes = sum(durations)
+        short_classes = len(durations) - placeable_classes
+        # At most placeable_classes instances are placed, at best the longest ones
+        placeable_minutes = min(placeable_minutes, sum(durations[short_classes:]))
+        unassigned_minutes = required_minutes - placeable_minutes
+        # Fewest classes whose minutes cover the minutes that cannot be placed
+        missing, covered = 0, 0
+        for duration in reversed(durations):
+            if covered >= unassigned_minutes:
+                break
+            covered += duration
+            missing += 1
+
+        reach = Counter()
+        for ci, teaching in enumerate(teachers):
+            for k in teaching:
+                reach[k] += self.class_counts[ci]
+        base = np.array(self.fixed_load, dtype=np.float64)
+        extra = np.array([min(self.capacity[k], reach[k]) for k in range(n_coaches)], dtype=np.float64)
+        return PlacementBounds(
+            len(durations), required_minutes, max(short_classes, missing), unassigned_minutes,
+            sum(self.slot_minutes) - placeable_minutes + self.fixed_idle_minutes,
+            base / self.coach_max, (base + extra) / self.coach_max, self.coach_max,
+            sorted(name for ci, teaching in enumerate(teachers) if not teaching for name in self.class_names[ci]))
+
+def compute_bounds(scheduler, manual_assignments=None) -> PlacementBounds:
+    """Flow relaxations of the placement problem generate_schedule solves"""
+    return PlacementRelaxation(scheduler, manual_assignments).bounds()
+
+@dataclass
+class MetricBound:
+    actual: float
+    lower_bound: float
+
+    @property
+    def gap(self) -> float:
+        return max(self.actual - self.lower_bound, 0.0)
+
+@dataclass
+class BoundReport:
+    """A schedule's metrics next to the lower bounds of its config"""
+    metrics: Dict[str, MetricBound]
+    objective: float
+    objective_bound: float
+
+    @property
+    def gap(self) -> float:
+        """Relative gap of the weighted objective; 0 when the schedule is provably optimal for it.
+
+        Differences within TOLERANCE count as none, as in can_improve.
+        """
+        if not self.can_improve or self.objective <= TOLERANCE or self.objective - self.objective_bound <= TOLERANCE:
+            return 0.0
+        return (self.objective - self.objective_bound) / self.objective
+
+    @property
+    def can_improve(self) -> bool:
+        """Whether any metric is above its bound, so more solver time may find a better schedule"""
+        return any(m.gap > TOLERANCE for m in self.metrics.values())
+
+    def summary(self) -> str:
+        forced = self.metrics["unassigned_classes"].lower_bound
+        limit = f" At least {forced:g} classes cannot be placed with this configuration." if forced else ""
+        if not self.can_improve:
+            return "Schedule meets its lower bounds; more solver time cannot help." + limit
+        behind = ", ".join(f"{name.replace('_', ' ')} {m.actual:g} (bound {m.lower_bound:g})"
+                           for name, m in self.metrics.items() if m.gap > TOLERANCE)
+        if not self.gap:
+            # Only metrics outside the weighted objective are behind
+            return f"Objective meets its lower bound; more solver time may help with {behind}." + limit
+        gap = f"{self.gap:.1%}" if self.gap >= 0.001 else "under 0.1%"
+        return f"Optimality gap {gap}; more solver time may help with {behind}." + limit
+
+    def to_dict(self) -> dict:
+        return {
+            "gap": round(self.gap, 6),
+            "can_improve": self.can_improve,
+            "objective": round(self.objective, 6),
+            "objective_bound": round(self.objective_bound, 6),
+            "summary": self.summary(),
+            "metrics": {name: {"actual": round(m.actual, 6), "lower_bound": round(m.lower_bound, 6),
+                               "gap": round(m.gap, 6)} for name, m in self.metrics.items()},
+        }
+
+def bound_report(scheduler, schedule: Sequence[ScheduledClass], manual_assignments=None,
+                 weights: Optional[ScoreWeights] = None, bounds: Optional[PlacementBounds] = None) -> BoundReport:
+    """Compare a generated schedule with the lower bounds of its config"""
+    weights = weights or ScoreWeights()
+    bounds = bounds or compute_bounds(scheduler, manual_assignments)
+    used_classes = {sc.class_def for sc in _fixed_placements(scheduler, manual_assignments)}
+    required, duration = Counter(), {}
+    for class_def in scheduler.class_definitions:
+        if class_def not in used_classes:
+            required[class_def.name] += class_def.weekly_count
+            duration[class_def.name] = class_def.duration_minutes
+    placed = Counter(sc.class_def.name for sc in schedule if not sc.is_fixed)
+    missing = {name: max(count - placed[name], 0) for name, count in required.items()}
+    booked = Counter()
+    for sc in schedule:
+        booked[sc.time_slot] += sc.class_def.duration_minutes
+    idle_minutes = sum(max(_slot_minutes(slot) - booked[slot], 0) for slot in _distinct_slots(scheduler.time_slots))
+    load = Counter(sc.coach.name for sc in schedule)
+    ratios = np.array([load[c.name] for c in scheduler.coaches], dtype=np.float64) / bounds.coach_max
+    imbalance = round(float(ratios.std()), 6) if len(ratios) else 0.0
+
+    metrics = {
+        "unassigned_classes": MetricBound(sum(missing.values()), bounds.unassigned_classes),
+        "unassigned_minutes": MetricBound(sum(n * duration[name] for name, n in missing.items()),
+                                          bounds.unassigned_minutes),
+        "idle_minutes": MetricBound(idle_minutes, bounds.idle_minutes),
+        # Capped by the actual value for schedules outside the relaxation, e.g. overloaded fixed coaches
+        "load_imbalance": MetricBound(imbalance, min(bounds.load_imbalance(), imbalance)),
+    }
+    def weighted(value):
+        return (weights.unplaced * value(metrics["unassigned_classes"])
+                + weights.idle_minutes * value(metrics["idle_minutes"])
+                + weights.load_imbalance * value(metrics["load_imbalance"]))
+    return BoundReport(metrics, weighted(lambda m: m.actual), weighted(lambda m: m.lower_bound))
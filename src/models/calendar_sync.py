@@ -0,0 +1,208 @@
+import re
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, Iterable, List, Optional
+
+from .data_classes import ScheduledClass
+
+DAY_INDEX = {
+    'monday': 0, 'tuesday': 1, 'wednesday': 2, 'thursday': 3,
+    'friday': 4, 'saturday': 5, 'sunday': 6
+}
+
+@dataclass(frozen=True)
+class CalendarEvent:
+    """A weekly class as a calendar event with a stable identity.
+
+    The uid is derived from the day, the class name and the ordinal of that
+    class on that day, so it survives regeneration as long as the class is
+    still taught on the same day.
+    """
+    uid: str
+    day: str
+    start_time: time
+    end_time: time
+    summary: str
+    class_type: str
+    coach: str
+    is_fixed: bool = False
+    location: Optional[str] = None
+
+    def content(self):
+        """Fields whose change makes an event an update rather than the same event"""
+        return (self.start_time, self.end_time, self.summary, self.class_type, self.coach, self.is_fixed,
+                self.location)
+
+    def to_dict(self):
+        return {
+            'uid': self.uid, 'day': self.day,
+            'start_time': self.start_time.strftime('%H:%M'), 'end_time': self.end_time.strftime('%H:%M'),
+            'summary': self.summary, 'class_type': self.class_type,
+            'coach': self.coach, 'is_fixed': self.is_fixed, 'location': self.location,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            uid=data['uid'], day=data['day'],
+            start_time=time.fromisoformat(data['start_time']), end_time=time.fromisoformat(data['end_time']),
+            summary=data['summary'], class_type=data['class_type'],
+            coach=data['coach'], is_fixed=data.get('is_fixed', False), location=data.get('location'),
+        )
+
+def _slug(text: str) -> str:
+    return re.sub(r'[^a-z0-9]+', '-', text.lower()).strip('-') or 'class'
+
+def _add_minutes(t: time, minutes: int) -> time:
+    total = min(t.hour * 60 + t.minute + minutes, 23 * 60 + 59)
+    return time(total // 60, total % 60)
+
+def schedule_events(schedule: List[ScheduledClass]) -> Dict[str, CalendarEvent]:
+    """Turn a schedule into calendar events keyed by their stable uid"""
+    # Classes sharing a slot run back to back in slot_position order
+    by_slot = defaultdict(list)
+    for sc in schedule:
+        by_slot[sc.time_slot].append(sc)
+    timed = []
+    for slot, classes in by_slot.items():
+        start = slot.start_time
+        for sc in sorted(classes, key=lambda c: c.slot_position):
+            end = _add_minutes(start, sc.class_def.duration_minutes)
+            timed.append((sc, start, end))
+            start = end
+
+    # Number repeated classes per day in time order to get their identity
+    timed.sort(key=lambda item: (item[0].time_slot.day.lower(), item[0].class_def.name, item[1]))
+    events = {}
+    ordinals = defaultdict(int)
+    for sc, start, end in timed:
+        day = sc.time_slot.day.lower()
+        key = (day, sc.class_def.name)
+        uid = f"{day}-{_slug(sc.class_def.name)}-{ordinals[key]}@bjjclub.local"
+        ordinals[key] += 1
+        events[uid] = CalendarEvent(
+            uid=uid, day=day, start_time=start, end_time=end,
+            summary=str(sc.class_def), class_type=sc.class_def.class_type.value,
+            coach=sc.coach.name, is_fixed=sc.is_fixed, location=sc.time_slot.location,
+        )
+    return events
+
+@dataclass
+class ScheduleDiff:
+    added: List[CalendarEvent] = field(default_factory=list)
+    changed: List[CalendarEvent] = field(default_factory=list)
+    cancelled: List[CalendarEvent] = field(default_factory=list)
+    unchanged: int = 0
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.added or self.changed or self.cancelled)
+
+    def to_dict(self):
+        return {
+            'added': [e.to_dict() for e in self.added],
+            'changed': [e.to_dict() for e in self.changed],
+            'cancelled': [e.to_dict() for e in self.cancelled],
+            'unchanged': self.unchanged,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            added=[CalendarEvent.from_dict(e) for e in data.get('added', [])],
+            changed=[CalendarEvent.from_dict(e) for e in data.get('changed', [])],
+            cancelled=[CalendarEvent.from_dict(e) for e in data.get('cancelled', [])],
+            unchanged=data.get('unchanged', 0),
+        )
+
+def diff_events(old: Dict[str, CalendarEvent], new: Dict[str, CalendarEvent],
+                moved: bool = False) -> ScheduleDiff:
+    """Compare two schedule versions event by event; with moved=True every kept event's dates changed"""
+    diff = ScheduleDiff()
+    for uid, event in new.items():
+        previous = old.get(uid)
+        if previous is None:
+            diff.added.append(event)
+        elif moved or previous.content() != event.content():
+            diff.changed.append(event)
+        else:
+            diff.unchanged += 1
+    diff.cancelled = [event for uid, event in old.items() if uid not in new]
+    return diff
+
+def diff_schedules(old: List[ScheduledClass], new: List[ScheduledClass]) -> ScheduleDiff:
+    return diff_events(schedule_events(old), schedule_events(new))
+
+def next_sequences(sequences: Dict[str, int], diff: ScheduleDiff) -> Dict[str, int]:
+    """Advance SEQUENCE numbers for events that changed, were cancelled or came back"""
+    updated = dict(sequences)
+    for event in diff.changed + diff.cancelled:
+        updated[event.uid] = updated.get(event.uid, 0) + 1
+    for event in diff.added:
+        if event.uid in updated:
+            updated[event.uid] += 1
+    return updated
+
+def _first_date(start_date: date, day: str) -> date:
+    return start_date + timedelta(days=(DAY_INDEX[day] - start_date.weekday()) % 7)
+
+def _event_lines(event: CalendarEvent, start_date: date, weeks: Optional[int], stamp: str,
+                 sequence: int = 0, cancelled: bool = False) -> List[str]:
+    event_date = _first_date(start_date, event.day)
+    start_str = datetime.combine(event_date, event.start_time).strftime('%Y%m%dT%H%M%S')
+    end_str = datetime.combine(event_date, event.end_time).strftime('%Y%m%dT%H%M%S')
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:{event.uid}",
+        f"DTSTAMP:{stamp}",
+        f"SEQUENCE:{sequence}",
+        f"DTSTART:{start_str}",
+        f"DTEND:{end_str}",
+        "RRULE:FREQ=WEEKLY" if weeks is None else f"RRULE:FREQ=WEEKLY;COUNT={weeks}",
+        f"SUMMARY:{event.summary}",
+        f"DESCRIPTION:Coach: {event.coach}" + ("\\nFixed Class" if event.is_fixed else ""),
+        f"LOCATION:{event.location or 'BJJ Club'}",
+    ]
+    if cancelled:
+        lines.append("STATUS:CANCELLED")
+    else:
+        lines.extend([
+            "STATUS:CONFIRMED",
+            "BEGIN:VALARM",
+            "TRIGGER:-PT15M",
+            "ACTION:DISPLAY",
+            "DESCRIPTION:Class starting in 15 minutes",
+            "END:VALARM",
+        ])
+    lines.append("END:VEVENT")
+    return lines
+
+def render_calendar(events: Iterable[CalendarEvent], start_date: Optional[date] = None, weeks: Optional[int] = 4,
+                    sequences: Optional[Dict[str, int]] = None,
+                    cancelled: Iterable[CalendarEvent] = ()) -> str:
+    """Render events as an iCalendar document; each class recurs weekly for `weeks`, or without end if None"""
+    if start_date is None:
+        start_date = date.today()
+    sequences = sequences or {}
+    stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+    lines = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "PRODID:-//BJJ Club//Schedule//EN",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH"
+    ]
+    for event in events:
+        if event.day in DAY_INDEX:
+            lines.extend(_event_lines(event, start_date, weeks, stamp, sequences.get(event.uid, 0)))
+    for event in cancelled:
+        if event.day in DAY_INDEX:
+            lines.extend(_event_lines(event, start_date, weeks, stamp, sequences.get(event.uid, 0), cancelled=True))
+    lines.append("END:VCALENDAR")
+    return "\n".join(lines)
+
+def render_diff(diff: ScheduleDiff, sequences: Dict[str, int], start_date: Optional[date] = None,
+                weeks: Optional[int] = 4) -> str:
+    """Render only the added, changed and cancelled events of a diff"""
+    return render_calendar(diff.added + diff.changed, start_date, weeks, sequences, diff.cancelled)
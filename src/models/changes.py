@@ -0,0 +1,132 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set
+
+COLLECTIONS = ("coaches", "time_slots", "class_definitions")
+
+@dataclass
+class ChangeSet:
+    """Entities to persist since the last save, by collection and stable id"""
+    upserts: Dict[str, Dict[int, int]] = field(default_factory=dict)  # collection -> {id: index}
+    deletes: Dict[str, Set[int]] = field(default_factory=dict)
+    order_changed: bool = False
+    full: bool = False
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.upserts or self.deletes or self.order_changed or self.full)
+
+class ChangeTracker:
+    """Stable ids for the entities of a scheduler and which of them changed.
+
+    Every entity gets an id that survives edits and reordering, so a store
+    can keep one row per entity and rewrite only the rows that changed.
+    Mutations must go through the scheduler's add/update/remove methods;
+    if the lists were changed directly the tracker falls back to a full save.
+    It keeps the entity it last saw at each position, so a list that was
+    replaced or reshuffled without changing length is caught too.
+    """
+
+    def __init__(self):
+        self.ids: Dict[str, List[int]] = {c: [] for c in COLLECTIONS}
+        self._entities: Dict[str, List[Any]] = {c: [] for c in COLLECTIONS}
+        self.next_id = 1
+        self._dirty: Dict[str, Set[int]] = {c: set() for c in COLLECTIONS}
+        self._deleted: Dict[str, Set[int]] = {c: set() for c in COLLECTIONS}
+        self._order_changed = False
+        self._full = True
+        # Bumped on every tracked change, so caches can tell whether the config moved
+        self.revision = 0
+
+    def _new_id(self) -> int:
+        entity_id = self.next_id
+        self.next_id += 1
+        return entity_id
+
+    def reset(self, scheduler):
+        """Assign fresh ids to every entity; the next save writes everything"""
+        self.ids = {c: [self._new_id() for _ in getattr(scheduler, c)] for c in COLLECTIONS}
+        self._entities = {c: list(getattr(scheduler, c)) for c in COLLECTIONS}
+        for c in COLLECTIONS:
+            self._dirty[c].clear()
+            self._deleted[c].clear()
+        self._order_changed = True
+        self._full = True
+        self.revision += 1
+
+    def restore(self, scheduler, ids: Dict[str, List[int]], next_id: int):
+        """Adopt ids loaded from a store for the scheduler's entities; nothing is dirty afterwards"""
+        self.ids = {c: list(ids.get(c, [])) for c in COLLECTIONS}
+        self._entities = {c: list(getattr(scheduler, c)) for c in COLLECTIONS}
+        self.next_id = next_id
+        self.revision += 1
+        self.mark_clean()
+
+    # Once the lists were changed behind the tracker's back, positions may not
+    # exist here; those calls are skipped and pending() falls back to a full save
+
+    def added(self, collection: str, entity, index: Optional[int] = None):
+        entity_id = self._new_id()
+        ids = self.ids[collection]
+        position = len(ids) if index is None else index
+        ids.insert(position, entity_id)
+        self._entities[collection].insert(position, entity)
+        self._dirty[collection].add(entity_id)
+        self._order_changed = True
+        self.revision += 1
+
+    def updated(self, collection: str, index: int, entity):
+        self.revision += 1
+        if index < len(self.ids[collection]):
+            self._dirty[collection].add(self.ids[collection][index])
+            self._entities[collection][index] = entity
+
+    def removed(self, collection: str, index: int):
+        self.revision += 1
+        if index >= len(self.ids[collection]):
+            return
+        entity_id = self.ids[collection].pop(index)
+        del self._entities[collection][index]
+        self._dirty[collection].discard(entity_id)
+        self._deleted[collection].add(entity_id)
+        self._order_changed = True
+
+    def in_sync(self, scheduler) -> bool:
+        """Whether each tracked position still holds the entity the tracker saw there"""
+        for c in COLLECTIONS:
+            entities, seen = getattr(scheduler, c), self._entities[c]
+            if len(entities) != len(seen) or any(a is not b for a, b in zip(entities, seen)):
+                return False
+        return True
+
+    def unchanged_since(self, saved_ids: Dict[str, List[int]]) -> Dict[str, Dict[int, int]]:
+        """{collection: {position: position in saved_ids}} of entities untouched since that save"""
+        if self._full:
+            return {c: {} for c in COLLECTIONS}
+        unchanged = {}
+        for c in COLLECTIONS:
+            before = {entity_id: i for i, entity_id in enumerate(saved_ids.get(c, []))}
+            unchanged[c] = {i: before[entity_id] for i, entity_id in enumerate(self.ids[c])
+                            if entity_id in before and entity_id not in self._dirty[c]}
+        return unchanged
+
+    def pending(self, scheduler) -> ChangeSet:
+        """What a store has to write to catch up with the scheduler"""
+        if not self.in_sync(scheduler):
+            self.reset(scheduler)
+        if self._full:
+            upserts = {c: {entity_id: i for i, entity_id in enumerate(self.ids[c])} for c in COLLECTIONS}
+            return ChangeSet(upserts, {}, True, True)
+        upserts = {}
+        for c in COLLECTIONS:
+            if self._dirty[c]:
+                positions = {entity_id: i for i, entity_id in enumerate(self.ids[c])}
+                upserts[c] = {entity_id: positions[entity_id] for entity_id in self._dirty[c]}
+        deletes = {c: set(ids) for c, ids in self._deleted.items() if ids}
+        return ChangeSet(upserts, deletes, self._order_changed, False)
+
+    def mark_clean(self):
+        for c in COLLECTIONS:
+            self._dirty[c].clear()
+            self._deleted[c].clear()
+        self._order_changed = False
+        self._full = False
@@ -0,0 +1,275 @@
+"""
+Pluggable hard and soft constraints on (coach, time slot, class) placements
+
+Each Rule reads some of the three axes (coach, slot, class), reducing
+each entity to a small hashable key (a coach's availability index, a
+slot's minute-of-week window, a class's type), and scores a combination
+of keys: 0 when satisfied, otherwise a violation degree. Hard rules
+forbid a placement; soft rules add weight * degree to its cost. A ConstraintSet is compiled
+once per run into one cost table per group of rules over the same axes,
+sized by the distinct keys rather than by the number of entities, so
+solver loops pay list lookups per candidate instead of rule calls.
+"""
+
+import itertools
+import math
+from dataclasses import dataclass, replace
+from typing import ClassVar, Dict, Hashable, List, Optional, Sequence, Tuple
+
+from .availability import availability_index, slot_window
+from .data_classes import ClassDefinition, Coach, TimeSlot
+from .enums import ClassType
+
+FORBIDDEN = math.inf
+AXES = ("coach", "slot", "class")
+
+def time_category(slot: TimeSlot) -> str:
+    """Categorize a time slot as morning, afternoon, or evening"""
+    hour = slot.start_time.hour
+    if hour < 12:
+        return "morning"
+    elif hour < 17:
+        return "afternoon"
+    return "evening"
+
+@dataclass
+class Rule:
+    """Base rule; `axes` names the entities whose keys violation() reads"""
+    axes: ClassVar[Tuple[str, ...]] = AXES
+    name: str = ""
+    hard: bool = True
+    weight: float = 1.0
+
+    def coach_key(self, coach: Coach) -> Hashable:
+        return None
+
+    def slot_key(self, slot: TimeSlot) -> Hashable:
+        return None
+
+    def class_key(self, class_def: ClassDefinition) -> Hashable:
+        return None
+
+    def violation(self, coach_key, slot_key, class_key) -> float:
+        raise NotImplementedError
+
+@dataclass
+class CoachTeachesType(Rule):
+    """The coach must teach the class's type (gi, no-gi, open mat)"""
+    axes = ("coach", "class")
+    name: str = "coach_type"
+
+    def coach_key(self, coach):
+        return (coach.can_teach_gi, coach.can_teach_nogi, coach.can_teach_open_mat)
+
+    def class_key(self, class_def):
+        return class_def.class_type
+
+    def violation(self, teaches, slot_key, class_type):
+        gi, nogi, open_mat = teaches
+        allowed = {ClassType.GI: gi, ClassType.NO_GI: nogi, ClassType.OPEN_MAT: open_mat}
+        return 0.0 if allowed.get(class_type, True) else 1.0
+
+@dataclass
+class CoachAvailableDay(Rule):
+    axes = ("coach", "slot")
+    name: str = "coach_day"
+
+    def coach_key(self, coach):
+        if coach.availability:
+            return availability_index(coach).days()
+        return frozenset(d.lower() for d in coach.available_days)
+
+    def slot_key(self, slot):
+        return slot.day.lower()
+
+    def violation(self, days, day, class_key):
+        return 0.0 if day in days else 1.0
+
+@dataclass
+class CoachPreferredTime(Rule):
+    """The slot lies inside one of the coach's availability windows (or starts in a preferred time of day)"""
+    axes = ("coach", "slot")
+    name: str = "coach_time"
+
+    def coach_key(self, coach):
+        return availability_index(coach)
+
+    def slot_key(self, slot):
+        return slot_window(slot)
+
+    def violation(self, index, window, class_key):
+        return 0.0 if index.covers(*window) else 1.0
+
+@dataclass
+class SlotTypePreference(Rule):
+    """Classes should match their slot's primary type; the secondary type counts half"""
+    axes = ("slot", "class")
+    name: str = "slot_preference"
+    hard: bool = False
+
+    def slot_key(self, slot):
+        return (slot.primary_preference, slot.secondary_preference)
+
+    def class_key(self, class_def):
+        return class_def.class_type.value
+
+    def violation(self, coach_key, preferences, value):
+        primary, secondary = preferences
+        if not primary or primary == value:
+            return 0.0
+        return 0.5 if secondary == value else 1.0
+
+def default_rules() -> List[Rule]:
+    return [CoachTeachesType(), CoachAvailableDay(), CoachPreferredTime(), SlotTypePreference()]
+
+@dataclass
+class Factor:
+    """Cost table of the rules that read the same axes, over their distinct keys"""
+    features: Dict[str, List[int]]   # axis -> key number of each entity, for the axes read
+    strides: Dict[str, int]
+    table: List[float]
+
+    def index(self, positions: Dict[str, int]) -> int:
+        return sum(self.features[axis][positions[axis]] * stride for axis, stride in self.strides.items())
+
+class CompiledConstraints:
+    """Placement costs for one config, indexed by coach, slot and class position"""
+
+    def __init__(self, factors: List[Factor], counts: Dict[str, int], slot_index: Dict[TimeSlot, int],
+                 class_index: Dict[ClassDefinition, int]):
+        self.factors = factors
+        self.coach_count = counts["coach"]
+        self.slot_index = slot_index
+        self.class_index = class_index
+        # Each factor's cell offset contributed by a slot or a class, deduplicated into signatures
+        self._slot_signatures, slot_offsets = _features(
+            [self._offsets("slot", i) for i in range(counts["slot"])])
+        self._class_signatures, class_offsets = _features(
+            [self._offsets("class", i) for i in range(counts["class"])])
+        self._bases = [[tuple(s + c for s, c in zip(so, co)) for co in class_offsets] for so in slot_offsets]
+        self._coach_costs: Dict[Tuple[int, int], List[float]] = {}
+
+    def _offsets(self, axis: str, position: int) -> Tuple[int, ...]:
+        return tuple(f.features[axis][position] * f.strides[axis] if axis in f.strides else 0
+                     for f in self.factors)
+
+    def cost(self, coach_idx: int, slot_idx: int, class_idx: int) -> float:
+        """Weighted soft penalty of a placement, or FORBIDDEN if a hard rule fails"""
+        positions = {"coach": coach_idx, "slot": slot_idx, "class": class_idx}
+        return sum(f.table[f.index(positions)] for f in self.factors)
+
+    def allowed(self, coach_idx: int, slot_idx: int, class_idx: int) -> bool:
+        return self.cost(coach_idx, slot_idx, class_idx) != FORBIDDEN
+
+    def slot_signature(self, slot_idx: int) -> int:
+        """Number shared by every slot that all rules see alike"""
+        return self._slot_signatures[slot_idx]
+
+    def class_signature(self, class_idx: int) -> int:
+        return self._class_signatures[class_idx]
+
+    def coach_costs(self, slot_idx: int, class_idx: int) -> List[float]:
+        """Cost of the placement for every coach, by coach position.
+
+        Cached per distinct slot and class keys, so sweeping many slots
+        and classes builds only a few vectors.
+        """
+        key = (self._slot_signatures[slot_idx], self._class_signatures[class_idx])
+        costs = self._coach_costs.get(key)
+        if costs is None:
+            costs = [0.0] * self.coach_count
+            for factor, base in zip(self.factors, self._bases[key[0]][key[1]]):
+                table = factor.table
+                if "coach" in factor.strides:
+                    stride = factor.strides["coach"]
+                    costs = [c + table[base + f * stride] for c, f in zip(costs, factor.features["coach"])]
+                else:
+                    costs = [c + table[base] for c in costs]
+            self._coach_costs[key] = costs
+        return costs
+
+# Spellings of the hard flag accepted from text sources such as forms and CSV
+HARD_VALUES = {"true": True, "1": True, "yes": True, "false": False, "0": False, "no": False}
+
+def _flag(name: str, value) -> bool:
+    """A rule's hard flag from a bool or a true/false string; anything else is an error"""
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.strip().lower() in HARD_VALUES:
+        return HARD_VALUES[value.strip().lower()]
+    raise ValueError(f"Constraint {name!r}: hard must be true or false, not {value!r}")
+
+def _features(keys: List[Tuple]) -> Tuple[List[int], List[Tuple]]:
+    """Number each distinct key tuple; returns per-entity numbers and the distinct tuples"""
+    numbers: Dict[Tuple, int] = {}
+    features = [numbers.setdefault(k, len(numbers)) for k in keys]
+    return features, list(numbers)
+
+class ConstraintSet:
+    """The rules a scheduler places classes under, with per-rule overrides"""
+
+    def __init__(self, rules: Optional[Sequence[Rule]] = None):
+        self.rules: List[Rule] = list(rules) if rules is not None else default_rules()
+
+    def rule(self, name: str) -> Optional[Rule]:
+        return next((r for r in self.rules if r.name == name), None)
+
+    def configure(self, settings: Dict[str, dict]):
+        """Override rules' hard flag and weight, e.g. {"coach_time": {"hard": false, "weight": 5}}"""
+        for name, options in settings.items():
+            rule = self.rule(name)
+            if rule is None:
+                raise ValueError(f"Unknown constraint {name!r}")
+            self.rules[self.rules.index(rule)] = replace(
+                rule, hard=_flag(name, options.get("hard", rule.hard)),
+                weight=float(options.get("weight", rule.weight)))
+
+    def to_dict(self) -> Dict[str, dict]:
+        """Settings that differ from the default rules"""
+        defaults = {r.name: r for r in default_rules()}
+        return {r.name: {"hard": r.hard, "weight": r.weight} for r in self.rules
+                if r.name not in defaults or (r.hard, r.weight) != (defaults[r.name].hard, defaults[r.name].weight)}
+
+    @staticmethod
+    def _cost(rules: Sequence[Rule], coach_keys: Tuple, slot_keys: Tuple, class_keys: Tuple) -> float:
+        cost = 0.0
+        for i, rule in enumerate(rules):
+            degree = rule.violation(coach_keys[i], slot_keys[i], class_keys[i])
+            if degree:
+                if rule.hard:
+                    return FORBIDDEN
+                cost += rule.weight * degree
+        return cost
+
+    def placement_cost(self, coach: Coach, slot: TimeSlot, class_def: ClassDefinition) -> float:
+        return self._cost(self.rules, tuple(r.coach_key(coach) for r in self.rules),
+                          tuple(r.slot_key(slot) for r in self.rules),
+                          tuple(r.class_key(class_def) for r in self.rules))
+
+    def compile(self, coaches: Sequence[Coach], time_slots: Sequence[TimeSlot],
+                class_definitions: Sequence[ClassDefinition]) -> CompiledConstraints:
+        entities = {"coach": coaches, "slot": time_slots, "class": class_definitions}
+        groups: Dict[Tuple[str, ...], List[Rule]] = {}
+        for rule in self.rules:
+            groups.setdefault(tuple(a for a in AXES if a in rule.axes), []).append(rule)
+        factors = []
+        for axes, rules in groups.items():
+            features, distinct = {}, {}
+            for axis in AXES:
+                if axis in axes:
+                    key_of = [getattr(r, f"{axis}_key") for r in rules]
+                    features[axis], distinct[axis] = _features(
+                        [tuple(k(e) for k in key_of) for e in entities[axis]])
+                else:
+                    distinct[axis] = [(None,) * len(rules)]
+            strides, stride = {}, 1
+            for axis in reversed(axes):
+                strides[axis] = stride
+                stride *= len(distinct[axis])
+            table = [self._cost(rules, ck, sk, kk)
+                     for ck, sk, kk in itertools.product(distinct["coach"], distinct["slot"], distinct["class"])]
+            factors.append(Factor(features, {a: strides[a] for a in axes}, table))
+        return CompiledConstraints(
+            factors, {axis: len(items) for axis, items in entities.items()},
+            slot_index={s: i for i, s in reversed(list(enumerate(time_slots)))},
+            class_index={cd: i for i, cd in reversed(list(enumerate(class_definitions)))})
@@ -10,6 +10,7 @@ class TimeSlot:
     end_time: time
     primary_preference: Optional[str] = None  # e.g., 'gi', 'no-gi', 'open-mat', or None
     secondary_preference: Optional[str] = None
+    location: Optional[str] = None  # gym the slot is at, for coaches shared by several locations
     
     def __str__(self):
         prefs = []
@@ -18,7 +19,8 @@ class TimeSlot:
         if self.secondary_preference:
             prefs.append(f"Secondary: {self.secondary_preference}")
         pref_str = f" ({', '.join(prefs)})" if prefs else ""
-        return f"{self.day.title()} {self.start_time.strftime('%H:%M')}-{self.end_time.strftime('%H:%M')}{pref_str}"
+        where = f"{self.location}: " if self.location else ""
+        return f"{where}{self.day.title()} {self.start_time.strftime('%H:%M')}-{self.end_time.strftime('%H:%M')}{pref_str}"
 
 @dataclass
 class Coach:
@@ -29,6 +31,8 @@ class Coach:
     can_teach_gi: bool = True
     can_teach_nogi: bool = True
     can_teach_open_mat: bool = True
+    # Minute-of-week windows like "tuesday 06:00-07:30"; when set they replace preferred_times and available_days
+    availability: List[str] = field(default_factory=list)
     
 @dataclass(frozen=True)
 class ClassDefinition:
@@ -0,0 +1,234 @@
+import hashlib
+import json
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .changes import COLLECTIONS
+from .constraints import ConstraintSet
+
+CHUNK_SIZE = 32
+
+Chunk = Tuple[str, ...]
+
+# Constraint overrides and travel times, kept in snapshots as a single record
+SETTINGS = "settings"
+
+def entity_records(scheduler, collection: str, known: Optional[Dict[int, str]] = None) -> List[str]:
+    """Canonical JSON text of each entity, the immutable unit a snapshot stores.
+
+    `known` maps positions to records already serialized, which are reused.
+    """
+    known = known or {}
+    return [known[i] if i in known else
+            json.dumps(scheduler.entity_to_dict(collection, e), sort_keys=True, separators=(",", ":"))
+            for i, e in enumerate(getattr(scheduler, collection))]
+
+def settings_record(scheduler) -> str:
+    return json.dumps({"constraints": scheduler.constraints.to_dict(),
+                       "travel_times": scheduler.travel_times_to_list()}, sort_keys=True, separators=(",", ":"))
+
+def apply_settings(scheduler, record: str):
+    settings = json.loads(record)
+    scheduler.constraints = ConstraintSet()
+    scheduler.constraints.configure(settings["constraints"])
+    scheduler.travel_times_from_list(settings["travel_times"])
+
+def chunk_hash(chunk: Chunk) -> str:
+    return hashlib.sha256("\n".join(chunk).encode("utf-8")).hexdigest()[:20]
+
+def _common_ends(old: Sequence[str], new: Sequence[str]) -> Tuple[int, int]:
+    """Lengths of the shared prefix and (non-overlapping) shared suffix"""
+    limit = min(len(old), len(new))
+    prefix = 0
+    while prefix < limit and old[prefix] == new[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and old[-1 - suffix] == new[-1 - suffix]:
+        suffix += 1
+    return prefix, suffix
+
+def splice_chunks(chunks: Tuple[Chunk, ...], digests: Tuple[str, ...],
+                  records: List[str]) -> Tuple[Tuple[Chunk, ...], Tuple[str, ...]]:
+    """Chunk `records`, reusing every chunk of `chunks` that lies in an unchanged region.
+
+    Only the chunks overlapping the edited span are rebuilt, so consecutive
+    snapshots share all but O(changes / CHUNK_SIZE + 1) chunks. Returns the
+    chunks and their digests; only the rebuilt chunks are hashed.
+    """
+    old = [record for chunk in chunks for record in chunk]
+    prefix, suffix = _common_ends(old, records)
+    head, start = [], 0
+    for chunk in chunks:
+        if start + len(chunk) > prefix:
+            break
+        head.append(chunk)
+        start += len(chunk)
+    tail, end = [], len(old)
+    for chunk in reversed(chunks[len(head):]):
+        if end - len(chunk) < len(old) - suffix:
+            break
+        tail.append(chunk)
+        end -= len(chunk)
+    middle = records[start:len(records) - (len(old) - end)]
+    rebuilt = [tuple(middle[i:i + CHUNK_SIZE]) for i in range(0, len(middle), CHUNK_SIZE)]
+    kept_head, kept_tail = digests[:len(head)], digests[len(digests) - len(tail):] if tail else ()
+    return (tuple(head + rebuilt + tail[::-1]),
+            tuple(kept_head) + tuple(chunk_hash(chunk) for chunk in rebuilt) + tuple(kept_tail))
+
+@dataclass(frozen=True)
+class ConfigSnapshot:
+    """An immutable revision of the coaches, time slots, class definitions and settings"""
+    chunks: Dict[str, Tuple[Chunk, ...]]
+    digests: Dict[str, Tuple[str, ...]]
+    label: str = ""
+
+    def records(self, collection: str) -> List[str]:
+        return [record for chunk in self.chunks.get(collection, ()) for record in chunk]
+
+    @classmethod
+    def of(cls, scheduler, base: Optional["ConfigSnapshot"] = None, label: str = "",
+           unchanged: Optional[Dict[str, Dict[int, int]]] = None) -> "ConfigSnapshot":
+        """Snapshot the scheduler, sharing chunks with `base`.
+
+        `unchanged` maps, per collection, positions of entities known to be
+        untouched since `base` to their position there; their records are
+        copied from `base` instead of serialized again.
+        """
+        chunks, digests = {}, {}
+        for c in COLLECTIONS:
+            known = None
+            if base is not None and unchanged and unchanged.get(c):
+                before = base.records(c)
+                known = {new: before[old] for new, old in unchanged[c].items()}
+            chunks[c], digests[c] = splice_chunks(base.chunks[c] if base else (), base.digests[c] if base else (),
+                                                  entity_records(scheduler, c, known))
+        chunks[SETTINGS], digests[SETTINGS] = splice_chunks(
+            base.chunks.get(SETTINGS, ()) if base else (), base.digests.get(SETTINGS, ()) if base else (),
+            [settings_record(scheduler)])
+        return cls(chunks, digests, label)
+
+    def same_config(self, other: "ConfigSnapshot") -> bool:
+        return all(self.digests.get(c) == other.digests.get(c) or self.records(c) == other.records(c)
+                   for c in COLLECTIONS + (SETTINGS,))
+
+    def apply(self, scheduler, base: Optional["ConfigSnapshot"] = None):
+        """Make the scheduler's config match this snapshot, touching only differing entities.
+
+        If the scheduler is known to hold `base`'s config, only the chunks
+        that differ from `base` are compared and nothing is serialized;
+        otherwise the scheduler's entities are serialized and compared.
+        """
+        for collection in COLLECTIONS:
+            if base is None:
+                offset, current, target = 0, entity_records(scheduler, collection), self.records(collection)
+            else:
+                offset, current, target = self._changed_span(base, collection)
+            prefix, suffix = _common_ends(current, target)
+            old_end, new_end = len(current) - suffix, len(target) - suffix
+            shared = min(old_end, new_end) - prefix
+            for i in range(prefix, prefix + shared):
+                scheduler.replace_entity(collection, offset + i, self._entity(scheduler, collection, target[i]))
+            for i in range(old_end - 1, prefix + shared - 1, -1):
+                scheduler.remove_entity(collection, offset + i)
+            for i in range(prefix + shared, new_end):
+                scheduler.add_entity(collection, self._entity(scheduler, collection, target[i]), offset + i)
+        # Revisions recorded before settings were part of snapshots leave them alone
+        if SETTINGS in self.chunks:
+            current = base.records(SETTINGS) if base is not None else [settings_record(scheduler)]
+            if current != self.records(SETTINGS):
+                apply_settings(scheduler, self.records(SETTINGS)[0])
+
+    def _changed_span(self, base: "ConfigSnapshot", collection: str) -> Tuple[int, List[str], List[str]]:
+        """Position of the first chunk that differs from `base` and the records of both from there on,
+        up to the last chunk that differs"""
+        old_digests, new_digests = base.digests[collection], self.digests[collection]
+        head, tail = _common_ends(old_digests, new_digests)
+        old_chunks, new_chunks = base.chunks[collection], self.chunks[collection]
+        offset = sum(len(chunk) for chunk in old_chunks[:head])
+        current = [r for chunk in old_chunks[head:len(old_chunks) - tail] for r in chunk]
+        target = [r for chunk in new_chunks[head:len(new_chunks) - tail] for r in chunk]
+        return offset, current, target
+
+    @staticmethod
+    def _entity(scheduler, collection: str, record: str):
+        return scheduler.entity_from_dict(collection, json.loads(record))
+
+class ConfigHistory:
+    """Linear undo/redo history of config snapshots.
+
+    Snapshots share unchanged chunks of entities, so a deep history costs
+    memory proportional to the edits rather than to history length times
+    config size. Recording after an undo drops the redo branch.
+    """
+
+    def __init__(self, limit: int = 100):
+        self.limit = limit
+        self.revisions: List[ConfigSnapshot] = []
+        self.position = -1
+
+    @property
+    def current(self) -> Optional[ConfigSnapshot]:
+        return self.revisions[self.position] if self.revisions else None
+
+    def record(self, scheduler, label: str, unchanged: Optional[Dict[str, Dict[int, int]]] = None) -> bool:
+        """Snapshot the scheduler's config; returns False if nothing changed.
+
+        `unchanged` lists entities untouched since the current revision, as
+        for ConfigSnapshot.of.
+        """
+        snapshot = ConfigSnapshot.of(scheduler, self.current, label, unchanged)
+        if self.current is not None and snapshot.same_config(self.current):
+            return False
+        del self.revisions[self.position + 1:]
+        self.revisions.append(snapshot)
+        if len(self.revisions) > self.limit:
+            del self.revisions[:len(self.revisions) - self.limit]
+        self.position = len(self.revisions) - 1
+        return True
+
+    def can_undo(self) -> bool:
+        return self.position > 0
+
+    def can_redo(self) -> bool:
+        return self.position < len(self.revisions) - 1
+
+    def undo(self, scheduler) -> Optional[str]:
+        """Step back one revision; returns the label of the undone edit"""
+        if not self.can_undo():
+            return None
+        label = self.current.label
+        self.goto(scheduler, self.position - 1)
+        return label
+
+    def redo(self, scheduler) -> Optional[str]:
+        if not self.can_redo():
+            return None
+        self.goto(scheduler, self.position + 1)
+        return self.current.label
+
+    def goto(self, scheduler, position: int):
+        """Move to a revision; the scheduler must hold the current revision's config"""
+        self.revisions[position].apply(scheduler, self.current)
+        self.position = position
+
+    def to_state(self) -> Tuple[dict, Dict[str, Chunk]]:
+        """A compact index of revisions plus the chunks it references, keyed by content hash"""
+        chunks: Dict[str, Chunk] = {}
+        revisions = []
+        for snapshot in self.revisions:
+            for collection, collection_chunks in snapshot.chunks.items():
+                chunks.update(zip(snapshot.digests[collection], collection_chunks))
+            revisions.append({"label": snapshot.label, "chunks": {c: list(d) for c, d in snapshot.digests.items()}})
+        return {"limit": self.limit, "position": self.position, "revisions": revisions}, chunks
+
+    @classmethod
+    def from_state(cls, index: dict, chunks: Dict[str, Sequence[str]]) -> "ConfigHistory":
+        history = cls(index.get("limit", 100))
+        loaded: Dict[str, Chunk] = {}
+        for revision in index["revisions"]:
+            history.revisions.append(ConfigSnapshot(
+                {c: tuple(loaded.setdefault(d, tuple(chunks[d])) for d in digests)
+                 for c, digests in revision["chunks"].items()},
+                {c: tuple(digests) for c, digests in revision["chunks"].items()}, revision["label"]))
+        history.position = index["position"]
+        return history
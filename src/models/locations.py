@@ -0,0 +1,374 @@
+"""
+Several gym locations sharing one coach pool
+
+Each TimeSlot may name its location, and the scheduler keeps a matrix of
+travel minutes between locations. A CoachTimeline enforces it: a coach's
+slots on one day must not overlap and must leave the travel time between
+their locations free. generate_schedule uses a timeline whenever slots
+span more than one location.
+
+solve_network decomposes a network by location instead of searching it as
+one problem. Every class's weekly count and every coach's weekly maximum
+are split between the locations, the locations are solved in parallel,
+and shared coaches are then coordinated: placements that break a coach's
+timeline or maximum across locations are released, and the affected
+locations are re-solved against what the others kept, in parallel rounds
+and finally one location at a time. Whatever is still unplaced is then
+offered to each location in turn, re-solved together with the locations
+whose coaches block its free slots, so a class that fell short at one
+location can move to another with room.
+"""
+
+import time
+from collections import Counter
+from dataclasses import dataclass, replace
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .availability import availability_index
+from .data_classes import ScheduledClass, TimeSlot
+
+# Travel minutes assumed between locations missing from the matrix
+DEFAULT_TRAVEL_MINUTES = 0
+# Parallel re-solve rounds before the remaining conflicts are settled one location at a time
+COORDINATION_ROUNDS = 2
+# Most locations re-solved together to place what coordination left unplaced
+REPAIR_GROUP = 4
+# Passes over the locations offering them the unplaced remainder
+REPAIR_PASSES = 2
+
+TravelTimes = Dict[Tuple[str, str], int]
+
+def travel_minutes(travel_times: TravelTimes, origin: Optional[str], destination: Optional[str]) -> int:
+    """Minutes from one location to another; the matrix is symmetric unless both directions are set"""
+    if origin == destination:
+        return 0
+    minutes = travel_times.get((origin, destination))
+    if minutes is None:
+        minutes = travel_times.get((destination, origin), DEFAULT_TRAVEL_MINUTES)
+    return minutes
+
+def _minutes(t) -> int:
+    return t.hour * 60 + t.minute
+
+class CoachTimeline:
+    """The slots each coach teaches in, per day, checked against travel between locations
+
+    A coach teaches classes back to back inside one slot, so the timeline
+    holds whole slot windows: two different slots of a coach on one day
+    conflict when they overlap or leave less than the travel time between.
+    """
+
+    def __init__(self, travel_times: Optional[TravelTimes] = None):
+        self.travel_times = dict(travel_times or {})
+        self._slots: Dict[Tuple[str, str], Counter] = {}
+
+    def copy(self) -> "CoachTimeline":
+        timeline = CoachTimeline(self.travel_times)
+        timeline._slots = {key: Counter(slots) for key, slots in self._slots.items()}
+        return timeline
+
+    def fits(self, coach_name: str, slot: TimeSlot) -> bool:
+        booked = self._slots.get((coach_name, slot.day.lower()))
+        if not booked or slot in booked:
+            return True
+        start, end = _minutes(slot.start_time), _minutes(slot.end_time)
+        for other in booked:
+            gap = travel_minutes(self.travel_times, slot.location, other.location)
+            if start < _minutes(other.end_time) + gap and _minutes(other.start_time) < end + gap:
+                return False
+        return True
+
+    def add(self, coach_name: str, slot: TimeSlot):
+        self._slots.setdefault((coach_name, slot.day.lower()), Counter())[slot] += 1
+
+    def remove(self, coach_name: str, slot: TimeSlot):
+        booked = self._slots[(coach_name, slot.day.lower())]
+        booked[slot] -= 1
+        if booked[slot] <= 0:
+            del booked[slot]
+
+@dataclass
+class LocationResult:
+    location: Optional[str]
+    scheduled: int
+    required: int
+    solves: int     # times the location was (re-)solved
+
+    def to_dict(self) -> dict:
+        return {"location": self.location, "scheduled": self.scheduled, "required": self.required,
+                "solves": self.solves}
+
+@dataclass
+class NetworkResult:
+    schedule: List[ScheduledClass]
+    conflicts: List[str]
+    locations: List[LocationResult]
+    rounds: int
+    elapsed_seconds: float
+
+    def to_dict(self) -> dict:
+        return {"scheduled": len(self.schedule), "rounds": self.rounds,
+                "seconds": round(self.elapsed_seconds, 6), "conflicts": self.conflicts,
+                "locations": [location.to_dict() for location in self.locations]}
+
+def allocate(total: int, weights: Sequence[float]) -> List[int]:
+    """Split `total` in proportion to `weights` by largest remainder; all to the first if every weight is 0"""
+    if not weights:
+        return []
+    weight_sum = sum(weights)
+    if weight_sum <= 0:
+        return [total] + [0] * (len(weights) - 1)
+    exact = [total * w / weight_sum for w in weights]
+    shares = [int(x) for x in exact]
+    by_remainder = sorted(range(len(weights)), key=lambda i: (-(exact[i] - shares[i]), i))
+    for i in by_remainder[:total - sum(shares)]:
+        shares[i] += 1
+    return shares
+
+def _solve_location(task) -> Tuple[List[ScheduledClass], List[str]]:
+    sub, manual, warm_start, timeline = task
+    return sub.generate_schedule(manual, warm_start=warm_start, timeline=timeline)
+
+def solve_network(scheduler, manual_assignments=None, jobs: int = 1,
+                  rounds: int = COORDINATION_ROUNDS) -> NetworkResult:
+    """Solve each location on its own, in worker processes when jobs > 1, and coordinate shared coaches"""
+    started = time.perf_counter()
+    locations = list(dict.fromkeys(slot.location for slot in scheduler.time_slots))
+    slots_at = {loc: [s for s in scheduler.time_slots if s.location == loc] for loc in locations}
+    manual = list(manual_assignments or [])
+    manual.extend({'class_def': fc.class_def, 'time_slot': fc.time_slot, 'coach': fc.coach}
+                  for fc in scheduler.fixed_classes)
+    manual_classes = {ma['class_def'].name for ma in manual}
+
+    # Class counts go to locations by their slot minutes, coach maxima by the slots each coach could take
+    minutes = [sum(_minutes(s.end_time) - _minutes(s.start_time) for s in slots_at[loc]) for loc in locations]
+    quotas = {cd.name: [0] * len(locations) if cd.name in manual_classes else allocate(cd.weekly_count, minutes)
+              for cd in scheduler.class_definitions}
+
+    def capacity_shares(coach) -> List[int]:
+        index = availability_index(coach)
+        weights = [sum(1 for s in slots_at[loc] if index.covers_slot(s)) for loc in locations]
+        return allocate(coach.max_weekly_classes, weights)
+    capacity = {c.name: capacity_shares(c) for c in scheduler.coaches}
+
+    coaches = {c.name: c for c in scheduler.coaches}
+    classes = {cd.name: cd for cd in scheduler.class_definitions}
+
+    def task(group: Sequence[int], kept: Dict[int, List[ScheduledClass]], counts: Optional[Counter] = None):
+        """Sub-problem of the locations in group; other locations' kept placements become busy time and used capacity
+
+        Given counts, the group is re-solved from scratch for those weekly counts instead of warm
+        started from its own kept placements against its quotas.
+        """
+        group_locations = {locations[n] for n in group}
+        sub = type(scheduler)()
+        sub.schedule_mode = scheduler.schedule_mode
+        sub.constraints = scheduler.constraints
+        sub.travel_times = dict(scheduler.travel_times)
+        timeline = CoachTimeline(scheduler.travel_times)
+        load = Counter()
+        for m, placements in kept.items():
+            if m not in group:
+                for sc in placements:
+                    timeline.add(sc.coach.name, sc.time_slot)
+                    load[sc.coach.name] += 1
+        if all(n in kept for n in group):
+            cap = {name: coach.max_weekly_classes - load[name] for name, coach in coaches.items()}
+        else:
+            cap = {name: sum(shares[n] for n in group) for name, shares in capacity.items()}
+        cold = counts is not None
+        if not cold:
+            counts = Counter({name: sum(shares[n] for n in group) for name, shares in quotas.items()})
+        sub.time_slots = [s for s in scheduler.time_slots if s.location in group_locations]
+        # Coaches with no capacity left only slow the sub-problem down
+        pinned = {ma['coach'].name for ma in manual if ma['time_slot'].location in group_locations}
+        sub.coaches = [replace(c, max_weekly_classes=max(cap[c.name], 0)) for c in scheduler.coaches
+                       if cap[c.name] > 0 or c.name in pinned]
+        sub.class_definitions = [replace(cd, weekly_count=counts[cd.name]) for cd in scheduler.class_definitions]
+        sub_coaches = {c.name: c for c in sub.coaches}
+        sub_classes = {cd.name: cd for cd in sub.class_definitions}
+        sub_manual = [{'class_def': sub_classes[ma['class_def'].name], 'time_slot': ma['time_slot'],
+                       'coach': sub_coaches[ma['coach'].name]}
+                      for ma in manual if ma['time_slot'].location in group_locations]
+        warm_start = [] if cold else [sc for n in group for sc in kept.get(n, []) if not sc.is_fixed]
+        return sub, sub_manual, warm_start, timeline
+
+    def run(tasks, parallel: bool):
+        if parallel and jobs > 1 and len(tasks) > 1:
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=min(jobs, len(tasks))) as pool:
+                return list(pool.map(_solve_location, tasks))
+        return [_solve_location(t) for t in tasks]
+
+    def restore(schedule: List[ScheduledClass]) -> List[ScheduledClass]:
+        return [ScheduledClass(classes[sc.class_def.name], sc.time_slot, coaches[sc.coach.name], sc.is_fixed)
+                for sc in schedule]
+
+    def coordinate(placements: Dict[int, List[ScheduledClass]]):
+        """Keep placements in location order while each coach's timeline and maximum allow; return the rest's locations"""
+        timeline = CoachTimeline(scheduler.travel_times)
+        load = Counter()
+        kept, released = {}, set()
+        for n in range(len(locations)):
+            kept[n] = []
+            for sc in placements[n]:
+                name = sc.coach.name
+                if sc.is_fixed or (load[name] < coaches[name].max_weekly_classes
+                                   and timeline.fits(name, sc.time_slot)):
+                    kept[n].append(sc)
+                    timeline.add(name, sc.time_slot)
+                    load[name] += 1
+                else:
+                    released.add(n)
+        return kept, released
+
+    solves = Counter()
+    pending = list(range(len(locations)))
+    results = run([task([n], {}) for n in pending], parallel=True)
+    placements = {n: restore(schedule) for n, (schedule, _) in zip(pending, results)}
+    solves.update(pending)
+    kept, released = coordinate(placements)
+    completed = 1
+    while released:
+        pending = sorted(released)
+        if completed < rounds:
+            results = run([task([n], kept) for n in pending], parallel=True)
+            for n, (schedule, _) in zip(pending, results):
+                kept[n] = restore(schedule)
+            solves.update(pending)
+            kept, released = coordinate(kept)
+        else:
+            # One location at a time, each seeing every other's placements, cannot conflict
+            for n in pending:
+                kept[n] = restore(run([task([n], kept)], parallel=False)[0][0])
+                solves[n] += 1
+            released = set()
+        completed += 1
+
+    def placed_at(n: int) -> Counter:
+        return Counter(sc.class_def.name for sc in kept[n] if not sc.is_fixed)
+
+    def unplaced() -> Counter:
+        placed = sum((placed_at(n) for n in kept), Counter())
+        return Counter({name: sum(shares) - placed[name] for name, shares in quotas.items()
+                        if sum(shares) > placed[name]})
+
+    def free_minutes(n: int) -> int:
+        booked = Counter()
+        for sc in kept[n]:
+            booked[sc.time_slot] += sc.class_def.duration_minutes
+        return sum(max(_minutes(s.end_time) - _minutes(s.start_time) - booked[s], 0)
+                   for s in slots_at[locations[n]])
+
+    def blockers(n: int, shortest: int) -> Counter:
+        """How often each other location's placements keep an available coach out of n's slots with room left"""
+        busy = {}
+        for m in kept:
+            if m != n:
+                for sc in kept[m]:
+                    busy.setdefault((sc.coach.name, sc.time_slot.day.lower()), []).append((m, sc.time_slot))
+        booked = Counter()
+        for sc in kept[n]:
+            booked[sc.time_slot] += sc.class_def.duration_minutes
+        count = Counter()
+        for slot in slots_at[locations[n]]:
+            start, end = _minutes(slot.start_time), _minutes(slot.end_time)
+            if end - start - booked[slot] < shortest:
+                continue
+            for coach in scheduler.coaches:
+                if not availability_index(coach).covers_slot(slot):
+                    continue
+                for m, other in busy.get((coach.name, slot.day.lower()), ()):
+                    gap = travel_minutes(scheduler.travel_times, slot.location, other.location)
+                    if start < _minutes(other.end_time) + gap and _minutes(other.start_time) < end + gap:
+                        count[m] += 1
+        return count
+
+    def settle(group: Sequence[int]):
+        """The group's quotas become what it places, the difference taken from other locations' unmet quotas"""
+        placed = {n: placed_at(n) for n in range(len(locations))}
+        for name, shares in quotas.items():
+            gained = sum(placed[k][name] - shares[k] for k in group)
+            for k in group:
+                shares[k] = placed[k][name]
+            # A class the group placed fewer of stays in its quota, still unplaced
+            shares[group[0]] -= min(gained, 0)
+            for m in range(len(locations)):
+                if gained <= 0:
+                    break
+                if m not in group:
+                    taken = min(gained, max(shares[m] - placed[m][name], 0))
+                    shares[m] -= taken
+                    gained -= taken
+
+    # Quotas are split before anyone knows where coaches end up, so coordination can leave a
+    # class short at one location while slot time goes free at another. Each location in turn
+    # is offered the unplaced remainder and re-solved from scratch together with the locations
+    # whose placements keep coaches out of its free slots, the group growing one location at a
+    # time up to REPAIR_GROUP; a group's new schedule is kept only when it places more. A later
+    # pass skips a location that found nothing unless a location it was grouped with changed.
+    missing = unplaced()
+    changes, changed, settled = 0, {}, {}
+    for _ in range(REPAIR_PASSES):
+        if not missing:
+            break
+        start_changes = changes
+        for n in range(len(locations)):
+            if not missing:
+                break
+            if n in settled and all(changed.get(k, -1) < settled[n][0] for k in settled[n][1]):
+                continue
+            shortest = min(classes[name].duration_minutes for name in missing)
+            blocked = blockers(n, shortest)
+            others = sorted((m for m in range(len(locations)) if m != n), key=lambda m: (-blocked[m], m))
+            for size in range(1, min(REPAIR_GROUP, len(locations)) + 1):
+                group = sorted([n] + others[:size - 1])
+                # More classes than the group's free time could hold only slow the solve down
+                free = sum(free_minutes(k) for k in group)
+                offered = Counter()
+                for name in sorted(missing, key=lambda name: (classes[name].duration_minutes, name)):
+                    offered[name] = min(missing[name], free // classes[name].duration_minutes)
+                    free -= offered[name] * classes[name].duration_minutes
+                counts = sum((placed_at(k) for k in group), Counter()) + offered
+                result = restore(run([task(group, kept, counts)], parallel=False)[0][0])
+                solves.update(group)
+                if len(result) > sum(len(kept[k]) for k in group):
+                    for k in group:
+                        kept[k] = [sc for sc in result if sc.time_slot.location == locations[k]]
+                    settle(group)
+                    missing = unplaced()
+                    changes += 1
+                    changed.update(dict.fromkeys(group, changes))
+                    break
+            else:
+                settled[n] = (changes, group)
+        completed += 1
+        if changes == start_changes:
+            break
+
+    schedule = [sc for n in range(len(locations)) for sc in kept[n]]
+    positions = Counter()
+    for sc in schedule:
+        sc.slot_position = positions[sc.time_slot]
+        positions[sc.time_slot] += 1
+    location_results = [
+        LocationResult(loc, len(kept[n]), sum(q[n] for q in quotas.values())
+                       + sum(1 for ma in manual if ma['time_slot'].location == loc), solves[n])
+        for n, loc in enumerate(locations)]
+    return NetworkResult(schedule, network_conflicts(scheduler, schedule, manual_classes), location_results,
+                         completed, time.perf_counter() - started)
+
+def network_conflicts(scheduler, schedule: Sequence[ScheduledClass], manual_classes=()) -> List[str]:
+    """Warnings worded like generate_schedule's, for a schedule assembled from several locations"""
+    booked = Counter()
+    for sc in schedule:
+        booked[sc.time_slot] += sc.class_def.duration_minutes
+    conflicts = [f"Could not fill all time in slot {slot}" for slot in scheduler.time_slots
+                 if booked[slot] < _minutes(slot.end_time) - _minutes(slot.start_time)]
+    placed = Counter(sc.class_def.name for sc in schedule)
+    unassigned = Counter()
+    for cd in scheduler.class_definitions:
+        if cd.name not in manual_classes:
+            unassigned[cd.class_type.value] += max(cd.weekly_count - placed[cd.name], 0)
+    conflicts += [f"Unassigned {ct} classes: {n}" for ct, n in unassigned.items() if n]
+    return conflicts
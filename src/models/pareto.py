@@ -0,0 +1,353 @@
+"""
+Pareto-front exploration of competing schedule objectives
+
+Coach fairness, gi/no-gi balance, slot fill and preference satisfaction
+pull against each other, so instead of one weighted optimum this searches
+for the non-dominated schedules with an NSGA-II style evolutionary loop:
+non-dominated sorting with crowding distance, binary tournaments, day-wise
+crossover and placement mutations that keep the generator's hard rules.
+Unplaced classes and other hard-rule costs rank before the objectives, so
+the front only trades among the best-placed schedules found.
+
+Genomes are the (class, slot, coach) index rows that ScoringModel scores,
+so a whole population is evaluated in one vectorized batch. Independent
+islands, each with its own random stream, run in worker processes when
+jobs > 1 and their fronts are merged at the end.
+"""
+
+import random
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .constraints import FORBIDDEN
+from .data_classes import ScheduledClass
+from .scoring import ScoringModel
+
+# Objectives traded off on the front, all minimized: coach fairness, gi/no-gi
+# balance across days, slot fill and slot type preferences
+OBJECTIVES = ("load_imbalance", "type_imbalance", "idle_minutes", "preference_mismatch")
+OBJECTIVE_LABELS = {"load_imbalance": "Coach load spread", "type_imbalance": "Type spread across days",
+                    "idle_minutes": "Idle minutes", "preference_mismatch": "Preference misses"}
+# Costs every front member should avoid before trading objectives
+HARD = ("unplaced", "coach_overload", "slot_overfill", "ineligible")
+CROSSOVER_RATE = 0.9
+MUTATION_ATTEMPTS = 10
+
+Placement = Tuple[int, int, int]   # class, slot and coach positions
+
+@dataclass
+class ParetoSolution:
+    schedule: List[ScheduledClass]
+    conflicts: List[str]
+    objectives: Dict[str, float]
+    violation: float    # weighted hard-rule cost, equal across a front
+    score: float        # weighted total with the default ScoreWeights
+
+    def to_dict(self) -> dict:
+        return {"objectives": self.objectives, "violation": self.violation, "score": self.score,
+                "scheduled": len(self.schedule), "conflicts": self.conflicts}
+
+@dataclass
+class ParetoFront:
+    """Non-dominated schedules, ordered by weighted score"""
+    solutions: List[ParetoSolution]
+    generations: int
+    evaluations: int
+    elapsed_seconds: float
+
+    def to_dict(self) -> dict:
+        return {"objectives": list(OBJECTIVES), "generations": self.generations,
+                "evaluations": self.evaluations, "seconds": round(self.elapsed_seconds, 6),
+                "solutions": [solution.to_dict() for solution in self.solutions]}
+
+class ParetoProblem:
+    """A gym config compiled for evolutionary search; picklable for worker processes"""
+
+    def __init__(self, scheduler, manual_assignments=None):
+        self.model = ScoringModel.from_scheduler(scheduler)
+        model = self.model
+        compiled = scheduler.constraints.compile(model.coaches, model.time_slots, model.class_definitions)
+        # The generator's hard rules: coaches allowed per slot and class, slot length and weekly maxima
+        self.allowed = [[[k for k, cost in enumerate(compiled.coach_costs(si, ci)) if cost != FORBIDDEN]
+                         for ci in range(len(model.class_definitions))] for si in range(len(model.time_slots))]
+        self.slot_minutes = [int(m) for m in model.slot_minutes]
+        self.slot_day = [int(d) for d in model.slot_day]
+        self.class_minutes = [int(m) for m in model.class_minutes]
+        self.coach_max = [int(m) for m in model.coach_max]
+
+        manual = list(manual_assignments or [])
+        manual.extend({'class_def': fc.class_def, 'time_slot': fc.time_slot, 'coach': fc.coach}
+                      for fc in scheduler.fixed_classes)
+        self.fixed: List[Placement] = [tuple(row) for row in model.encode(
+            [ScheduledClass(ma['class_def'], ma['time_slot'], ma['coach'], is_fixed=True) for ma in manual])]
+        # As in generate_schedule, manually placed classes and slots are left alone
+        locked_classes = {model.class_index.get(ma['class_def'].name) for ma in manual}
+        self.locked_slots = {model.slot_index.get(ma['time_slot']) for ma in manual}
+        self.open_slots = [si for si in range(len(model.time_slots)) if si not in self.locked_slots]
+        self.required = {ci: cd.weekly_count for ci, cd in enumerate(model.class_definitions)
+                         if ci not in locked_classes and cd.weekly_count > 0}
+
+    def encode(self, schedule: Sequence[ScheduledClass]) -> List[Placement]:
+        """Free placements of a generated schedule, in slot order"""
+        free = sorted((sc for sc in schedule if not sc.is_fixed), key=lambda sc: sc.slot_position)
+        return [tuple(int(v) for v in row) for row in self.model.encode(free)]
+
+    def valid(self, genome: Sequence[Placement]) -> bool:
+        used = Counter()
+        load = Counter()
+        for c, s, k in self.fixed:
+            used[s] += self.class_minutes[c]
+            load[k] += 1
+        counts = Counter()
+        for c, s, k in genome:
+            if s in self.locked_slots or k not in self.allowed[s][c]:
+                return False
+            used[s] += self.class_minutes[c]
+            load[k] += 1
+            counts[c] += 1
+        return (all(used[s] <= self.slot_minutes[s] for s in used)
+                and all(load[k] <= self.coach_max[k] for k in load)
+                and all(counts[c] <= self.required.get(c, 0) for c in counts))
+
+    def evaluate(self, genomes: Sequence[Sequence[Placement]]) -> Tuple[np.ndarray, np.ndarray]:
+        """(objective matrix, hard violation) of every genome in one scoring batch"""
+        batch = self.model.stack([np.array(self.fixed + list(g), dtype=np.int64).reshape(-1, 3) for g in genomes])
+        values = self.model.components(batch)
+        weights = vars(self.model.weights)
+        objectives = np.stack([values[name] for name in OBJECTIVES], axis=1)
+        violation = sum(weights[name] * values[name] for name in HARD)
+        return objectives, np.round(violation, 9)
+
+    # Variation operators: each returns a new genome, or None when it breaks a hard rule
+
+    def mutate(self, genome: List[Placement], rng: random.Random) -> List[Placement]:
+        for _ in range(MUTATION_ATTEMPTS):
+            child = rng.choice((self._reassign, self._move, self._swap_slots, self._swap_coaches,
+                                self._add))(list(genome), rng)
+            if child is not None and self.valid(child):
+                return child
+        return list(genome)
+
+    def _reassign(self, genome, rng):
+        if not genome:
+            return None
+        i = rng.randrange(len(genome))
+        c, s, k = genome[i]
+        genome[i] = (c, s, rng.choice(self.allowed[s][c] or [k]))
+        return genome
+
+    def _move(self, genome, rng):
+        if not genome or not self.open_slots:
+            return None
+        c, _, k = genome.pop(rng.randrange(len(genome)))
+        # Appended, so the class runs last in its new slot
+        genome.append((c, rng.choice(self.open_slots), k))
+        return genome
+
+    def _swap_slots(self, genome, rng):
+        if len(genome) < 2:
+            return None
+        i, j = rng.sample(range(len(genome)), 2)
+        (ci, si, ki), (cj, sj, kj) = genome[i], genome[j]
+        genome[i], genome[j] = (ci, sj, ki), (cj, si, kj)
+        return genome
+
+    def _swap_coaches(self, genome, rng):
+        if len(genome) < 2:
+            return None
+        i, j = rng.sample(range(len(genome)), 2)
+        (ci, si, ki), (cj, sj, kj) = genome[i], genome[j]
+        genome[i], genome[j] = (ci, si, kj), (cj, sj, ki)
+        return genome
+
+    def _add(self, genome, rng):
+        counts = Counter(c for c, _, _ in genome)
+        missing = [c for c, n in self.required.items() if counts[c] < n]
+        if not missing or not self.open_slots:
+            return None
+        c, s = rng.choice(missing), rng.choice(self.open_slots)
+        if not self.allowed[s][c]:
+            return None
+        genome.append((c, s, rng.choice(self.allowed[s][c])))
+        return genome
+
+    def crossover(self, a: List[Placement], b: List[Placement], rng: random.Random) -> List[Placement]:
+        """Each day's classes from one parent; a child that breaks a rule falls back to `a`"""
+        from_a = {day for day in set(self.slot_day) if rng.random() < 0.5}
+        child = [p for p in a if self.slot_day[p[1]] in from_a] + [p for p in b if self.slot_day[p[1]] not in from_a]
+        counts = Counter()
+        trimmed = []
+        for p in child:
+            counts[p[0]] += 1
+            if counts[p[0]] <= self.required.get(p[0], 0):
+                trimmed.append(p)
+        return trimmed if self.valid(trimmed) else list(a)
+
+    def decode(self, genome: Sequence[Placement]) -> List[ScheduledClass]:
+        model = self.model
+        schedule = [ScheduledClass(model.class_definitions[c], model.time_slots[s], model.coaches[k],
+                                   is_fixed=True) for c, s, k in self.fixed]
+        schedule += [ScheduledClass(model.class_definitions[c], model.time_slots[s], model.coaches[k])
+                     for c, s, k in genome]
+        positions = Counter()
+        for sc in schedule:
+            sc.slot_position = positions[sc.time_slot]
+            positions[sc.time_slot] += 1
+        return schedule
+
+    def conflicts(self, genome: Sequence[Placement]) -> List[str]:
+        """Warnings worded like generate_schedule's"""
+        used = Counter()
+        for c, s, _ in self.fixed + list(genome):
+            used[s] += self.class_minutes[c]
+        conflicts = [f"Could not fill all time in slot {slot}" for si, slot in enumerate(self.model.time_slots)
+                     if used[si] < self.slot_minutes[si]]
+        counts = Counter(c for c, _, _ in genome)
+        unassigned = Counter()
+        for c, n in self.required.items():
+            unassigned[self.model.class_definitions[c].class_type.value] += max(n - counts[c], 0)
+        conflicts += [f"Unassigned {ct} classes: {n}" for ct, n in unassigned.items() if n]
+        return conflicts
+
+def non_dominated_fronts(objectives: np.ndarray, violation: np.ndarray) -> List[np.ndarray]:
+    """Indexes of each front, best first; lower violation dominates regardless of objectives"""
+    le = (objectives[:, None, :] <= objectives[None, :, :]).all(axis=2)
+    lt = (objectives[:, None, :] < objectives[None, :, :]).any(axis=2)
+    dominates = (violation[:, None] < violation[None, :]) | ((violation[:, None] == violation[None, :]) & le & lt)
+    dominated_by = dominates.sum(axis=0)
+    remaining = np.ones(len(objectives), dtype=bool)
+    fronts = []
+    while remaining.any():
+        front = np.flatnonzero(remaining & (dominated_by == 0))
+        fronts.append(front)
+        remaining[front] = False
+        dominated_by -= dominates[front].sum(axis=0)
+    return fronts
+
+def crowding_distance(objectives: np.ndarray) -> np.ndarray:
+    """NSGA-II crowding distance within one front; boundary points are infinite"""
+    n = len(objectives)
+    distance = np.zeros(n)
+    if n <= 2:
+        return np.full(n, np.inf)
+    for m in range(objectives.shape[1]):
+        order = np.argsort(objectives[:, m], kind="stable")
+        values = objectives[order, m]
+        distance[order[[0, -1]]] = np.inf
+        span = values[-1] - values[0]
+        if span > 0:
+            distance[order[1:-1]] += (values[2:] - values[:-2]) / span
+    return distance
+
+def _select(objectives: np.ndarray, violation: np.ndarray, size: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """The `size` survivors with their front rank and crowding distance"""
+    chosen, ranks, crowding = [], [], []
+    for rank, front in enumerate(non_dominated_fronts(objectives, violation)):
+        distance = crowding_distance(objectives[front])
+        if len(chosen) + len(front) > size:
+            keep = np.argsort(-distance, kind="stable")[:size - len(chosen)]
+            front, distance = front[keep], distance[keep]
+        chosen.extend(front)
+        ranks.extend([rank] * len(front))
+        crowding.extend(distance)
+        if len(chosen) >= size:
+            break
+    return np.array(chosen, dtype=np.intp), np.array(ranks), np.array(crowding)
+
+def _unique(genomes: List[List[Placement]]) -> List[List[Placement]]:
+    seen = set()
+    unique = []
+    for genome in genomes:
+        key = tuple(sorted(genome))
+        if key not in seen:
+            seen.add(key)
+            unique.append(genome)
+    return unique
+
+def evolve(problem: ParetoProblem, seeds: List[List[Placement]], population: int, generations: int,
+           seed: Optional[int] = None) -> Tuple[List[List[Placement]], int]:
+    """Run one NSGA-II island; returns its first front and the number of evaluations"""
+    rng = random.Random(seed)
+    genomes = _unique(seeds)
+    while len(genomes) < population:
+        genomes.append(problem.mutate(rng.choice(seeds), rng))
+    objectives, violation = problem.evaluate(genomes)
+    evaluations = len(genomes)
+    chosen, ranks, crowding = _select(objectives, violation, population)
+    genomes, objectives, violation = [genomes[i] for i in chosen], objectives[chosen], violation[chosen]
+
+    def tournament():
+        i, j = rng.randrange(len(genomes)), rng.randrange(len(genomes))
+        return i if (ranks[i], -crowding[i]) <= (ranks[j], -crowding[j]) else j
+
+    for _ in range(generations):
+        offspring = []
+        for _ in range(population):
+            a, b = genomes[tournament()], genomes[tournament()]
+            child = problem.crossover(a, b, rng) if rng.random() < CROSSOVER_RATE else list(a)
+            offspring.append(problem.mutate(child, rng))
+        child_objectives, child_violation = problem.evaluate(offspring)
+        evaluations += len(offspring)
+        merged = genomes + offspring
+        merged_objectives = np.vstack([objectives, child_objectives])
+        merged_violation = np.concatenate([violation, child_violation])
+        # Identical schedules would crowd out the rest of the front
+        keys = {}
+        for i, genome in enumerate(merged):
+            keys.setdefault(tuple(sorted(genome)), i)
+        distinct = np.array(sorted(keys.values()), dtype=np.intp)
+        chosen, ranks, crowding = _select(merged_objectives[distinct], merged_violation[distinct], population)
+        chosen = distinct[chosen]
+        genomes = [merged[i] for i in chosen]
+        objectives, violation = merged_objectives[chosen], merged_violation[chosen]
+    front = [genomes[i] for i in np.flatnonzero(ranks == 0)]
+    return front, evaluations
+
+def _evolve_island(args) -> Tuple[List[List[Placement]], int]:
+    return evolve(*args)
+
+def explore_pareto(scheduler, manual_assignments=None, population: int = 40, generations: int = 40,
+                   islands: Optional[int] = None, jobs: int = 1, seed: Optional[int] = None,
+                   size: int = 10) -> ParetoFront:
+    """Search for up to `size` non-dominated schedules over OBJECTIVES"""
+    started = time.perf_counter()
+    problem = ParetoProblem(scheduler, manual_assignments)
+    islands = max(islands or jobs, 1)
+    rng = random.Random(seed)
+    # The greedy schedule and randomized restarts seed every island
+    seeds = [problem.encode(scheduler.generate_schedule(manual_assignments)[0])]
+    for _ in range(max(population // 2, 1)):
+        seeds.append(problem.encode(scheduler.generate_schedule(manual_assignments, rng=rng)[0]))
+    seeds = [genome for genome in _unique(seeds) if problem.valid(genome)] or [[]]
+    tasks = [(problem, seeds, population, generations, rng.randrange(2 ** 32)) for _ in range(islands)]
+    if jobs <= 1 or islands <= 1:
+        results = [evolve(*task) for task in tasks]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=min(jobs, islands)) as pool:
+            results = list(pool.map(_evolve_island, tasks))
+
+    genomes = _unique([genome for front, _ in results for genome in front])
+    objectives, violation = problem.evaluate(genomes)
+    front = non_dominated_fronts(objectives, violation)[0]
+    # Schedules with the same objective values offer no choice between them
+    distinct = {}
+    for i in front:
+        distinct.setdefault(tuple(np.round(objectives[i], 6)), i)
+    front = np.array(sorted(distinct.values()), dtype=np.intp)
+    if len(front) > size:
+        front = front[np.argsort(-crowding_distance(objectives[front]), kind="stable")[:size]]
+    solutions = []
+    for i in front:
+        schedule = problem.decode(genomes[i])
+        solutions.append(ParetoSolution(
+            schedule, problem.conflicts(genomes[i]),
+            {name: round(float(objectives[i, m]), 6) for m, name in enumerate(OBJECTIVES)},
+            float(violation[i]), round(problem.model.score(schedule), 6)))
+    solutions.sort(key=lambda solution: solution.score)
+    return ParetoFront(solutions, generations, sum(evaluations for _, evaluations in results),
+                       time.perf_counter() - started)
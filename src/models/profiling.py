@@ -0,0 +1,110 @@
+import time
+from dataclasses import dataclass, field, asdict
+from typing import Callable, List, Optional
+
+@dataclass
+class PhaseStats:
+    name: str
+    wall_seconds: float = 0.0
+    candidate_evaluations: int = 0  # (class, slot) pairs examined
+    eligibility_checks: int = 0  # coach/class/slot compatibility checks
+    placements: int = 0  # classes added to the schedule
+
+@dataclass
+class ScheduleProfile:
+    phases: List[PhaseStats] = field(default_factory=list)
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(p.wall_seconds for p in self.phases)
+
+    def get_phase(self, name: str) -> Optional[PhaseStats]:
+        for phase in self.phases:
+            if phase.name == name:
+                return phase
+        return None
+
+    def to_dict(self):
+        return {
+            "total_seconds": self.total_seconds,
+            "phases": [asdict(p) for p in self.phases],
+        }
+
+    def format_table(self) -> str:
+        lines = [f"{'Phase':<20} {'ms':>9} {'candidates':>11} {'checks':>9} {'placed':>7}"]
+        for p in self.phases:
+            lines.append(f"{p.name:<20} {p.wall_seconds * 1000:9.3f} {p.candidate_evaluations:11d} "
+                         f"{p.eligibility_checks:9d} {p.placements:7d}")
+        lines.append(f"{'total':<20} {self.total_seconds * 1000:9.3f}")
+        return "\n".join(lines)
+
+class _Phase:
+    __slots__ = ("profiler", "stats", "start")
+
+    def __init__(self, profiler, stats):
+        self.profiler = profiler
+        self.stats = stats
+
+    def __enter__(self):
+        self.profiler._current = self.stats
+        self.start = time.perf_counter()
+        return self.stats
+
+    def __exit__(self, *exc):
+        self.stats.wall_seconds += time.perf_counter() - self.start
+        self.profiler._current = None
+        if self.profiler.on_phase is not None:
+            self.profiler.on_phase(self.stats)
+        return False
+
+class ScheduleProfiler:
+    """Records wall time and work counters for each phase of generate_schedule.
+
+    Pass an instance to BJJScheduler.generate_schedule(profiler=...) and read
+    `profiler.profile` afterwards, or supply `on_phase` to be called with the
+    PhaseStats of every phase as it finishes.
+    """
+
+    enabled = True
+
+    def __init__(self, on_phase: Optional[Callable[[PhaseStats], None]] = None):
+        self.on_phase = on_phase
+        self.profile = ScheduleProfile()
+        self._current: Optional[PhaseStats] = None
+
+    def phase(self, name: str) -> _Phase:
+        stats = PhaseStats(name)
+        self.profile.phases.append(stats)
+        return _Phase(self, stats)
+
+    def count(self, candidate_evaluations: int = 0, eligibility_checks: int = 0, placements: int = 0):
+        """Add counters to the phase that is currently running"""
+        stats = self._current
+        if stats is None:
+            return
+        stats.candidate_evaluations += candidate_evaluations
+        stats.eligibility_checks += eligibility_checks
+        stats.placements += placements
+
+class _NullPhase:
+    __slots__ = ()
+
+    def __enter__(self):
+        return None
+
+    def __exit__(self, *exc):
+        return False
+
+class NullProfiler:
+    """Profiler used when profiling is off: every hook is a no-op"""
+
+    enabled = False
+    _phase = _NullPhase()
+
+    def phase(self, name: str) -> _NullPhase:
+        return self._phase
+
+    def count(self, candidate_evaluations: int = 0, eligibility_checks: int = 0, placements: int = 0):
+        pass
+
+NULL_PROFILER = NullProfiler()
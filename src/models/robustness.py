@@ -0,0 +1,155 @@
+"""
+Monte Carlo robustness of a schedule against coach no-shows
+
+Each scenario draws which coaches miss the week from per-coach absence
+probabilities, then repairs the schedule greedily: every class of an absent
+coach goes to the first conflict-free substitute (as ranked by the
+SubstituteIndex) who is present, still has weekly headroom and is not
+already covering an overlapping class. Scenarios are simulated in batches
+as NumPy arrays, one vectorized step per class and candidate, so the cost
+grows with the number of classes rather than the number of scenarios.
+"""
+
+import math
+from dataclasses import dataclass
+from statistics import NormalDist
+from typing import Dict, List, Mapping, Optional, Sequence
+
+import numpy as np
+
+from .data_classes import ScheduledClass
+
+DEFAULT_ABSENCE_PROBABILITY = 0.05
+BATCH_SIZE = 20000
+
+@dataclass
+class ClassRisk:
+    entry: int              # position in the schedule
+    class_name: str
+    day: str
+    coach: str
+    no_show_rate: float     # share of scenarios where the coach is absent
+    uncovered_rate: float   # share of scenarios where no substitute was found
+
+    def to_dict(self) -> dict:
+        return {"entry": self.entry, "class_name": self.class_name, "day": self.day, "coach": self.coach,
+                "no_show_rate": round(self.no_show_rate, 6), "uncovered_rate": round(self.uncovered_rate, 6)}
+
+@dataclass
+class RobustnessReport:
+    samples: int
+    confidence: float
+    expected_no_shows: float        # classes per week whose coach is absent
+    expected_uncovered: float       # of those, classes left without a substitute
+    uncovered_interval: tuple       # confidence interval of expected_uncovered
+    uncovered_std: float
+    any_uncovered: float            # share of weeks with at least one uncovered class
+    classes: List[ClassRisk]        # most fragile first
+
+    def summary(self) -> str:
+        low, high = self.uncovered_interval
+        return (f"{self.expected_uncovered:.3f} uncovered classes/week "
+                f"({self.confidence:.0%} CI {low:.3f}-{high:.3f}) of {self.expected_no_shows:.3f} no-shows; "
+                f"{self.any_uncovered:.1%} of weeks lose a class")
+
+    def to_dict(self, limit: Optional[int] = None) -> dict:
+        return {
+            "samples": self.samples,
+            "confidence": self.confidence,
+            "expected_no_shows": round(self.expected_no_shows, 6),
+            "expected_uncovered": round(self.expected_uncovered, 6),
+            "uncovered_interval": [round(v, 6) for v in self.uncovered_interval],
+            "uncovered_std": round(self.uncovered_std, 6),
+            "any_uncovered": round(self.any_uncovered, 6),
+            "classes": [risk.to_dict() for risk in self.classes[:limit]],
+        }
+
+def absence_probabilities(names: Sequence[str], probabilities: Optional[Mapping[str, float]] = None,
+                          default: float = DEFAULT_ABSENCE_PROBABILITY) -> np.ndarray:
+    """Probability per coach name, from the mapping or the default"""
+    probabilities = dict(probabilities or {})
+    unknown = set(probabilities) - set(names)
+    if unknown:
+        raise ValueError(f"Unknown coach {sorted(unknown)[0]!r}")
+    p = np.array([float(probabilities.get(name, default)) for name in names])
+    if not np.all((p >= 0) & (p <= 1)):
+        raise ValueError("Absence probabilities must be between 0 and 1")
+    return p
+
+def _overlaps(a, b) -> bool:
+    return a[0] == b[0] and a[1] < b[2] and b[1] < a[2]
+
+def simulate_robustness(scheduler, schedule: Sequence[ScheduledClass],
+                        probabilities: Optional[Mapping[str, float]] = None,
+                        default_probability: float = DEFAULT_ABSENCE_PROBABILITY,
+                        samples: int = 10000, seed: Optional[int] = None, confidence: float = 0.95,
+                        batch_size: int = BATCH_SIZE, index=None) -> RobustnessReport:
+    """Expected classes left uncovered per week when coaches miss it at random"""
+    if samples < 1:
+        raise ValueError("samples must be at least 1")
+    index = index or scheduler.substitute_index(schedule)
+    schedule = index.schedule
+    names = [coach.name for coach in index.coaches]
+    positions: Dict[str, int] = {}
+    for k, name in enumerate(names):
+        positions.setdefault(name, k)
+    # Coaches in the schedule but no longer on the roster can still miss their classes
+    for sc in schedule:
+        if sc.coach.name not in positions:
+            positions[sc.coach.name] = len(names)
+            names.append(sc.coach.name)
+    p = absence_probabilities(names, probabilities, default_probability)
+    owners = np.array([positions[sc.coach.name] for sc in schedule], dtype=np.intp)
+    candidates = [[positions[s.coach.name] for s in index.find(j) if not s.conflict] for j in range(len(schedule))]
+    headroom = np.zeros(len(names), dtype=np.int32)
+    headroom[:len(index.headroom)] = index.headroom
+
+    # Most constrained classes are repaired first; a substitute's earlier cover blocks overlapping classes
+    order = sorted(range(len(schedule)), key=lambda j: (len(candidates[j]), index.intervals[j]))
+    overlapping = {j: [o for o in order[:n] if _overlaps(index.intervals[j], index.intervals[o])]
+                   for n, j in enumerate(order)}
+
+    rng = np.random.default_rng(seed)
+    uncovered_per_week = np.empty(samples)
+    no_shows = np.zeros(len(schedule))
+    uncovered_counts = np.zeros(len(schedule))
+    for begin in range(0, samples, batch_size):
+        n = min(batch_size, samples - begin)
+        absent = rng.random((n, len(names))) < p
+        remaining = np.broadcast_to(headroom, absent.shape).copy()
+        assigned = np.full((n, len(schedule)), -1, dtype=np.int32)
+        uncovered = np.zeros((n, len(schedule)), dtype=bool)
+        for j in order:
+            pending = np.flatnonzero(absent[:, owners[j]])
+            for k in candidates[j]:
+                if not pending.size:
+                    break
+                free = ~absent[pending, k] & (remaining[pending, k] > 0)
+                for o in overlapping[j]:
+                    free &= assigned[pending, o] != k
+                taken = pending[free]
+                assigned[taken, j] = k
+                remaining[taken, k] -= 1
+                pending = pending[~free]
+            uncovered[pending, j] = True
+        uncovered_per_week[begin:begin + n] = uncovered.sum(axis=1)
+        no_shows += absent[:, owners].sum(axis=0)
+        uncovered_counts += uncovered.sum(axis=0)
+
+    mean = float(uncovered_per_week.mean())
+    std = float(uncovered_per_week.std(ddof=1)) if samples > 1 else 0.0
+    margin = NormalDist().inv_cdf(0.5 + confidence / 2) * std / math.sqrt(samples)
+    classes = [ClassRisk(j, sc.class_def.name, sc.time_slot.day, sc.coach.name,
+                         float(no_shows[j] / samples), float(uncovered_counts[j] / samples))
+               for j, sc in enumerate(schedule)]
+    classes.sort(key=lambda risk: (-risk.uncovered_rate, -risk.no_show_rate, risk.entry))
+    return RobustnessReport(
+        samples=samples,
+        confidence=confidence,
+        expected_no_shows=float(no_shows.sum() / samples),
+        expected_uncovered=mean,
+        uncovered_interval=(max(0.0, mean - margin), mean + margin),
+        uncovered_std=std,
+        any_uncovered=float(np.count_nonzero(uncovered_per_week) / samples),
+        classes=classes,
+    )
@@ -1,11 +1,26 @@
 import random
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Optional, Sequence, Tuple
 from datetime import datetime, time, date, timedelta
 import json
-from pathlib import Path
 
 from .enums import ClassType, GiSubType, NoGiSubType, ScheduleMode
 from .data_classes import TimeSlot, Coach, ClassDefinition, ScheduledClass, ScheduleRequirements, get_default_configuration
+from .profiling import ScheduleProfiler, ScheduleProfile, NULL_PROFILER
+from .changes import ChangeTracker
+from .constraints import FORBIDDEN, ConstraintSet, time_category
+from .substitutes import Substitute, SubstituteIndex
+from .locations import CoachTimeline, travel_minutes
+from .availability import validate_windows
+
+def _minutes(t: time) -> int:
+    return t.hour * 60 + t.minute
+
+def _time_order(schedule: Sequence[ScheduledClass]) -> List[int]:
+    return sorted(range(len(schedule)), key=lambda i: (schedule[i].time_slot.day.lower(),
+                                                       schedule[i].time_slot.start_time))
+
+# Chance that a randomized restart re-places a warm-started class from scratch
+WARM_START_RELEASE = 0.1
 
 class BJJScheduler:
     def __init__(self):
@@ -14,13 +29,48 @@ class BJJScheduler:
         self.fixed_classes: List[ScheduledClass] = []
         self.schedule_mode: ScheduleMode = ScheduleMode.BALANCED
         self.class_definitions: List[ClassDefinition] = []
+        # Tracks which entities changed so stores can save only those
+        self.changes = ChangeTracker()
+        # Hard and soft placement rules, compiled into a cost table per run
+        self.constraints = ConstraintSet()
+        # Minutes between two locations, keyed (from, to); see locations.travel_minutes
+        self.travel_times: Dict[Tuple[str, str], int] = {}
+        # (config and schedule key, index) of the last substitute_index call
+        self._substitutes: Optional[Tuple[tuple, SubstituteIndex]] = None
         self.load_default()
     
     def add_coach(self, coach: Coach):
-        self.coaches.append(coach)
+        self.add_entity("coaches", coach)
+
+    def update_coach(self, index: int, coach: Coach):
+        """Replace the coach at index (also call after editing a coach in place)"""
+        self.replace_entity("coaches", index, coach)
+
+    def remove_coach(self, index: int):
+        self.remove_entity("coaches", index)
         
     def add_time_slot(self, time_slot: TimeSlot):
-        self.time_slots.append(time_slot)
+        self.add_entity("time_slots", time_slot)
+
+    def update_time_slot(self, index: int, time_slot: TimeSlot):
+        self.replace_entity("time_slots", index, time_slot)
+
+    def remove_time_slot(self, index: int):
+        self.remove_entity("time_slots", index)
+
+    def add_entity(self, collection: str, entity, index: Optional[int] = None):
+        """Append an entity, or insert it at index"""
+        entities = getattr(self, collection)
+        entities.insert(len(entities) if index is None else index, entity)
+        self.changes.added(collection, entity, index)
+
+    def replace_entity(self, collection: str, index: int, entity):
+        getattr(self, collection)[index] = entity
+        self.changes.updated(collection, index, entity)
+
+    def remove_entity(self, collection: str, index: int):
+        del getattr(self, collection)[index]
+        self.changes.removed(collection, index)
         
     def add_fixed_class(self, scheduled_class: ScheduledClass):
         scheduled_class.is_fixed = True
@@ -31,13 +81,40 @@ class BJJScheduler:
         
     def add_class_definition(self, class_def: ClassDefinition):
         """Add a new class definition"""
-        self.class_definitions.append(class_def)
+        self.add_entity("class_definitions", class_def)
+
+    def update_class_definition(self, index: int, class_def: ClassDefinition):
+        self.replace_entity("class_definitions", index, class_def)
+
+    def remove_class_definition_at(self, index: int):
+        self.remove_entity("class_definitions", index)
         
     def remove_class_definition(self, class_def: ClassDefinition):
         """Remove a class definition"""
         if class_def in self.class_definitions:
-            self.class_definitions.remove(class_def)
+            self.remove_class_definition_at(self.class_definitions.index(class_def))
             
+    def set_travel_time(self, origin: str, destination: str, minutes: int):
+        self.travel_times[(origin, destination)] = minutes
+
+    def travel_times_to_list(self) -> List[dict]:
+        return [{"from": origin, "to": destination, "minutes": minutes}
+                for (origin, destination), minutes in self.travel_times.items()]
+
+    def travel_times_from_list(self, entries: List[dict]):
+        self.travel_times = {(t["from"], t["to"]): int(t["minutes"]) for t in entries}
+
+    def travel_minutes(self, origin: Optional[str], destination: Optional[str]) -> int:
+        return travel_minutes(self.travel_times, origin, destination)
+
+    def locations(self) -> List[Optional[str]]:
+        """Distinct slot locations in config order; None is a slot without a location"""
+        return list(dict.fromkeys(slot.location for slot in self.time_slots))
+
+    def coach_timeline(self) -> Optional[CoachTimeline]:
+        """An empty timeline when slots span several locations, else None (one gym needs no travel checks)"""
+        return CoachTimeline(self.travel_times) if len(self.locations()) > 1 else None
+
     def get_class_definition_by_name(self, name: str) -> Optional[ClassDefinition]:
         """Get a class definition by name"""
         for class_def in self.class_definitions:
@@ -47,34 +124,11 @@ class BJJScheduler:
         
     def _get_time_category(self, time_slot: TimeSlot) -> str:
         """Categorize time slot as morning, afternoon, or evening"""
-        hour = time_slot.start_time.hour
-        if hour < 12:
-            return "morning"
-        elif hour < 17:
-            return "afternoon"
-        else:
-            return "evening"
+        return time_category(time_slot)
             
     def _can_coach_teach_class(self, coach: Coach, class_def: ClassDefinition, time_slot: TimeSlot) -> bool:
-        """Check if coach can teach this class at this time"""
-        # Check class type compatibility
-        if class_def.class_type == ClassType.GI and not coach.can_teach_gi:
-            return False
-        if class_def.class_type == ClassType.NO_GI and not coach.can_teach_nogi:
-            return False
-        if class_def.class_type == ClassType.OPEN_MAT and not coach.can_teach_open_mat:
-            return False
-            
-        # Check day availability
-        if time_slot.day.lower() not in [day.lower() for day in coach.available_days]:
-            return False
-            
-        # Check time preference
-        time_category = self._get_time_category(time_slot)
-        if time_category not in coach.preferred_times:
-            return False
-            
-        return True
+        """Check if coach can teach this class at this time (no hard constraint fails)"""
+        return self.constraints.placement_cost(coach, time_slot, class_def) != FORBIDDEN
         
     def _get_coach_current_load(self, coach: Coach, current_schedule: List[ScheduledClass]) -> int:
         """Count how many classes this coach is already teaching"""
@@ -178,94 +232,255 @@ class BJJScheduler:
         candidates.sort(key=lambda x: (x[2], -x[3]))
         return candidates[0][0], candidates[0][1]
         
-    def generate_schedule(self, manual_assignments=None) -> Tuple[List[ScheduledClass], List[str]]:
-        """Generate a schedule with manual assignments and slot preferences"""
+    def resolve_slots(self, schedule: Sequence[ScheduledClass]) -> List[Optional[TimeSlot]]:
+        """The config slot of each scheduled class, or None where its time falls in no slot
+
+        Schedules rebuilt from exported dicts carry each class's own start
+        and end time instead of its slot.
+        """
+        slots_by_day: Dict[str, List[TimeSlot]] = {}
+        for slot in self.time_slots:
+            slots_by_day.setdefault(slot.day.lower(), []).append(slot)
+        known_slots = set(self.time_slots)
+        # Exported classes run back to back from their slot's start, so the
+        # minutes already booked in a slot tell overlapping slots apart
+        booked: Dict[TimeSlot, int] = {}
+        resolved: List[Optional[TimeSlot]] = [None] * len(schedule)
+        for i in _time_order(schedule):
+            sc = schedule[i]
+            if sc.time_slot in known_slots:
+                resolved[i] = sc.time_slot
+                continue
+            start, end = _minutes(sc.time_slot.start_time), _minutes(sc.time_slot.end_time)
+            containing = [s for s in slots_by_day.get(sc.time_slot.day.lower(), [])
+                          if _minutes(s.start_time) <= start and end <= _minutes(s.end_time)
+                          and s.location == sc.time_slot.location]
+            slot = min(containing, key=lambda s: (_minutes(s.start_time) + booked.get(s, 0) != start,
+                                                  _minutes(s.end_time)), default=None)
+            if slot is not None:
+                booked[slot] = booked.get(slot, 0) + end - start
+            resolved[i] = slot
+        return resolved
+
+    def resolve_schedule(self, schedule: Sequence[ScheduledClass]) -> List[ScheduledClass]:
+        """Map a schedule onto this config's classes, coaches and slots by name and time
+
+        Entries whose class or coach no longer exists or whose time falls in
+        no slot (see resolve_slots) are dropped.
+        """
+        classes = {cd.name: cd for cd in self.class_definitions}
+        coaches = {c.name: c for c in self.coaches}
+        slots = self.resolve_slots(schedule)
+        resolved = []
+        for i in _time_order(schedule):
+            sc = schedule[i]
+            class_def = classes.get(sc.class_def.name)
+            coach = coaches.get(sc.coach.name)
+            if class_def and coach and slots[i]:
+                resolved.append(ScheduledClass(class_def, slots[i], coach, is_fixed=sc.is_fixed))
+        return resolved
+
+    def substitute_index(self, schedule: Sequence[ScheduledClass]) -> SubstituteIndex:
+        """Precomputed eligibility and coach busy times of a schedule, for repeated substitute lookups.
+
+        The last index is reused while neither the schedule nor the config
+        changed, so repeated find_substitutes calls build it once.
+        """
+        key = None
+        if self.changes.in_sync(self):
+            key = (self.changes.revision, tuple(self.constraints.rules), tuple(sorted(self.travel_times.items())),
+                   tuple((sc.class_def.name, sc.time_slot, sc.coach.name) for sc in schedule))
+        if key is not None and self._substitutes is not None and self._substitutes[0] == key:
+            return self._substitutes[1]
+        index = SubstituteIndex(self, schedule)
+        self._substitutes = (key, index) if key is not None else None
+        return index
+
+    def find_substitutes(self, schedule: Sequence[ScheduledClass], entry: int,
+                         limit: Optional[int] = None) -> List[Substitute]:
+        """Coaches who could cover schedule[entry], conflict-free and least loaded first"""
+        return self.substitute_index(schedule).find(entry, limit)
+
+    def generate_schedule(self, manual_assignments=None,
+                          profiler: Optional[ScheduleProfiler] = None,
+                          rng: Optional[random.Random] = None,
+                          warm_start: Optional[Sequence[ScheduledClass]] = None,
+                          timeline: Optional[CoachTimeline] = None) -> Tuple[List[ScheduledClass], List[str]]:
+        """Generate a schedule with manual assignments and slot preferences
+
+        Pass a ScheduleProfiler to record per-phase timings and work counters.
+        Passing an rng randomizes the order classes and coaches are tried in,
+        which lets solvers restart the greedy placement from different orders.
+        A warm_start schedule (usually the previous run) is kept wherever its
+        placements still satisfy the hard rules, before the greedy passes
+        place the rest.
+
+        With slots at several locations every coach's timeline is checked so
+        their slots leave the travel time between locations free; a given
+        timeline (coaches' slots elsewhere) is checked the same way.
+        """
+        profiler = profiler or NULL_PROFILER
+        timeline = timeline.copy() if timeline is not None else self.coach_timeline()
+        coaches = list(self.coaches)
+        if rng is not None:
+            rng.shuffle(coaches)
         schedule = []
         conflicts = []
-        manual_assignments = manual_assignments or []
+        manual_assignments = list(manual_assignments or [])
+        # Classes fixed through add_fixed_class are placed like manual assignments
+        manual_assignments.extend(
+            {'class_def': fc.class_def, 'time_slot': fc.time_slot, 'coach': fc.coach}
+            for fc in self.fixed_classes
+        )
         # 1. Place manual assignments first
-        used_slots = set()
-        used_classes = set()
-        for ma in manual_assignments:
-            # ma: dict with keys: class_def, time_slot, coach
-            sc = ScheduledClass(ma['class_def'], ma['time_slot'], ma['coach'], is_fixed=True)
-            schedule.append(sc)
-            used_slots.add(ma['time_slot'])
-            used_classes.add(ma['class_def'])
+        with profiler.phase("manual_placement"):
+            used_slots = set()
+            used_classes = set()
+            for ma in manual_assignments:
+                # ma: dict with keys: class_def, time_slot, coach
+                sc = ScheduledClass(ma['class_def'], ma['time_slot'], ma['coach'], is_fixed=True)
+                schedule.append(sc)
+                if timeline is not None:
+                    timeline.add(ma['coach'].name, ma['time_slot'])
+                used_slots.add(ma['time_slot'])
+                used_classes.add(ma['class_def'])
+            profiler.count(placements=len(manual_assignments))
         # 2. Prepare slots by preference
-        slots_by_pref = {'gi': [], 'no-gi': [], 'open-mat': [], None: []}
-        for slot in self.time_slots:
-            if slot in used_slots:
-                continue
-            pref = slot.primary_preference if slot.primary_preference else None
-            slots_by_pref.setdefault(pref, []).append(slot)
+        with profiler.phase("slot_preparation"):
+            slots_by_pref = {'gi': [], 'no-gi': [], 'open-mat': [], None: []}
+            for slot in self.time_slots:
+                if slot in used_slots:
+                    continue
+                pref = slot.primary_preference if slot.primary_preference else None
+                slots_by_pref.setdefault(pref, []).append(slot)
+            # Rules are evaluated once here; the placement loops only look up costs
+            compiled = self.constraints.compile(self.coaches, self.time_slots, self.class_definitions)
+            coach_positions = {id(c): i for i, c in enumerate(self.coaches)}
+            coach_order = [(coach, coach_positions[id(coach)]) for coach in coaches]
         # 3. Prepare classes by type (excluding manual assignments)
-        classes_by_type = {'gi': [], 'no-gi': [], 'open-mat': []}
-        for class_def in self.class_definitions:
-            if class_def in used_classes:
-                continue
-            for _ in range(class_def.weekly_count):
-                classes_by_type[class_def.class_type.value].append(class_def)
+        with profiler.phase("class_expansion"):
+            classes_by_type = {'gi': [], 'no-gi': [], 'open-mat': []}
+            for class_def in self.class_definitions:
+                if class_def in used_classes:
+                    continue
+                for _ in range(class_def.weekly_count):
+                    classes_by_type[class_def.class_type.value].append(class_def)
+            if rng is not None:
+                for classes in classes_by_type.values():
+                    rng.shuffle(classes)
+        if warm_start:
+            with profiler.phase("warm_start"):
+                kept = 0
+                for previous in self.resolve_schedule(warm_start):
+                    class_def, slot, coach = previous.class_def, previous.time_slot, previous.coach
+                    pending = classes_by_type[class_def.class_type.value]
+                    if previous.is_fixed or slot in used_slots or class_def not in pending:
+                        continue
+                    if rng is not None and rng.random() < WARM_START_RELEASE:
+                        continue
+                    if (compiled.cost(coach_positions[id(coach)], compiled.slot_index[slot],
+                                      compiled.class_index[class_def]) == FORBIDDEN
+                            or self._get_available_time_in_slot(slot, schedule) < class_def.duration_minutes
+                            or self._get_coach_current_load(coach, schedule) >= coach.max_weekly_classes
+                            or (timeline is not None and not timeline.fits(coach.name, slot))):
+                        continue
+                    pending.remove(class_def)
+                    schedule.append(ScheduledClass(class_def, slot, coach))
+                    if timeline is not None:
+                        timeline.add(coach.name, slot)
+                    kept += 1
+                profiler.count(placements=kept)
         # 4. Distribute classes to preferred slots
         def assign_classes_to_slots(class_type, slots):
-            assigned = set()
+            # Track placement per class instance: a class with weekly_count > 1
+            # appears several times and each copy must be placed on its own
+            remaining = []
             slot_idx = 0
+            # Counted in locals and flushed once so a disabled profiler costs nothing in the loop
+            evaluations = checks = placements = 0
             for class_def in classes_by_type[class_type]:
+                placed = False
+                class_i = compiled.class_index[class_def]
                 # Find a slot with enough space and a coach
                 for _ in range(len(slots)):
                     slot = slots[slot_idx % len(slots)]
-                    # Find a coach
-                    for coach in self.coaches:
-                        if self._can_coach_teach_class(coach, class_def, slot) and self._get_coach_current_load(coach, schedule) < coach.max_weekly_classes:
-                            # Check available time
-                            if self._get_available_time_in_slot(slot, schedule) >= class_def.duration_minutes:
-                                sc = ScheduledClass(class_def, slot, coach)
-                                schedule.append(sc)
-                                assigned.add(class_def)
-                                break
+                    evaluations += 1
                     slot_idx += 1
-                    if class_def in assigned:
+                    if self._get_available_time_in_slot(slot, schedule) < class_def.duration_minutes:
+                        checks += len(coach_order)
+                        continue
+                    # The allowed coach with the lowest soft penalty, first in order on ties
+                    costs = compiled.coach_costs(compiled.slot_index[slot], class_i)
+                    best_coach, best_cost = None, FORBIDDEN
+                    for coach, coach_i in coach_order:
+                        checks += 1
+                        cost = costs[coach_i]
+                        if (cost < best_cost and self._get_coach_current_load(coach, schedule) < coach.max_weekly_classes
+                                and (timeline is None or timeline.fits(coach.name, slot))):
+                            best_coach, best_cost = coach, cost
+                            if cost == 0:
+                                break
+                    if best_coach is not None:
+                        schedule.append(ScheduledClass(class_def, slot, best_coach))
+                        if timeline is not None:
+                            timeline.add(best_coach.name, slot)
+                        placements += 1
+                        placed = True
                         break
-            # Remove assigned classes
-            classes_by_type[class_type] = [c for c in classes_by_type[class_type] if c not in assigned]
-        # Assign by primary preference
-        for ct in ['gi', 'no-gi', 'open-mat']:
-            assign_classes_to_slots(ct, slots_by_pref.get(ct, []))
-        # Assign by secondary preference
-        for slot in self.time_slots:
-            if slot in used_slots:
-                continue
-            sec = slot.secondary_preference
-            if sec and sec in classes_by_type:
-                assign_classes_to_slots(sec, [slot])
-        # Assign remaining classes to no-preference slots
-        for ct in ['gi', 'no-gi', 'open-mat']:
-            assign_classes_to_slots(ct, slots_by_pref.get(None, []))
-        # 5. Fill any remaining space in any slot
-        for ct in ['gi', 'no-gi', 'open-mat']:
+                if not placed:
+                    remaining.append(class_def)
+            # Keep only the instances that are still unassigned
+            classes_by_type[class_type] = remaining
+            profiler.count(evaluations, checks, placements)
+        with profiler.phase("preference_passes"):
+            # Assign by primary preference
+            for ct in ['gi', 'no-gi', 'open-mat']:
+                assign_classes_to_slots(ct, slots_by_pref.get(ct, []))
+            # Assign by secondary preference
             for slot in self.time_slots:
                 if slot in used_slots:
                     continue
-                assign_classes_to_slots(ct, [slot])
+                sec = slot.secondary_preference
+                if sec and sec in classes_by_type:
+                    assign_classes_to_slots(sec, [slot])
+            # Assign remaining classes to no-preference slots
+            for ct in ['gi', 'no-gi', 'open-mat']:
+                assign_classes_to_slots(ct, slots_by_pref.get(None, []))
+        # 5. Fill any remaining space in any slot
+        with profiler.phase("fill"):
+            for ct in ['gi', 'no-gi', 'open-mat']:
+                for slot in self.time_slots:
+                    if slot in used_slots:
+                        continue
+                    assign_classes_to_slots(ct, [slot])
         # 6. Report unfilled slots
-        for slot in self.time_slots:
-            if self._get_available_time_in_slot(slot, schedule) > 0:
-                conflicts.append(f"Could not fill all time in slot {slot}")
+        with profiler.phase("unfilled_report"):
+            for slot in self.time_slots:
+                if self._get_available_time_in_slot(slot, schedule) > 0:
+                    conflicts.append(f"Could not fill all time in slot {slot}")
         # 7. Report unassigned classes
-        for ct, clist in classes_by_type.items():
-            if clist:
-                conflicts.append(f"Unassigned {ct} classes: {len(clist)}")
+        with profiler.phase("unassigned_report"):
+            for ct, clist in classes_by_type.items():
+                if clist:
+                    conflicts.append(f"Unassigned {ct} classes: {len(clist)}")
         # 8. Assign slot_position for each class in a slot
-        from collections import defaultdict
-        slot_groups = defaultdict(list)
-        for sc in schedule:
-            slot_groups[sc.time_slot].append(sc)
-        for slot, sc_list in slot_groups.items():
-            # Sort by class_def name for determinism, or keep as is for order of assignment
-            sc_list.sort(key=lambda sc: sc.class_def.name)
-            for i, sc in enumerate(sc_list):
-                sc.slot_position = i
+        with profiler.phase("slot_positions"):
+            from collections import defaultdict
+            slot_groups = defaultdict(list)
+            for sc in schedule:
+                slot_groups[sc.time_slot].append(sc)
+            for slot, sc_list in slot_groups.items():
+                # Sort by class_def name for determinism, or keep as is for order of assignment
+                sc_list.sort(key=lambda sc: sc.class_def.name)
+                for i, sc in enumerate(sc_list):
+                    sc.slot_position = i
         return schedule, conflicts
+
+    def generate_schedule_with_profile(self, manual_assignments=None) -> Tuple[List[ScheduledClass], List[str], ScheduleProfile]:
+        """Generate a schedule and return it with its per-phase profile"""
+        profiler = ScheduleProfiler()
+        schedule, conflicts = self.generate_schedule(manual_assignments, profiler=profiler)
+        return schedule, conflicts, profiler.profile
         
     def print_schedule(self, schedule: List[ScheduledClass]):
         """Print the schedule in a readable format"""
@@ -295,65 +510,14 @@ class BJJScheduler:
                       f"{sc.class_def} | {sc.coach.name}{fixed_marker}")
     
     def export_to_icalendar(self, schedule: List[ScheduledClass], start_date: Optional[date] = None, weeks: int = 4) -> str:
-        """Export schedule to iCalendar format (.ics file)"""
-        if start_date is None:
-            start_date = date.today()
-        
-        ical_content = [
-            "BEGIN:VCALENDAR",
-            "VERSION:2.0",
-            "PRODID:-//BJJ Club//Schedule//EN",
-            "CALSCALE:GREGORIAN",
-            "METHOD:PUBLISH"
-        ]
-        
-        day_mapping = {
-            'monday': 0, 'tuesday': 1, 'wednesday': 2, 'thursday': 3,
-            'friday': 4, 'saturday': 5, 'sunday': 6
-        }
-        
-        # Generate events for specified number of weeks
-        for week in range(weeks):
-            week_date = start_date + timedelta(weeks=week)
-            
-            for sc in schedule:
-                if sc.time_slot.day.lower() not in day_mapping:
-                    continue
-                    
-                day_offset = day_mapping[sc.time_slot.day.lower()]
-                event_date = week_date + timedelta(days=day_offset)
-                
-                # Create datetime objects
-                start_datetime = datetime.combine(event_date, sc.time_slot.start_time)
-                end_datetime = datetime.combine(event_date, sc.time_slot.end_time)
-                
-                # Format for iCalendar (UTC)
-                start_str = start_datetime.strftime('%Y%m%dT%H%M%S')
-                end_str = end_datetime.strftime('%Y%m%dT%H%M%S')
-                
-                # Create unique ID
-                uid = f"{start_str}-{sc.class_def.class_type.value}-main@bjjclub.local"
-                
-                # Add event
-                ical_content.extend([
-                    "BEGIN:VEVENT",
-                    f"UID:{uid}",
-                    f"DTSTAMP:{datetime.now().strftime('%Y%m%dT%H%M%SZ')}",
-                    f"DTSTART:{start_str}",
-                    f"DTEND:{end_str}",
-                    f"SUMMARY:{sc.class_def}",
-                    f"DESCRIPTION:Coach: {sc.coach.name}" + ("\\nFixed Class" if sc.is_fixed else ""),
-                    f"LOCATION:BJJ Club",
-                    "BEGIN:VALARM",
-                    "TRIGGER:-PT15M",
-                    "ACTION:DISPLAY",
-                    "DESCRIPTION:Class starting in 15 minutes",
-                    "END:VALARM",
-                    "END:VEVENT"
-                ])
-        
-        ical_content.append("END:VCALENDAR")
-        return "\n".join(ical_content)
+        """Export schedule to iCalendar format (.ics file)
+
+        Each class becomes one weekly recurring event whose UID stays stable
+        across regenerations (see calendar_sync.schedule_events).
+        """
+        from .calendar_sync import schedule_events, render_calendar
+        events = schedule_events(schedule)
+        return render_calendar(events.values(), start_date, weeks)
     
     def save_icalendar_file(self, schedule: List[ScheduledClass], filename: Optional[str] = None, 
                            start_date: Optional[date] = None, weeks: int = 4):
@@ -369,48 +533,85 @@ class BJJScheduler:
         print(f"Schedule saved to {filename}")
         print("Double-click the file to add to your Mac Calendar app!") 
 
+    @staticmethod
+    def entity_to_dict(collection: str, entity) -> dict:
+        """Serialize one coach, time slot or class definition"""
+        if collection == "coaches":
+            data = dict(vars(entity))
+            # Coaches described by days and times of day keep their existing shape
+            if not data["availability"]:
+                del data["availability"]
+            return data
+        if collection == "time_slots":
+            data = {
+                "day": entity.day,
+                "start_time": entity.start_time.strftime("%H:%M"),
+                "end_time": entity.end_time.strftime("%H:%M"),
+                "primary_preference": entity.primary_preference,
+                "secondary_preference": entity.secondary_preference
+            }
+            # Single-gym configs keep their existing shape
+            if entity.location is not None:
+                data["location"] = entity.location
+            return data
+        return {"name": entity.name, "class_type": entity.class_type.value,
+                "duration_minutes": entity.duration_minutes, "weekly_count": entity.weekly_count}
+
+    @staticmethod
+    def entity_from_dict(collection: str, data: dict):
+        if collection == "coaches":
+            coach = Coach(**data)
+            coach.availability = validate_windows(coach.availability)
+            return coach
+        if collection == "time_slots":
+            return TimeSlot(
+                day=data["day"],
+                start_time=time.fromisoformat(data["start_time"]),
+                end_time=time.fromisoformat(data["end_time"]),
+                primary_preference=data.get("primary_preference"),
+                secondary_preference=data.get("secondary_preference"),
+                location=data.get("location")
+            )
+        return ClassDefinition(
+            name=data["name"],
+            class_type=ClassType(data["class_type"]),
+            duration_minutes=data.get("duration_minutes", 60),
+            weekly_count=data.get("weekly_count", 0)
+        )
+
     def to_dict(self):
-        return {
-            "coaches": [vars(c) for c in self.coaches],
-            "time_slots": [
-                {
-                    "day": ts.day,
-                    "start_time": ts.start_time.strftime("%H:%M"),
-                    "end_time": ts.end_time.strftime("%H:%M"),
-                    "primary_preference": ts.primary_preference,
-                    "secondary_preference": ts.secondary_preference
-                } for ts in self.time_slots
-            ],
-            "class_definitions": [
-                {"name": cd.name, "class_type": cd.class_type.value, "duration_minutes": cd.duration_minutes, "weekly_count": cd.weekly_count} for cd in self.class_definitions
-            ]
+        data = {
+            collection: [self.entity_to_dict(collection, e) for e in getattr(self, collection)]
+            for collection in ("coaches", "time_slots", "class_definitions")
         }
+        constraints = self.constraints.to_dict()
+        if constraints:
+            data["constraints"] = constraints
+        if self.travel_times:
+            data["travel_times"] = self.travel_times_to_list()
+        return data
 
     def from_dict(self, data):
-        from .enums import ClassType
-        from datetime import time
-        self.coaches = [Coach(**c) for c in data.get("coaches", [])]
-        self.time_slots = [
-            TimeSlot(
-                day=ts["day"],
-                start_time=time.fromisoformat(ts["start_time"]),
-                end_time=time.fromisoformat(ts["end_time"]),
-                primary_preference=ts.get("primary_preference"),
-                secondary_preference=ts.get("secondary_preference")
-            ) for ts in data.get("time_slots", [])
-        ]
-        self.class_definitions = [
-            ClassDefinition(
-                name=cd["name"],
-                class_type=ClassType(cd["class_type"]),
-                duration_minutes=cd.get("duration_minutes", 60),
-                weekly_count=cd.get("weekly_count", 0)
-            ) for cd in data.get("class_definitions", [])
-        ]
+        for collection in ("coaches", "time_slots", "class_definitions"):
+            setattr(self, collection, [self.entity_from_dict(collection, e) for e in data.get(collection, [])])
+        self.constraints = ConstraintSet()
+        self.constraints.configure(data.get("constraints", {}))
+        self.travel_times_from_list(data.get("travel_times", []))
+        self.changes.reset(self)
 
     def save_to_json(self, filepath):
-        with open(filepath, "w") as f:
-            json.dump(self.to_dict(), f, indent=2)
+        """Write the config as a snapshot, atomically replacing any existing file"""
+        import os
+        import tempfile
+        directory = os.path.dirname(os.path.abspath(filepath))
+        fd, tmp_path = tempfile.mkstemp(prefix=".bjj-config-", suffix=".json", dir=directory)
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(self.to_dict(), f, indent=2)
+            os.replace(tmp_path, filepath)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
 
     def load_from_json(self, filepath):
         with open(filepath, "r") as f:
@@ -421,4 +622,5 @@ class BJJScheduler:
         data = get_default_configuration()
         self.coaches = data["coaches"]
         self.time_slots = data["time_slots"]
-        self.class_definitions = data["class_definitions"] 
\ No newline at end of file
+        self.class_definitions = data["class_definitions"]
+        self.changes.reset(self)
\ No newline at end of file
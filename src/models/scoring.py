@@ -0,0 +1,172 @@
+"""
+Vectorized multi-objective scoring of schedules with NumPy
+
+A ScoringModel compiles a gym config into arrays once; schedules are then
+encoded as (class, slot, coach) index arrays and scored in batches, so
+multi-start and local search can compare thousands of candidates per
+second. Lower scores are better.
+"""
+
+from dataclasses import asdict, dataclass, fields
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+from .data_classes import ScheduledClass
+from .calendar_sync import DAY_INDEX
+from .availability import availability_index
+
+TYPES = ("gi", "no-gi", "open-mat")
+DAYS = 7
+
+@dataclass
+class ScoreWeights:
+    """Weight of each objective in the combined score"""
+    unplaced: float = 100.0            # required class instances left unscheduled
+    coach_overload: float = 50.0       # classes above a coach's weekly maximum
+    slot_overfill: float = 50.0        # minutes booked beyond a slot's length
+    ineligible: float = 20.0           # classes whose coach lacks the type, day or time preference
+    idle_minutes: float = 0.05         # unused minutes in slots
+    preference_mismatch: float = 2.0   # classes not matching their slot's primary/secondary type
+    load_imbalance: float = 1.0        # spread of coach load relative to their maximum
+    type_imbalance: float = 0.5        # spread of each class type's count across days
+    moved: float = 5.0                 # reference placements not kept (see ScoringModel.set_reference)
+
+COMPONENTS = tuple(f.name for f in fields(ScoreWeights))
+
+@dataclass
+class ScoreBreakdown:
+    total: float
+    components: Dict[str, float]
+
+    def to_dict(self):
+        return {"total": self.total, **self.components}
+
+class ScoringModel:
+    """Arrays describing a gym config, for scoring any schedule drawn from it"""
+
+    def __init__(self, coaches, time_slots, class_definitions, weights: Optional[ScoreWeights] = None):
+        self.weights = weights or ScoreWeights()
+        self.coaches = list(coaches)
+        self.time_slots = list(time_slots)
+        self.class_definitions = list(class_definitions)
+        self.coach_index = {c.name: i for i, c in enumerate(self.coaches)}
+        self.slot_index = {s: i for i, s in enumerate(self.time_slots)}
+        self.class_index = {cd.name: i for i, cd in enumerate(self.class_definitions)}
+
+        self.class_type = np.array([TYPES.index(cd.class_type.value) for cd in self.class_definitions], dtype=np.int64)
+        self.class_minutes = np.array([cd.duration_minutes for cd in self.class_definitions], dtype=np.float64)
+        self.class_required = np.array([cd.weekly_count for cd in self.class_definitions], dtype=np.float64)
+        self.coach_max = np.array([c.max_weekly_classes for c in self.coaches], dtype=np.float64)
+        self.slot_minutes = np.array([(s.end_time.hour * 60 + s.end_time.minute)
+                                      - (s.start_time.hour * 60 + s.start_time.minute)
+                                      for s in self.time_slots], dtype=np.float64)
+        self.slot_day = np.array([DAY_INDEX.get(s.day.lower(), 0) for s in self.time_slots], dtype=np.int64)
+        self.slot_primary = np.array([TYPES.index(s.primary_preference) if s.primary_preference in TYPES else -1
+                                      for s in self.time_slots], dtype=np.int64)
+        self.slot_secondary = np.array([TYPES.index(s.secondary_preference) if s.secondary_preference in TYPES
+                                        else -1 for s in self.time_slots], dtype=np.int64)
+        # eligible[coach, slot, type]: the coach teaches that type and is available for the slot
+        teaches = np.array([[c.can_teach_gi, c.can_teach_nogi, c.can_teach_open_mat] for c in self.coaches],
+                           dtype=bool).reshape(len(self.coaches), len(TYPES))
+        available = np.array([[index.covers_slot(s) for s in self.time_slots]
+                              for index in map(availability_index, self.coaches)], dtype=bool).reshape(len(self.coaches), len(self.time_slots))
+        self.eligible = available[:, :, None] & teaches[:, None, :]
+        # Sorted (class, slot, coach) keys of a previous schedule and how often each occurs
+        self.reference_keys = np.zeros(0, dtype=np.int64)
+        self.reference_counts = np.zeros(0, dtype=np.int64)
+
+    @classmethod
+    def from_scheduler(cls, scheduler, weights: Optional[ScoreWeights] = None) -> "ScoringModel":
+        return cls(scheduler.coaches, scheduler.time_slots, scheduler.class_definitions, weights)
+
+    def encode(self, schedule: Sequence[ScheduledClass]) -> np.ndarray:
+        """(n, 3) int array of class, slot and coach indexes; unknown entities are skipped"""
+        rows = []
+        for sc in schedule:
+            class_idx = self.class_index.get(sc.class_def.name)
+            slot_idx = self.slot_index.get(sc.time_slot)
+            coach_idx = self.coach_index.get(sc.coach.name)
+            if class_idx is not None and slot_idx is not None and coach_idx is not None:
+                rows.append((class_idx, slot_idx, coach_idx))
+        return np.array(rows, dtype=np.int64).reshape(len(rows), 3)
+
+    def _keys(self, cls: np.ndarray, slot: np.ndarray, coach: np.ndarray) -> np.ndarray:
+        return (cls * len(self.time_slots) + slot) * len(self.coaches) + coach
+
+    def set_reference(self, schedule: Sequence[ScheduledClass]):
+        """Count every placement of `schedule` missing from a scored schedule as moved"""
+        encoded = self.encode(schedule)
+        self.reference_keys, self.reference_counts = np.unique(
+            self._keys(encoded[:, 0], encoded[:, 1], encoded[:, 2]), return_counts=True)
+
+    def stack(self, encoded: Sequence[np.ndarray]) -> np.ndarray:
+        """Pad encoded schedules into one (batch, n, 3) array; padding rows are -1"""
+        width = max((len(e) for e in encoded), default=0)
+        batch = np.full((len(encoded), width, 3), -1, dtype=np.int64)
+        for i, e in enumerate(encoded):
+            batch[i, :len(e)] = e
+        return batch
+
+    def components(self, batch: np.ndarray) -> Dict[str, np.ndarray]:
+        """Raw value of every objective for each schedule in a (batch, n, 3) array"""
+        b = batch.shape[0]
+        n_classes, n_slots, n_coaches = len(self.class_definitions), len(self.time_slots), len(self.coaches)
+        valid = batch[..., 0] >= 0
+        row = np.broadcast_to(np.arange(b)[:, None], valid.shape)[valid]
+        cls, slot, coach = batch[..., 0][valid], batch[..., 1][valid], batch[..., 2][valid]
+        ctype = self.class_type[cls]
+        minutes = self.class_minutes[cls]
+
+        placed = np.bincount(row * n_classes + cls, minlength=b * n_classes).reshape(b, n_classes)
+        load = np.bincount(row * n_coaches + coach, minlength=b * n_coaches).reshape(b, n_coaches)
+        used = np.bincount(row * n_slots + slot, weights=minutes, minlength=b * n_slots).reshape(b, n_slots)
+        day_type = np.bincount((row * DAYS + self.slot_day[slot]) * len(TYPES) + ctype,
+                               minlength=b * DAYS * len(TYPES)).reshape(b, DAYS, len(TYPES))
+
+        primary, secondary = self.slot_primary[slot], self.slot_secondary[slot]
+        # A class in a slot with preferences costs 1 unless it matches the primary, 0.5 for the secondary
+        mismatch = np.where(primary < 0, 0.0, np.where(primary == ctype, 0.0,
+                                                       np.where(secondary == ctype, 0.5, 1.0)))
+        ineligible = ~self.eligible[coach, slot, ctype]
+        ratio = load / np.maximum(self.coach_max, 1)
+        moved = np.zeros(b)
+        if len(self.reference_keys):
+            keys = self._keys(cls, slot, coach)
+            refs = len(self.reference_keys)
+            pos = np.minimum(np.searchsorted(self.reference_keys, keys), refs - 1)
+            hit = self.reference_keys[pos] == keys
+            kept = np.bincount(row[hit] * refs + pos[hit], minlength=b * refs).reshape(b, refs)
+            moved = (self.reference_counts - np.minimum(kept, self.reference_counts)).sum(axis=1)
+        active_days = np.unique(self.slot_day) if n_slots else np.array([], dtype=np.int64)
+        return {
+            "unplaced": np.maximum(self.class_required - placed, 0).sum(axis=1),
+            "coach_overload": np.maximum(load - self.coach_max, 0).sum(axis=1),
+            "slot_overfill": np.maximum(used - self.slot_minutes, 0).sum(axis=1),
+            "ineligible": np.bincount(row, weights=ineligible, minlength=b),
+            "idle_minutes": np.maximum(self.slot_minutes - used, 0).sum(axis=1),
+            "preference_mismatch": np.bincount(row, weights=mismatch, minlength=b),
+            "load_imbalance": ratio.std(axis=1) if n_coaches else np.zeros(b),
+            "type_imbalance": (day_type[:, active_days, :].std(axis=1).sum(axis=1) if len(active_days)
+                               else np.zeros(b)),
+            "moved": moved,
+        }
+
+    def score_batch(self, batch: np.ndarray) -> np.ndarray:
+        """Weighted total for each schedule in a (batch, n, 3) array"""
+        values = self.components(batch)
+        weights = asdict(self.weights)
+        return sum(weights[name] * values[name] for name in COMPONENTS)
+
+    def score_many(self, schedules: Sequence[Sequence[ScheduledClass]]) -> np.ndarray:
+        return self.score_batch(self.stack([self.encode(s) for s in schedules]))
+
+    def breakdown(self, schedule: Sequence[ScheduledClass]) -> ScoreBreakdown:
+        values = self.components(self.stack([self.encode(schedule)]))
+        weights = asdict(self.weights)
+        components = {name: float(values[name][0]) for name in COMPONENTS}
+        total = sum(weights[name] * components[name] for name in COMPONENTS)
+        return ScoreBreakdown(round(total, 6), {k: round(v, 6) for k, v in components.items()})
+
+    def score(self, schedule: Sequence[ScheduledClass]) -> float:
+        return self.breakdown(schedule).total
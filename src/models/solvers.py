@@ -0,0 +1,93 @@
+import random
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence, Tuple
+
+from .data_classes import ScheduledClass
+
+@dataclass
+class SolveResult:
+    schedule: List[ScheduledClass]
+    conflicts: List[str]
+    seed: Optional[int] = None
+    iterations: int = 1
+    elapsed_seconds: float = 0.0
+    history: List[Tuple[int, int]] = field(default_factory=list)
+    score: Optional[float] = None
+    bounds: Optional[object] = None   # bounds.BoundReport, imported with numpy on first solve
+    locations: Optional[list] = None  # locations.LocationResult of each location when solved by location
+
+def schedule_cost(schedule: List[ScheduledClass], conflicts: List[str]) -> Tuple[int, int]:
+    """Lower is better: more placed classes first, then fewer conflicts"""
+    return (-len(schedule), len(conflicts))
+
+def solve(scheduler, manual_assignments=None, seed: Optional[int] = None,
+          time_budget: Optional[float] = None, max_iterations: Optional[int] = None,
+          warm_start: Optional[Sequence[ScheduledClass]] = None,
+          stability_weight: Optional[float] = None, by_location: bool = False, jobs: int = 1) -> SolveResult:
+    """Run the greedy generator, then random restarts while budget remains.
+
+    The first iteration is the plain deterministic greedy run. Without a time
+    budget or iteration cap that is the only run, unless a seed is given:
+    the seed then adds one seeded restart. Restarts draw their class
+    and coach orders from random.Random(seed), so a seed with max_iterations
+    reproduces the same result; a pure time budget depends on machine speed.
+    Runs with the same placements and conflicts are compared by their
+    weighted score from ScoringModel. The result's bounds report compares
+    the best schedule with lower bounds from bounds.py.
+
+    With a warm_start schedule every run keeps its still-valid placements
+    (restarts release a few at random), and each placement of it a run does
+    not keep adds stability_weight to the score.
+
+    With by_location the config is decomposed into one sub-problem per slot
+    location (see locations.solve_network), solved in `jobs` processes;
+    restarts and warm starts do not apply there.
+    """
+    from .bounds import bound_report
+    from .scoring import ScoreWeights, ScoringModel
+
+    started = time.perf_counter()
+    weights = ScoreWeights() if stability_weight is None else ScoreWeights(moved=stability_weight)
+    model = ScoringModel.from_scheduler(scheduler, weights)
+    if by_location:
+        from .locations import solve_network
+        network = solve_network(scheduler, manual_assignments, jobs=jobs)
+        return SolveResult(network.schedule, network.conflicts, seed, network.rounds,
+                           time.perf_counter() - started, [schedule_cost(network.schedule, network.conflicts)],
+                           model.score(network.schedule),
+                           bound_report(scheduler, network.schedule, manual_assignments, model.weights),
+                           network.locations)
+    if warm_start:
+        warm_start = scheduler.resolve_schedule(warm_start)
+        model.set_reference(warm_start)
+    best_schedule, best_conflicts = scheduler.generate_schedule(manual_assignments, warm_start=warm_start)
+    best_cost = schedule_cost(best_schedule, best_conflicts)
+    best_score = model.score(best_schedule)
+    history = [best_cost]
+    if time_budget is None and max_iterations is None and seed is not None:
+        # A seed alone asks for randomization: one seeded restart after the greedy run
+        max_iterations = 2
+    if time_budget is None and max_iterations is None:
+        return SolveResult(best_schedule, best_conflicts, seed, 1, time.perf_counter() - started, history,
+                           best_score, bound_report(scheduler, best_schedule, manual_assignments, model.weights))
+
+    rng = random.Random(seed)
+    iterations = 1
+    while best_cost[1] > 0:
+        if max_iterations is not None and iterations >= max_iterations:
+            break
+        if time_budget is not None and time.perf_counter() - started >= time_budget:
+            break
+        schedule, conflicts = scheduler.generate_schedule(manual_assignments, rng=rng, warm_start=warm_start)
+        iterations += 1
+        cost = schedule_cost(schedule, conflicts)
+        history.append(cost)
+        if cost > best_cost:
+            continue
+        # Equal placements and conflicts: the weighted score breaks the tie
+        score = model.score(schedule)
+        if cost < best_cost or score < best_score:
+            best_schedule, best_conflicts, best_cost, best_score = schedule, conflicts, cost, score
+    return SolveResult(best_schedule, best_conflicts, seed, iterations, time.perf_counter() - started, history,
+                       best_score, bound_report(scheduler, best_schedule, manual_assignments, model.weights))
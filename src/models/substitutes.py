@@ -0,0 +1,130 @@
+"""
+Substitute-coach lookups for a generated schedule
+
+A SubstituteIndex is built once per schedule: the coaches allowed for each
+slot and class come from the compiled constraint tables, cached by rule
+signature, and each coach's classes are kept as sorted busy intervals per
+day. A lookup then costs one cached list plus a bisect per eligible coach
+instead of checking every coach against the rules.
+"""
+
+import bisect
+import itertools
+from collections import Counter
+from dataclasses import dataclass
+from typing import Collection, Dict, List, Optional, Sequence, Tuple
+
+from .constraints import FORBIDDEN
+from .data_classes import Coach, ScheduledClass, TimeSlot
+
+@dataclass
+class Substitute:
+    coach: Coach
+    headroom: int      # classes left before the coach's max_weekly_classes
+    conflict: bool     # already teaching at an overlapping time that day
+    cost: float        # soft-rule penalty of the coach taking the class
+
+    def to_dict(self) -> dict:
+        return {"coach": self.coach.name, "headroom": self.headroom, "conflict": self.conflict,
+                "cost": self.cost}
+
+class BusyIntervals:
+    """One coach's classes on one day, sorted by start, with the running maximum end"""
+
+    def __init__(self, intervals: List[Tuple[int, int]]):
+        intervals = sorted(intervals)
+        self.starts = [start for start, _ in intervals]
+        self.max_ends = list(itertools.accumulate((end for _, end in intervals), max))
+
+    def overlaps(self, start: int, end: int) -> bool:
+        i = bisect.bisect_left(self.starts, end)
+        return i > 0 and self.max_ends[i - 1] > start
+
+def _minutes(t) -> int:
+    return t.hour * 60 + t.minute
+
+def class_intervals(schedule: Sequence[ScheduledClass],
+                    known_slots: Collection[TimeSlot]) -> List[Tuple[str, int, int]]:
+    """Each class's own (day, start, end), in minutes.
+
+    Classes in a config slot run back to back in slot_position order, as
+    exports show them; other entries (rebuilt from exports) already carry
+    their own times.
+    """
+    intervals: List[Optional[Tuple[str, int, int]]] = [None] * len(schedule)
+    by_slot: Dict[TimeSlot, List[int]] = {}
+    for i, sc in enumerate(schedule):
+        if sc.time_slot in known_slots:
+            by_slot.setdefault(sc.time_slot, []).append(i)
+        else:
+            intervals[i] = (sc.time_slot.day.lower(), _minutes(sc.time_slot.start_time),
+                            _minutes(sc.time_slot.end_time))
+    for slot, members in by_slot.items():
+        start = _minutes(slot.start_time)
+        for i in sorted(members, key=lambda i: schedule[i].slot_position):
+            end = start + schedule[i].class_def.duration_minutes
+            intervals[i] = (slot.day.lower(), start, end)
+            start = end
+    return intervals
+
+class SubstituteIndex:
+    """Eligibility and coach busy times of one schedule, for instant substitute lookups"""
+
+    def __init__(self, scheduler, schedule: Sequence[ScheduledClass]):
+        self.schedule = list(schedule)
+        self.coaches = list(scheduler.coaches)
+        slots = scheduler.resolve_slots(self.schedule)
+        # Entries in no config slot are judged on their own time
+        time_slots = list(scheduler.time_slots) + list(dict.fromkeys(
+            sc.time_slot for sc, slot in zip(self.schedule, slots) if slot is None))
+        self.compiled = scheduler.constraints.compile(self.coaches, time_slots, scheduler.class_definitions)
+        class_positions: Dict[str, int] = {}
+        for i, class_def in enumerate(scheduler.class_definitions):
+            class_positions.setdefault(class_def.name, i)
+        self._places = [(self.compiled.slot_index[slot or sc.time_slot], class_positions.get(sc.class_def.name))
+                        for sc, slot in zip(self.schedule, slots)]
+        self.intervals = class_intervals(self.schedule, set(scheduler.time_slots))
+
+        load = Counter(sc.coach.name for sc in self.schedule)
+        self.headroom = [c.max_weekly_classes - load[c.name] for c in self.coaches]
+        busy: Dict[Tuple[str, str], List[Tuple[int, int]]] = {}
+        for sc, (day, start, end) in zip(self.schedule, self.intervals):
+            busy.setdefault((sc.coach.name, day), []).append((start, end))
+        self.busy = {key: BusyIntervals(intervals) for key, intervals in busy.items()}
+        # At several locations a coach also needs the travel time between their slots
+        self.slots = slots
+        self.timeline = scheduler.coach_timeline()
+        if self.timeline is not None:
+            for sc, slot in zip(self.schedule, slots):
+                self.timeline.add(sc.coach.name, slot or sc.time_slot)
+        self._eligible: Dict[Tuple[int, int], List[Tuple[int, float]]] = {}
+
+    def eligible(self, slot_idx: int, class_idx: int) -> List[Tuple[int, float]]:
+        """(coach position, cost) of every coach the hard rules allow, cached per rule signature"""
+        key = (self.compiled.slot_signature(slot_idx), self.compiled.class_signature(class_idx))
+        coaches = self._eligible.get(key)
+        if coaches is None:
+            coaches = [(k, cost) for k, cost in enumerate(self.compiled.coach_costs(slot_idx, class_idx))
+                       if cost != FORBIDDEN]
+            self._eligible[key] = coaches
+        return coaches
+
+    def find(self, entry: int, limit: Optional[int] = None) -> List[Substitute]:
+        """Coaches who could take schedule[entry]: conflict-free first, then most headroom, then lowest cost"""
+        sc = self.schedule[entry]
+        slot_idx, class_idx = self._places[entry]
+        if class_idx is None:
+            return []
+        day, start, end = self.intervals[entry]
+        substitutes = []
+        for k, cost in self.eligible(slot_idx, class_idx):
+            coach = self.coaches[k]
+            if coach.name == sc.coach.name:
+                continue
+            busy = self.busy.get((coach.name, day))
+            conflict = busy is not None and busy.overlaps(start, end)
+            if self.timeline is not None and not conflict:
+                conflict = not self.timeline.fits(coach.name, self.slots[entry] or sc.time_slot)
+            substitutes.append(Substitute(coach, self.headroom[k], conflict, cost))
+        substitutes.sort(key=lambda s: (s.conflict, -s.headroom, s.cost))
+        return substitutes[:limit]
@@ -0,0 +1,237 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime, timedelta, timezone, time as dt_time
+from typing import Dict, List, Optional, Tuple
+
+from ..models.data_classes import ClassDefinition, TimeSlot, Coach, ScheduledClass
+from ..models.enums import ClassType
+from ..models.calendar_sync import (
+    DAY_INDEX, CalendarEvent, ScheduleDiff, diff_events, next_sequences, render_calendar, render_diff, schedule_events
+)
+from . import metrics
+
+# Publications each process keeps in memory, least recently used first out
+PUBLICATION_CACHE_SIZE = 256
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS feed_publications (
+    token TEXT PRIMARY KEY,
+    version TEXT NOT NULL,
+    published_at REAL NOT NULL,
+    start_date TEXT NOT NULL,
+    schedule_json TEXT NOT NULL,
+    sequences_json TEXT NOT NULL,
+    changes_json TEXT NOT NULL
+);
+"""
+
+def schedule_from_dicts(schedule: List[dict]) -> List[ScheduledClass]:
+    """Rebuild ScheduledClass objects from the schedule dicts kept in the session"""
+    schedule_objs = []
+    for sc in schedule:
+        class_def = ClassDefinition(sc['class_name'], ClassType(sc['class_type']), sc['duration'])
+        time_slot = TimeSlot(sc['day'], dt_time.fromisoformat(sc['start_time']), dt_time.fromisoformat(sc['end_time']),
+                             location=sc.get('location'))
+        coach = Coach(sc['coach'], 0, [], [])
+        schedule_objs.append(ScheduledClass(class_def, time_slot, coach, is_fixed=sc['is_fixed']))
+    return schedule_objs
+
+def schedule_to_dicts(schedule: List[ScheduledClass]) -> List[dict]:
+    """Flatten a schedule into dicts with each class's own start and end time, sorted by day and time"""
+    by_slot: Dict[TimeSlot, List[ScheduledClass]] = {}
+    for sc in schedule:
+        by_slot.setdefault(sc.time_slot, []).append(sc)
+    entries = []
+    for slot, classes in by_slot.items():
+        # Classes sharing a slot run back to back in slot_position order
+        class_start = datetime.combine(date.today(), slot.start_time)
+        for sc in sorted(classes, key=lambda c: c.slot_position):
+            class_end = class_start + timedelta(minutes=sc.class_def.duration_minutes)
+            entries.append({
+                'class_name': sc.class_def.name,
+                'class_type': sc.class_def.class_type.value,
+                'duration': sc.class_def.duration_minutes,
+                'day': sc.time_slot.day,
+                'start_time': class_start.strftime('%H:%M'),
+                'end_time': class_end.strftime('%H:%M'),
+                'coach': sc.coach.name,
+                'is_fixed': sc.is_fixed
+            })
+            if slot.location is not None:
+                entries[-1]['location'] = slot.location
+            class_start = class_end
+    entries.sort(key=lambda x: (DAY_INDEX.get(x['day'].lower(), 7), x['start_time']))
+    return entries
+
+def schedule_version(schedule: List[dict]) -> str:
+    """Content hash identifying a schedule version"""
+    canonical = json.dumps(schedule, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+class FeedPublication:
+    """One published schedule version with its feed indexes and rendered feeds"""
+
+    def __init__(self, token: str, version: str, published_at: float, start_date: date, schedule: List[dict],
+                 sequences: Optional[Dict[str, int]] = None, changes: Optional[ScheduleDiff] = None):
+        self.token = token
+        self.version = version
+        self.published_at = published_at
+        self.start_date = start_date
+        self.schedule = schedule
+        self.events: Dict[str, CalendarEvent] = schedule_events(schedule_from_dicts(schedule))
+        # SEQUENCE per event uid and the diff against the previous version
+        self.sequences: Dict[str, int] = sequences or {}
+        self.changes: ScheduleDiff = changes or ScheduleDiff(added=list(self.events.values()))
+        # Built once per version so a per-coach feed never scans the whole schedule
+        self.by_coach: Dict[str, List[CalendarEvent]] = {}
+        self.by_class_type: Dict[str, List[CalendarEvent]] = {}
+        for event in self.events.values():
+            self.by_coach.setdefault(event.coach, []).append(event)
+            self.by_class_type.setdefault(event.class_type, []).append(event)
+        self._rendered: Dict[Tuple[str, str], bytes] = {}
+
+    @property
+    def last_modified(self) -> datetime:
+        return datetime.fromtimestamp(int(self.published_at), timezone.utc)
+
+    def entries(self, scope: str, key: str = "") -> Optional[List[CalendarEvent]]:
+        if scope == "gym":
+            return list(self.events.values())
+        if scope == "coach":
+            return self.by_coach.get(key)
+        if scope == "class":
+            return self.by_class_type.get(key)
+        return None
+
+    def _in_scope(self, event: CalendarEvent, scope: str, key: str) -> bool:
+        return (scope == "gym" or (scope == "coach" and event.coach == key)
+                or (scope == "class" and event.class_type == key))
+
+    def etag(self, scope: str, key: str = "") -> str:
+        digest = hashlib.sha256(f"{self.version}|{scope}|{key}".encode("utf-8")).hexdigest()
+        return digest[:32]
+
+    def render(self, scope: str, key: str = "") -> Optional[bytes]:
+        """Return the iCalendar bytes of a feed, rendering it at most once per version"""
+        cache_key = (scope, key)
+        body = self._rendered.get(cache_key)
+        metrics.record_cache("ical_feed", body is not None)
+        if body is not None:
+            return body
+        if scope == "changes":
+            ical = render_diff(self.changes, self.sequences, self.start_date, weeks=None)
+        else:
+            entries = self.entries(scope, key)
+            # Events cancelled by this version stay in the feed once so clients drop them
+            cancelled = [e for e in self.changes.cancelled if self._in_scope(e, scope, key)]
+            if entries is None and not cancelled:
+                return None
+            ical = render_calendar(entries or [], self.start_date, None, self.sequences, cancelled)
+        body = ical.encode("utf-8")
+        self._rendered[cache_key] = body
+        return body
+
+class FeedRegistry:
+    """Published schedules behind stable, subscribable feed URLs.
+
+    Publications are persisted in SQLite so every worker process can answer
+    feed requests; each process keeps the publications it loaded most
+    recently, with their rendered feeds, in a bounded LRU cache. A
+    publication lives as long as its token: republishing replaces it and
+    only revoke() deletes it, so subscribers never depend on the browser
+    session that published it.
+    """
+
+    def __init__(self, path: str, clock=time.time, cache_size: int = PUBLICATION_CACHE_SIZE):
+        self.path = path
+        self.clock = clock
+        self.cache_size = cache_size
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._publications: "OrderedDict[str, FeedPublication]" = OrderedDict()
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            self._local.conn = conn
+        return conn
+
+    def _cache(self, publication: "FeedPublication"):
+        with self._lock:
+            self._publications[publication.token] = publication
+            self._publications.move_to_end(publication.token)
+            while len(self._publications) > self.cache_size:
+                self._publications.popitem(last=False)
+
+    def _cached(self, token: str) -> Optional["FeedPublication"]:
+        with self._lock:
+            publication = self._publications.get(token)
+            if publication is not None:
+                self._publications.move_to_end(token)
+            return publication
+
+    def publish(self, token: str, schedule: List[dict]) -> FeedPublication:
+        """Publish a schedule under a feed token; republishing the same schedule is a no-op"""
+        version = schedule_version(schedule)
+        current = self.get(token)
+        if current is not None and current.version == version:
+            return current
+        # Events recur weekly without an end from the Monday of the first publishing week,
+        # so weekdays line up and republishing never moves DTSTART
+        today = date.fromtimestamp(self.clock())
+        start_date = current.start_date if current is not None else today - timedelta(days=today.weekday())
+        publication = FeedPublication(token, version, self.clock(), start_date, schedule)
+        if current is not None:
+            # Diff by stable event uid so clients receive updates and cancellations
+            publication.changes = diff_events(current.events, publication.events)
+            publication.sequences = next_sequences(current.sequences, publication.changes)
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO feed_publications "
+                "(token, version, published_at, start_date, schedule_json, sequences_json, changes_json) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (token, version, publication.published_at, start_date.isoformat(), json.dumps(schedule),
+                 json.dumps(publication.sequences), json.dumps(publication.changes.to_dict())))
+        self._cache(publication)
+        return publication
+
+    def get(self, token: str) -> Optional[FeedPublication]:
+        row = self._connect().execute(
+            "SELECT version FROM feed_publications WHERE token = ?", (token,)).fetchone()
+        if row is None:
+            with self._lock:
+                self._publications.pop(token, None)
+            return None
+        publication = self._cached(token)
+        if publication is not None and publication.version == row[0]:
+            return publication
+        # Another worker published a newer version, or this process has not seen the token yet
+        row = self._connect().execute(
+            "SELECT version, published_at, start_date, schedule_json, sequences_json, changes_json "
+            "FROM feed_publications WHERE token = ?",
+            (token,)).fetchone()
+        if row is None:
+            return None
+        changes = json.loads(row[5])
+        publication = FeedPublication(token, row[0], row[1], date.fromisoformat(row[2]), json.loads(row[3]),
+                                      sequences=json.loads(row[4]),
+                                      changes=ScheduleDiff.from_dict(changes) if changes else None)
+        self._cache(publication)
+        return publication
+
+    def revoke(self, token: str) -> bool:
+        """Delete a publication, so its feed URLs answer 404; whether there was one"""
+        conn = self._connect()
+        with conn:
+            deleted = conn.execute("DELETE FROM feed_publications WHERE token = ?", (token,)).rowcount
+        with self._lock:
+            self._publications.pop(token, None)
+        return deleted > 0
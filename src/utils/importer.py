@@ -0,0 +1,234 @@
+import csv
+import json
+import re
+from dataclasses import dataclass, field
+from datetime import time
+from typing import Dict, Iterator, List, Optional, TextIO, Tuple
+
+from ..models.data_classes import ClassDefinition, Coach, TimeSlot
+from ..models.availability import TIME_BUCKETS, validate_windows
+from ..models.calendar_sync import DAY_INDEX
+from ..models.enums import ClassType
+
+# Accepted spellings of the entity kind, per file or in a `kind` column
+KINDS = {
+    "coach": "coach", "coaches": "coach",
+    "slot": "slot", "slots": "slot", "time_slot": "slot", "time_slots": "slot",
+    "class": "class", "classes": "class", "class_definition": "class", "class_definitions": "class",
+}
+TRUE_VALUES = {"1", "true", "yes", "y", "x"}
+FALSE_VALUES = {"0", "false", "no", "n"}
+PREFERENCES = {"gi", "no-gi", "open-mat"}
+
+@dataclass
+class RowError:
+    row: int
+    message: str
+
+    def __str__(self):
+        return f"Row {self.row}: {self.message}"
+
+@dataclass
+class ImportResult:
+    created: Dict[str, int] = field(default_factory=lambda: {"coach": 0, "slot": 0, "class": 0})
+    updated: Dict[str, int] = field(default_factory=lambda: {"coach": 0, "slot": 0, "class": 0})
+    errors: List[RowError] = field(default_factory=list)
+    rows: int = 0
+    truncated: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    def summary(self) -> str:
+        if not self.ok:
+            more = " (stopped early)" if self.truncated else ""
+            return f"Import failed: {len(self.errors)} invalid rows of {self.rows}{more}; nothing was imported"
+        parts = [f"{self.created[k] + self.updated[k]} {label}" for k, label in
+                 (("coach", "coaches"), ("slot", "time slots"), ("class", "classes"))]
+        return f"Imported {', '.join(parts)} from {self.rows} rows"
+
+    def to_dict(self):
+        return {"ok": self.ok, "rows": self.rows, "created": self.created, "updated": self.updated,
+                "errors": [{"row": e.row, "message": e.message} for e in self.errors],
+                "truncated": self.truncated}
+
+def detect_format(filename: str) -> str:
+    return "jsonl" if filename.lower().endswith((".jsonl", ".ndjson")) else "csv"
+
+def iter_rows(stream: TextIO, fmt: str = "csv") -> Iterator[Tuple[int, dict]]:
+    """Yield (row number, record) pairs one at a time; row numbers match the file's lines"""
+    if fmt == "jsonl":
+        for number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield number, e
+                continue
+            yield number, record if isinstance(record, dict) else ValueError("expected a JSON object")
+    else:
+        reader = csv.DictReader(stream)
+        for record in reader:
+            # line_num is the last physical line read, so quoted newlines keep numbers right
+            yield reader.line_num, record
+
+def _text(record: dict, key: str, default: Optional[str] = None) -> str:
+    value = record.get(key)
+    if value is None or (isinstance(value, str) and not value.strip()):
+        if default is None:
+            raise ValueError(f"missing {key}")
+        return default
+    return value.strip() if isinstance(value, str) else value
+
+def _list(record: dict, key: str) -> List[str]:
+    value = record.get(key) or []
+    if isinstance(value, str):
+        value = re.split(r"[;,|]", value)
+    return [str(v).strip().lower() for v in value if str(v).strip()]
+
+def _bool(record: dict, key: str, default: bool = True) -> bool:
+    value = record.get(key)
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return default
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    raise ValueError(f"{key} must be yes or no, not {value!r}")
+
+def _int(record: dict, key: str, default: Optional[str] = None) -> int:
+    value = _text(record, key, default)
+    try:
+        if isinstance(value, (bool, float)):
+            raise ValueError
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{key} must be a whole number, not {value!r}")
+
+def _time(record: dict, key: str) -> time:
+    value = _text(record, key)
+    try:
+        return time.fromisoformat(value if len(value) > 4 else value.zfill(5))
+    except ValueError:
+        raise ValueError(f"{key} must be HH:MM, not {value!r}")
+
+def _preference(record: dict, key: str) -> Optional[str]:
+    value = (record.get(key) or "").strip().lower()
+    if value in ("", "none"):
+        return None
+    if value not in PREFERENCES:
+        raise ValueError(f"{key} must be one of {', '.join(sorted(PREFERENCES))}")
+    return value
+
+def _choices(record: dict, key: str, known) -> List[str]:
+    values = _list(record, key)
+    unknown = [v for v in values if v not in known]
+    if unknown:
+        raise ValueError(f"{key} must be among {', '.join(known)}, not {unknown[0]!r}")
+    return values
+
+def parse_coach(record: dict) -> Coach:
+    max_weekly_classes = _int(record, "max_weekly_classes")
+    if max_weekly_classes < 0:
+        raise ValueError("max_weekly_classes must not be negative")
+    return Coach(
+        name=_text(record, "name"),
+        max_weekly_classes=max_weekly_classes,
+        preferred_times=_choices(record, "preferred_times", TIME_BUCKETS),
+        available_days=_choices(record, "available_days", DAY_INDEX),
+        can_teach_gi=_bool(record, "can_teach_gi"),
+        can_teach_nogi=_bool(record, "can_teach_nogi"),
+        can_teach_open_mat=_bool(record, "can_teach_open_mat"),
+        availability=validate_windows(_list(record, "availability")),
+    )
+
+def parse_time_slot(record: dict) -> TimeSlot:
+    day = _text(record, "day").lower()
+    if day not in DAY_INDEX:
+        raise ValueError(f"day must be a weekday name, not {day!r}")
+    slot = TimeSlot(
+        day=day,
+        start_time=_time(record, "start_time"),
+        end_time=_time(record, "end_time"),
+        primary_preference=_preference(record, "primary_preference"),
+        secondary_preference=_preference(record, "secondary_preference"),
+        location=(record.get("location") or "").strip() or None,
+    )
+    if slot.end_time <= slot.start_time:
+        raise ValueError("end_time must be after start_time")
+    return slot
+
+def parse_class_definition(record: dict) -> ClassDefinition:
+    value = _text(record, "class_type").lower()
+    try:
+        class_type = ClassType(value)
+    except ValueError:
+        raise ValueError(f"class_type must be gi, no-gi or open-mat, not {value!r}")
+    duration = _int(record, "duration_minutes", "60")
+    weekly_count = _int(record, "weekly_count", "0")
+    if duration <= 0 or weekly_count < 0:
+        raise ValueError("duration_minutes must be positive and weekly_count not negative")
+    return ClassDefinition(_text(record, "name"), class_type, duration, weekly_count)
+
+PARSERS = {"coach": parse_coach, "slot": parse_time_slot, "class": parse_class_definition}
+
+def _slot_key(slot: TimeSlot):
+    return (slot.day.lower(), slot.start_time, slot.end_time, slot.location)
+
+def import_entities(scheduler, stream: TextIO, fmt: str = "csv", kind: Optional[str] = None,
+                    max_errors: int = 100) -> ImportResult:
+    """Validate every row of a CSV/JSONL stream, then apply all of them or none.
+
+    Rows are parsed as they are read, so the file is never held in memory;
+    each row needs a `kind` column unless `kind` is given for the whole file.
+    Coaches and classes with an existing name, and slots with an existing
+    day and time, are updated in place.
+    """
+    result = ImportResult()
+    file_kind = KINDS.get(kind.lower()) if kind else None
+    if kind and file_kind is None:
+        result.errors.append(RowError(0, f"Unknown entity kind {kind!r}"))
+        return result
+    staged: List[Tuple[str, object]] = []
+    for number, record in iter_rows(stream, fmt):
+        result.rows += 1
+        try:
+            if isinstance(record, Exception):
+                raise ValueError(f"invalid JSON: {record}")
+            row_kind = file_kind or KINDS.get(str(record.get("kind", "")).strip().lower())
+            if row_kind is None:
+                raise ValueError("kind must be coach, slot or class")
+            staged.append((row_kind, PARSERS[row_kind](record)))
+        except (ValueError, TypeError, AttributeError) as e:
+            result.errors.append(RowError(number, str(e)))
+            if len(result.errors) >= max_errors:
+                result.truncated = True
+                break
+    if result.errors:
+        return result
+
+    # Apply the whole batch at once, after every row validated
+    coach_index = {c.name: i for i, c in enumerate(scheduler.coaches)}
+    class_index = {cd.name: i for i, cd in enumerate(scheduler.class_definitions)}
+    slot_index = {_slot_key(s): i for i, s in enumerate(scheduler.time_slots)}
+    targets = {
+        "coach": ("coaches", coach_index, lambda c: c.name),
+        "class": ("class_definitions", class_index, lambda cd: cd.name),
+        "slot": ("time_slots", slot_index, _slot_key),
+    }
+    for row_kind, entity in staged:
+        collection, index, key = targets[row_kind]
+        position = index.get(key(entity))
+        if position is None:
+            index[key(entity)] = len(getattr(scheduler, collection))
+            scheduler.add_entity(collection, entity)
+            result.created[row_kind] += 1
+        else:
+            scheduler.replace_entity(collection, position, entity)
+            result.updated[row_kind] += 1
+    return result
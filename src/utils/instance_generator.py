@@ -0,0 +1,98 @@
+import random
+from dataclasses import replace
+from datetime import time
+from typing import Optional, Sequence
+
+from ..models.data_classes import Coach, TimeSlot, ClassDefinition
+from ..models.enums import ClassType
+from ..models.scheduler import BJJScheduler
+
+DAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+TIME_CATEGORIES = ['morning', 'afternoon', 'evening']
+SLOT_START_HOURS = [6, 7, 9, 12, 13, 17, 18, 19, 20]
+PREFERENCES = ['gi', 'no-gi', 'open-mat', None]
+
+def _sample_at_least_one(rng: random.Random, options: Sequence, density: float) -> list:
+    """Keep each option with probability `density`, never returning an empty list"""
+    chosen = [o for o in options if rng.random() < density]
+    return chosen or [rng.choice(options)]
+
+def generate_instance(num_coaches: int = 10, num_slots: int = 20, num_class_definitions: int = 6,
+                      durations: Sequence[int] = (45, 60, 90), availability_density: float = 0.6,
+                      seed: Optional[int] = 0) -> BJJScheduler:
+    """Build a synthetic gym configuration for tests and benchmarks.
+
+    `availability_density` is the probability that a coach is available on a
+    given day, prefers a given time of day and can teach a given class type.
+    The same arguments and seed always produce the same configuration.
+    """
+    rng = random.Random(seed)
+    scheduler = BJJScheduler()
+
+    scheduler.coaches = []
+    for i in range(num_coaches):
+        teach = [rng.random() < availability_density for _ in ClassType]
+        if not any(teach):
+            teach[rng.randrange(len(teach))] = True
+        scheduler.coaches.append(Coach(
+            name=f"Coach {i + 1}",
+            max_weekly_classes=rng.randint(3, 12),
+            preferred_times=_sample_at_least_one(rng, TIME_CATEGORIES, availability_density),
+            available_days=_sample_at_least_one(rng, DAYS, availability_density),
+            can_teach_gi=teach[0],
+            can_teach_nogi=teach[1],
+            can_teach_open_mat=teach[2],
+        ))
+
+    scheduler.time_slots = []
+    for _ in range(num_slots):
+        start_hour = rng.choice(SLOT_START_HOURS)
+        length = rng.choice([60, 90, 120, 180])
+        end_minutes = min(start_hour * 60 + length, 23 * 60 + 59)
+        primary = rng.choice(PREFERENCES)
+        secondary = rng.choice([p for p in PREFERENCES if p != primary or p is None])
+        scheduler.time_slots.append(TimeSlot(
+            day=rng.choice(DAYS),
+            start_time=time(start_hour, 0),
+            end_time=time(end_minutes // 60, end_minutes % 60),
+            primary_preference=primary,
+            secondary_preference=secondary,
+        ))
+
+    scheduler.class_definitions = []
+    class_types = list(ClassType)
+    for i in range(num_class_definitions):
+        class_type = class_types[i % len(class_types)]
+        scheduler.class_definitions.append(ClassDefinition(
+            name=f"{class_type.value.title()} Class {i + 1}",
+            class_type=class_type,
+            duration_minutes=rng.choice(list(durations)),
+            weekly_count=rng.randint(1, 4),
+        ))
+
+    # The lists were built directly, so give every entity a fresh id
+    scheduler.changes.reset(scheduler)
+    return scheduler
+
+def generate_network(num_locations: int = 5, num_coaches: int = 30, slots_per_location: int = 10,
+                     num_class_definitions: int = 6, max_travel_minutes: int = 60,
+                     seed: Optional[int] = 0) -> BJJScheduler:
+    """A synthetic gym network: generate_instance's coaches shared by every location.
+
+    Slots are dealt round-robin to locations "Gym 1", "Gym 2", ..., weekly
+    counts are scaled to the network and every pair of locations gets a
+    random travel time.
+    """
+    rng = random.Random(seed)
+    scheduler = generate_instance(num_coaches, num_locations * slots_per_location, num_class_definitions,
+                                  seed=seed)
+    locations = [f"Gym {i + 1}" for i in range(num_locations)]
+    scheduler.time_slots = [replace(slot, location=locations[i % num_locations])
+                            for i, slot in enumerate(scheduler.time_slots)]
+    scheduler.class_definitions = [replace(cd, weekly_count=cd.weekly_count * num_locations)
+                                   for cd in scheduler.class_definitions]
+    for i, origin in enumerate(locations):
+        for destination in locations[i + 1:]:
+            scheduler.set_travel_time(origin, destination, rng.randint(10, max_travel_minutes))
+    scheduler.changes.reset(scheduler)
+    return scheduler
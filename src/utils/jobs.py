@@ -0,0 +1,119 @@
+import json
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    submitted_at REAL NOT NULL,
+    finished_at REAL,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_finished ON jobs(finished_at);
+"""
+
+class JobRegistry:
+    """Background jobs on a small thread pool, keeping the latest results.
+
+    A job runs in the process that accepted it. With a database `path` its
+    state and result are written to SQLite, so a poll reaching any worker
+    process finds it; without one, jobs live in this process's memory. At
+    most `keep` finished jobs are retained, oldest first out.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_workers: int = 2, keep: int = 1000):
+        self.path = path
+        self.max_workers = max_workers
+        self.keep = keep
+        self._jobs: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        if path is not None:
+            with self._connect() as conn:
+                conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            self._local.conn = conn
+        return conn
+
+    def _save(self, job: dict):
+        if self.path is None:
+            return
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO jobs (id, status, submitted_at, finished_at, result, error) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (job["id"], job["status"], job["submitted_at"], job.get("finished_at"),
+                 json.dumps(job["result"]) if "result" in job else None, job.get("error")))
+
+    def submit(self, fn: Callable, *args, **kwargs) -> str:
+        job_id = secrets.token_urlsafe(12)
+        job = {"id": job_id, "status": "queued", "submitted_at": time.time()}
+        self._save(job)
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix="bjj-job")
+            self._jobs[job_id] = job
+            self._trim()
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job_id
+
+    def _run(self, job, fn, args, kwargs):
+        job["status"] = "running"
+        self._save(job)
+        try:
+            job["result"] = fn(*args, **kwargs)
+            job["status"] = "done"
+        except Exception as e:
+            job["error"] = f"{type(e).__name__}: {e}"
+            job["status"] = "failed"
+        job["finished_at"] = time.time()
+        self._save(job)
+
+    def _trim(self):
+        finished = [jid for jid, job in self._jobs.items() if job["status"] in ("done", "failed")]
+        for jid in finished[:max(0, len(self._jobs) - self.keep)]:
+            del self._jobs[jid]
+        if self.path is not None:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "DELETE FROM jobs WHERE id IN (SELECT id FROM jobs WHERE finished_at IS NOT NULL "
+                    "ORDER BY finished_at DESC LIMIT -1 OFFSET ?)", (self.keep,))
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None or self.path is None:
+                return dict(job) if job is not None else None
+        # Accepted by another worker process
+        row = self._connect().execute(
+            "SELECT status, submitted_at, finished_at, result, error FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        status, submitted_at, finished_at, result, error = row
+        job = {"id": job_id, "status": status, "submitted_at": submitted_at}
+        if finished_at is not None:
+            job["finished_at"] = finished_at
+        if result is not None:
+            job["result"] = json.loads(result)
+        if error is not None:
+            job["error"] = error
+        return job
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
@@ -0,0 +1,228 @@
+import bisect
+import threading
+import weakref
+from typing import Callable, Dict, List, Sequence, Tuple
+
+DEFAULT_LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DEFAULT_SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _format_number(value) -> str:
+    if isinstance(value, float):
+        if value == float("inf"):
+            return "+Inf"
+        return repr(value)
+    return str(value)
+
+class _Shard:
+    """A thread's values; when the thread ends and drops it, its values fold into the retired total"""
+    __slots__ = ("values", "__weakref__")
+
+    def __init__(self):
+        self.values = {}
+
+class _ThreadShards:
+    """One private dict per thread, so recording a value never takes a lock.
+
+    The lock is only taken when a thread records its first value, when a
+    finished thread's shard is folded into the retired total, and when the
+    metrics are scraped, which merges the retired total with every live
+    thread's shard. Shards of finished threads therefore do not accumulate
+    under a thread-per-request server.
+    """
+
+    def __init__(self, merge: Callable[[dict, dict], None]):
+        self._local = threading.local()
+        self._merge = merge
+        self._shards: Dict[int, dict] = {}
+        self._retired: dict = {}
+        self._lock = threading.RLock()
+
+    def get(self) -> dict:
+        try:
+            return self._local.shard.values
+        except AttributeError:
+            shard = _Shard()
+            with self._lock:
+                self._shards[id(shard)] = shard.values
+            weakref.finalize(shard, self._retire, id(shard), shard.values)
+            self._local.shard = shard
+            return shard.values
+
+    def _retire(self, key: int, values: dict):
+        with self._lock:
+            self._shards.pop(key, None)
+            self._merge(self._retired, values)
+
+    def __len__(self) -> int:
+        """Live shards"""
+        with self._lock:
+            return len(self._shards)
+
+    def snapshot(self) -> List[dict]:
+        with self._lock:
+            # The merge replaces retired values rather than mutating them, so a shallow copy is stable
+            shards = [dict(self._retired)] + list(self._shards.values())
+        # dict() copies under the GIL, so a concurrent insert cannot break iteration
+        return [dict(s) for s in shards]
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._shards = _ThreadShards(self._merge)
+
+    @staticmethod
+    def _merge(totals: dict, shard: dict):
+        for key, value in shard.items():
+            totals[key] = totals.get(key, 0) + value
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        shard = self._shards.get()
+        shard[key] = shard.get(key, 0) + amount
+
+    def values(self) -> Dict[Tuple, float]:
+        totals: Dict[Tuple, float] = {}
+        for shard in self._shards.snapshot():
+            self._merge(totals, shard)
+        return totals
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self.values().items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_number(value)}")
+        return lines
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._shards = _ThreadShards(self._merge)
+
+    def _merge(self, totals: dict, shard: dict):
+        """Add a shard's states into totals, replacing merged states rather than mutating them"""
+        for key, (counts, total, count) in shard.items():
+            merged = totals.get(key, [[0] * (len(self.buckets) + 1), 0.0, 0])
+            totals[key] = [[a + b for a, b in zip(merged[0], counts)], merged[1] + total, merged[2] + count]
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        shard = self._shards.get()
+        state = shard.get(key)
+        if state is None:
+            # [per-bucket counts (last one is +Inf), sum, count]
+            state = shard[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        state[0][bisect.bisect_left(self.buckets, value)] += 1
+        state[1] += value
+        state[2] += 1
+
+    def values(self) -> Dict[Tuple, list]:
+        totals: Dict[Tuple, list] = {}
+        for shard in self._shards.snapshot():
+            self._merge(totals, shard)
+        return totals
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for key, (counts, total, count) in sorted(self.values().items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_number(float(bound))}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_number(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+class DerivedGauge:
+    """Gauge computed from other metrics at scrape time"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str],
+                 compute: Callable[[], Dict[Tuple, float]]):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.compute = compute
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge"]
+        for key, value in sorted(self.compute().items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_number(float(value))}")
+        return lines
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS) -> Histogram:
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def derived_gauge(self, name: str, documentation: str, labelnames: Sequence[str],
+                      compute: Callable[[], Dict[Tuple, float]]) -> DerivedGauge:
+        metric = DerivedGauge(name, documentation, labelnames, compute)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format"""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+# Metrics exported by the web app
+REGISTRY = MetricsRegistry()
+
+REQUEST_LATENCY = REGISTRY.histogram(
+    "bjj_http_request_duration_seconds", "HTTP request latency by route", ["route", "method"])
+REQUESTS = REGISTRY.counter(
+    "bjj_http_requests_total", "HTTP requests by route and status", ["route", "method", "status"])
+GENERATE_DURATION = REGISTRY.histogram(
+    "bjj_generate_schedule_duration_seconds", "Time spent in generate_schedule")
+GENERATE_OUTCOMES = REGISTRY.counter(
+    "bjj_generate_schedule_total", "generate_schedule runs by outcome", ["outcome"])
+SESSION_PAYLOAD_BYTES = REGISTRY.histogram(
+    "bjj_session_payload_bytes", "Size of serialized session payloads", buckets=DEFAULT_SIZE_BUCKETS)
+EXPORT_BYTES = REGISTRY.counter(
+    "bjj_export_bytes_total", "Bytes sent by export downloads", ["format"])
+EXPORTS = REGISTRY.counter(
+    "bjj_exports_total", "Export downloads", ["format"])
+CACHE_REQUESTS = REGISTRY.counter(
+    "bjj_cache_requests_total", "Cache lookups by cache and result", ["cache", "result"])
+
+def record_cache(cache: str, hit: bool):
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+def _cache_hit_ratios() -> Dict[Tuple, float]:
+    hits: Dict[str, float] = {}
+    totals: Dict[str, float] = {}
+    for (cache, result), value in CACHE_REQUESTS.values().items():
+        totals[cache] = totals.get(cache, 0) + value
+        if result == "hit":
+            hits[cache] = hits.get(cache, 0) + value
+    return {(cache,): hits.get(cache, 0) / total for cache, total in totals.items() if total}
+
+CACHE_HIT_RATIO = REGISTRY.derived_gauge(
+    "bjj_cache_hit_ratio", "Fraction of cache lookups that were hits", ["cache"], _cache_hit_ratios)
@@ -0,0 +1,182 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional
+
+from .feeds import schedule_version
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS schedule_records (
+    hash TEXT PRIMARY KEY,
+    record TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS schedule_versions (
+    version TEXT PRIMARY KEY,
+    created_at REAL NOT NULL,
+    size INTEGER NOT NULL,
+    record_hashes TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS schedule_history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    owner TEXT NOT NULL,
+    version TEXT NOT NULL REFERENCES schedule_versions(version),
+    published_at REAL NOT NULL,
+    label TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS schedule_history_owner ON schedule_history (owner, id);
+CREATE INDEX IF NOT EXISTS schedule_history_owner_version ON schedule_history (owner, version);
+"""
+
+# SQLite's default limit on bound parameters is 999 in older builds
+_BATCH = 500
+
+def canonical_record(record: dict) -> str:
+    return json.dumps(record, sort_keys=True, separators=(",", ":"))
+
+def record_hash(canonical: str) -> str:
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:32]
+
+@dataclass
+class HistoryEntry:
+    id: int
+    owner: str
+    version: str
+    published_at: float
+    label: str
+    size: int
+
+    def to_dict(self):
+        return {"id": self.id, "version": self.version, "published_at": self.published_at,
+                "label": self.label, "size": self.size}
+
+@dataclass
+class VersionDiff:
+    """Scheduled-class records only in the old version (removed) or only in the new one (added)"""
+    old_version: str
+    new_version: str
+    added: List[dict] = field(default_factory=list)
+    removed: List[dict] = field(default_factory=list)
+
+    def to_dict(self):
+        return {"from": self.old_version, "to": self.new_version, "added": self.added, "removed": self.removed}
+
+def _take(hashes: List[str], counts: Counter, records: Dict[str, dict]) -> List[dict]:
+    """Records for the hashes in `counts`, in the order they appear in the version"""
+    counts = Counter(counts)
+    taken = []
+    for h in hashes:
+        if counts[h] > 0:
+            counts[h] -= 1
+            taken.append(records[h])
+    return taken
+
+class ScheduleHistory:
+    """Every published schedule per owner, stored content-addressed.
+
+    A version is the hash of the canonical schedule, and each scheduled-class
+    record is stored once however many versions contain it, so a version
+    costs one row holding its record hashes. Diffs compare hashes and decode
+    only the records that differ.
+    """
+
+    def __init__(self, path: str, clock=time.time):
+        self.path = path
+        self.clock = clock
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            self._local.conn = conn
+        return conn
+
+    def record(self, owner: str, schedule: List[dict], label: str = "") -> HistoryEntry:
+        """Add a schedule to the owner's history; recording the latest version again is a no-op"""
+        version = schedule_version(schedule)
+        conn = self._connect()
+        with conn:
+            # Take the write lock before checking, so two workers recording the
+            # same schedule neither both append it nor race on its version row
+            conn.execute("BEGIN IMMEDIATE")
+            latest = self.entries(owner, limit=1)
+            if latest and latest[0].version == version:
+                return latest[0]
+            now = self.clock()
+            if conn.execute("SELECT 1 FROM schedule_versions WHERE version = ?", (version,)).fetchone() is None:
+                canonical = [canonical_record(r) for r in schedule]
+                hashes = [record_hash(c) for c in canonical]
+                conn.executemany("INSERT OR IGNORE INTO schedule_records (hash, record) VALUES (?, ?)",
+                                 zip(hashes, canonical))
+                conn.execute("INSERT OR IGNORE INTO schedule_versions (version, created_at, size, record_hashes) "
+                             "VALUES (?, ?, ?, ?)", (version, now, len(hashes), ",".join(hashes)))
+            cursor = conn.execute("INSERT INTO schedule_history (owner, version, published_at, label) "
+                                  "VALUES (?, ?, ?, ?)", (owner, version, now, label))
+        return HistoryEntry(cursor.lastrowid, owner, version, now, label, len(schedule))
+
+    def transfer(self, owner: str, new_owner: str):
+        """Move an owner's history to a new owner, e.g. when its feed token is replaced"""
+        conn = self._connect()
+        with conn:
+            conn.execute("UPDATE schedule_history SET owner = ? WHERE owner = ?", (new_owner, owner))
+
+    def entries(self, owner: str, limit: int = 50, before: Optional[int] = None) -> List[HistoryEntry]:
+        """The owner's history, newest first; pass the last id seen as `before` to page back"""
+        rows = self._connect().execute(
+            "SELECT h.id, h.version, h.published_at, h.label, v.size FROM schedule_history h "
+            "JOIN schedule_versions v ON v.version = h.version "
+            "WHERE h.owner = ? AND h.id < ? ORDER BY h.id DESC LIMIT ?",
+            (owner, before if before is not None else 2 ** 63 - 1, limit)).fetchall()
+        return [HistoryEntry(row[0], owner, row[1], row[2], row[3], row[4]) for row in rows]
+
+    def _hashes(self, owner: str, version: str) -> Optional[List[str]]:
+        # Versions are shared by content, so only return those in this owner's history
+        row = self._connect().execute(
+            "SELECT v.record_hashes FROM schedule_versions v WHERE v.version = ? AND EXISTS "
+            "(SELECT 1 FROM schedule_history h WHERE h.owner = ? AND h.version = v.version)",
+            (version, owner)).fetchone()
+        if row is None:
+            return None
+        return row[0].split(",") if row[0] else []
+
+    def _records(self, hashes: Iterable[str]) -> Dict[str, dict]:
+        unique = list(set(hashes))
+        records = {}
+        conn = self._connect()
+        for start in range(0, len(unique), _BATCH):
+            batch = unique[start:start + _BATCH]
+            rows = conn.execute(f"SELECT hash, record FROM schedule_records WHERE hash IN "
+                                f"({','.join('?' * len(batch))})", batch).fetchall()
+            records.update((h, json.loads(record)) for h, record in rows)
+        return records
+
+    def get(self, owner: str, version: str) -> Optional[List[dict]]:
+        hashes = self._hashes(owner, version)
+        if hashes is None:
+            return None
+        records = self._records(hashes)
+        return [records[h] for h in hashes]
+
+    def diff(self, owner: str, old_version: str, new_version: str) -> Optional[VersionDiff]:
+        old, new = self._hashes(owner, old_version), self._hashes(owner, new_version)
+        if old is None or new is None:
+            return None
+        old_counts, new_counts = Counter(old), Counter(new)
+        added, removed = new_counts - old_counts, old_counts - new_counts
+        records = self._records(list(added) + list(removed))
+        return VersionDiff(old_version, new_version, added=_take(new, added, records),
+                           removed=_take(old, removed, records))
+
+    def stats(self) -> Dict[str, int]:
+        conn = self._connect()
+        return {
+            "entries": conn.execute("SELECT COUNT(*) FROM schedule_history").fetchone()[0],
+            "versions": conn.execute("SELECT COUNT(*) FROM schedule_versions").fetchone()[0],
+            "records": conn.execute("SELECT COUNT(*) FROM schedule_records").fetchone()[0],
+        }
@@ -0,0 +1,310 @@
+import hashlib
+import secrets
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional
+
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+from itsdangerous import BadSignature, Signer
+from werkzeug.datastructures import CallbackDict
+
+from . import metrics
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    sid TEXT PRIMARY KEY,
+    expires REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_last_access ON sessions(last_access);
+CREATE INDEX IF NOT EXISTS sessions_expires ON sessions(expires);
+CREATE TABLE IF NOT EXISTS session_values (
+    sid TEXT NOT NULL,
+    key TEXT NOT NULL,
+    blob_hash TEXT NOT NULL,
+    PRIMARY KEY (sid, key)
+);
+CREATE INDEX IF NOT EXISTS session_values_blob ON session_values(blob_hash);
+CREATE TABLE IF NOT EXISTS blobs (
+    hash TEXT PRIMARY KEY,
+    data BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    refcount INTEGER NOT NULL
+);
+"""
+
+class SessionStore:
+    """SQLite session storage with TTL expiry, a size cap and value deduplication.
+
+    Each session value is stored once per distinct content in `blobs` and
+    referenced by hash, so many sessions holding the same gym configuration
+    share a single copy. Expired sessions are removed and the least recently
+    used sessions are evicted while the stored bytes exceed `max_bytes`.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float = 7 * 24 * 3600,
+                 max_bytes: int = 64 * 1024 * 1024, compact_every: int = 200,
+                 clock: Callable[[], float] = time.time):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.compact_every = compact_every
+        self.clock = clock
+        self._local = threading.local()
+        self._writes = 0
+        self._compactor = None
+        self._stop = threading.Event()
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def load(self, sid: str) -> Optional[Dict[str, bytes]]:
+        """Return the stored values of a live session and mark it as recently used"""
+        conn = self._connect()
+        now = self.clock()
+        row = conn.execute("SELECT expires FROM sessions WHERE sid = ?", (sid,)).fetchone()
+        if row is None:
+            return None
+        if row[0] <= now:
+            self.delete(sid)
+            return None
+        with conn:
+            conn.execute("UPDATE sessions SET last_access = ? WHERE sid = ?", (now, sid))
+        rows = conn.execute(
+            "SELECT v.key, b.data FROM session_values v JOIN blobs b ON b.hash = v.blob_hash WHERE v.sid = ?",
+            (sid,)).fetchall()
+        return {key: bytes(data) for key, data in rows}
+
+    def save(self, sid: str, values: Dict[str, bytes], ttl_seconds: Optional[float] = None,
+             partial: bool = False, deleted: Iterable[str] = ()):
+        """Store a session, writing only values whose content changed
+
+        With partial=True, `values` holds just the changed keys: other stored
+        keys are kept and only the keys in `deleted` are removed.
+        """
+        conn = self._connect()
+        now = self.clock()
+        expires = now + (self.ttl_seconds if ttl_seconds is None else ttl_seconds)
+        hashes = {key: hashlib.sha256(data).hexdigest() for key, data in values.items()}
+        with conn:
+            if partial:
+                keys = list(values) + list(deleted)
+                current = {}
+                for key in keys:
+                    row = conn.execute("SELECT blob_hash FROM session_values WHERE sid = ? AND key = ?",
+                                       (sid, key)).fetchone()
+                    if row is not None:
+                        current[key] = row[0]
+            else:
+                current = dict(conn.execute(
+                    "SELECT key, blob_hash FROM session_values WHERE sid = ?", (sid,)).fetchall())
+            conn.execute(
+                "INSERT INTO sessions (sid, expires, last_access) VALUES (?, ?, ?) "
+                "ON CONFLICT(sid) DO UPDATE SET expires = excluded.expires, last_access = excluded.last_access",
+                (sid, expires, now))
+            for key, digest in hashes.items():
+                old = current.pop(key, None)
+                if old == digest:
+                    continue
+                conn.execute(
+                    "INSERT INTO blobs (hash, data, size, refcount) VALUES (?, ?, ?, 1) "
+                    "ON CONFLICT(hash) DO UPDATE SET refcount = refcount + 1",
+                    (digest, values[key], len(values[key])))
+                conn.execute(
+                    "INSERT OR REPLACE INTO session_values (sid, key, blob_hash) VALUES (?, ?, ?)",
+                    (sid, key, digest))
+                if old is not None:
+                    conn.execute("UPDATE blobs SET refcount = refcount - 1 WHERE hash = ?", (old,))
+            # Whatever is left was not written: stale keys on a full save, deleted keys on a partial one
+            for key, old in current.items():
+                conn.execute("DELETE FROM session_values WHERE sid = ? AND key = ?", (sid, key))
+                conn.execute("UPDATE blobs SET refcount = refcount - 1 WHERE hash = ?", (old,))
+        self._writes += 1
+        if self.compact_every and self._writes % self.compact_every == 0:
+            self.compact()
+
+    def delete(self, sid: str):
+        conn = self._connect()
+        with conn:
+            self._delete_sessions(conn, [sid])
+
+    def _delete_sessions(self, conn, sids):
+        for sid in sids:
+            conn.execute(
+                "UPDATE blobs SET refcount = refcount - 1 WHERE hash IN "
+                "(SELECT blob_hash FROM session_values WHERE sid = ?)", (sid,))
+            conn.execute("DELETE FROM session_values WHERE sid = ?", (sid,))
+            conn.execute("DELETE FROM sessions WHERE sid = ?", (sid,))
+
+    def total_bytes(self) -> int:
+        row = self._connect().execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()
+        return row[0]
+
+    def session_count(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def compact(self) -> Dict[str, int]:
+        """Drop expired sessions, evict LRU sessions over the size cap and free unused blobs"""
+        conn = self._connect()
+        stats = {"expired": 0, "evicted": 0, "blobs_freed": 0}
+        with conn:
+            expired = [r[0] for r in conn.execute(
+                "SELECT sid FROM sessions WHERE expires <= ?", (self.clock(),))]
+            self._delete_sessions(conn, expired)
+            stats["expired"] = len(expired)
+            stats["blobs_freed"] += conn.execute("DELETE FROM blobs WHERE refcount <= 0").rowcount
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+            while total > self.max_bytes:
+                # Size the batch from the average footprint so large overflows take few passes
+                count = conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+                batch = max(1, -(-(total - self.max_bytes) * count // total)) if count else 0
+                victims = [r[0] for r in conn.execute(
+                    "SELECT sid FROM sessions ORDER BY last_access LIMIT ?", (batch,))]
+                if not victims:
+                    break
+                self._delete_sessions(conn, victims)
+                stats["evicted"] += len(victims)
+                stats["blobs_freed"] += conn.execute("DELETE FROM blobs WHERE refcount <= 0").rowcount
+                total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+        return stats
+
+    def start_compactor(self, interval_seconds: float = 300):
+        """Run compact() periodically on a daemon thread"""
+        if self._compactor is not None:
+            return
+
+        def run():
+            while not self._stop.wait(interval_seconds):
+                try:
+                    self.compact()
+                except sqlite3.Error:
+                    pass
+
+        self._compactor = threading.Thread(target=run, name="session-compactor", daemon=True)
+        self._compactor.start()
+
+    def stop_compactor(self):
+        self._stop.set()
+        if self._compactor is not None:
+            self._compactor.join()
+            self._compactor = None
+        self._stop.clear()
+
+class StoreSession(CallbackDict, SessionMixin):
+    """Session dict that remembers which keys were assigned or deleted.
+
+    Plain item assignment and deletion are tracked per key, so saving only
+    serializes those keys. Any other change (update(), pop(), setting
+    session.modified after mutating a value in place) saves every key.
+    """
+
+    def __init__(self, initial=None, sid=None, new=False):
+        def on_update(self):
+            self.modified = True
+        self._tracking = False
+        self.dirty_keys = set()
+        self.deleted_keys = set()
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self._modified = False
+
+    @property
+    def modified(self):
+        return self._modified
+
+    @modified.setter
+    def modified(self, value):
+        self._modified = value
+        if value and not self._tracking:
+            # An untracked change: the next save writes every key
+            self.dirty_keys = None
+
+    def __setitem__(self, key, value):
+        self._tracking = True
+        try:
+            super().__setitem__(key, value)
+        finally:
+            self._tracking = False
+        if self.dirty_keys is not None:
+            self.dirty_keys.add(key)
+            self.deleted_keys.discard(key)
+
+    def __delitem__(self, key):
+        self._tracking = True
+        try:
+            super().__delitem__(key)
+        finally:
+            self._tracking = False
+        if self.dirty_keys is not None:
+            self.dirty_keys.discard(key)
+            self.deleted_keys.add(key)
+
+class StoreSessionInterface(SessionInterface):
+    """Flask session interface keeping session data in a SessionStore.
+
+    The cookie only carries a signed session id; every top-level session key
+    is serialized separately so unchanged keys are not rewritten.
+    """
+
+    serializer = TaggedJSONSerializer()
+
+    def __init__(self, store: SessionStore):
+        self.store = store
+
+    def _signer(self, app) -> Signer:
+        return Signer(app.secret_key, salt="bjj-session")
+
+    def open_session(self, app, request):
+        cookie = request.cookies.get(self.get_cookie_name(app))
+        if cookie:
+            try:
+                sid = self._signer(app).unsign(cookie).decode()
+            except BadSignature:
+                sid = None
+            if sid:
+                values = self.store.load(sid)
+                if values is not None:
+                    data = {key: self.serializer.loads(raw.decode("utf-8")) for key, raw in values.items()}
+                    return StoreSession(data, sid=sid)
+        return StoreSession(sid=secrets.token_urlsafe(32), new=True)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        if not session:
+            if session.modified and not session.new:
+                self.store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+        if not (session.modified or session.new or self.should_set_cookie(app, session)):
+            return
+        if session.new or session.dirty_keys is None:
+            values = {key: self.serializer.dumps(value).encode("utf-8") for key, value in session.items()}
+            self.store.save(session.sid, values)
+        else:
+            # Only the keys assigned or deleted during this request are written
+            values = {key: self.serializer.dumps(session[key]).encode("utf-8") for key in session.dirty_keys}
+            self.store.save(session.sid, values, partial=True, deleted=session.deleted_keys)
+        metrics.SESSION_PAYLOAD_BYTES.observe(sum(len(v) for v in values.values()))
+        response.set_cookie(
+            name,
+            self._signer(app).sign(session.sid).decode(),
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            domain=domain,
+            path=path,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app),
+        )
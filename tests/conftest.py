@@ -1,3 +1,6 @@
 import sys
 import os
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))) 
\ No newline at end of file
+import tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+# Keep the web app's session database out of the working tree during tests
+os.environ.setdefault('BJJ_SESSION_DB', os.path.join(tempfile.mkdtemp(prefix='bjj-tests-'), 'sessions.sqlite3'))
@@ -0,0 +1,75 @@
+import json
+import time as clock
+from datetime import time
+
+import pytest
+
+from src.models.absence import analyze_absences
+from src.models.data_classes import ClassDefinition, Coach, TimeSlot
+from src.models.enums import ClassType
+from src.models.scheduler import BJJScheduler
+from src.utils.instance_generator import generate_instance
+
+EVENINGS = ["monday", "tuesday", "wednesday"]
+
+def _gym():
+    scheduler = BJJScheduler()
+    scheduler.from_dict({"coaches": [], "time_slots": [], "class_definitions": []})
+    # Ana is the only no-gi coach; Ben and Cleo share the gi classes
+    scheduler.add_coach(Coach("Ana", 3, ["evening"], EVENINGS, can_teach_gi=False))
+    scheduler.add_coach(Coach("Ben", 2, ["evening"], EVENINGS, can_teach_nogi=False))
+    scheduler.add_coach(Coach("Cleo", 2, ["evening"], EVENINGS, can_teach_nogi=False))
+    for day in EVENINGS:
+        scheduler.add_time_slot(TimeSlot(day, time(18), time(20)))
+    scheduler.add_class_definition(ClassDefinition("Gi", ClassType.GI, 60, 3))
+    scheduler.add_class_definition(ClassDefinition("No-Gi", ClassType.NO_GI, 60, 2))
+    return scheduler
+
+def test_ranks_single_points_of_failure():
+    report = analyze_absences(_gym())
+    assert (report.required, report.baseline) == (5, 5)
+    assert [(i.coaches, i.lost) for i in report.impacts] == [(("Ana",), 2), (("Ben",), 1), (("Cleo",), 1)]
+    assert report.impacts[0].uncovered_classes == ["No-Gi"]
+    assert report.single_points_of_failure == ["Ana", "Ben", "Cleo"]
+
+def test_pairs_and_named_groups():
+    scheduler = _gym()
+    pairs = analyze_absences(scheduler, size=2)
+    assert [(i.coaches, i.lost, i.uncovered_classes) for i in pairs.impacts] == [
+        (("Ana", "Ben"), 3, ["No-Gi"]), (("Ana", "Cleo"), 3, ["No-Gi"]), (("Ben", "Cleo"), 3, ["Gi"])]
+    assert pairs.single_points_of_failure == []
+    groups = analyze_absences(scheduler, groups=[["Ana"], ["Ben", "Cleo"]])
+    assert [i.lost for i in groups.impacts] == [3, 2]
+    with pytest.raises(ValueError):
+        analyze_absences(scheduler, groups=[["Nobody"]])
+
+def test_parallel_matches_serial():
+    scheduler = generate_instance(12, 24, 6, seed=2)
+    serial = analyze_absences(scheduler, size=2)
+    parallel = analyze_absences(scheduler, size=2, jobs=2)
+    assert parallel.impacts == serial.impacts
+
+def test_fifty_coach_roster_in_seconds():
+    scheduler = generate_instance(50, 100, 20, seed=0)
+    started = clock.perf_counter()
+    report = analyze_absences(scheduler)
+    assert len(report.impacts) == 50
+    assert clock.perf_counter() - started < 5
+
+def test_cli_and_api_reports(tmp_path):
+    from src.app import app
+    from src.cli import main
+
+    config = tmp_path / "gym.json"
+    _gym().save_to_json(str(config))
+    summary = tmp_path / "summary.json"
+    assert main([str(config), "--absences", "1", "--summary", str(summary)]) == 0
+    absences = json.loads(summary.read_text())["results"][0]["absences"]
+    assert absences["single_points_of_failure"] == ["Ana", "Ben", "Cleo"]
+
+    client = app.test_client()
+    workspace = client.post("/api/v1/workspaces", json={"config": _gym().to_dict()}).get_json()["id"]
+    response = client.post(f"/api/v1/workspaces/{workspace}/absences", json={"size": 2, "limit": 1})
+    assert response.get_json()["impacts"] == [
+        {"coaches": ["Ana", "Ben"], "covered": 2, "lost": 3, "uncovered_classes": ["No-Gi"]}]
+    assert client.post(f"/api/v1/workspaces/{workspace}/absences", json={"size": 0}).status_code == 400
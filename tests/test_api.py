@@ -0,0 +1,138 @@
+import threading
+import time
+
+import pytest
+
+from src.api import ApiError
+from src.app import app
+from src.utils.instance_generator import generate_instance
+
+@pytest.fixture
+def client():
+    return app.test_client()
+
+@pytest.fixture
+def workspace(client):
+    config = generate_instance(6, 10, 4, seed=1).to_dict()
+    response = client.post('/api/v1/workspaces', json={'config': config})
+    assert response.status_code == 201
+    return response.get_json()['id']
+
+def test_bulk_upsert_by_id(client, workspace):
+    url = f'/api/v1/workspaces/{workspace}/config'
+    config = client.get(url).get_json()
+    coach = dict(config['coaches'][0], max_weekly_classes=1)
+    slot = {'day': 'sunday', 'start_time': '10:00', 'end_time': '11:00'}
+    response = client.patch(url, json={
+        'coaches': [coach], 'time_slots': [slot],
+        'delete': {'class_definitions': [config['class_definitions'][0]['name']]},
+    })
+    counts = response.get_json()
+    assert counts['coaches'] == {'created': 0, 'updated': 1, 'deleted': 0}
+    assert counts['time_slots']['created'] == 1
+    assert counts['class_definitions']['deleted'] == 1
+    updated = client.get(url).get_json()
+    assert updated['coaches'][0]['max_weekly_classes'] == 1
+    assert client.patch(url, json={'coaches': [{'name': 'X', 'bogus': 1}]}).status_code == 400
+    for bad in (['x'], {'coaches': 5}, {'coaches': [{'name': 'X'}]}, {'nope': []}):
+        assert client.patch(url, json={'delete': bad}).status_code == 400
+
+def test_generate_sync_and_fetch(client, workspace):
+    result = client.post(f'/api/v1/workspaces/{workspace}/generate',
+                         json={'seed': 3, 'time_budget': 0.2}).get_json()
+    assert result['schedule']['columns'][0] == 'class'
+    assert len(result['schedule']['rows']) == result['scheduled']
+    fetched = client.get(f'/api/v1/workspaces/{workspace}/schedule').get_json()
+    assert fetched['version'] == result['version']
+    ics = client.get(f'/api/v1/workspaces/{workspace}/export/ics?start_date=2024-01-01')
+    assert ics.data.startswith(b'BEGIN:VCALENDAR')
+    assert client.get(f'/api/v1/workspaces/{workspace}/export/pdf').status_code == 404
+
+def test_generate_async_job(client, workspace):
+    response = client.post(f'/api/v1/workspaces/{workspace}/generate', json={'async': True})
+    assert response.status_code == 202
+    job_url = f"/api/v1/jobs/{response.get_json()['job']}"
+    for _ in range(200):
+        job = client.get(job_url).get_json()
+        if job['status'] in ('done', 'failed'):
+            break
+        time.sleep(0.01)
+    assert job['status'] == 'done'
+    assert client.get(f'/api/v1/workspaces/{workspace}/schedule').status_code == 200
+
+def test_unknown_workspace_is_json_404(client):
+    response = client.get('/api/v1/workspaces/nope/config')
+    assert response.status_code == 404
+    assert response.get_json() == {'error': 'Unknown workspace'}
+
+def test_workspaces_outlive_session_expiry_and_eviction(tmp_path):
+    from src.api import WorkspaceStore
+    from src.utils.session_store import SessionStore
+
+    clock = [1000.0]
+    store = SessionStore(str(tmp_path / "s.db"), ttl_seconds=60, max_bytes=10, compact_every=0,
+                         clock=lambda: clock[0])
+    workspaces = WorkspaceStore(store)
+    workspace_id = workspaces.create({"coaches": []})
+    store.save("browser", {"k": b"x" * 100})
+    clock[0] += 3600
+    store.compact()
+    assert store.session_count() == 0
+    assert workspaces.update(workspace_id, schedule=[]) == {"config": {"coaches": []}, "schedule": []}
+    workspaces.delete(workspace_id)
+    with pytest.raises(ApiError):
+        workspaces.load(workspace_id)
+
+def test_concurrent_patches_keep_every_change(client, workspace):
+    url = f'/api/v1/workspaces/{workspace}/config'
+    coaches = [{'name': f'Coach {i}', 'max_weekly_classes': 2, 'preferred_times': ['evening']} for i in range(8)]
+    barrier = threading.Barrier(len(coaches))
+
+    def patch(coach):
+        own = app.test_client()
+        barrier.wait()
+        assert own.patch(url, json={'coaches': [coach]}).status_code == 200
+
+    threads = [threading.Thread(target=patch, args=(coach,)) for coach in coaches]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    names = {coach['name'] for coach in client.get(url).get_json()['coaches']}
+    assert names >= {coach['name'] for coach in coaches}
+
+def test_configs_that_cannot_be_scheduled_are_rejected(client, workspace):
+    url = f'/api/v1/workspaces/{workspace}/config'
+    slot = {'day': 'monday', 'start_time': '18:00', 'end_time': '19:00'}
+    coach = {'name': 'Ana', 'max_weekly_classes': 3, 'preferred_times': ['evening'], 'available_days': ['monday']}
+    gi = {'name': 'Gi', 'class_type': 'gi'}
+    bad = [
+        [], {'coaches': {}},
+        {'time_slots': [dict(slot, day=5)]}, {'time_slots': [dict(slot, day='someday')]},
+        {'time_slots': [dict(slot, start_time='6pm')]}, {'time_slots': [dict(slot, end_time='17:00')]},
+        {'time_slots': [dict(slot, primary_preference='judo')]},
+        {'coaches': [dict(coach, max_weekly_classes='3')]}, {'coaches': [dict(coach, max_weekly_classes=-1)]},
+        {'coaches': [dict(coach, preferred_times=['night'])]}, {'coaches': [dict(coach, available_days='monday')]},
+        {'class_definitions': [dict(gi, weekly_count='3')]}, {'class_definitions': [dict(gi, class_type='judo')]},
+        {'class_definitions': [dict(gi, duration_minutes=0)]},
+    ]
+    for config in bad:
+        assert client.put(url, json=config).status_code == 400, config
+        assert client.post('/api/v1/workspaces', json={'config': config}).status_code == 400, config
+    assert client.patch(url, json={'time_slots': [dict(slot, day=5)]}).status_code == 400
+    assert client.patch(url, json={'class_definitions': [dict(gi, weekly_count='3')]}).status_code == 400
+    assert client.put(url, json={'coaches': [coach], 'time_slots': [slot],
+                                 'class_definitions': [dict(gi, weekly_count=1)]}).status_code == 200
+    assert client.post(f'/api/v1/workspaces/{workspace}/generate', json={}).get_json()['scheduled'] == 1
+
+def test_jobs_are_visible_to_other_workers(tmp_path):
+    from src.utils.jobs import JobRegistry
+
+    path = str(tmp_path / "jobs.db")
+    worker, other = JobRegistry(path), JobRegistry(path)
+    job_id = worker.submit(lambda: {"answer": 42})
+    worker.shutdown()
+    assert other.get(job_id)["result"] == {"answer": 42} and other.get("nope") is None
+    failed = worker.submit(lambda: 1 / 0)
+    worker.shutdown()
+    assert other.get(failed)["status"] == "failed"
@@ -0,0 +1,95 @@
+import io
+import json
+import time as clock
+from datetime import time
+
+import pytest
+
+from src.models.availability import AvailabilityIndex, availability_index, parse_window, slot_window
+from src.models.constraints import time_category
+from src.models.data_classes import ClassDefinition, Coach, TimeSlot
+from src.models.enums import ClassType
+from src.models.scheduler import BJJScheduler
+from src.utils.importer import import_entities
+from src.utils.instance_generator import generate_instance
+
+def _slot(day, start, end):
+    return TimeSlot(day, time(*start), time(*end))
+
+def test_windows_merge_wrap_and_check_whole_slots():
+    index = AvailabilityIndex([parse_window("tue 06:00-07:30"), parse_window("tuesday 07:30-08:00"),
+                               parse_window("sun 22:00-02:00")])
+    assert index.windows() == ["monday 00:00-02:00", "tuesday 06:00-08:00", "sunday 22:00-24:00"]
+    assert index.days() == {"monday", "tuesday", "sunday"}
+    assert index.covers_slot(_slot("tuesday", (6, 30), (8, 0)))
+    assert not index.covers_slot(_slot("tuesday", (7, 30), (8, 30)))
+    assert not index.covers_slot(_slot("wednesday", (6, 30), (7, 0)))
+    assert index.covers_slot(_slot("monday", (0, 30), (1, 30)))
+    for bad in ("tue 6-7", "someday 06:00-07:00", "t 06:00-07:00", "tue 25:00-26:00"):
+        with pytest.raises(ValueError):
+            parse_window(bad)
+
+def test_legacy_fields_migrate_with_start_time_semantics():
+    scheduler = generate_instance(30, 80, 5, seed=4)
+    for coach in scheduler.coaches:
+        index = availability_index(coach)
+        for slot in scheduler.time_slots:
+            legacy = slot.day in coach.available_days and time_category(slot) in coach.preferred_times
+            assert index.covers_slot(slot) == legacy
+
+def test_containment_is_logarithmic():
+    index = AvailabilityIndex((start, start + 5) for start in range(0, 7 * 1440, 10))
+    assert len(index) == 1008
+    windows = [slot_window(_slot("friday", (h, 0), (h, 5))) for h in range(24)] * 2000
+    started = clock.perf_counter()
+    assert all(index.covers(*w) for w in windows)
+    assert clock.perf_counter() - started < 1
+
+def test_generator_places_classes_inside_windows_only():
+    scheduler = BJJScheduler()
+    scheduler.from_dict({"coaches": [], "time_slots": [], "class_definitions": []})
+    # Free "Tue 06:00-07:30 and Thu after 18:00"; the legacy fields would allow nothing
+    scheduler.add_coach(Coach("Ana", 5, [], [], availability=["tue 06:00-07:30", "thu 18:00-24:00"]))
+    for slot in (_slot("tuesday", (6, 0), (7, 0)), _slot("tuesday", (7, 0), (8, 0)),
+                 _slot("thursday", (17, 0), (18, 0)), _slot("thursday", (19, 0), (20, 0))):
+        scheduler.add_time_slot(slot)
+    scheduler.add_class_definition(ClassDefinition("Gi", ClassType.GI, 60, 4))
+    schedule, _ = scheduler.generate_schedule()
+    assert sorted(str(sc.time_slot) for sc in schedule) == ["Thursday 19:00-20:00", "Tuesday 06:00-07:00"]
+
+def test_windows_round_trip_and_are_validated():
+    scheduler = BJJScheduler()
+    coach = Coach("Ana", 5, [], [], availability=["tue 06:00-07:30"])
+    scheduler.from_dict({"coaches": [], "time_slots": [], "class_definitions": []})
+    scheduler.add_coach(coach)
+    restored = BJJScheduler()
+    restored.from_dict(json.loads(json.dumps(scheduler.to_dict())))
+    assert restored.coaches == [coach]
+    assert "availability" not in BJJScheduler().to_dict()["coaches"][0]
+    with pytest.raises(ValueError):
+        restored.from_dict({"coaches": [dict(vars(coach), availability=["tue 6-7"])]})
+
+    rows = io.StringIO('kind,name,max_weekly_classes,availability\ncoach,Ben,3,"mon 06:00-07:00;wed 18:00-20:00"\n'
+                       'coach,Cleo,3,tue 6-7\n')
+    result = import_entities(scheduler, rows)
+    assert [e.row for e in result.errors] == [3]
+    result = import_entities(scheduler, io.StringIO(rows.getvalue().splitlines(True)[0]
+                                                    + rows.getvalue().splitlines(True)[1]))
+    assert result.ok and scheduler.coaches[-1].availability == ["mon 06:00-07:00", "wed 18:00-20:00"]
+
+def test_web_form_and_api_accept_windows():
+    from src.app import app
+
+    client = app.test_client()
+    form = {'add_coach': '1', 'coach_name': 'Window Coach', 'coach_max_weekly_classes': '3',
+            'coach_availability': 'tue 06:00-07:30\r\nthu 18:00-24:00'}
+    page = client.post('/', data=form)
+    assert b'tue 06:00-07:30; thu 18:00-24:00' in page.data
+    payload = client.post('/', data=dict(form, coach_name='Bad Coach', coach_availability='tue 6-7'),
+                          headers={'X-Fragment-Request': '1'}).get_json()
+    assert any(m.startswith('availability window must look like') for m in payload['messages'])
+    assert 'Bad Coach' not in payload['fragments']['coaches']
+
+    config = BJJScheduler().to_dict()
+    config["coaches"][0]["availability"] = ["someday 06:00-07:00"]
+    assert client.post("/api/v1/workspaces", json={"config": config}).status_code == 400
@@ -0,0 +1,105 @@
+from datetime import time
+
+import numpy as np
+import pytest
+
+from src.models.bounds import TOLERANCE, BoundReport, FlowNetwork, MetricBound, _min_spread, bound_report, compute_bounds
+from src.models.data_classes import ClassDefinition, Coach, TimeSlot
+from src.models.enums import ClassType
+from src.models.scheduler import BJJScheduler
+from src.models.solvers import solve
+from src.utils.instance_generator import generate_instance
+
+def _gym(coaches, slots, classes):
+    scheduler = BJJScheduler()
+    scheduler.from_dict({"coaches": [], "time_slots": [], "class_definitions": []})
+    for coach in coaches:
+        scheduler.add_coach(coach)
+    for slot in slots:
+        scheduler.add_time_slot(slot)
+    for class_def in classes:
+        scheduler.add_class_definition(class_def)
+    return scheduler
+
+ANA = Coach("Ana", 10, ["evening"], ["monday", "tuesday"])
+
+def test_max_flow():
+    network = FlowNetwork(4)
+    network.add_edge(0, 1, 3)
+    network.add_edge(0, 2, 2)
+    network.add_edge(1, 2, 5)
+    network.add_edge(1, 3, 2)
+    network.add_edge(2, 3, 3)
+    assert network.max_flow(0, 3) == 5
+
+def test_config_limit_is_reported_as_optimal():
+    # Two hours of slots for three one-hour classes: one class can never be placed
+    scheduler = _gym([ANA], [TimeSlot("monday", time(18), time(19)), TimeSlot("tuesday", time(18), time(19))],
+                     [ClassDefinition("Gi", ClassType.GI, 60, 3)])
+    schedule, _ = scheduler.generate_schedule()
+    report = bound_report(scheduler, schedule)
+    assert report.metrics["unassigned_classes"].lower_bound == 1
+    assert report.metrics["unassigned_minutes"].lower_bound == 60
+    assert not report.can_improve and report.gap == 0
+    assert "cannot help" in report.summary() and "At least 1 classes" in report.summary()
+
+def test_coach_capacity_bounds_unassigned_classes():
+    busy = Coach("Ana", 1, ["evening"], ["monday"])
+    scheduler = _gym([busy], [TimeSlot("monday", time(18), time(21))], [ClassDefinition("Gi", ClassType.GI, 60, 3)])
+    bounds = compute_bounds(scheduler)
+    assert (bounds.unassigned_classes, bounds.unassigned_minutes, bounds.idle_minutes) == (2, 120, 120)
+
+def test_gap_of_a_worse_schedule():
+    scheduler = _gym([ANA], [TimeSlot("monday", time(18), time(19))], [ClassDefinition("Gi", ClassType.GI, 60, 1)])
+    report = bound_report(scheduler, [])
+    assert report.can_improve and report.gap == 1.0
+    assert report.metrics["unassigned_classes"].gap == 1
+
+def test_min_spread_relaxation():
+    ones = np.ones(3)
+    assert _min_spread(np.zeros(3), ones, ones, 1.5) == pytest.approx(0.0, abs=1e-6)
+    # The third coach cannot teach, so any load on the others spreads the ratios
+    assert _min_spread(np.zeros(3), np.array([1.0, 1.0, 0.0]), ones, 2.0) == pytest.approx(np.std([1, 1, 0]), abs=1e-6)
+
+def test_gap_and_summary_share_the_tolerance():
+    placed = {"unassigned_classes": MetricBound(0, 0)}
+    within = BoundReport(dict(placed, idle_minutes=MetricBound(60 + TOLERANCE / 2, 60)), 60 + TOLERANCE / 2, 60)
+    assert not within.can_improve and within.gap == 0 and "cannot help" in within.summary()
+    minutes_only = BoundReport(dict(placed, unassigned_minutes=MetricBound(90, 60)), 1.0, 1.0)
+    assert minutes_only.can_improve and "Objective meets its lower bound" in minutes_only.summary()
+
+def test_load_imbalance_bound_does_not_depend_on_placed_classes():
+    scheduler = generate_instance(10, 20, 5, seed=2)
+    schedule, _ = scheduler.generate_schedule()
+    full, empty = bound_report(scheduler, schedule), bound_report(scheduler, [])
+    assert empty.metrics["load_imbalance"].lower_bound == 0
+    assert full.metrics["load_imbalance"].lower_bound == compute_bounds(scheduler).load_imbalance()
+    assert full.objective_bound <= full.objective and empty.objective_bound <= empty.objective
+    # Without a total, ratios meet at a common centre wherever the ranges overlap
+    assert _min_spread(np.array([0.5, 0.0]), np.array([1.0, 1.0]), np.ones(2)) == pytest.approx(0.0, abs=1e-6)
+    assert _min_spread(np.array([0.6, 0.0]), np.array([1.0, 0.2]), np.ones(2)) == pytest.approx(0.2, abs=1e-6)
+
+def test_bounds_never_exceed_generated_schedules():
+    for seed in range(3):
+        scheduler = generate_instance(25, 50, 12, seed=seed)
+        report = bound_report(scheduler, scheduler.generate_schedule()[0])
+        assert all(m.lower_bound <= m.actual for m in report.metrics.values())
+
+def test_solve_cli_and_api_report_bounds(tmp_path):
+    from src.app import app
+    from src.cli import run_config
+
+    assert solve(BJJScheduler()).bounds.to_dict()["gap"] == 0
+    config = tmp_path / "gym.json"
+    BJJScheduler().save_to_json(str(config))
+    summary = run_config(str(config), {"seed": None, "time_budget": None, "iterations": None,
+                                       "output_dir": None})
+    assert summary["bounds"]["can_improve"] is False
+
+    client = app.test_client()
+    workspace = client.post("/api/v1/workspaces", json={"config": BJJScheduler().to_dict()}).get_json()["id"]
+    generated = client.post(f"/api/v1/workspaces/{workspace}/generate", json={}).get_json()
+    assert set(generated["bounds"]["metrics"]) == {"unassigned_classes", "unassigned_minutes", "idle_minutes",
+                                                   "load_imbalance"}
+    page = client.post("/", data={"generate_schedule": "1"}).data.decode()
+    assert "Optimality:" in page
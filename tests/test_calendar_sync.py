@@ -0,0 +1,54 @@
+from datetime import date, time
+
+from src.models.calendar_sync import diff_schedules, next_sequences, render_diff, schedule_events
+from src.models.data_classes import ClassDefinition, Coach, ScheduledClass, TimeSlot
+from src.models.enums import ClassType
+from src.utils.feeds import FeedRegistry
+
+def _class(name, day, start, end, coach="Ana", duration=60):
+    return ScheduledClass(ClassDefinition(name, ClassType.GI, duration), TimeSlot(day, start, end),
+                          Coach(coach, 0, [], []))
+
+def test_uids_are_stable_across_regeneration():
+    first = [_class("Fundamentals", "monday", time(18), time(19)), _class("Fundamentals", "monday", time(19), time(20))]
+    second = [_class("Fundamentals", "monday", time(19), time(20), coach="Ben"), first[0]]
+    assert list(schedule_events(first)) == list(schedule_events(second))
+    assert "monday-fundamentals-1@bjjclub.local" in schedule_events(first)
+
+def test_diff_reports_added_changed_and_cancelled():
+    old = [_class("Fundamentals", "monday", time(18), time(19)), _class("Open Mat", "friday", time(18), time(19))]
+    new = [_class("Fundamentals", "monday", time(18), time(19), coach="Ben"), _class("Comp", "tuesday", time(18), time(19))]
+    diff = diff_schedules(old, new)
+    assert [e.uid for e in diff.changed] == ["monday-fundamentals-0@bjjclub.local"]
+    assert [e.uid for e in diff.cancelled] == ["friday-open-mat-0@bjjclub.local"]
+    assert [e.uid for e in diff.added] == ["tuesday-comp-0@bjjclub.local"]
+    sequences = next_sequences({}, diff)
+    assert sequences == {"monday-fundamentals-0@bjjclub.local": 1, "friday-open-mat-0@bjjclub.local": 1}
+    body = render_diff(diff, sequences, date(2024, 1, 1))
+    assert body.count("BEGIN:VEVENT") == 3
+    assert "STATUS:CANCELLED" in body and "SEQUENCE:1" in body
+
+def test_events_carry_their_slot_location():
+    downtown = _class("Fundamentals", "monday", time(18), time(19))
+    uptown = ScheduledClass(downtown.class_def, TimeSlot("monday", time(18), time(19), location="Uptown"),
+                            downtown.coach)
+    diff = diff_schedules([downtown], [uptown])
+    assert [e.location for e in diff.changed] == ["Uptown"]
+    body = render_diff(diff, next_sequences({}, diff), date(2024, 1, 1))
+    assert "LOCATION:Uptown" in body and "LOCATION:BJJ Club" not in body
+    assert "LOCATION:BJJ Club" in render_diff(diff_schedules([uptown], [downtown]), {}, date(2024, 1, 1))
+    event = diff.changed[0]
+    assert type(event).from_dict(event.to_dict()) == event
+
+def test_feed_registry_tracks_sequences_and_changes(tmp_path):
+    entry = {'class_name': 'Gi', 'class_type': 'gi', 'duration': 60, 'day': 'monday',
+             'start_time': '19:00', 'end_time': '20:00', 'coach': 'Ana', 'is_fixed': False}
+    registry = FeedRegistry(str(tmp_path / "feeds.db"))
+    registry.publish("tok", [entry])
+    publication = registry.publish("tok", [dict(entry, coach='Ben')])
+    assert publication.sequences == {"monday-gi-0@bjjclub.local": 1}
+    assert b"SEQUENCE:1" in publication.render('changes')
+    # An emptied schedule still tells subscribers which events are gone
+    publication = FeedRegistry(str(tmp_path / "feeds.db")).publish("tok", [])
+    assert b"STATUS:CANCELLED" in publication.render('gym')
+    assert b"STATUS:CANCELLED" in publication.render('coach', 'Ben')
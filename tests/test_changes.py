@@ -0,0 +1,83 @@
+import json
+from datetime import time
+
+from src.models.data_classes import Coach, TimeSlot
+from src.models.scheduler import BJJScheduler
+from src.utils.session_store import SessionStore
+
+def _scheduler():
+    scheduler = BJJScheduler()
+    scheduler.from_dict({"coaches": [], "time_slots": [], "class_definitions": []})
+    scheduler.add_coach(Coach("Ana", 3, [], ["monday"]))
+    scheduler.add_coach(Coach("Ben", 2, [], ["tuesday"]))
+    scheduler.add_time_slot(TimeSlot("monday", time(18), time(19)))
+    scheduler.changes.mark_clean()
+    return scheduler
+
+def test_tracker_reports_only_touched_entities():
+    scheduler = _scheduler()
+    ana, ben = scheduler.changes.ids["coaches"]
+    scheduler.coaches[1].max_weekly_classes = 5
+    scheduler.update_coach(1, scheduler.coaches[1])
+    changes = scheduler.changes.pending(scheduler)
+    assert changes.upserts == {"coaches": {ben: 1}} and not changes.order_changed
+
+    scheduler.changes.mark_clean()
+    scheduler.remove_coach(0)
+    changes = scheduler.changes.pending(scheduler)
+    assert changes.deletes == {"coaches": {ana}} and changes.order_changed
+    assert scheduler.changes.ids["coaches"] == [ben]
+
+def test_direct_list_edits_fall_back_to_full_save():
+    scheduler = _scheduler()
+    scheduler.time_slots.append(TimeSlot("friday", time(12), time(13)))
+    changes = scheduler.changes.pending(scheduler)
+    assert changes.full and len(changes.upserts["time_slots"]) == 2
+
+def test_replaced_lists_of_the_same_length_fall_back_to_full_save():
+    scheduler = _scheduler()
+    scheduler.coaches = [Coach("Cleo", 1, [], ["friday"]), Coach("Dan", 1, [], ["friday"])]
+    assert not scheduler.changes.in_sync(scheduler)
+    assert scheduler.changes.pending(scheduler).full
+
+def test_generated_instances_can_be_edited_and_undone():
+    from src.models.history import ConfigHistory
+    from src.utils.instance_generator import generate_instance
+    scheduler = generate_instance(12, 20, 4, seed=1)
+    assert scheduler.changes.in_sync(scheduler)
+    history = ConfigHistory()
+    history.record(scheduler, "generated")
+    scheduler.remove_coach(0)
+    history.record(scheduler, "delete coach")
+    assert history.undo(scheduler) == "delete coach"
+    assert len(scheduler.coaches) == 12 and scheduler.changes.in_sync(scheduler)
+
+def test_partial_save_keeps_other_keys(tmp_path):
+    store = SessionStore(str(tmp_path / "s.db"), compact_every=0)
+    store.save("sid", {"a": b"1", "b": b"2", "c": b"3"})
+    store.save("sid", {"b": b"20"}, partial=True, deleted=["c"])
+    assert store.load("sid") == {"a": b"1", "b": b"20"}
+
+def test_session_edit_rewrites_one_entity():
+    from src.app import app, get_scheduler, save_scheduler
+    with app.test_request_context():
+        from flask import session
+        scheduler = get_scheduler()
+        before = dict(session)
+        session.dirty_keys = set()
+        scheduler.coaches[0].max_weekly_classes = 9
+        scheduler.update_coach(0, scheduler.coaches[0])
+        save_scheduler(scheduler)
+        coach_id = scheduler.changes.ids["coaches"][0]
+        assert {k for k in session.dirty_keys if k.startswith("cfg:")} == {f"cfg:coaches:{coach_id}"}
+        # The undo history gains a single new chunk of entities
+        assert sum(k.startswith("hist:chunk:") for k in session.dirty_keys) == 1
+        assert session["cfg:index"] == before["cfg:index"]
+        assert get_scheduler().coaches[0].max_weekly_classes == 9
+
+def test_save_to_json_replaces_file_atomically(tmp_path):
+    path = tmp_path / "config.json"
+    path.write_text("old")
+    _scheduler().save_to_json(str(path))
+    assert [c["name"] for c in json.loads(path.read_text())["coaches"]] == ["Ana", "Ben"]
+    assert [p.name for p in tmp_path.iterdir()] == ["config.json"]
@@ -0,0 +1,114 @@
+import io
+import json
+from datetime import time
+
+import pytest
+
+from src.models.constraints import FORBIDDEN, ConstraintSet
+from src.models.data_classes import ClassDefinition, Coach, TimeSlot
+from src.models.enums import ClassType
+from src.models.scheduler import BJJScheduler
+
+MORNING = TimeSlot("monday", time(7), time(8), primary_preference="no-gi", secondary_preference="gi")
+EVENING = TimeSlot("monday", time(19), time(20))
+GI = ClassDefinition("Gi", ClassType.GI, 60, 1)
+OPEN = ClassDefinition("Open Mat", ClassType.OPEN_MAT, 60, 1)
+ANA = Coach("Ana", 5, ["evening"], ["monday"], can_teach_open_mat=False)
+
+def test_compiled_table_combines_hard_and_soft_rules():
+    compiled = ConstraintSet().compile([ANA], [MORNING, EVENING], [GI, OPEN])
+    assert compiled.cost(0, 0, 0) == FORBIDDEN      # Ana does not teach mornings
+    assert compiled.cost(0, 1, 0) == 0
+    assert not compiled.allowed(0, 1, 1)            # nor open mat
+
+    constraints = ConstraintSet()
+    constraints.configure({"coach_time": {"hard": False, "weight": 4}})
+    compiled = constraints.compile([ANA], [MORNING, EVENING], [GI, OPEN])
+    assert compiled.cost(0, 0, 0) == 4 + 0.5        # off-hours plus a secondary-preference match
+
+def _tight_scheduler():
+    scheduler = BJJScheduler()
+    scheduler.from_dict({"coaches": [], "time_slots": [], "class_definitions": []})
+    scheduler.add_coach(ANA)
+    scheduler.add_time_slot(MORNING)
+    scheduler.add_class_definition(GI)
+    return scheduler
+
+def test_soft_preferred_time_lets_tight_config_place_classes():
+    scheduler = _tight_scheduler()
+    schedule, conflicts = scheduler.generate_schedule()
+    assert schedule == [] and "Unassigned gi classes: 1" in conflicts
+
+    scheduler.constraints.configure({"coach_time": {"hard": False, "weight": 3}})
+    schedule, conflicts = scheduler.generate_schedule()
+    assert [(sc.class_def.name, sc.coach.name) for sc in schedule] == [("Gi", "Ana")]
+
+def test_soft_rules_prefer_the_cheaper_coach():
+    scheduler = _tight_scheduler()
+    scheduler.add_coach(Coach("Ben", 5, ["morning"], ["monday"]))
+    scheduler.constraints.configure({"coach_time": {"hard": False, "weight": 3}})
+    schedule, _ = scheduler.generate_schedule()
+    assert schedule[0].coach.name == "Ben"
+
+def test_settings_round_trip_through_config():
+    scheduler = _tight_scheduler()
+    assert "constraints" not in scheduler.to_dict()
+    scheduler.constraints.configure({"slot_preference": {"weight": 2.5}})
+    data = scheduler.to_dict()
+    assert data["constraints"] == {"slot_preference": {"hard": False, "weight": 2.5}}
+    restored = BJJScheduler()
+    restored.from_dict(data)
+    assert restored.constraints.rule("slot_preference").weight == 2.5
+    with pytest.raises(ValueError):
+        restored.from_dict({"constraints": {"nope": {}}})
+
+def test_hard_flag_parses_strings_and_rejects_other_values():
+    constraints = ConstraintSet()
+    constraints.configure({"coach_time": {"hard": "false"}, "slot_preference": {"hard": " True "}})
+    assert not constraints.rule("coach_time").hard and constraints.rule("slot_preference").hard
+    for bad in ("maybe", 1, None):
+        with pytest.raises(ValueError):
+            constraints.configure({"coach_time": {"hard": bad}})
+
+def test_web_session_keeps_uploaded_constraints():
+    from src.app import app
+    client = app.test_client()
+    client.get("/")
+    settings = BJJScheduler().to_dict()
+    settings["constraints"] = {"coach_time": {"hard": False, "weight": 2.0}}
+    client.post("/settings/upload", data={"settings_file": (io.BytesIO(json.dumps(settings).encode()), "s.json")},
+                content_type="multipart/form-data")
+    downloaded = json.loads(client.get("/settings/download").data)
+    assert downloaded["constraints"] == settings["constraints"]
+    client.post("/undo")
+    assert "constraints" not in json.loads(client.get("/settings/download").data)
+
+def test_custom_rule_over_all_axes():
+    from dataclasses import dataclass
+    from src.models.constraints import Rule
+
+    @dataclass
+    class NoAnaGiOnMondays(Rule):
+        name: str = "custom"
+        hard: bool = False
+        weight: float = 7.0
+
+        def coach_key(self, coach):
+            return coach.name
+
+        def slot_key(self, slot):
+            return slot.day
+
+        def class_key(self, class_def):
+            return class_def.class_type
+
+        def violation(self, name, day, class_type):
+            return 1.0 if (name, day, class_type) == ("Ana", "monday", ClassType.GI) else 0.0
+
+    constraints = ConstraintSet()
+    constraints.rules.append(NoAnaGiOnMondays())
+    ben = Coach("Ben", 5, ["evening"], ["monday"])
+    compiled = constraints.compile([ANA, ben], [MORNING, EVENING], [GI, OPEN])
+    assert compiled.coach_costs(1, 0) == [7.0, 0.0]
+    assert compiled.cost(0, 1, 0) == constraints.placement_cost(ANA, EVENING, GI) == 7.0
+    assert compiled.coach_costs(1, 1) == [FORBIDDEN, 0.0]
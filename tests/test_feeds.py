@@ -0,0 +1,80 @@
+import time
+
+from src.utils.feeds import FeedRegistry
+
+SCHEDULE = [
+    {'class_name': 'Gi Fundamentals', 'class_type': 'gi', 'duration': 60, 'day': 'monday',
+     'start_time': '19:00', 'end_time': '20:00', 'coach': 'Ana', 'is_fixed': False},
+    {'class_name': 'No-Gi', 'class_type': 'no-gi', 'duration': 60, 'day': 'tuesday',
+     'start_time': '19:00', 'end_time': '20:00', 'coach': 'Ben', 'is_fixed': False},
+]
+
+def test_publication_indexes_and_caches_feeds(tmp_path):
+    registry = FeedRegistry(str(tmp_path / "feeds.db"))
+    publication = registry.publish("tok", SCHEDULE)
+    assert [e.summary for e in publication.by_coach['Ana']] == ['Gi Fundamentals']
+    body = publication.render('coach', 'Ana')
+    assert b'Gi Fundamentals' in body and b'No-Gi' not in body
+    assert publication.render('coach', 'Ana') is body
+    assert publication.render('coach', 'Nobody') is None
+    # Republishing the same schedule keeps the version and its cached feeds
+    assert registry.publish("tok", list(SCHEDULE)) is publication
+
+def test_publication_is_shared_through_the_database(tmp_path):
+    path = str(tmp_path / "feeds.db")
+    first = FeedRegistry(path).publish("tok", SCHEDULE)
+    loaded = FeedRegistry(path).get("tok")
+    assert loaded.version == first.version
+    assert loaded.etag('gym') == first.etag('gym')
+
+def test_feed_route_answers_conditional_get():
+    from src.app import app
+    client = app.test_client()
+    client.post('/', data={'generate_schedule': '1'})
+    with client.session_transaction() as sess:
+        token = sess['feed_token']
+    response = client.get(f'/feeds/{token}/gym.ics')
+    assert response.status_code == 200
+    assert b'BEGIN:VCALENDAR' in response.data
+    etag = response.headers['ETag']
+    cached = client.get(f'/feeds/{token}/gym.ics', headers={'If-None-Match': etag})
+    assert cached.status_code == 304
+    assert client.get(f'/feeds/{token}/coach/Default Coach.ics').status_code == 200
+    assert client.get('/feeds/unknown/gym.ics').status_code == 404
+
+def test_cache_is_bounded_and_publications_live_until_revoked(tmp_path):
+    registry = FeedRegistry(str(tmp_path / "feeds.db"), cache_size=2)
+    for token in ("a", "b", "c"):
+        registry.publish(token, SCHEDULE)
+    assert list(registry._publications) == ["b", "c"]
+    assert registry.get("a") is not None and list(registry._publications) == ["c", "a"]
+    assert registry.revoke("b") and not registry.revoke("b")
+    assert registry.get("b") is None and registry.get("a") is not None
+
+def test_start_date_stays_put_and_events_never_run_out(tmp_path):
+    now = [time.mktime((2026, 10, 14, 12, 0, 0, 0, 0, -1))]  # a Wednesday
+    registry = FeedRegistry(str(tmp_path / "feeds.db"), clock=lambda: now[0])
+    first = registry.publish("tok", SCHEDULE)
+    now[0] += 70 * 86400
+    moved_class = [dict(SCHEDULE[0], start_time='18:00', end_time='19:00'), SCHEDULE[1]]
+    second = registry.publish("tok", moved_class)
+    assert second.start_date == first.start_date
+    assert sorted(second.sequences.values()) == [1] and second.changes.unchanged == 1
+    body = second.render('gym')
+    assert body.count(b'RRULE:FREQ=WEEKLY\n') == 2 and b'COUNT=' not in body
+    assert registry.publish("tok", list(moved_class)) is second
+
+def test_feeds_outlive_the_session_and_can_be_replaced():
+    from src.app import app, session_store
+    client = app.test_client()
+    client.post('/', data={'generate_schedule': '1'})
+    with client.session_transaction() as sess:
+        old_token = sess['feed_token']
+    client.post('/feeds/revoke')
+    with client.session_transaction() as sess:
+        token, sid = sess['feed_token'], sess.sid
+    assert token != old_token and client.get(f'/feeds/{old_token}/gym.ics').status_code == 404
+    assert len(client.get('/schedule/history').get_json()['entries']) == 1
+    session_store.delete(sid)
+    session_store.compact()
+    assert client.get(f'/feeds/{token}/gym.ics').status_code == 200
@@ -0,0 +1,47 @@
+import json
+
+from src.app import app
+
+COACH_FORM = {
+    'add_coach': '1', 'coach_name': 'Fragment Coach', 'coach_max_weekly_classes': '3',
+    'coach_preferred_times': 'evening', 'coach_available_days': 'monday',
+}
+
+def test_post_with_fragment_header_returns_changed_sections_only():
+    client = app.test_client()
+    full = client.post('/', data=COACH_FORM)
+    partial = client.post('/', data=dict(COACH_FORM, coach_name='Second Coach'),
+                          headers={'X-Fragment-Request': '1'})
+    payload = partial.get_json()
+    assert sorted(payload['fragments']) == ['coaches', 'manual', 'pareto']
+    assert 'Second Coach' in payload['fragments']['coaches']
+    assert 'Coach added!' in payload['messages']
+    assert len(partial.data) < len(full.data)
+    assert b'id="flash-messages"' in full.data and b'Coach added!' in full.data
+
+def test_generate_patches_schedule_and_conflicts():
+    client = app.test_client()
+    payload = client.post('/', data={'generate_schedule': '1'}, headers={'X-Fragment-Request': '1'}).get_json()
+    assert sorted(payload['fragments']) == ['conflicts', 'schedule']
+    assert '<table' in payload['fragments']['schedule']
+
+def test_fragment_endpoint_renders_one_section():
+    client = app.test_client()
+    client.post('/', data=COACH_FORM)
+    response = client.get('/fragments/coaches')
+    assert response.status_code == 200 and b'Fragment Coach' in response.data
+    assert b'<html' not in response.data
+    assert client.get('/fragments/nope').status_code == 404
+
+def test_invalid_coach_edit_changes_nothing():
+    client = app.test_client()
+    client.post('/', data=COACH_FORM)
+    coaches = lambda: [c['name'] for c in json.loads(client.get('/settings/download').data)['coaches']]
+    index = coaches().index('Fragment Coach')
+    edit = dict(COACH_FORM, edit_coach='1', coach_edit_idx=str(index), coach_name='Renamed Coach',
+                coach_availability='tue 6-7')
+    del edit['add_coach']
+    payload = client.post('/', data=edit, headers={'X-Fragment-Request': '1'}).get_json()
+    assert any(m.startswith('availability window must look like') for m in payload['messages'])
+    assert 'Renamed Coach' not in payload['fragments']['coaches']
+    assert coaches()[index] == 'Fragment Coach'
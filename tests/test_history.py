@@ -0,0 +1,137 @@
+from datetime import time
+
+from src.models import history as history_module
+from src.models.data_classes import Coach, TimeSlot
+from src.models.history import ConfigHistory, ConfigSnapshot
+from src.models.scheduler import BJJScheduler
+
+def _scheduler(coaches=3):
+    scheduler = BJJScheduler()
+    scheduler.from_dict({"coaches": [], "time_slots": [], "class_definitions": []})
+    for i in range(coaches):
+        scheduler.add_coach(Coach(f"Coach {i}", 3, [], ["monday"]))
+    scheduler.add_time_slot(TimeSlot("monday", time(18), time(19)))
+    return scheduler
+
+def _names(scheduler):
+    return [c.name for c in scheduler.coaches]
+
+def test_undo_and_redo_restore_deleted_coach():
+    scheduler = _scheduler()
+    history = ConfigHistory()
+    history.record(scheduler, "initial config")
+    scheduler.remove_coach(1)
+    history.record(scheduler, "delete coach")
+    scheduler.remove_time_slot(0)
+    history.record(scheduler, "delete slot")
+
+    assert history.undo(scheduler) == "delete slot"
+    assert history.undo(scheduler) == "delete coach"
+    assert _names(scheduler) == ["Coach 0", "Coach 1", "Coach 2"]
+    assert len(scheduler.time_slots) == 1
+    assert history.undo(scheduler) is None
+    assert history.redo(scheduler) == "delete coach"
+    assert _names(scheduler) == ["Coach 0", "Coach 2"]
+
+def test_recording_after_undo_drops_redo_branch():
+    scheduler = _scheduler()
+    history = ConfigHistory()
+    history.record(scheduler, "initial config")
+    scheduler.remove_coach(0)
+    history.record(scheduler, "delete coach")
+    history.undo(scheduler)
+    scheduler.coaches[0].max_weekly_classes = 9
+    scheduler.update_coach(0, scheduler.coaches[0])
+    assert history.record(scheduler, "edit coach")
+    assert not history.can_redo()
+    assert not history.record(scheduler, "no-op")
+
+def test_snapshots_share_unchanged_chunks(monkeypatch):
+    monkeypatch.setattr(history_module, "CHUNK_SIZE", 4)
+    scheduler = _scheduler(coaches=40)
+    first = ConfigSnapshot.of(scheduler)
+    scheduler.coaches[21].max_weekly_classes = 1
+    second = ConfigSnapshot.of(scheduler, first)
+    fresh = [a is b for a, b in zip(first.chunks["coaches"], second.chunks["coaches"])].count(False)
+    assert len(second.chunks["coaches"]) == 10 and fresh == 1
+    assert second.chunks["time_slots"] is not None and second.chunks["time_slots"][0] is first.chunks["time_slots"][0]
+
+    scheduler.remove_coach(5)
+    third = ConfigSnapshot.of(scheduler, second)
+    shared = sum(any(c is d for d in second.chunks["coaches"]) for c in third.chunks["coaches"])
+    assert shared == 9 and third.records("coaches") == history_module.entity_records(scheduler, "coaches")
+
+def test_restore_only_touches_differing_entities():
+    scheduler = _scheduler(coaches=5)
+    target = ConfigSnapshot.of(scheduler)
+    scheduler.remove_coach(2)
+    scheduler.changes.mark_clean()
+    target.apply(scheduler)
+    changes = scheduler.changes.pending(scheduler)
+    assert not changes.full and sum(len(v) for v in changes.upserts.values()) == 1
+    assert _names(scheduler) == [f"Coach {i}" for i in range(5)]
+
+def test_unchanged_entities_are_neither_serialized_nor_rehashed(monkeypatch):
+    scheduler = _scheduler(coaches=100)
+    history = ConfigHistory()
+    history.record(scheduler, "initial config")
+    scheduler.changes.mark_clean()
+    saved = {c: list(ids) for c, ids in scheduler.changes.ids.items()}
+    serialized, hashed = [], []
+    to_dict, chunk_hash = scheduler.entity_to_dict, history_module.chunk_hash
+    monkeypatch.setattr(scheduler, "entity_to_dict", lambda c, e: serialized.append(e) or to_dict(c, e))
+    monkeypatch.setattr(history_module, "chunk_hash", lambda chunk: hashed.append(chunk) or chunk_hash(chunk))
+
+    scheduler.coaches[50].max_weekly_classes = 9
+    scheduler.update_coach(50, scheduler.coaches[50])
+    scheduler.remove_coach(10)
+    assert history.record(scheduler, "edit coaches", scheduler.changes.unchanged_since(saved))
+    assert serialized == [scheduler.coaches[49]] and len(hashed) == 2
+    del serialized[:], hashed[:]
+    history.to_state()
+    assert history.undo(scheduler) == "edit coaches"
+    assert not serialized and not hashed
+    assert _names(scheduler) == [f"Coach {i}" for i in range(100)]
+    assert scheduler.coaches[50].max_weekly_classes == 3
+
+def test_undo_reverts_constraints_and_travel_times():
+    scheduler = _scheduler()
+    history = ConfigHistory()
+    history.record(scheduler, "initial config")
+    scheduler.constraints.configure({"coach_time": {"hard": False, "weight": 3}})
+    scheduler.set_travel_time("Gym 1", "Gym 2", 25)
+    assert history.record(scheduler, "settings")
+    index, chunks = history.to_state()
+    history = ConfigHistory.from_state(index, chunks)
+    assert history.undo(scheduler) == "settings"
+    assert scheduler.constraints.to_dict() == {} and scheduler.travel_times == {}
+    history.redo(scheduler)
+    assert scheduler.constraints.rule("coach_time").weight == 3
+    assert scheduler.travel_minutes("Gym 2", "Gym 1") == 25
+
+def test_state_round_trip():
+    scheduler = _scheduler()
+    history = ConfigHistory(limit=2)
+    history.record(scheduler, "initial config")
+    for i in range(3):
+        scheduler.add_coach(Coach(f"New {i}", 1, [], ["friday"]))
+        history.record(scheduler, "add coach")
+    index, chunks = history.to_state()
+    restored = ConfigHistory.from_state(index, chunks)
+    assert len(restored.revisions) == 2 and restored.undo(scheduler) == "add coach"
+    assert _names(scheduler)[-1] == "New 1"
+
+def test_web_undo_redo():
+    from src.app import app
+    client = app.test_client()
+    client.get("/")
+    with client.session_transaction() as sess:
+        count = len(sess["cfg:index"]["ids"]["coaches"])
+    client.post("/coaches/delete/0")
+    client.post("/undo")
+    with client.session_transaction() as sess:
+        assert len(sess["cfg:index"]["ids"]["coaches"]) == count
+        assert "Undid delete coach" in [m for _, m in sess["_flashes"]]
+    client.post("/redo")
+    with client.session_transaction() as sess:
+        assert len(sess["cfg:index"]["ids"]["coaches"]) == count - 1
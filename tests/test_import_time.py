@@ -0,0 +1,26 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
+from import_time import check_budget, parse_importtime
+
+def test_parse_importtime_reads_depth_and_timings():
+    stderr = ("import time: self [us] | cumulative | imported package\n"
+              "import time:       120 |        120 |   json.decoder\n"
+              "import time:       300 |        420 | json\n")
+    records = parse_importtime(stderr)
+    assert records == [
+        {"module": "json.decoder", "self_us": 120, "cumulative_us": 120, "depth": 1},
+        {"module": "json", "self_us": 300, "cumulative_us": 420, "depth": 0},
+    ]
+    assert check_budget({"cli": {"import_ms": 0.42}}, {"cli": 0.1})
+
+def test_gui_startup_defers_dialogs_and_exporters():
+    pytest.importorskip("tkinter")
+    code = ("import sys, src.gui.main_window; "
+            "print(sorted(m for m in sys.modules if m.startswith('src.gui.dialogs.') or m == 'src.utils.export'))")
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    assert out.strip() == "[]"
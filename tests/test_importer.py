@@ -0,0 +1,67 @@
+import io
+import json
+
+from src.models.scheduler import BJJScheduler
+from src.utils.importer import import_entities
+
+CSV = """kind,name,max_weekly_classes,preferred_times,available_days,day,start_time,end_time,class_type,weekly_count
+coach,Ana,5,evening;morning,monday;tuesday,,,,,
+slot,,,,,monday,18:00,19:30,,
+class,Fundamentals,,,,,,,gi,3
+coach,Ben,4,evening,friday,,,,,
+"""
+
+def _empty_scheduler():
+    scheduler = BJJScheduler()
+    scheduler.coaches, scheduler.time_slots, scheduler.class_definitions = [], [], []
+    return scheduler
+
+def test_csv_rows_of_every_kind_are_imported():
+    scheduler = _empty_scheduler()
+    result = import_entities(scheduler, io.StringIO(CSV))
+    assert result.ok, result.errors
+    assert [c.name for c in scheduler.coaches] == ['Ana', 'Ben']
+    assert scheduler.coaches[0].preferred_times == ['evening', 'morning']
+    assert scheduler.time_slots[0].end_time.minute == 30
+    assert scheduler.class_definitions[0].weekly_count == 3
+    # Re-importing updates by name instead of duplicating
+    again = import_entities(scheduler, io.StringIO(CSV))
+    assert again.updated['coach'] == 2 and len(scheduler.coaches) == 2
+
+def test_errors_carry_row_numbers_and_nothing_is_applied():
+    bad = CSV.replace('coach,Ben,4', 'coach,Ben,four').replace('monday,18:00,19:30', 'funday,18:00,19:30')
+    scheduler = _empty_scheduler()
+    result = import_entities(scheduler, io.StringIO(bad))
+    assert [e.row for e in result.errors] == [3, 5]
+    assert 'max_weekly_classes' in result.errors[1].message
+    assert scheduler.coaches == [] and scheduler.time_slots == []
+
+def test_coach_values_are_checked():
+    coach = {'name': 'Ana', 'max_weekly_classes': 3, 'preferred_times': ['evening'], 'available_days': ['monday']}
+    bad = [dict(coach, preferred_times=['night']), dict(coach, available_days='mon'),
+           dict(coach, max_weekly_classes=-1), dict(coach, max_weekly_classes=2.7),
+           dict(coach, max_weekly_classes=True)]
+    lines = [json.dumps(record) for record in [coach] + bad]
+    scheduler = _empty_scheduler()
+    result = import_entities(scheduler, io.StringIO('\n'.join(lines)), 'jsonl', kind='coaches')
+    assert [e.row for e in result.errors] == [2, 3, 4, 5, 6] and scheduler.coaches == []
+    assert 'preferred_times' in result.errors[0].message and 'available_days' in result.errors[1].message
+    assert import_entities(scheduler, io.StringIO(lines[0]), 'jsonl', kind='coaches').ok
+
+def test_jsonl_with_file_kind():
+    lines = [json.dumps({'name': 'Open Mat', 'class_type': 'open-mat', 'duration_minutes': 90}), '', '{oops']
+    scheduler = _empty_scheduler()
+    result = import_entities(scheduler, io.StringIO('\n'.join(lines)), 'jsonl', kind='classes')
+    assert [e.row for e in result.errors] == [3]
+    ok = import_entities(scheduler, io.StringIO(lines[0]), 'jsonl', kind='classes')
+    assert ok.ok and scheduler.class_definitions[0].duration_minutes == 90
+
+def test_upload_route_saves_once(tmp_path):
+    from src.app import app
+    client = app.test_client()
+    response = client.post('/import', data={'import_file': (io.BytesIO(CSV.encode()), 'entities.csv')},
+                           content_type='multipart/form-data')
+    assert response.status_code == 302
+    with client.session_transaction() as sess:
+        ids = sess['cfg:index']['ids']['coaches'][-2:]
+        assert [sess[f'cfg:coaches:{i}']['name'] for i in ids] == ['Ana', 'Ben']
@@ -0,0 +1,24 @@
+from src.utils.instance_generator import generate_instance
+
+def test_generate_instance_sizes():
+    scheduler = generate_instance(num_coaches=30, num_slots=60, num_class_definitions=12, seed=1)
+    assert len(scheduler.coaches) == 30
+    assert len(scheduler.time_slots) == 60
+    assert len(scheduler.class_definitions) == 12
+    assert all(c.available_days and c.preferred_times for c in scheduler.coaches)
+    assert all(ts.start_time < ts.end_time for ts in scheduler.time_slots)
+
+def test_generate_instance_is_reproducible():
+    a = generate_instance(num_coaches=20, num_slots=40, seed=7)
+    b = generate_instance(num_coaches=20, num_slots=40, seed=7)
+    c = generate_instance(num_coaches=20, num_slots=40, seed=8)
+    assert a.to_dict() == b.to_dict()
+    assert a.to_dict() != c.to_dict()
+
+def test_generated_instance_schedules_within_coach_limits():
+    scheduler = generate_instance(num_coaches=15, num_slots=30, num_class_definitions=8,
+                                  availability_density=0.9, seed=3)
+    schedule, _ = scheduler.generate_schedule()
+    assert schedule
+    for coach in scheduler.coaches:
+        assert sum(1 for sc in schedule if sc.coach is coach) <= coach.max_weekly_classes
@@ -0,0 +1,143 @@
+import io
+import json
+import time as clock
+from collections import Counter
+from datetime import time
+
+from src.models.data_classes import ClassDefinition, Coach, TimeSlot
+from src.models.enums import ClassType
+from src.models.locations import CoachTimeline, allocate, solve_network, travel_minutes
+from src.models.scheduler import BJJScheduler
+from src.utils.feeds import schedule_from_dicts, schedule_to_dicts
+from src.utils.importer import import_entities
+from src.utils.instance_generator import generate_network
+
+DOWNTOWN = TimeSlot("monday", time(18), time(19), location="Downtown")
+UPTOWN = TimeSlot("monday", time(19, 15), time(20, 15), location="Uptown")
+
+def _network(travel: int):
+    scheduler = BJJScheduler()
+    scheduler.from_dict({"coaches": [], "time_slots": [], "class_definitions": []})
+    scheduler.add_coach(Coach("Ana", 5, ["evening"], ["monday"]))
+    scheduler.add_time_slot(DOWNTOWN)
+    scheduler.add_time_slot(UPTOWN)
+    scheduler.add_class_definition(ClassDefinition("Gi", ClassType.GI, 60, 2))
+    scheduler.set_travel_time("Downtown", "Uptown", travel)
+    return scheduler
+
+def _valid(scheduler, schedule) -> bool:
+    timeline = CoachTimeline(scheduler.travel_times)
+    load = Counter()
+    for sc in schedule:
+        if not timeline.fits(sc.coach.name, sc.time_slot):
+            return False
+        timeline.add(sc.coach.name, sc.time_slot)
+        load[sc.coach.name] += 1
+    return all(load[c.name] <= c.max_weekly_classes for c in scheduler.coaches)
+
+def test_timeline_keeps_travel_time_free():
+    travel = {("Downtown", "Uptown"): 30}
+    assert travel_minutes(travel, "Uptown", "Downtown") == 30 and travel_minutes(travel, "Uptown", "Uptown") == 0
+    timeline = CoachTimeline(travel)
+    timeline.add("Ana", DOWNTOWN)
+    assert timeline.fits("Ana", DOWNTOWN) and timeline.fits("Ben", UPTOWN)
+    assert not timeline.fits("Ana", UPTOWN)
+    assert timeline.fits("Ana", TimeSlot("monday", time(19), time(20), location="Downtown"))
+    timeline.remove("Ana", DOWNTOWN)
+    assert timeline.fits("Ana", UPTOWN)
+    assert allocate(10, [1, 1, 2]) == [3, 2, 5] and allocate(3, [0, 0]) == [3, 0]
+
+def test_generator_enforces_travel_between_locations():
+    schedule, conflicts = _network(30).generate_schedule()
+    assert len(schedule) == 1 and "Unassigned gi classes: 1" in conflicts
+    schedule, conflicts = _network(10).generate_schedule()
+    assert {sc.time_slot.location for sc in schedule} == {"Downtown", "Uptown"}
+    assert BJJScheduler().coach_timeline() is None
+
+def test_locations_round_trip_through_config_exports_and_imports():
+    scheduler = _network(30)
+    restored = BJJScheduler()
+    restored.from_dict(json.loads(json.dumps(scheduler.to_dict())))
+    assert restored.time_slots == [DOWNTOWN, UPTOWN] and restored.travel_minutes("Uptown", "Downtown") == 30
+    assert "location" not in BJJScheduler().to_dict()["time_slots"][0]
+
+    schedule, _ = _network(10).generate_schedule()
+    exported = schedule_to_dicts(schedule)
+    assert [entry["location"] for entry in exported] == ["Downtown", "Uptown"]
+    assert scheduler.resolve_slots(schedule_from_dicts(exported)) == [DOWNTOWN, UPTOWN]
+
+    rows = io.StringIO("kind,day,start_time,end_time,location\nslot,monday,18:00,19:00,Uptown\n")
+    result = import_entities(scheduler, rows)
+    assert result.created["slot"] == 1 and scheduler.time_slots[-1].location == "Uptown"
+
+def test_network_decomposes_by_location():
+    scheduler = generate_network(30, 150, 10, 8, seed=1)
+    started = clock.perf_counter()
+    result = solve_network(scheduler)
+    assert clock.perf_counter() - started < 10
+    assert len(result.locations) == 30 and _valid(scheduler, result.schedule)
+    assert sum(location.scheduled for location in result.locations) == len(result.schedule)
+    placed = Counter(sc.class_def.name for sc in result.schedule)
+    assert all(placed[cd.name] <= cd.weekly_count for cd in scheduler.class_definitions)
+
+    small = generate_network(4, 20, 6, 6, seed=2)
+    serial, parallel = solve_network(small), solve_network(small, jobs=2)
+    key = lambda r: [(sc.class_def.name, sc.time_slot, sc.coach.name) for sc in r.schedule]
+    assert key(serial) == key(parallel)
+
+def test_network_places_at_least_as_many_as_the_generator():
+    # Without moving unplaced quota between locations the first network placed 20 to the generator's 22
+    cases = [((3, 10, 6), seed) for seed in range(4)] + [((8, 40, 8), seed) for seed in range(2)]
+    for args, seed in cases:
+        scheduler = generate_network(*args, seed=seed)
+        result = solve_network(scheduler)
+        schedule, _ = scheduler.generate_schedule()
+        assert len(result.schedule) >= len(schedule) and _valid(scheduler, result.schedule)
+        assert all(location.scheduled <= location.required for location in result.locations)
+
+def test_manual_assignments_stay_at_their_location():
+    scheduler = generate_network(3, 12, 6, 4, seed=3)
+    slot = scheduler.time_slots[1]
+    manual = [{"class_def": scheduler.class_definitions[0], "time_slot": slot, "coach": scheduler.coaches[0]}]
+    result = solve_network(scheduler, manual)
+    fixed = [sc for sc in result.schedule if sc.is_fixed]
+    assert [(sc.time_slot, sc.coach.name) for sc in fixed] == [(slot, scheduler.coaches[0].name)]
+    assert _valid(scheduler, result.schedule)
+
+def test_cli_and_api_solve_by_location(tmp_path):
+    from src.app import app
+    from src.cli import main
+
+    scheduler = generate_network(3, 12, 6, 4, seed=4)
+    config = tmp_path / "network.json"
+    scheduler.save_to_json(str(config))
+    summary = tmp_path / "summary.json"
+    assert main([str(config), "--by-location", "--summary", str(summary)]) == 0
+    result = json.loads(summary.read_text())["results"][0]
+    assert [location["location"] for location in result["locations"]] == ["Gym 1", "Gym 2", "Gym 3"]
+
+    client = app.test_client()
+    workspace = client.post("/api/v1/workspaces", json={"config": scheduler.to_dict()}).get_json()["id"]
+    data = client.post(f"/api/v1/workspaces/{workspace}/generate", json={"by_location": True}).get_json()
+    assert data["scheduled"] == result["scheduled"] and len(data["locations"]) == 3
+
+def test_slot_edits_keep_their_location():
+    from src.app import app
+
+    client = app.test_client()
+    client.get("/")
+    slots = lambda: json.loads(client.get("/settings/download").data)["time_slots"]
+    form = {"slot_day": "monday", "slot_start_hour": "6", "slot_start_minute": "0", "slot_end_hour": "7",
+            "slot_end_minute": "0", "slot_primary_preference": "none", "slot_secondary_preference": "none"}
+    client.post("/", data=dict(form, add_slot="1", slot_location="Uptown"))
+    index = len(slots()) - 1
+    assert slots()[index]["location"] == "Uptown"
+    client.post("/", data=dict(form, edit_slot="1", slot_edit_idx=str(index), slot_start_hour="5"))
+    assert slots()[index]["location"] == "Uptown" and slots()[index]["start_time"] == "05:00"
+
+    form = {"day": "tuesday", "start_hour": "6", "start_minute": "0", "end_hour": "7", "end_minute": "0"}
+    client.post(f"/time-slots/edit/{index}", data=dict(form, location="Downtown"))
+    client.post(f"/time-slots/edit/{index}", data=dict(form, end_hour="8"))
+    assert slots()[index]["location"] == "Downtown" and slots()[index]["end_time"] == "08:00"
+    client.post(f"/time-slots/edit/{index}", data=dict(form, location=" "))
+    assert "location" not in slots()[index]
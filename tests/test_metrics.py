@@ -0,0 +1,47 @@
+import threading
+from src.utils.metrics import MetricsRegistry
+
+def test_counter_and_histogram_render_prometheus_text():
+    registry = MetricsRegistry()
+    requests = registry.counter("test_requests_total", "Requests", ["route"])
+    latency = registry.histogram("test_latency_seconds", "Latency", ["route"], buckets=(0.1, 1.0))
+    requests.inc(route="/")
+    requests.inc(2, route="/")
+    latency.observe(0.05, route="/")
+    latency.observe(0.5, route="/")
+    latency.observe(5, route="/")
+    text = registry.render()
+    assert '# TYPE test_requests_total counter' in text
+    assert 'test_requests_total{route="/"} 3' in text
+    assert 'test_latency_seconds_bucket{route="/",le="0.1"} 1' in text
+    assert 'test_latency_seconds_bucket{route="/",le="1.0"} 2' in text
+    assert 'test_latency_seconds_bucket{route="/",le="+Inf"} 3' in text
+    assert 'test_latency_seconds_count{route="/"} 3' in text
+
+def test_counter_merges_thread_shards():
+    registry = MetricsRegistry()
+    counter = registry.counter("test_hits_total", "Hits")
+    def work():
+        for _ in range(1000):
+            counter.inc()
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert counter.values()[()] == 8000
+
+def test_finished_threads_fold_into_retired_totals():
+    registry = MetricsRegistry()
+    counter = registry.counter("test_requests_total", "Requests")
+    latency = registry.histogram("test_latency_seconds", "Latency", buckets=(1.0,))
+    def request():
+        counter.inc()
+        latency.observe(0.5)
+    for _ in range(200):
+        thread = threading.Thread(target=request)
+        thread.start()
+        thread.join()
+    assert len(counter._shards) == 0 and len(latency._shards) == 0
+    counter.inc()
+    assert counter.values()[()] == 201 and latency.values()[()][2] == 200
@@ -0,0 +1,83 @@
+import json
+import time
+
+import numpy as np
+
+from src.models.pareto import OBJECTIVES, ParetoProblem, crowding_distance, explore_pareto, non_dominated_fronts
+from src.models.scheduler import BJJScheduler
+from src.utils.instance_generator import generate_instance
+
+def test_fronts_rank_violation_before_objectives():
+    objectives = np.array([[1.0, 2.0], [2.0, 1.0], [2.0, 2.0], [0.0, 0.0]])
+    violation = np.array([0.0, 0.0, 0.0, 5.0])
+    assert [list(front) for front in non_dominated_fronts(objectives, violation)] == [[0, 1], [2], [3]]
+    distance = crowding_distance(np.array([[0.0, 3.0], [1.0, 1.0], [3.0, 0.0]]))
+    assert np.isinf(distance[[0, 2]]).all() and distance[1] == 2.0
+
+def test_front_is_valid_and_non_dominated():
+    scheduler = generate_instance(20, 40, 10, seed=0)
+    front = explore_pareto(scheduler, population=20, generations=15, seed=3, size=6)
+    problem = ParetoProblem(scheduler)
+    assert 1 <= len(front.solutions) <= 6
+    values = np.array([[s.objectives[name] for name in OBJECTIVES] for s in front.solutions])
+    assert len(non_dominated_fronts(values, np.zeros(len(values)))) == 1
+    assert len({s.violation for s in front.solutions}) == 1
+    for solution in front.solutions:
+        assert problem.valid(problem.encode(solution.schedule))
+    # Never worse on placements than the greedy schedule it was seeded from
+    greedy, _ = scheduler.generate_schedule()
+    assert all(len(s.schedule) >= len(greedy) for s in front.solutions)
+    scores = [s.score for s in front.solutions]
+    assert scores == sorted(scores)
+    again = explore_pareto(scheduler, population=20, generations=15, seed=3, size=6)
+    assert [s.objectives for s in again.solutions] == [s.objectives for s in front.solutions]
+
+def test_manual_assignments_are_kept_and_islands_merge():
+    scheduler = generate_instance(12, 24, 6, seed=1)
+    manual = [{"class_def": scheduler.class_definitions[0], "time_slot": scheduler.time_slots[0],
+               "coach": scheduler.coaches[0]}]
+    front = explore_pareto(scheduler, manual, population=10, generations=5, jobs=2, seed=1)
+    for solution in front.solutions:
+        fixed = [sc for sc in solution.schedule if sc.is_fixed]
+        assert [(sc.class_def.name, sc.time_slot, sc.coach.name) for sc in fixed] == [
+            (scheduler.class_definitions[0].name, scheduler.time_slots[0], scheduler.coaches[0].name)]
+        assert all(sc.time_slot != scheduler.time_slots[0] for sc in solution.schedule if not sc.is_fixed)
+
+def test_cli_api_and_web(tmp_path):
+    from src.app import app
+    from src.cli import main
+
+    config = tmp_path / "gym.json"
+    generate_instance(8, 16, 5, seed=2).save_to_json(str(config))
+    summary = tmp_path / "summary.json"
+    assert main([str(config), "--pareto", "3", "--generations", "5", "--seed", "1", "--formats", "json",
+                 "--output-dir", str(tmp_path / "out"), "--summary", str(summary)]) == 0
+    pareto = json.loads(summary.read_text())["results"][0]["pareto"]
+    assert 1 <= len(pareto["solutions"]) <= 3
+    saved = json.loads((tmp_path / "out" / "gym.pareto.json").read_text())
+    assert len(saved) == len(pareto["solutions"]) and saved[0]["schedule"]
+
+    client = app.test_client()
+    workspace = client.post("/api/v1/workspaces", json={"config": BJJScheduler().to_dict()}).get_json()["id"]
+    assert client.post(f"/api/v1/workspaces/{workspace}/pareto/0").status_code == 404
+    assert client.post(f"/api/v1/workspaces/{workspace}/pareto", json={"population": 1}).status_code == 400
+    data = client.post(f"/api/v1/workspaces/{workspace}/pareto", json={"generations": 3, "seed": 1}).get_json()
+    chosen = client.post(f"/api/v1/workspaces/{workspace}/pareto/0").get_json()
+    assert chosen["version"] == data["solutions"][0]["version"]
+    assert client.get(f"/api/v1/workspaces/{workspace}/schedule").get_json()["version"] == chosen["version"]
+
+    assert client.post("/schedule/pareto/0").status_code == 404
+    page = client.post("/", data={"explore_tradeoffs": "1"})
+    assert b"Exploring trade-offs in the background" in page.data
+    for _ in range(300):
+        fragment = client.get("/fragments/pareto").data
+        if b"Trade-offs" in fragment:
+            break
+        time.sleep(0.05)
+    assert b"Trade-offs" in fragment
+    assert client.post("/schedule/pareto/0").status_code == 302
+    assert client.post("/", data={"explore_tradeoffs": "1"}).status_code == 200
+    # A config edit drops the pending exploration and any explored front
+    client.post("/coaches/delete/0")
+    assert b"Trade-offs" not in client.get("/fragments/pareto").data
+    assert client.get("/schedule/substitutes/0").status_code == 200
@@ -0,0 +1,22 @@
+from src.gui.widgets.prefix_index import PrefixIndex
+
+def test_prefix_search_matches_any_word():
+    index = PrefixIndex()
+    index.add("1", "Alice Smith Monday, Tuesday")
+    index.add("2", "Bob Jones Friday")
+    index.add("3", "Alicia Keys Monday")
+    assert index.search("ali") == {"1", "3"}
+    assert index.search("mon ali") == {"1", "3"}
+    assert index.search("fri") == {"2"}
+    assert index.search("") is None
+
+def test_prefix_index_incremental_updates():
+    index = PrefixIndex()
+    for i in range(1000):
+        index.add(str(i), f"Coach {i} evening")
+    index.remove("500")
+    index.update("501", "Renamed morning")
+    assert "500" not in index
+    assert index.search("coach 50") == {"50"} | {str(i) for i in range(502, 510)}
+    assert index.search("morn") == {"501"}
+    assert len(index) == 999
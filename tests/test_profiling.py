@@ -0,0 +1,22 @@
+from src.models.scheduler import BJJScheduler
+from src.models.profiling import ScheduleProfiler
+
+PHASES = ["manual_placement", "slot_preparation", "class_expansion", "preference_passes",
+          "fill", "unfilled_report", "unassigned_report", "slot_positions"]
+
+def test_profile_records_every_phase():
+    scheduler = BJJScheduler()
+    schedule, conflicts, profile = scheduler.generate_schedule_with_profile()
+    assert [p.name for p in profile.phases] == PHASES
+    assert sum(p.placements for p in profile.phases) == len(schedule)
+    assert profile.get_phase("preference_passes").eligibility_checks > 0
+    assert profile.total_seconds >= 0
+    assert profile.to_dict()["phases"][0]["name"] == "manual_placement"
+
+def test_profiler_callback_and_unprofiled_result_match():
+    seen = []
+    scheduler = BJJScheduler()
+    profiled, _ = scheduler.generate_schedule(profiler=ScheduleProfiler(on_phase=lambda p: seen.append(p.name)))
+    plain, _ = scheduler.generate_schedule()
+    assert seen == PHASES
+    assert [(sc.class_def, sc.time_slot) for sc in profiled] == [(sc.class_def, sc.time_slot) for sc in plain]
@@ -0,0 +1,95 @@
+import json
+import time as clock
+from datetime import time
+
+import pytest
+
+from src.models.data_classes import ClassDefinition, Coach, ScheduledClass, TimeSlot
+from src.models.enums import ClassType
+from src.models.robustness import simulate_robustness
+from src.models.scheduler import BJJScheduler
+from src.utils.instance_generator import generate_instance
+
+DAYS = ["monday", "tuesday"]
+GI = ClassDefinition("Gi", ClassType.GI, 60, 2)
+
+def _gym():
+    scheduler = BJJScheduler()
+    scheduler.from_dict({"coaches": [], "time_slots": [], "class_definitions": []})
+    # Ana teaches both classes; Ben can cover one of them, Cleo never teaches gi
+    scheduler.add_coach(Coach("Ana", 2, ["evening"], DAYS))
+    scheduler.add_coach(Coach("Ben", 1, ["evening"], DAYS))
+    scheduler.add_coach(Coach("Cleo", 5, ["evening"], DAYS, can_teach_gi=False))
+    for day in DAYS:
+        scheduler.add_time_slot(TimeSlot(day, time(18), time(19)))
+    scheduler.add_class_definition(GI)
+    ana = scheduler.coaches[0]
+    return scheduler, [ScheduledClass(GI, slot, ana) for slot in scheduler.time_slots]
+
+def test_expected_uncovered_matches_analytic_value():
+    scheduler, schedule = _gym()
+    report = simulate_robustness(scheduler, schedule, {"Ana": 0.5, "Ben": 0.5}, samples=200000, seed=3)
+    # Ana away: one class uncovered if Ben is in, both if Ben is also away
+    assert report.expected_no_shows == pytest.approx(1.0, abs=0.01)
+    assert report.expected_uncovered == pytest.approx(0.75, abs=0.01)
+    low, high = report.uncovered_interval
+    assert low < report.expected_uncovered < high and high - low < 0.01
+    assert report.any_uncovered == pytest.approx(0.5, abs=0.01)
+    assert report.classes[0].coach == "Ana"
+
+def test_certain_outcomes_and_validation():
+    scheduler, schedule = _gym()
+    report = simulate_robustness(scheduler, schedule, {"Ana": 1.0}, default_probability=0.0, samples=10)
+    assert (report.expected_uncovered, report.uncovered_std) == (1.0, 0.0)
+    assert sorted(risk.uncovered_rate for risk in report.classes) == [0.0, 1.0]
+    with pytest.raises(ValueError):
+        simulate_robustness(scheduler, schedule, {"Nobody": 0.1})
+    with pytest.raises(ValueError):
+        simulate_robustness(scheduler, schedule, default_probability=1.5)
+
+def test_substitute_is_not_booked_twice_at_once():
+    scheduler = BJJScheduler()
+    scheduler.from_dict({"coaches": [], "time_slots": [], "class_definitions": []})
+    early, late = TimeSlot("monday", time(18), time(19)), TimeSlot("monday", time(18, 30), time(19, 30))
+    for name in ("Ana", "Ben", "Sub"):
+        scheduler.add_coach(Coach(name, 5, ["evening"], ["monday"]))
+    scheduler.add_time_slot(early)
+    scheduler.add_time_slot(late)
+    scheduler.add_class_definition(GI)
+    ana, ben = scheduler.coaches[:2]
+    schedule = [ScheduledClass(GI, early, ana), ScheduledClass(GI, late, ben)]
+    report = simulate_robustness(scheduler, schedule, {"Ana": 1.0, "Ben": 1.0}, default_probability=0.0,
+                                 samples=5)
+    assert report.expected_uncovered == 1.0
+
+def test_hundred_thousand_scenarios_in_seconds():
+    scheduler = generate_instance(50, 100, 20, seed=0)
+    schedule, _ = scheduler.generate_schedule()
+    started = clock.perf_counter()
+    report = simulate_robustness(scheduler, schedule, samples=100000, seed=1)
+    assert clock.perf_counter() - started < 5
+    assert report.samples == 100000 and report.expected_uncovered <= report.expected_no_shows
+
+def test_cli_and_api_reports(tmp_path):
+    from src.app import app
+    from src.cli import main
+
+    scheduler, _ = _gym()
+    config = tmp_path / "gym.json"
+    scheduler.save_to_json(str(config))
+    summary = tmp_path / "summary.json"
+    assert main([str(config), "--robustness", "1000", "--absence-probability", "0",
+                 "--absence-probability", "Ana=1", "--seed", "1", "--summary", str(summary)]) == 0
+    robustness = json.loads(summary.read_text())["results"][0]["robustness"]
+    assert (robustness["samples"], robustness["expected_no_shows"]) == (1000, 2.0)
+
+    client = app.test_client()
+    workspace = client.post("/api/v1/workspaces", json={"config": scheduler.to_dict()}).get_json()["id"]
+    url = f"/api/v1/workspaces/{workspace}/robustness"
+    assert client.post(url, json={}).status_code == 404
+    client.post(f"/api/v1/workspaces/{workspace}/generate", json={"seed": 1})
+    data = client.post(url, json={"samples": 500, "probabilities": {"Ana": 1}, "default_probability": 0,
+                                  "limit": 1}).get_json()
+    assert data["samples"] == 500 and len(data["classes"]) == 1
+    assert client.post(url, json={"samples": 0}).status_code == 400
+    assert client.post(url, json={"probabilities": {"Nobody": 0.1}}).status_code == 400
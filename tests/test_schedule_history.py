@@ -0,0 +1,85 @@
+from src.utils.feeds import schedule_version
+from src.utils.schedule_history import ScheduleHistory
+
+def _entry(name, day="monday", start="18:00", coach="Ana"):
+    return {"class_name": name, "class_type": "gi", "duration": 60, "day": day, "start_time": start,
+            "end_time": "19:00", "coach": coach, "is_fixed": False}
+
+BASE = [_entry(f"Class {i}", start=f"{10 + i}:00") for i in range(6)]
+
+def test_versions_share_records(tmp_path):
+    history = ScheduleHistory(str(tmp_path / "h.db"))
+    first = history.record("gym", BASE, "generate")
+    changed = BASE[:5] + [_entry("Class 5", coach="Ben")]
+    second = history.record("gym", changed, "generate")
+    assert history.record("gym", changed).id == second.id
+    history.record("other", BASE)
+    assert first.version == schedule_version(BASE)
+    assert history.stats() == {"entries": 3, "versions": 2, "records": 7}
+    assert [e.version for e in history.entries("gym")] == [second.version, first.version]
+    assert history.get("gym", first.version) == BASE
+
+def test_diff_reports_changed_records(tmp_path):
+    history = ScheduleHistory(str(tmp_path / "h.db"))
+    old = history.record("gym", BASE).version
+    new = history.record("gym", BASE[1:] + [_entry("Kids", day="friday")]).version
+    diff = history.diff("gym", old, new)
+    assert diff.removed == [BASE[0]] and [r["class_name"] for r in diff.added] == ["Kids"]
+
+def test_versions_are_private_to_owner(tmp_path):
+    history = ScheduleHistory(str(tmp_path / "h.db"))
+    version = history.record("gym", BASE).version
+    assert history.get("intruder", version) is None
+    assert history.diff("intruder", version, version) is None
+
+def test_entries_page_backwards(tmp_path):
+    history = ScheduleHistory(str(tmp_path / "h.db"))
+    for i in range(5):
+        history.record("gym", BASE[:i + 1])
+    page = history.entries("gym", limit=2)
+    older = history.entries("gym", limit=2, before=page[-1].id)
+    assert [e.size for e in page + older] == [5, 4, 3, 2]
+
+def test_concurrent_records_of_one_schedule_append_it_once(tmp_path):
+    import threading
+    import time
+
+    def slow_clock():
+        # Widen the window between checking the latest entry and appending
+        time.sleep(0.02)
+        return time.time()
+
+    histories = [ScheduleHistory(str(tmp_path / "h.db"), clock=slow_clock) for _ in range(2)]
+    barrier = threading.Barrier(8)
+    entries, errors = [], []
+
+    def publish(history):
+        barrier.wait()
+        try:
+            entries.append(history.record("gym", BASE, "generate"))
+        except Exception as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=publish, args=(histories[i % 2],)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors and len({e.id for e in entries}) == 1
+    assert histories[0].stats() == {"entries": 1, "versions": 1, "records": 6}
+
+def test_web_history_and_restore():
+    from src.app import app
+    client = app.test_client()
+    client.post("/", data={"generate_schedule": "1"})
+    entries = client.get("/schedule/history").get_json()["entries"]
+    assert entries and entries[0]["label"] == "generate"
+    version = entries[0]["version"]
+    schedule = client.get(f"/schedule/history/{version}").get_json()["schedule"]
+    with client.session_transaction() as sess:
+        assert sess["last_schedule"] == schedule
+        sess["last_schedule"] = []
+    assert client.post(f"/schedule/history/{version}/restore").status_code == 302
+    with client.session_transaction() as sess:
+        assert sess["last_schedule"] == schedule
+    assert client.get("/schedule/history/unknown").status_code == 404
@@ -0,0 +1,51 @@
+import random
+from datetime import time
+
+import numpy as np
+
+from src.models.data_classes import ClassDefinition, Coach, ScheduledClass, TimeSlot
+from src.models.enums import ClassType
+from src.models.scoring import ScoreWeights, ScoringModel
+from src.models.solvers import solve
+from src.models.scheduler import BJJScheduler
+
+GI = ClassDefinition("Gi", ClassType.GI, 60, 2)
+NOGI = ClassDefinition("No-Gi", ClassType.NO_GI, 60, 1)
+MON = TimeSlot("monday", time(18), time(20), primary_preference="gi")
+TUE = TimeSlot("tuesday", time(7), time(8), primary_preference="no-gi", secondary_preference="gi")
+ANA = Coach("Ana", 1, ["evening"], ["monday"], can_teach_nogi=False)
+BEN = Coach("Ben", 3, ["morning"], ["tuesday"])
+
+def _model(**weights):
+    return ScoringModel([ANA, BEN], [MON, TUE], [GI, NOGI], ScoreWeights(**weights))
+
+def test_breakdown_counts_each_objective():
+    schedule = [ScheduledClass(GI, MON, ANA), ScheduledClass(GI, MON, ANA),
+                ScheduledClass(GI, TUE, BEN), ScheduledClass(GI, TUE, BEN)]
+    components = _model().breakdown(schedule).components
+    assert components["unplaced"] == 1          # the no-gi class
+    assert components["coach_overload"] == 1    # Ana teaches 2 with a max of 1
+    assert components["slot_overfill"] == 60    # Tuesday is one hour long
+    assert components["idle_minutes"] == 0
+    assert components["preference_mismatch"] == 1.0  # two secondary-preference matches
+    assert components["ineligible"] == 0
+
+def test_ineligible_and_weights():
+    schedule = [ScheduledClass(NOGI, MON, ANA)]
+    model = _model(unplaced=0, idle_minutes=0, preference_mismatch=0, load_imbalance=0, type_imbalance=0)
+    breakdown = model.breakdown(schedule)
+    assert breakdown.components["ineligible"] == 1
+    assert breakdown.total == 20.0
+
+def test_batch_matches_single_scores():
+    scheduler = BJJScheduler()
+    model = ScoringModel.from_scheduler(scheduler)
+    schedules = [scheduler.generate_schedule(rng=random.Random(seed))[0] for seed in range(20)]
+    schedules.append([])
+    batch = model.score_many(schedules)
+    assert np.allclose(batch, [model.score(s) for s in schedules])
+    assert batch[-1] > batch[0]
+
+def test_solve_reports_score():
+    result = solve(BJJScheduler(), seed=1, max_iterations=3)
+    assert result.score is not None and result.score >= 0
@@ -0,0 +1,53 @@
+from src.utils.session_store import SessionStore
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+    def __call__(self):
+        return self.now
+
+def test_identical_values_are_stored_once(tmp_path):
+    store = SessionStore(str(tmp_path / "s.db"), compact_every=0)
+    config = b'{"coaches": []}' * 100
+    for i in range(50):
+        store.save(f"sid{i}", {"scheduler_data": config, "n": str(i).encode()})
+    assert store.session_count() == 50
+    assert store.total_bytes() < 2 * len(config)
+    assert store.load("sid7") == {"scheduler_data": config, "n": b"7"}
+
+def test_ttl_expiry_and_compaction(tmp_path):
+    clock = FakeClock()
+    store = SessionStore(str(tmp_path / "s.db"), ttl_seconds=60, compact_every=0, clock=clock)
+    store.save("a", {"k": b"old"})
+    store.save("a", {"k": b"new"})
+    clock.now += 30
+    store.save("b", {"k": b"other"})
+    clock.now += 40
+    assert store.load("a") is None
+    assert store.load("b") == {"k": b"other"}
+    store.compact()
+    assert store.session_count() == 1
+    assert store.total_bytes() == len(b"other")
+
+def test_size_cap_evicts_least_recently_used(tmp_path):
+    clock = FakeClock()
+    store = SessionStore(str(tmp_path / "s.db"), max_bytes=5000, compact_every=0, clock=clock)
+    for i in range(10):
+        clock.now += 1
+        store.save(f"sid{i}", {"data": bytes([i]) * 1000})
+    clock.now += 1
+    store.load("sid0")  # touch the oldest session so it survives
+    stats = store.compact()
+    assert stats["evicted"] > 0
+    assert store.total_bytes() <= 5000
+    assert store.load("sid0") is not None
+    assert store.load("sid1") is None
+
+def test_app_session_round_trip():
+    from src.app import app
+    client = app.test_client()
+    response = client.post('/', data={'generate_schedule': '1'})
+    assert response.status_code == 200
+    csv_response = client.get('/schedule/export/csv')
+    assert csv_response.status_code == 200
+    assert b'Class Name' in csv_response.data
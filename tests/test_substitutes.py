@@ -0,0 +1,101 @@
+import time as clock
+from datetime import time
+
+from src.models.data_classes import ClassDefinition, Coach, ScheduledClass, TimeSlot
+from src.models.enums import ClassType
+from src.models.scheduler import BJJScheduler
+from src.models.substitutes import BusyIntervals
+from src.utils.feeds import schedule_from_dicts, schedule_to_dicts
+from src.utils.instance_generator import generate_instance
+
+EVENING = TimeSlot("monday", time(18), time(20))
+GI = ClassDefinition("Gi", ClassType.GI, 60, 1)
+NOGI = ClassDefinition("No-Gi", ClassType.NO_GI, 60, 1)
+
+def _gym():
+    scheduler = BJJScheduler()
+    scheduler.from_dict({"coaches": [], "time_slots": [], "class_definitions": []})
+    for coach in (Coach("Ana", 5, ["evening"], ["monday"]),
+                  Coach("Ben", 2, ["evening"], ["monday"]),
+                  Coach("Cleo", 5, ["evening"], ["monday"]),
+                  Coach("Dan", 5, ["evening"], ["monday"], can_teach_gi=False),
+                  Coach("Eve", 5, ["morning"], ["monday"])):
+        scheduler.add_coach(coach)
+    scheduler.add_time_slot(EVENING)
+    scheduler.add_class_definition(GI)
+    scheduler.add_class_definition(NOGI)
+    ana, ben, cleo = scheduler.coaches[:3]
+    # Gi 18:00-19:00 by Ana, No-Gi 19:00-20:00 by Cleo
+    schedule = [ScheduledClass(GI, EVENING, ana, slot_position=0), ScheduledClass(NOGI, EVENING, cleo, slot_position=1),
+                ScheduledClass(NOGI, TimeSlot("monday", time(18), time(19)), ben)]
+    return scheduler, schedule
+
+def test_ranks_by_conflicts_then_headroom():
+    scheduler, schedule = _gym()
+    substitutes = scheduler.find_substitutes(schedule, 0)
+    # Dan does not teach gi and Eve only mornings; Ben teaches at 18:00
+    assert [(s.coach.name, s.headroom, s.conflict) for s in substitutes] == [("Cleo", 4, False), ("Ben", 1, True)]
+
+def test_back_to_back_classes_do_not_conflict():
+    scheduler, schedule = _gym()
+    names = [s.coach.name for s in scheduler.find_substitutes(schedule, 1, limit=2)]
+    assert names == ["Dan", "Ana"]
+
+def test_busy_intervals():
+    busy = BusyIntervals([(600, 660), (540, 720), (800, 860)])
+    assert busy.overlaps(700, 710) and busy.overlaps(850, 900)
+    assert not busy.overlaps(720, 800) and not busy.overlaps(400, 540)
+
+def test_exported_schedule_resolves_to_same_answers():
+    scheduler = BJJScheduler()
+    scheduler.add_coach(Coach("Second Coach", 10, ["morning", "afternoon", "evening"], ["monday", "tuesday",
+                        "wednesday", "thursday", "friday", "saturday", "sunday"]))
+    schedule, _ = scheduler.generate_schedule()
+    exported = schedule_to_dicts(schedule)
+    rebuilt = scheduler.substitute_index(schedule_from_dicts(exported))
+    direct = scheduler.substitute_index(schedule)
+    for i, entry in enumerate(exported):
+        original = next(j for j, sc in enumerate(schedule) if sc.class_def.name == entry["class_name"]
+                        and sc.time_slot.day == entry["day"] and direct.intervals[j][1] == rebuilt.intervals[i][1])
+        assert [s.to_dict() for s in rebuilt.find(i)] == [s.to_dict() for s in direct.find(original)]
+
+def test_lookup_under_a_millisecond():
+    scheduler = generate_instance(50, 100, 20, seed=0)
+    schedule, _ = scheduler.generate_schedule()
+    index = scheduler.substitute_index(schedule)
+    index.find(0)
+    started = clock.perf_counter()
+    for entry in range(len(schedule)):
+        index.find(entry)
+    assert (clock.perf_counter() - started) / len(schedule) < 0.001
+
+def test_web_route():
+    from src.app import app
+    client = app.test_client()
+    assert client.get("/schedule/substitutes/0").status_code == 404
+    client.post("/", data={"generate_schedule": "1"})
+    data = client.get("/schedule/substitutes/0").get_json()
+    assert data["entry"]["coach"] == "Default Coach" and data["substitutes"] == []
+    assert data["elapsed_ms"] >= 0
+
+def test_indexes_are_reused_until_the_config_or_schedule_changes():
+    from src import app as web
+    client = web.app.test_client()
+    client.post("/", data={"generate_schedule": "1"})
+    client.get("/schedule/substitutes/0")
+    cached = list(web.substitute_indexes.items())[-1]
+    client.get("/schedule/substitutes/0")
+    assert list(web.substitute_indexes.items())[-1] == cached
+
+    client.post("/", data={"add_coach": "1", "coach_name": "Cover", "coach_max_weekly_classes": "3",
+                           "coach_preferred_times": "evening", "coach_available_days": "monday",
+                           "coach_can_teach_gi": "1"})
+    assert cached[0] not in web.substitute_indexes
+    names = [s["coach"] for s in client.get("/schedule/substitutes/0").get_json()["substitutes"]]
+    assert "Cover" in names
+
+    scheduler = generate_instance(20, 40, 8, seed=3)
+    schedule, _ = scheduler.generate_schedule()
+    assert scheduler.substitute_index(schedule) is scheduler.substitute_index(list(schedule))
+    scheduler.update_coach(0, scheduler.coaches[0])
+    assert scheduler.substitute_index(schedule) is not scheduler.substitute_index(schedule[1:])
@@ -0,0 +1,102 @@
+import json
+from collections import Counter
+from datetime import time
+
+from src.models.data_classes import Coach, ScheduledClass, TimeSlot
+from src.models.profiling import ScheduleProfiler
+from src.models.scheduler import BJJScheduler
+from src.models.scoring import ScoringModel
+from src.models.solvers import solve
+from src.utils.feeds import schedule_from_dicts, schedule_to_dicts
+from src.utils.instance_generator import generate_instance
+
+def _placements(schedule):
+    return Counter((sc.class_def.name, sc.time_slot, sc.coach.name) for sc in schedule)
+
+def test_unchanged_config_keeps_every_placement_without_searching():
+    scheduler = generate_instance(25, 50, 12, seed=0)
+    previous, conflicts = scheduler.generate_schedule()
+    profiler = ScheduleProfiler()
+    schedule, again = scheduler.generate_schedule(profiler=profiler, warm_start=previous)
+    assert _placements(schedule) == _placements(previous) and again == conflicts
+    phases = {p.name: p for p in profiler.profile.phases}
+    assert phases["warm_start"].placements == len(previous)
+    assert phases["preference_passes"].placements == 0
+
+def test_small_edit_moves_few_classes():
+    scheduler = generate_instance(100, 200, 40, seed=3)
+    previous, _ = scheduler.generate_schedule()
+    # A new coach reorders the cold greedy run but leaves old placements valid
+    scheduler.add_coach(Coach("New Coach", 5, ["morning", "afternoon", "evening"], ["monday", "tuesday"]))
+    cold, _ = scheduler.generate_schedule()
+    warm, _ = scheduler.generate_schedule(warm_start=previous)
+    model = ScoringModel.from_scheduler(scheduler)
+    model.set_reference(previous)
+    assert len(warm) >= len(cold)
+    assert model.breakdown(warm).components["moved"] <= model.breakdown(cold).components["moved"]
+
+def test_invalid_previous_placements_are_replaced():
+    scheduler = BJJScheduler()
+    previous, _ = scheduler.generate_schedule()
+    coach = scheduler.coaches[0]
+    scheduler.update_coach(0, Coach(coach.name, coach.max_weekly_classes, coach.preferred_times, ["sunday"]))
+    schedule, _ = scheduler.generate_schedule(warm_start=previous)
+    assert all(sc.time_slot.day == "sunday" for sc in schedule)
+
+def test_resolve_schedule_from_exported_dicts():
+    scheduler = BJJScheduler()
+    previous, _ = scheduler.generate_schedule()
+    resolved = scheduler.resolve_schedule(schedule_from_dicts(schedule_to_dicts(previous)))
+    assert _placements(resolved) == _placements(previous)
+    stray = ScheduledClass(previous[0].class_def, TimeSlot("sunday", time(3), time(4)), previous[0].coach)
+    assert scheduler.resolve_schedule([stray]) == []
+
+def test_moved_component_counts_missing_reference_placements():
+    scheduler = BJJScheduler()
+    previous, _ = scheduler.generate_schedule()
+    model = ScoringModel.from_scheduler(scheduler)
+    model.set_reference(previous)
+    assert model.breakdown(previous).components["moved"] == 0
+    assert model.breakdown(previous[2:]).components["moved"] == 2
+    assert model.breakdown([]).components["moved"] == len(previous)
+
+def test_solve_with_stability_weight():
+    scheduler = generate_instance(25, 50, 12, seed=1)
+    previous = solve(scheduler).schedule
+    model = ScoringModel.from_scheduler(scheduler)
+    model.set_reference(previous)
+    moved = {}
+    for weight in (0, 1000):
+        result = solve(scheduler, seed=4, max_iterations=8, warm_start=previous, stability_weight=weight)
+        # Placements and conflicts still come first; stability only ranks equal runs
+        assert len(result.schedule) >= len(previous)
+        moved[weight] = model.breakdown(result.schedule).components["moved"]
+    assert moved[1000] <= moved[0]
+
+def test_cli_warm_start_from_output_directory(tmp_path):
+    from src.cli import main
+
+    config = tmp_path / "gym.json"
+    BJJScheduler().save_to_json(str(config))
+    out = tmp_path / "out"
+    assert main([str(config), "-o", str(out), "--formats", "json", "--summary", str(tmp_path / "a.json")]) == 0
+    first = json.loads((out / "gym.json").read_text())["schedule"]
+    assert main([str(config), "-o", str(out), "--formats", "json", "--warm-start", str(out),
+                 "--stability-weight", "10", "--summary", str(tmp_path / "b.json")]) == 0
+    assert json.loads((out / "gym.json").read_text())["schedule"] == first
+
+def test_web_and_api_warm_start():
+    from src.app import app
+    client = app.test_client()
+    client.post("/", data={"generate_schedule": "1"})
+    with client.session_transaction() as sess:
+        first = sess["last_schedule"]
+    client.post("/", data={"generate_schedule": "1", "keep_previous": "on"})
+    with client.session_transaction() as sess:
+        assert sess["last_schedule"] == first
+
+    workspace = client.post("/api/v1/workspaces", json={"config": BJJScheduler().to_dict()}).get_json()["id"]
+    generated = client.post(f"/api/v1/workspaces/{workspace}/generate", json={}).get_json()
+    again = client.post(f"/api/v1/workspaces/{workspace}/generate",
+                        json={"warm_start": True, "stability_weight": 3}).get_json()
+    assert again["version"] == generated["version"]